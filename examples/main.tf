@@ -39,6 +39,8 @@ module "batch_ecs" {
   batch_compute_environment_state = "ENABLED"
   batch_max_vcpus                 = 16
 
+  enable_batch_fargate_spot = false
+
   batch_job_queue_name     = "example-batch-job-queue"
   batch_job_queue_state    = "ENABLED"
   batch_job_queue_priority = 1
@@ -59,5 +61,6 @@ module "batch_ecs" {
   batch_service_role_name = "example-batch-service-role"
   security_group_ids      = ["sg-0123456789abcdef0"]
 
-  create_ecs_task_definition = true
+  create_ecs_task_definition            = true
+  enable_ecs_capacity_provider_strategy = false
 }
@@ -4,6 +4,10 @@ terraform {
       source  = "hashicorp/aws"
       version = "~> 4.0"
     }
+    null = {
+      source  = "hashicorp/null"
+      version = "~> 3.0"
+    }
   }
   required_version = ">= 1.0"
 }
@@ -22,14 +26,41 @@ resource "aws_ecs_cluster" "ecs-batch" {
   }
 }
 
+# Capacity providers of the cluster, with the default strategy for its services
+resource "aws_ecs_cluster_capacity_providers" "ecs-batch" {
+  count = var.enable_ecs_capacity_provider_strategy ? 1 : 0
+
+  cluster_name       = aws_ecs_cluster.ecs-batch.name
+  capacity_providers = ["FARGATE", "FARGATE_SPOT"]
+
+  dynamic "default_capacity_provider_strategy" {
+    for_each = var.ecs_capacity_provider_strategy
+    content {
+      capacity_provider = default_capacity_provider_strategy.value.capacity_provider
+      base              = default_capacity_provider_strategy.value.base
+      weight            = default_capacity_provider_strategy.value.weight
+    }
+  }
+}
+
 # ECS Service
 resource "aws_ecs_service" "ecs-batch" {
-  count           = var.create_ecs_task_definition ? 1 : 0
+  count           = var.create_ecs_task_definition && !var.enable_ecs_autoscaling ? 1 : 0
   name            = var.service_name
   cluster         = aws_ecs_cluster.ecs-batch.id
   task_definition = aws_ecs_task_definition.ecs-batch[0].arn
   desired_count   = var.desired_count
-  launch_type     = "FARGATE"
+  launch_type     = var.enable_ecs_capacity_provider_strategy ? null : "FARGATE"
+
+  # A capacity provider strategy replaces the launch type
+  dynamic "capacity_provider_strategy" {
+    for_each = var.enable_ecs_capacity_provider_strategy ? var.ecs_capacity_provider_strategy : []
+    content {
+      capacity_provider = capacity_provider_strategy.value.capacity_provider
+      base              = capacity_provider_strategy.value.base
+      weight            = capacity_provider_strategy.value.weight
+    }
+  }
 
   network_configuration {
     subnets          = var.private_subnet_ids
@@ -37,7 +68,111 @@ resource "aws_ecs_service" "ecs-batch" {
     security_groups  = var.security_group_ids
   }
 
-  depends_on = [aws_iam_role_policy_attachment.ecs_task_execution_role_policy]
+  depends_on = [
+    aws_iam_role_policy_attachment.ecs_task_execution_role_policy,
+    aws_ecs_cluster_capacity_providers.ecs-batch
+  ]
+}
+
+# ECS Service whose desired count is managed by Application Auto Scaling
+# (lifecycle cannot be conditional, so the autoscaled service is a separate resource)
+resource "aws_ecs_service" "ecs-batch-autoscaled" {
+  count           = var.create_ecs_task_definition && var.enable_ecs_autoscaling ? 1 : 0
+  name            = var.service_name
+  cluster         = aws_ecs_cluster.ecs-batch.id
+  task_definition = aws_ecs_task_definition.ecs-batch[0].arn
+  desired_count   = var.desired_count
+  launch_type     = var.enable_ecs_capacity_provider_strategy ? null : "FARGATE"
+
+  # A capacity provider strategy replaces the launch type
+  dynamic "capacity_provider_strategy" {
+    for_each = var.enable_ecs_capacity_provider_strategy ? var.ecs_capacity_provider_strategy : []
+    content {
+      capacity_provider = capacity_provider_strategy.value.capacity_provider
+      base              = capacity_provider_strategy.value.base
+      weight            = capacity_provider_strategy.value.weight
+    }
+  }
+
+  network_configuration {
+    subnets          = var.private_subnet_ids
+    assign_public_ip = false
+    security_groups  = var.security_group_ids
+  }
+
+  depends_on = [
+    aws_iam_role_policy_attachment.ecs_task_execution_role_policy,
+    aws_ecs_cluster_capacity_providers.ecs-batch
+  ]
+
+  # desired_count only sets the initial count, so applies don't undo the autoscaler's changes
+  lifecycle {
+    ignore_changes = [desired_count]
+  }
+}
+
+locals {
+  ecs_service_name = (
+    !var.create_ecs_task_definition ? null
+    : var.enable_ecs_autoscaling ? aws_ecs_service.ecs-batch-autoscaled[0].name
+    : aws_ecs_service.ecs-batch[0].name
+  )
+}
+
+# Application Auto Scaling of the ECS service's desired count
+locals {
+  ecs_autoscaling_metrics = {
+    cpu      = "ECSServiceAverageCPUUtilization"
+    memory   = "ECSServiceAverageMemoryUtilization"
+    requests = "ALBRequestCountPerTarget"
+  }
+
+  ecs_autoscaling_requests_without_label = (
+    var.create_ecs_task_definition && var.enable_ecs_autoscaling &&
+    lookup(var.ecs_autoscaling_target_values, "requests", null) != null &&
+    var.ecs_autoscaling_alb_resource_label == null
+  )
+}
+
+# Variable validations cannot read other variables and preconditions need Terraform 1.2, so a
+# requests policy without its ALB resource label fails the plan on this resource instead of the apply
+resource "null_resource" "ecs_autoscaling_alb_resource_label_required" {
+  count = local.ecs_autoscaling_requests_without_label ? 1 : 0
+
+  triggers = {
+    error = tobool("ecs_autoscaling_alb_resource_label is required when ecs_autoscaling_target_values has a requests entry")
+  }
+}
+
+resource "aws_appautoscaling_target" "ecs-batch" {
+  count              = var.create_ecs_task_definition && var.enable_ecs_autoscaling ? 1 : 0
+  service_namespace  = "ecs"
+  resource_id        = "service/${aws_ecs_cluster.ecs-batch.name}/${local.ecs_service_name}"
+  scalable_dimension = "ecs:service:DesiredCount"
+  min_capacity       = var.ecs_autoscaling_min_capacity
+  max_capacity       = var.ecs_autoscaling_max_capacity
+}
+
+# One target-tracking policy per entry of var.ecs_autoscaling_target_values
+resource "aws_appautoscaling_policy" "ecs-batch" {
+  for_each = var.create_ecs_task_definition && var.enable_ecs_autoscaling ? var.ecs_autoscaling_target_values : {}
+
+  name               = "${var.service_name}-${each.key}-target-tracking"
+  policy_type        = "TargetTrackingScaling"
+  service_namespace  = aws_appautoscaling_target.ecs-batch[0].service_namespace
+  resource_id        = aws_appautoscaling_target.ecs-batch[0].resource_id
+  scalable_dimension = aws_appautoscaling_target.ecs-batch[0].scalable_dimension
+
+  target_tracking_scaling_policy_configuration {
+    target_value       = each.value
+    scale_in_cooldown  = var.ecs_autoscaling_scale_in_cooldown
+    scale_out_cooldown = var.ecs_autoscaling_scale_out_cooldown
+
+    predefined_metric_specification {
+      predefined_metric_type = local.ecs_autoscaling_metrics[each.key]
+      resource_label         = each.key == "requests" ? var.ecs_autoscaling_alb_resource_label : null
+    }
+  }
 }
 
 # ------------------------------
@@ -144,6 +279,26 @@ resource "aws_batch_compute_environment" "batch_compute_env" {
   state        = var.batch_compute_environment_state
 }
 
+# Optional FARGATE_SPOT compute environment, queued behind the on-demand one
+resource "aws_batch_compute_environment" "batch_spot_compute_env" {
+  count = var.enable_batch_fargate_spot ? 1 : 0
+
+  compute_environment_name = coalesce(var.batch_spot_compute_environment_name, "${var.batch_compute_environment_name}-spot")
+
+  compute_resources {
+    type = "FARGATE_SPOT"
+
+    subnets            = var.private_subnet_ids
+    security_group_ids = var.security_group_ids
+
+    max_vcpus = coalesce(var.batch_spot_max_vcpus, var.batch_max_vcpus)
+  }
+
+  service_role = aws_iam_role.batch_service_role.arn
+  type         = "MANAGED"
+  state        = var.batch_compute_environment_state
+}
+
 # --------------------------------------------------
 # AWS Batch Job Queue
 # --------------------------------------------------
@@ -153,9 +308,35 @@ resource "aws_batch_job_queue" "batch_job_queue" {
   state    = var.batch_job_queue_state
   priority = var.batch_job_queue_priority
 
-  compute_environments = [
-    aws_batch_compute_environment.batch_compute_env.arn
-  ]
+  # On-demand capacity first, FARGATE_SPOT behind it
+  compute_environments = concat(
+    [aws_batch_compute_environment.batch_compute_env.arn],
+    aws_batch_compute_environment.batch_spot_compute_env[*].arn
+  )
+
+  scheduling_policy_arn = var.enable_batch_fair_share ? aws_batch_scheduling_policy.batch_scheduling_policy[0].arn : null
+}
+
+# Optional fair-share scheduling of the job queue, weighted by share identifier
+resource "aws_batch_scheduling_policy" "batch_scheduling_policy" {
+  count = var.enable_batch_fair_share ? 1 : 0
+
+  name = coalesce(var.batch_scheduling_policy_name, "${var.batch_job_queue_name}-fair-share")
+
+  fair_share_policy {
+    compute_reservation = var.batch_fair_share_compute_reservation
+    share_decay_seconds = var.batch_fair_share_decay_seconds
+
+    dynamic "share_distribution" {
+      for_each = var.batch_fair_share_weights
+      content {
+        share_identifier = share_distribution.key
+        weight_factor    = share_distribution.value
+      }
+    }
+  }
+
+  tags = var.batch_job_tags
 }
 
 # --------------------------------------------------
@@ -217,6 +398,117 @@ resource "aws_batch_job_definition" "batch_job_definition" {
   tags = var.batch_job_tags
 }
 
+# --------------------------------------------------
+# Additional AWS Batch Compute Environments, Job Queues and Job Definitions
+# --------------------------------------------------
+
+locals {
+  # Compute environment ARNs and types by key; "default" and "default_spot" are the compute environments above
+  batch_compute_environment_arns = merge(
+    { default = aws_batch_compute_environment.batch_compute_env.arn },
+    { for environment in aws_batch_compute_environment.batch_spot_compute_env : "default_spot" => environment.arn },
+    { for key, environment in aws_batch_compute_environment.additional : key => environment.arn }
+  )
+  batch_compute_environment_types = merge(
+    { default = "FARGATE", default_spot = "FARGATE_SPOT" },
+    { for key, environment in var.batch_compute_environments : key => lookup(environment, "type", "FARGATE") }
+  )
+
+  # Each queue's compute environment keys in the order given, FARGATE ones before FARGATE_SPOT ones
+  batch_job_queue_compute_environment_keys = {
+    for name, queue in var.batch_job_queues : name => concat(
+      [for key in lookup(queue, "compute_environments", ["default"]) : key if local.batch_compute_environment_types[key] == "FARGATE"],
+      [for key in lookup(queue, "compute_environments", ["default"]) : key if local.batch_compute_environment_types[key] == "FARGATE_SPOT"]
+    )
+  }
+}
+
+resource "aws_batch_compute_environment" "additional" {
+  for_each = var.batch_compute_environments
+
+  compute_environment_name = each.value.name
+
+  compute_resources {
+    type = lookup(each.value, "type", "FARGATE")
+
+    subnets            = lookup(each.value, "subnet_ids", var.private_subnet_ids)
+    security_group_ids = lookup(each.value, "security_group_ids", var.security_group_ids)
+
+    max_vcpus = lookup(each.value, "max_vcpus", var.batch_max_vcpus)
+  }
+
+  service_role = aws_iam_role.batch_service_role.arn
+  type         = "MANAGED"
+  state        = lookup(each.value, "state", "ENABLED")
+}
+
+resource "aws_batch_job_queue" "additional" {
+  for_each = var.batch_job_queues
+
+  name     = each.value.name
+  state    = lookup(each.value, "state", "ENABLED")
+  priority = each.value.priority
+
+  compute_environments = [for key in local.batch_job_queue_compute_environment_keys[each.key] : local.batch_compute_environment_arns[key]]
+}
+
+resource "aws_batch_job_definition" "additional" {
+  for_each = var.batch_job_definitions
+
+  name = each.value.name
+  type = "container"
+
+  platform_capabilities = ["FARGATE"]
+
+  container_properties = jsonencode({
+    image            = lookup(each.value, "image", var.batch_container_image)
+    jobRoleArn       = aws_iam_role.ecs_task_role.arn
+    executionRoleArn = aws_iam_role.ecs_task_execution_role.arn
+
+    resourceRequirements = [
+      {
+        type  = "VCPU"
+        value = lookup(each.value, "vcpu", var.batch_job_vcpu)
+      },
+      {
+        type  = "MEMORY"
+        value = lookup(each.value, "memory", var.batch_job_memory)
+      }
+    ]
+
+    environment = lookup(each.value, "environment", var.batch_job_environment)
+
+    logConfiguration = {
+      logDriver = "awslogs"
+      options = {
+        "awslogs-group"         = var.log_group_name
+        "awslogs-region"        = var.region
+        "awslogs-stream-prefix" = lookup(each.value, "log_prefix", var.batch_job_log_prefix)
+      }
+    }
+
+    secrets = lookup(each.value, "secrets", var.batch_job_secrets)
+
+    networkConfiguration = {
+      assignPublicIp = var.batch_assign_public_ip
+    }
+
+    fargatePlatformConfiguration = {
+      platformVersion = var.batch_fargate_platform_version
+    }
+  })
+
+  timeout {
+    attempt_duration_seconds = lookup(each.value, "timeout_seconds", var.batch_job_timeout_seconds)
+  }
+
+  retry_strategy {
+    attempts = lookup(each.value, "retry_attempts", var.batch_job_retry_attempts)
+  }
+
+  tags = lookup(each.value, "tags", var.batch_job_tags)
+}
+
 # --------------------------------------------------
 # IAM Role for AWS Batch Service
 # --------------------------------------------------
@@ -5,7 +5,17 @@ output "ecs_cluster_id" {
 
 output "ecs_service_name" {
   description = "ECS service name"
-  value       = var.create_ecs_task_definition ? aws_ecs_service.ecs-batch[0].name : null
+  value       = local.ecs_service_name
+}
+
+output "ecs_capacity_providers" {
+  description = "Capacity providers associated with the ECS cluster (empty unless enable_ecs_capacity_provider_strategy)"
+  value       = var.enable_ecs_capacity_provider_strategy ? tolist(aws_ecs_cluster_capacity_providers.ecs-batch[0].capacity_providers) : []
+}
+
+output "ecs_autoscaling_policy_arns" {
+  description = "ARNs of the ECS service target-tracking scaling policies, keyed by metric"
+  value       = { for metric, policy in aws_appautoscaling_policy.ecs-batch : metric => policy.arn }
 }
 
 output "ecs_task_definition_arn" {
@@ -64,6 +74,31 @@ output "batch_job_definition_name" {
   value       = aws_batch_job_definition.batch_job_definition.name
 }
 
+output "batch_scheduling_policy_arn" {
+  description = "ARN of the fair-share scheduling policy (null unless enable_batch_fair_share)"
+  value       = var.enable_batch_fair_share ? aws_batch_scheduling_policy.batch_scheduling_policy[0].arn : null
+}
+
+output "batch_spot_compute_environment_arn" {
+  description = "ARN of the FARGATE_SPOT compute environment (null unless enable_batch_fargate_spot)"
+  value       = var.enable_batch_fargate_spot ? aws_batch_compute_environment.batch_spot_compute_env[0].arn : null
+}
+
+output "batch_compute_environment_arns" {
+  description = "ARNs of the additional AWS Batch compute environments, keyed like batch_compute_environments"
+  value       = { for key, environment in aws_batch_compute_environment.additional : key => environment.arn }
+}
+
+output "batch_job_queue_arns" {
+  description = "ARNs of the additional AWS Batch job queues, keyed like batch_job_queues"
+  value       = { for key, queue in aws_batch_job_queue.additional : key => queue.arn }
+}
+
+output "batch_job_definition_arns" {
+  description = "ARNs of the additional AWS Batch job definitions, keyed like batch_job_definitions"
+  value       = { for key, definition in aws_batch_job_definition.additional : key => definition.arn }
+}
+
 output "batch_service_role_arn" {
   description = "ARN of the IAM role for AWS Batch service"
   value       = aws_iam_role.batch_service_role.arn
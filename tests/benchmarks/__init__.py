@@ -0,0 +1 @@
+# Benchmarks for the terraform test harness (run as modules, not collected by pytest)
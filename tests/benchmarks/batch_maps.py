@@ -0,0 +1,170 @@
+"""How static evaluation and planning scale with the size of the Batch ``for_each`` maps.
+
+Usage::
+
+    python -m tests.benchmarks.batch_maps --entries 1 10 100 500
+    python -m tests.benchmarks.batch_maps --static-only       # no terraform
+    python -m tests.benchmarks.batch_maps --compare .benchmarks/batch_maps/<earlier>.json
+
+For each size the example configuration is given ``batch_compute_environments``,
+``batch_job_queues`` and ``batch_job_definitions`` maps of that many entries
+each (every queue drawing on two of the additional compute environments and the
+default one). The harness static evaluator always runs over it; unless
+``--static-only`` is given, ``init``, ``plan -out`` and ``show -json`` also run
+in a variant workspace holding the maps as an override file, with wall time,
+CPU time and peak RSS taken from the harness timing log as in
+``module_scale``. Results are saved as JSON named after the current commit.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from tests.benchmarks.module_scale import EXAMPLES_DIR, REPOSITORY, git_commit, run_stage, terraform_version
+from tests.harness.matrix import Variant, VariantMatrix
+from tests.harness.plan_model import PlanModel
+from tests.harness.static import StaticConfiguration
+from tests.harness.timing import TIMING_LOG_ENV
+
+DEFAULT_RESULTS_DIR = REPOSITORY / ".benchmarks" / "batch_maps"
+SIZES = (1, 10, 100, 500)
+STAGES = ("static", "init", "plan", "show")
+
+
+def batch_maps(entries: int) -> Dict[str, Dict[str, dict]]:
+    """Module arguments declaring ``entries`` compute environments, job queues and job definitions"""
+    environments = [f"ce{index}" for index in range(entries)]
+    return {
+        "batch_compute_environments": {
+            key: {"name": f"bench-{key}", "max_vcpus": 16 + index % 64}
+            for index, key in enumerate(environments)
+        },
+        "batch_job_queues": {
+            f"q{index}": {
+                "name": f"bench-q{index}",
+                "priority": index % 1000,
+                "compute_environments": [environments[index], environments[(index + 1) % entries], "default"]
+                if entries > 1 else [environments[index], "default"],
+            }
+            for index in range(entries)
+        },
+        "batch_job_definitions": {
+            f"job{index}": {"name": f"bench-job{index}", "vcpu": "1", "memory": str(2048 + 1024 * (index % 4)),
+                            "timeout_seconds": 600 + index, "retry_attempts": 1 + index % 3}
+            for index in range(entries)
+        },
+    }
+
+
+def benchmark_static(entries: int) -> dict:
+    start = time.perf_counter()
+    configuration = StaticConfiguration.from_example(EXAMPLES_DIR, overrides=batch_maps(entries))
+    return {"wall_seconds": round(time.perf_counter() - start, 6), "resources": len(configuration)}
+
+
+def benchmark_size(entries: int, workdir: Path, plugin_cache_dir: Path, static_only: bool) -> dict:
+    """Evaluate, and unless ``static_only`` init, plan and render, the example with maps of ``entries``"""
+    stages: Dict[str, dict] = {"static": benchmark_static(entries)}
+    record = {"entries": entries, "stages": stages}
+    if static_only:
+        return record
+
+    matrix = VariantMatrix(EXAMPLES_DIR, workdir, plugin_cache_dir)
+    workspace = matrix.prepare(Variant(f"entries-{entries}", batch_maps(entries)))
+    log_path = workdir / "timing.jsonl"
+    os.environ[TIMING_LOG_ENV] = str(log_path)  # run_terraform records through this process's environment
+    env = matrix.environment(workspace)
+    for stage, args in (
+        ("init", ["init", "-input=false", "-no-color"]),
+        ("plan", ["plan", "-input=false", "-no-color", "-out=tfplan"]),
+        ("show", ["show", "-json", "-no-color", "tfplan"]),
+    ):
+        stages[stage], result = run_stage(args, workspace, log_path, env)
+        if result.returncode != 0:
+            return record
+    record["planned_resources"] = len(PlanModel.from_json(json.loads(result.stdout)))
+    return record
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Per-size ratios of the current run's stage times to the baseline's"""
+    lines = [f"compared with {baseline['commit']} ({baseline['created']})"]
+    baseline_sizes = {record["entries"]: record for record in baseline["results"]}
+    for record in current["results"]:
+        previous = baseline_sizes.get(record["entries"])
+        if previous is None:
+            continue
+        ratios = []
+        for stage in STAGES:
+            now = record["stages"].get(stage, {}).get("wall_seconds")
+            then = previous["stages"].get(stage, {}).get("wall_seconds")
+            if now is not None and then:
+                ratios.append(f"{stage} {now / then:.2f}x")
+        lines.append(f"{record['entries']:>5} entries: {', '.join(ratios) or 'nothing comparable'}")
+    return lines
+
+
+def print_record(record: dict):
+    static = record["stages"]["static"]
+    stages = "  ".join(
+        f"{stage} {stats['wall_seconds']:.1f}s/{stats['peak_rss_mb'] or 0:.0f}MiB"
+        + ("" if stats["returncode"] == 0 else " FAILED")
+        for stage, stats in record["stages"].items() if stage != "static"
+    )
+    print(f"{record['entries']:>5} entries  static {static['wall_seconds']:.2f}s "
+          f"({static['resources']} resources)  {stages}".rstrip())
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=list(SIZES), help="entries per map")
+    parser.add_argument("--static-only", action="store_true", help="skip terraform and time static evaluation")
+    parser.add_argument("--workdir", type=Path, help="keep generated workspaces here instead of a temp dir")
+    parser.add_argument("--plugin-cache-dir", type=Path, help="provider plugin cache shared by every size")
+    parser.add_argument("--results-dir", type=Path, default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "terraform_version": None if args.static_only else terraform_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "static_only": args.static_only,
+        "results": [],
+    }
+    previous_log = os.environ.get(TIMING_LOG_ENV)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            workdir = args.workdir or Path(temp_dir)
+            workdir.mkdir(parents=True, exist_ok=True)
+            plugin_cache_dir = args.plugin_cache_dir or workdir / "plugin-cache"
+            plugin_cache_dir.mkdir(parents=True, exist_ok=True)
+            for entries in args.entries:
+                record = benchmark_size(entries, workdir, plugin_cache_dir, args.static_only)
+                results["results"].append(record)
+                print_record(record)
+    finally:
+        if previous_log is None:
+            os.environ.pop(TIMING_LOG_ENV, None)
+        else:
+            os.environ[TIMING_LOG_ENV] = previous_log
+
+    args.results_dir.mkdir(parents=True, exist_ok=True)
+    suffix = "-static-only" if args.static_only else ""
+    path = args.results_dir / f"{results['created'].replace(':', '')}-{results['commit']}{suffix}.json"
+    path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"results written to {path}")
+    if args.compare:
+        for line in compare(results, json.loads(args.compare.read_text(encoding="utf-8"))):
+            print(line)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
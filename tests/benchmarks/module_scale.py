@@ -0,0 +1,241 @@
+"""How init, plan, JSON rendering and plan parsing scale with the number of module instances.
+
+Usage::
+
+    python -m tests.benchmarks.module_scale --instances 1 10 100 500
+    python -m tests.benchmarks.module_scale --compare .benchmarks/module_scale/<earlier>.json
+    python -m tests.benchmarks.module_scale --parse-only      # no terraform: synthetic plans
+
+For each size a root configuration with that many ``module "batch_ecs_<n>"``
+blocks (the example's arguments, with every ``*_name`` and ``*family``
+argument made unique per instance) is written next to a copy of the module,
+then ``init``, ``plan -out`` and ``show -json`` run in it. Terraform wall
+time, CPU time and peak RSS come from the harness timing log; parse time and
+peak RSS of the harness plan readers are measured in a fresh interpreter as
+in ``plan_parser``. Results are saved as JSON named after the current commit
+so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from tests.benchmarks.plan_parser import measure
+from tests.benchmarks.synthetic import example_plan, iter_scaled_changes, write_json_plan
+from tests.harness.runner import TerraformResult, run_terraform
+from tests.harness.static import module_arguments
+from tests.harness.timing import TIMING_LOG_ENV, read_log
+
+REPOSITORY = Path(__file__).parent.parent.parent
+EXAMPLES_DIR = REPOSITORY / "examples"
+DEFAULT_RESULTS_DIR = REPOSITORY / ".benchmarks" / "module_scale"
+MODULE_NAME = "batch_ecs"
+SIZES = (1, 10, 100, 500)
+PARSERS = ("json-load", "stream-json")
+
+# The example's own provider configuration, repeated in the synthesized root
+ROOT_PROVIDER = {
+    "region": "us-east-1",
+    "access_key": "mock_access_key",
+    "secret_key": "mock_secret_key",
+    "skip_credentials_validation": True,
+    "skip_requesting_account_id": True,
+}
+
+
+def instance_arguments(arguments: Dict[str, object], index: int) -> Dict[str, object]:
+    """The example's module arguments with resource names made unique for instance ``index``"""
+    unique = dict(arguments)
+    for name, value in arguments.items():
+        if isinstance(value, str) and value and name.endswith(("_name", "family")):
+            unique[name] = f"{value}-{index}"
+    return unique
+
+
+def synthesize_root(instances: int, destination: Path, examples_dir: Path = EXAMPLES_DIR) -> Path:
+    """Write a copy of the module and a root calling it ``instances`` times; returns the root directory"""
+    destination = Path(destination)
+    destination.mkdir(parents=True, exist_ok=True)
+    for source in examples_dir.parent.glob("*.tf"):
+        shutil.copyfile(source, destination / source.name)
+    root = destination / "scale"
+    root.mkdir(exist_ok=True)
+    lock_file = examples_dir / ".terraform.lock.hcl"
+    if lock_file.exists():
+        shutil.copyfile(lock_file, root / lock_file.name)
+
+    arguments = module_arguments(examples_dir, MODULE_NAME)
+    config = {
+        "provider": {"aws": ROOT_PROVIDER},
+        "module": {
+            f"{MODULE_NAME}_{index}": {"source": "../", **instance_arguments(arguments, index)}
+            for index in range(instances)
+        },
+    }
+    (root / "main.tf.json").write_text(json.dumps(config, indent=2), encoding="utf-8")
+    return root
+
+
+def run_stage(args: Sequence[str], cwd: Path, log_path: Path, env: Dict[str, str]) -> Tuple[dict, TerraformResult]:
+    """Run one terraform command and return its timing entry from the harness timing log"""
+    before = len(read_log(log_path))
+    result = run_terraform(args, cwd, env)
+    entry = read_log(log_path)[before]
+    stats = {
+        "wall_seconds": entry["wall_seconds"],
+        "cpu_seconds": round(entry["user_seconds"] + entry["system_seconds"], 6),
+        "peak_rss_mb": entry["peak_rss_mb"],
+        "returncode": result.returncode,
+    }
+    if result.returncode != 0:
+        stats["error"] = result.stderr.strip().splitlines()[-20:]
+    return stats, result
+
+
+def benchmark_size(instances: int, workdir: Path, plugin_cache_dir: Path, parsers: Sequence[str]) -> dict:
+    """Init, plan, render and parse the root with ``instances`` module instances"""
+    root = synthesize_root(instances, workdir / f"instances-{instances}")
+    log_path = workdir / "timing.jsonl"
+    os.environ[TIMING_LOG_ENV] = str(log_path)  # run_terraform records through this process's environment
+    env = dict(os.environ, TF_PLUGIN_CACHE_DIR=str(plugin_cache_dir), TF_IN_AUTOMATION="1")
+    stages: Dict[str, dict] = {}
+    record = {"instances": instances, "stages": stages}
+
+    for stage, args in (
+        ("init", ["init", "-input=false", "-no-color"]),
+        ("plan", ["plan", "-input=false", "-no-color", "-out=tfplan"]),
+        ("show", ["show", "-json", "-no-color", "tfplan"]),
+    ):
+        stages[stage], result = run_stage(args, root, log_path, env)
+        if result.returncode != 0:
+            return record
+    plan_json = root / "plan.json"
+    plan_json.write_text(result.stdout, encoding="utf-8")
+    record["plan_json_mb"] = round(plan_json.stat().st_size / (1024 * 1024), 3)
+    record["parsers"] = {name: measure(name, plan_json) for name in parsers}
+    return record
+
+
+def benchmark_parse_only(instances: int, workdir: Path, parsers: Sequence[str]) -> dict:
+    """Parse a synthetic plan of ``instances`` copies of the recorded example plan"""
+    path = workdir / f"plan-{instances}.json"
+    write_json_plan(iter_scaled_changes(instances), example_plan()["output_changes"], path)
+    return {
+        "instances": instances,
+        "stages": {},
+        "plan_json_mb": round(path.stat().st_size / (1024 * 1024), 3),
+        "parsers": {name: measure(name, path) for name in parsers},
+    }
+
+
+def git_commit() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY, capture_output=True, text=True)
+    return result.stdout.strip() or "unknown"
+
+
+def terraform_version() -> Optional[str]:
+    try:
+        result = subprocess.run(["terraform", "version", "-json"], capture_output=True, text=True)
+        return json.loads(result.stdout)["terraform_version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def metric(record: dict, name: str) -> Optional[float]:
+    """``init``/``plan``/``show`` wall seconds or ``parse:<parser>`` seconds of one size"""
+    if name.startswith("parse:"):
+        return record.get("parsers", {}).get(name[len("parse:"):], {}).get("seconds")
+    return record["stages"].get(name, {}).get("wall_seconds")
+
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """Per-size ratios of the current run's times to the baseline's"""
+    lines = [f"compared with {baseline['commit']} ({baseline['created']})"]
+    baseline_sizes = {record["instances"]: record for record in baseline["results"]}
+    names = ["init", "plan", "show", *(f"parse:{parser}" for parser in PARSERS)]
+    for record in current["results"]:
+        previous = baseline_sizes.get(record["instances"])
+        if previous is None:
+            continue
+        ratios = []
+        for name in names:
+            now, then = metric(record, name), metric(previous, name)
+            if now is not None and then:
+                ratios.append(f"{name} {now / then:.2f}x")
+        lines.append(f"{record['instances']:>5} instances: {', '.join(ratios) or 'nothing comparable'}")
+    return lines
+
+
+def print_record(record: dict):
+    stages = "  ".join(
+        f"{stage} {stats['wall_seconds']:.1f}s/{stats['peak_rss_mb'] or 0:.0f}MiB"
+        + ("" if stats["returncode"] == 0 else " FAILED")
+        for stage, stats in record["stages"].items()
+    )
+    parsers = "  ".join(
+        f"{name} {stats['seconds']:.2f}s/{stats['peak_rss_mb']:.0f}MiB"
+        for name, stats in record.get("parsers", {}).items()
+    )
+    size = f"{record['plan_json_mb']:.1f}MB plan" if "plan_json_mb" in record else "no plan"
+    print(f"{record['instances']:>5} instances  {size:>12}  {stages}  {parsers}".rstrip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, nargs="+", default=list(SIZES), help="module instance counts")
+    parser.add_argument("--parsers", nargs="+", default=list(PARSERS), choices=PARSERS)
+    parser.add_argument("--parse-only", action="store_true", help="skip terraform and parse synthetic plans")
+    parser.add_argument("--workdir", type=Path, help="keep generated configurations here instead of a temp dir")
+    parser.add_argument("--plugin-cache-dir", type=Path, help="provider plugin cache shared by every size")
+    parser.add_argument("--results-dir", type=Path, default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "terraform_version": None if args.parse_only else terraform_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parse_only": args.parse_only,
+        "results": [],
+    }
+    previous_log = os.environ.get(TIMING_LOG_ENV)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            workdir = args.workdir or Path(temp_dir)
+            workdir.mkdir(parents=True, exist_ok=True)
+            plugin_cache_dir = args.plugin_cache_dir or workdir / "plugin-cache"
+            plugin_cache_dir.mkdir(parents=True, exist_ok=True)
+            for instances in args.instances:
+                if args.parse_only:
+                    record = benchmark_parse_only(instances, workdir, args.parsers)
+                else:
+                    record = benchmark_size(instances, workdir, plugin_cache_dir, args.parsers)
+                results["results"].append(record)
+                print_record(record)
+    finally:
+        if previous_log is None:
+            os.environ.pop(TIMING_LOG_ENV, None)
+        else:
+            os.environ[TIMING_LOG_ENV] = previous_log
+
+    args.results_dir.mkdir(parents=True, exist_ok=True)
+    suffix = "-parse-only" if args.parse_only else ""
+    path = args.results_dir / f"{results['created'].replace(':', '')}-{results['commit']}{suffix}.json"
+    path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"results written to {path}")
+    if args.compare:
+        for line in compare(results, json.loads(args.compare.read_text(encoding="utf-8"))):
+            print(line)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
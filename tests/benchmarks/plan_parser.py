@@ -0,0 +1,140 @@
+"""Compare peak RSS and throughput of the plan parsers on large synthetic plans.
+
+Usage::
+
+    python -m tests.benchmarks.plan_parser --sizes 10 100 500
+
+Each parser runs in a fresh interpreter so its peak RSS is measured in
+isolation. ``legacy-text`` is the line-splitting regex parser that
+``parsed_plan_output`` used before the structured plan model, and
+``json-load`` is ``json.load`` followed by ``PlanModel.from_json``.
+"""
+import argparse
+import json
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from tests.benchmarks.synthetic import example_plan, iter_scaled_changes, write_json_plan, write_text_plan
+
+PARSERS = ("legacy-text", "stream-text", "json-load", "stream-json")
+
+
+def legacy_parse(stdout: str) -> dict:
+    """The original stdout scraper, kept verbatim as the benchmark baseline"""
+    resources = []
+    lines = stdout.split('\n')
+    current_resource = None
+
+    for line in lines:
+        if line.startswith('  # module.batch_ecs'):
+            resource_match = re.search(r'aws_([^.]+)\.([^\s]+)', line)
+            if resource_match:
+                current_resource = {
+                    'type': resource_match.group(1),
+                    'name': resource_match.group(2),
+                    'attributes': []
+                }
+                resources.append(current_resource)
+        elif current_resource and line.strip().startswith('+') and '=' in line:
+            attr_line = line.strip()[1:].strip()
+            if '=' in attr_line:
+                key, value = attr_line.split('=', 1)
+                current_resource['attributes'].append({'key': key.strip(), 'value': value.strip()})
+
+    summary = {}
+    for line in stdout.split('\n'):
+        if 'Plan:' in line and 'to add' in line:
+            summary['add'] = int(re.search(r'(\d+) to add', line).group(1))
+            break
+
+    return {'resources': resources, 'plan_summary': summary}
+
+
+def run_parser(parser: str, path: Path) -> int:
+    """Parse ``path`` with ``parser`` and return the number of resource changes seen"""
+    if parser == "legacy-text":
+        return len(legacy_parse(path.read_text(encoding="utf-8"))["resources"])
+    if parser == "stream-text":
+        from tests.harness.streaming import iter_text_resource_changes
+        with open(path, encoding="utf-8") as lines:
+            return sum(1 for _ in iter_text_resource_changes(lines))
+    if parser == "json-load":
+        from tests.harness.plan_model import PlanModel
+        with open(path, encoding="utf-8") as source:
+            return len(PlanModel.from_json(json.load(source)))
+    if parser == "stream-json":
+        from tests.harness.streaming import iter_json_resource_changes
+        return sum(1 for _ in iter_json_resource_changes(path))
+    raise ValueError(f"unknown parser {parser}")
+
+
+def measure(parser: str, path: Path) -> dict:
+    """Run one parser in a child interpreter and collect its timing and peak RSS"""
+    result = subprocess.run(
+        [sys.executable, "-m", "tests.benchmarks.plan_parser", "--measure", parser, str(path)],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent.parent,
+    )
+    return json.loads(result.stdout)
+
+
+def generate(size_mb: int, workdir: Path) -> dict:
+    """Write text and JSON plans of roughly ``size_mb`` MiB and return their paths"""
+    outputs = example_plan()["output_changes"]
+    probe = workdir / "probe.txt"
+    write_text_plan(iter_scaled_changes(1), outputs, probe)
+    instances = max(1, size_mb * 1024 * 1024 // probe.stat().st_size)
+    paths = {"text": workdir / f"plan-{size_mb}mb.txt", "json": workdir / f"plan-{size_mb}mb.json"}
+    write_text_plan(iter_scaled_changes(instances), outputs, paths["text"])
+    write_json_plan(iter_scaled_changes(instances), outputs, paths["json"])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="plan sizes in MiB")
+    parser.add_argument("--parsers", nargs="+", default=list(PARSERS), choices=PARSERS)
+    parser.add_argument("--workdir", type=Path, help="keep generated plans here instead of a temp dir")
+    parser.add_argument("--measure", nargs=2, metavar=("PARSER", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        name, path = args.measure
+        started = time.perf_counter()
+        count = run_parser(name, Path(path))
+        elapsed = time.perf_counter() - started
+        print(json.dumps({
+            "seconds": elapsed,
+            "resources": count,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        workdir = args.workdir or Path(temp_dir)
+        workdir.mkdir(parents=True, exist_ok=True)
+        print(f"{'size':>8} {'parser':<12} {'resources':>10} {'seconds':>9} {'MiB/s':>8} {'peak RSS MiB':>13}")
+        for size_mb in args.sizes:
+            paths = generate(size_mb, workdir)
+            for name in args.parsers:
+                path = paths["json" if name.startswith(("json", "stream-json")) else "text"]
+                file_mb = path.stat().st_size / (1024 * 1024)
+                stats = measure(name, path)
+                print(
+                    f"{file_mb:>6.0f}MB {name:<12} {stats['resources']:>10} {stats['seconds']:>9.2f} "
+                    f"{file_mb / stats['seconds']:>8.1f} {stats['peak_rss_mb']:>13.1f}"
+                )
+            if args.workdir is None:
+                for path in paths.values():
+                    path.unlink()
+
+
+if __name__ == "__main__":
+    main()
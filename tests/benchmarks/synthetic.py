@@ -0,0 +1,141 @@
+import copy
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+MODULE = "module.batch_ecs"
+
+ACTION_SYMBOLS = {"create": "+", "delete": "-", "update": "~"}
+ACTION_PHRASES = {"create": "will be created", "delete": "will be destroyed", "update": "will be updated in-place"}
+
+
+def example_plan() -> dict:
+    """The recorded plan of the example configuration"""
+    return json.loads((FIXTURES_DIR / "example_plan.json").read_text(encoding="utf-8"))
+
+
+def iter_scaled_changes(instances: int) -> Iterator[dict]:
+    """Resource changes for ``instances`` copies of the example module under unique module addresses"""
+    base = example_plan()["resource_changes"]
+    for index in range(instances):
+        module = f"{MODULE}_{index}"
+        for change in base:
+            clone = copy.deepcopy(change)
+            clone["address"] = module + change["address"][len(MODULE):]
+            clone["module_address"] = module
+            yield clone
+
+
+def synthesize_plan(instances: int) -> dict:
+    """In-memory plan for ``instances`` copies of the example module"""
+    plan = dict(example_plan())
+    plan["resource_changes"] = list(iter_scaled_changes(instances))
+    plan["planned_values"] = {"root_module": {}}
+    return plan
+
+
+def _render_value(value, unknown, indent: int) -> List[str]:
+    pad = " " * indent
+    if unknown is True:
+        return ["(known after apply)"]
+    if isinstance(value, str) and value[:1] in "[{":
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            decoded = None
+        if decoded is not None:
+            body = json.dumps(decoded, indent=2, sort_keys=True).splitlines()
+            return ["jsonencode("] + [f"{pad}    {line}" for line in body] + [f"{pad})"]
+    if isinstance(value, list):
+        if not value:
+            return ["[]"]
+        return ["["] + [f"{pad}    + {json.dumps(item)}," for item in value] + [f"{pad}]"]
+    if isinstance(value, dict):
+        if not value:
+            return ["{}"]
+        return ["{"] + [f'{pad}    + "{key}" = {json.dumps(item)}' for key, item in value.items()] + [f"{pad}}}"]
+    return [json.dumps(value)]
+
+
+def _render_body(after: dict, unknown: dict, indent: int, symbol: str) -> Iterator[str]:
+    pad = " " * indent
+    attributes, blocks = [], []
+    for key in sorted(set(after) | {k for k, v in unknown.items() if v is True}):
+        value = after.get(key)
+        if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            blocks.append(key)
+        elif value is not None or unknown.get(key) is True:
+            attributes.append(key)
+    width = max((len(key) for key in attributes), default=0)
+    for key in attributes:
+        lines = _render_value(after.get(key), unknown.get(key), indent + 2)
+        yield f"{pad}{symbol} {key.ljust(width)} = {lines[0]}"
+        yield from lines[1:]
+    for key in blocks:
+        block_unknown = unknown.get(key) if isinstance(unknown.get(key), list) else []
+        for index, item in enumerate(after[key]):
+            item_unknown = block_unknown[index] if index < len(block_unknown) and isinstance(block_unknown[index], dict) else {}
+            yield ""
+            yield f"{pad}{symbol} {key} {{"
+            yield from _render_body(item, item_unknown, indent + 4, symbol)
+            yield f"{pad}  }}"
+
+
+def render_text_plan(plan: dict) -> Iterator[str]:
+    """Render a JSON plan in the layout of ``terraform plan -no-color`` output, one line at a time"""
+    return render_text_changes(plan["resource_changes"], plan.get("output_changes", {}))
+
+
+def render_text_changes(changes: Iterable[dict], outputs: dict) -> Iterator[str]:
+    """Render resource and output changes as ``terraform plan -no-color`` output"""
+    yield "Terraform used the selected providers to generate the following execution"
+    yield "plan. Resource actions are indicated with the following symbols:"
+    yield "  + create"
+    yield ""
+    yield "Terraform will perform the following actions:"
+    counts = {"create": 0, "update": 0, "delete": 0}
+    for change in changes:
+        action = change["change"]["actions"][0]
+        counts[action] = counts.get(action, 0) + 1
+        symbol = ACTION_SYMBOLS.get(action, "~")
+        yield ""
+        yield f"  # {change['address']} {ACTION_PHRASES.get(action, 'will be updated in-place')}"
+        yield f'  {symbol} resource "{change["type"]}" "{change["name"]}" {{'
+        yield from _render_body(change["change"]["after"] or {}, change["change"]["after_unknown"] or {}, 6, symbol)
+        yield "    }"
+    yield ""
+    yield f"Plan: {counts['create']} to add, {counts['update']} to change, {counts['delete']} to destroy."
+    if outputs:
+        yield ""
+        yield "Changes to Outputs:"
+        width = max(len(name) for name in outputs)
+        for name, output in outputs.items():
+            value = "(known after apply)" if output.get("after_unknown") is True else json.dumps(output.get("after"))
+            yield f"  + {name.ljust(width)} = {value}"
+
+
+def write_text_plan(changes: Iterable[dict], outputs: dict, path: Path):
+    """Stream rendered plan output to ``path``"""
+    with open(path, "w", encoding="utf-8") as output:
+        for line in render_text_changes(changes, outputs):
+            output.write(line)
+            output.write("\n")
+
+
+def write_json_plan(changes: Iterable[dict], outputs: dict, path: Path):
+    """Stream a ``terraform show -json`` style document to ``path`` without building it in memory"""
+    base = example_plan()
+    with open(path, "w", encoding="utf-8") as output:
+        output.write(json.dumps({
+            "format_version": base["format_version"],
+            "terraform_version": base["terraform_version"],
+        })[:-1])
+        output.write(',"resource_changes":[')
+        for index, change in enumerate(changes):
+            if index:
+                output.write(",")
+            output.write(json.dumps(change, separators=(",", ":")))
+        output.write('],"output_changes":')
+        output.write(json.dumps(outputs, separators=(",", ":")))
+        output.write("}")
@@ -1,9 +1,236 @@
-import pytest
-import subprocess
 import json
-import re
+import os
+import sys
+import pytest
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
+
+from tests.harness.apply import ApplyBenchmark
+from tests.harness.broker import PlanBroker
+from tests.harness.cache import DEFAULT_MAX_BYTES, PlanCache
+from tests.harness.checks import run_checks, streaming_runner
+from tests.harness.console import ConsolePool
+from tests.harness.documents import PlanDocuments
+from tests.harness.graph import DependencyGraph
+from tests.harness.handoff import HANDOFF_ENV, PlanHandoff
+from tests.harness.matrix import VariantMatrix, configuration_variants, load_variant_plans, save_variant_plans
+from tests.harness.mirror import ProviderMirror
+from tests.harness.plan_model import PlanModel
+from tests.harness.runner import TerraformResult, run_terraform
+from tests.harness.selection import AffectedTestSelection
+from tests.harness.shared import SharedState
+from tests.harness.snapshot import PlanSnapshot
+from tests.harness.static import StaticConfiguration
+from tests.harness.timing import TIMING_LOG_ENV, TerraformTimingPlugin
+from tests.harness.trace import TraceProfiler
+from tests.harness.workflows import WorkflowRegistry
+from tests.harness.workspace import WorkspacePool
+
+plan_broker_key = pytest.StashKey[PlanBroker]()
+trace_profiler_key = pytest.StashKey[TraceProfiler]()
+apply_benchmark_key = pytest.StashKey[ApplyBenchmark]()
+
+# Fixtures served by run_checks, and the check behind each
+CHECK_FIXTURES = {
+    "terraform_fmt_check": "fmt_check",
+    "terraform_validate": "validate",
+    "terraform_plan": "plan",
+    "terraform_plan_json": "show",
+    "terraform_graph": "graph",
+}
+SNAPSHOT_DIR = Path(__file__).parent / "snapshots"
+WORKFLOWS_DIR = Path(__file__).parent.parent / ".github" / "workflows"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("terraform")
+    group.addoption(
+        "--no-plan-cache",
+        action="store_true",
+        default=False,
+        help="always run terraform instead of replaying cached validate/plan results",
+    )
+    group.addoption(
+        "--plan-cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="maximum size of the on-disk plan cache in MiB (default: %(default)s)",
+    )
+    group.addoption(
+        "--plan-handoff",
+        type=Path,
+        default=os.environ.get(HANDOFF_ENV),
+        metavar="MANIFEST",
+        help="serve init, plan and show from a plan recorded by 'python -m tests.harness.handoff record' while "
+             "its fingerprint matches the sources, planning as usual otherwise (default: $TF_PLAN_HANDOFF)",
+    )
+    group.addoption(
+        "--variant-workers",
+        type=int,
+        default=None,
+        help="processes used to plan feature-flag variants (default: CPU count, 0 plans serially)",
+    )
+    group.addoption(
+        "--workspace-pool-size",
+        type=int,
+        default=os.cpu_count(),
+        help="number of pre-initialized example workspaces handed out by workspace_pool",
+    )
+    group.addoption(
+        "--console-pool-size",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="number of terraform console processes kept open by terraform_console (default: %(default)s)",
+    )
+    group.addoption(
+        "--provider-mirror",
+        type=Path,
+        default=os.environ.get("TF_PROVIDER_MIRROR"),
+        help="install providers only from the mirror built by 'python -m tests.harness.mirror build' "
+             "in this directory (default: $TF_PROVIDER_MIRROR)",
+    )
+    group.addoption(
+        "--aws-endpoint",
+        default=os.environ.get("AWS_ENDPOINT_URL"),
+        help="URL of a local AWS emulator such as LocalStack; enables the integration tests, which "
+             "apply and destroy the example configuration against it (default: $AWS_ENDPOINT_URL)",
+    )
+    group.addoption(
+        "--apply-parallelism",
+        default="1,4,10",
+        help="comma-separated -parallelism values the integration tests apply and destroy with "
+             "(default: %(default)s)",
+    )
+    group.addoption(
+        "--apply-report",
+        type=Path,
+        default=None,
+        help="write per-resource apply/destroy timings as JSON here "
+             "(default: terraform-apply/report.json in the pytest cache)",
+    )
+    group.addoption(
+        "--snapshot-update",
+        action="store_true",
+        default=False,
+        help="rewrite the golden plan snapshots in tests/snapshots from the current plan instead of comparing",
+    )
+    group.addoption(
+        "--affected-only",
+        action="store_true",
+        default=False,
+        help="deselect tests whose files, resources, variables and outputs are unchanged since they last "
+             "passed, reusing those results",
+    )
+    group.addoption(
+        "--terraform-concurrency",
+        type=int,
+        default=os.cpu_count(),
+        help="maximum number of terraform checks (fmt, validate, plan) run at once (default: CPU count)",
+    )
+    group.addoption(
+        "--terraform-stream-output",
+        action="store_true",
+        default=False,
+        help="echo terraform output to stderr as it is produced",
+    )
+    group.addoption(
+        "--terraform-profile",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="run terraform plan with TF_LOG=trace and write its trace log, time breakdown and "
+             "flame graph stacks to DIR (implies --no-plan-cache)",
+    )
+    group.addoption(
+        "--terraform-slowest",
+        type=int,
+        default=10,
+        help="number of slowest terraform invocations to list in the terminal summary",
+    )
+    group.addoption(
+        "--terraform-timing-report",
+        type=Path,
+        default=None,
+        help="write per-invocation terraform timings as JSON here "
+             "(default: terraform-timing/report.json in the pytest cache)",
+    )
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(
+        TerraformTimingPlugin(
+            config.getoption("terraform_timing_report"),
+            slowest=config.getoption("terraform_slowest"),
+        ),
+        "terraform-timing",
+    )
+    config.addinivalue_line(
+        "markers",
+        "terraform_inputs(*names): resource types or addresses, var.<name>, output.<name> or files the "
+        "test depends on, for --affected-only",
+    )
+    tests_dir = Path(__file__).parent
+    config.pluginmanager.register(
+        AffectedTestSelection(
+            tests_dir.parent / "examples",
+            [Path(__file__), *sorted((tests_dir / "harness").glob("*.py")), *sorted(SNAPSHOT_DIR.glob("*.json")),
+             *sorted(WORKFLOWS_DIR.glob("*.yml"))],
+            enabled=config.getoption("affected_only"),
+        ),
+        "terraform-affected",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the opt-in integration tests unless an AWS emulator endpoint is configured"""
+    if config.getoption("aws_endpoint"):
+        return
+    skip = pytest.mark.skip(reason="integration tests need --aws-endpoint (or $AWS_ENDPOINT_URL)")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def untimed(monkeypatch):
+    """Fixture keeping simulated terraform runs out of the session's timing report"""
+    monkeypatch.delenv(TIMING_LOG_ENV, raising=False)
+
+
+class RecordingRunner:
+    """Stand-in runner that records calls and returns canned terraform output"""
+
+    def __init__(self):
+        self.calls = []
+        self.envs = []
+        self.results = {}
+
+    def __call__(self, args, cwd, env=None):
+        self.calls.append(args)
+        self.envs.append(env)
+        return self.results.get(args[0], TerraformResult("", "", 0))
+
+
+@pytest.fixture
+def recording_runner() -> RecordingRunner:
+    """Fixture with a stand-in terraform runner; ``results`` maps a subcommand to its canned output"""
+    return RecordingRunner()
+
+
+@pytest.fixture
+def fake_module(tmp_path) -> Path:
+    """Fixture creating a minimal module with an examples directory under ``tmp_path / "module"``"""
+    module = tmp_path / "module"
+    examples = module / "examples"
+    examples.mkdir(parents=True)
+    (module / "main.tf").write_text(
+        'terraform {\n  required_providers {\n    aws = {\n      source  = "hashicorp/aws"\n'
+        '      version = "~> 4.0"\n    }\n  }\n}\n\nresource "aws_ecs_cluster" "ecs-batch" {\n  name = var.name\n}\n'
+    )
+    (module / "README.md").write_text("# module\n")
+    (examples / "main.tf").write_text('module "batch_ecs" {\n  source = "../"\n  name   = "example"\n}\n')
+    (examples / "terraform.tfvars").write_text('cluster_name = "example"\n')
+    return examples
 
 
 @pytest.fixture(scope="session")
@@ -13,113 +240,317 @@ def terraform_examples_dir():
 
 
 @pytest.fixture(scope="session")
-def terraform_init(terraform_examples_dir):
-    """Fixture to ensure terraform is initialized"""
-    init_result = subprocess.run(
-        ["terraform", "init", "-no-color"],
-        cwd=terraform_examples_dir,
-        capture_output=True,
-        text=True
+def fixtures_dir():
+    """Fixture to get the directory of recorded terraform output"""
+    return Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="session")
+def recorded_plan_json(fixtures_dir) -> dict:
+    """Fixture with a recorded ``terraform show -json`` plan of the example configuration"""
+    return json.loads((fixtures_dir / "example_plan.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(scope="session")
+def recorded_plan(recorded_plan_json) -> PlanModel:
+    """Fixture with the recorded example plan indexed as a PlanModel"""
+    return PlanModel.from_json(recorded_plan_json)
+
+
+@pytest.fixture(scope="session")
+def provider_mirror(pytestconfig, terraform_examples_dir):
+    """Fixture pointing every terraform process at the offline provider mirror, when one is configured"""
+    root = pytestconfig.getoption("provider_mirror")
+    if not root:
+        yield None
+        return
+    mirror = ProviderMirror(root)
+    problems = mirror.verify(terraform_examples_dir / ".terraform.lock.hcl")
+    if problems:
+        pytest.fail("Provider mirror is not usable:\n" + "\n".join(problems), pytrace=False)
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in mirror.environment().items():
+            patch.setenv(name, value)
+        yield mirror
+
+
+@pytest.fixture(scope="session")
+def shared_state(tmp_path_factory) -> SharedState:
+    """Fixture with the locks and results shared by every pytest-xdist worker of this run"""
+    root = tmp_path_factory.getbasetemp()
+    if os.environ.get("PYTEST_XDIST_WORKER"):
+        # Workers get basetemp/popen-gwN; the parent is common to the run
+        root = root.parent
+    return SharedState(root / "terraform-shared")
+
+
+@pytest.fixture(scope="session")
+def plan_broker(pytestconfig, terraform_examples_dir, tmp_path_factory, provider_mirror,
+                shared_state) -> PlanBroker:
+    """Fixture providing the session-wide broker that runs terraform once per command"""
+    cache = None
+    profile_dir = pytestconfig.getoption("terraform_profile")
+    # pytestconfig has no cache attribute under -p no:cacheprovider
+    pytest_cache = getattr(pytestconfig, "cache", None)
+    if not pytestconfig.getoption("no_plan_cache") and not profile_dir and pytest_cache is not None:
+        cache = PlanCache(
+            pytest_cache.mkdir("terraform-plan-cache"),
+            max_bytes=pytestconfig.getoption("plan_cache_size") * 1024 * 1024,
+        )
+    runner = streaming_runner(sys.__stderr__) if pytestconfig.getoption("terraform_stream_output") else run_terraform
+    if profile_dir:
+        runner = pytestconfig.stash[trace_profiler_key] = TraceProfiler(profile_dir, runner=runner)
+    handoff = None
+    manifest = pytestconfig.getoption("plan_handoff")
+    if manifest and not profile_dir:
+        try:
+            handoff = PlanHandoff.load(manifest)
+        except (OSError, ValueError, KeyError) as error:
+            raise pytest.UsageError(f"--plan-handoff {manifest}: {error}")
+    broker = PlanBroker(terraform_examples_dir, tmp_path_factory.mktemp("terraform-plan"), runner=runner,
+                        cache=cache, shared=shared_state, handoff=handoff)
+    pytestconfig.stash[plan_broker_key] = broker
+    return broker
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """Report how many terraform processes the session actually launched"""
+    broker = config.stash.get(plan_broker_key, None)
+    if broker is None:
+        return
+    commands = ", ".join(args[0] for args in broker.invocations) or "none"
+    handoff = f", plan hand-off: {broker.handoff_status or 'unused'}" if broker.handoff is not None else ""
+    terminalreporter.write_sep(
+        "-",
+        f"terraform invocations: {broker.invocation_count} ({commands}), "
+        f"plan cache hits: {len(broker.cache_hits)}{handoff}"
     )
+    benchmark = config.stash.get(apply_benchmark_key, None)
+    if benchmark is not None and benchmark.runs:
+        terminalreporter.write_sep("-", f"apply/destroy latency against {benchmark.endpoint}")
+        for line in benchmark.summary_lines():
+            terminalreporter.write_line(line)
+    profiler = config.stash.get(trace_profiler_key, None)
+    if profiler is not None:
+        for profile in profiler.profiles:
+            for line in profile.summary_lines():
+                terminalreporter.write_line(line)
+        terminalreporter.write_line(f"trace logs, breakdowns and folded stacks: {profiler.output_dir}")
+
+
+@pytest.fixture(scope="session")
+def terraform_init(plan_broker):
+    """Fixture to ensure terraform is initialized"""
+    init_result = plan_broker.init()
     assert init_result.returncode == 0, f"Terraform init failed: {init_result.stderr}"
 
 
-@pytest.fixture(scope="function")
-def terraform_plan(terraform_examples_dir, terraform_init) -> Tuple[str, str, int]:
-    """Fixture to run terraform plan and return output"""
-    plan_result = subprocess.run(
-        ["terraform", "plan", "-no-color", "-input=false"],
-        cwd=terraform_examples_dir,
-        capture_output=True,
-        text=True
-    )
-    return plan_result.stdout, plan_result.stderr, plan_result.returncode
+@pytest.fixture(scope="session")
+def terraform_checks(request, plan_broker):
+    """Fixture running the fmt, validate and plan checks the selected tests need, concurrently"""
+    checks = {
+        check
+        for item in request.session.items
+        for fixture, check in CHECK_FIXTURES.items()
+        if fixture in getattr(item, "fixturenames", ())
+    }
+    return run_checks(plan_broker, checks, max_concurrency=request.config.getoption("terraform_concurrency"))
 
 
-@pytest.fixture(scope="function")
-def terraform_validate(terraform_examples_dir, terraform_init) -> Tuple[str, str, int]:
+@pytest.fixture(scope="session")
+def terraform_plan(plan_broker, terraform_checks) -> Tuple[str, str, int]:
+    """Fixture to run terraform plan (initializing on a cache miss) and return output"""
+    return plan_broker.plan()
+
+
+@pytest.fixture(scope="session")
+def terraform_plan_file(plan_broker, terraform_plan) -> Path:
+    """Fixture to get the binary plan file written by terraform plan"""
+    stdout, stderr, returncode = terraform_plan
+    if returncode != 0:
+        pytest.fail(f"Terraform plan failed: {stderr}")
+    return plan_broker.plan_file
+
+
+@pytest.fixture(scope="session")
+def terraform_plan_json(plan_broker, terraform_plan_file) -> dict:
+    """Fixture to get the JSON rendering of the saved plan"""
+    return plan_broker.plan_json()
+
+
+@pytest.fixture(scope="session")
+def terraform_validate(plan_broker, terraform_checks) -> Tuple[str, str, int]:
     """Fixture to run terraform validate"""
-    validate_result = subprocess.run(
-        ["terraform", "validate", "-no-color"],
-        cwd=terraform_examples_dir,
-        capture_output=True,
-        text=True
-    )
-    return validate_result.stdout, validate_result.stderr, validate_result.returncode
+    return plan_broker.validate()
 
 
-@pytest.fixture(scope="function")
-def terraform_fmt_check(terraform_examples_dir) -> Tuple[str, str, int]:
+@pytest.fixture(scope="session")
+def terraform_fmt_check(plan_broker, terraform_checks) -> Tuple[str, str, int]:
     """Fixture to run terraform fmt check"""
-    fmt_result = subprocess.run(
-        ["terraform", "fmt", "-check", "-no-color"],
-        cwd=terraform_examples_dir,
-        capture_output=True,
-        text=True
-    )
-    return fmt_result.stdout, fmt_result.stderr, fmt_result.returncode
+    return plan_broker.fmt_check()
 
 
-@pytest.fixture(scope="function")
-def parsed_plan_output(terraform_plan):
-    """Fixture to parse terraform plan output into structured data"""
-    stdout, stderr, returncode = terraform_plan
+@pytest.fixture(scope="session")
+def terraform_graph(plan_broker, terraform_checks) -> Tuple[str, str, int]:
+    """Fixture to run terraform graph"""
+    return plan_broker.graph()
 
+
+@pytest.fixture(scope="session")
+def dependency_graph(terraform_graph) -> DependencyGraph:
+    """Fixture with the resources of the example configuration and what each waits for on apply"""
+    stdout, stderr, returncode = terraform_graph
     if returncode != 0:
-        pytest.fail(f"Terraform plan failed: {stderr}")
+        pytest.fail(f"Terraform graph failed: {stderr}")
+    return DependencyGraph.from_dot(stdout)
 
-    # Parse the plan output to extract resource information
-    resources = []
-    lines = stdout.split('\n')
-    current_resource = None
-
-    for line in lines:
-        if line.startswith('  # module.batch_ecs.aws_'):
-            # Extract resource type and name
-            resource_match = re.search(r'aws_([^.]+)\.([^\s]+)', line)
-            if resource_match:
-                resource_type = resource_match.group(1)
-                resource_name = resource_match.group(2)
-                current_resource = {
-                    'type': resource_type,
-                    'name': resource_name,
-                    'attributes': []
-                }
-                resources.append(current_resource)
-        elif current_resource and line.strip().startswith('+') and '=' in line:
-            # Extract attribute
-            attr_line = line.strip()[1:].strip()
-            if '=' in attr_line:
-                key, value = attr_line.split('=', 1)
-                current_resource['attributes'].append({
-                    'key': key.strip(),
-                    'value': value.strip()
-                })
 
-    return {
-        'resources': resources,
-        'plan_summary': extract_plan_summary(stdout)
-    }
+@pytest.fixture
+def assert_critical_path(dependency_graph):
+    """Fixture asserting that the apply's critical path stays within a budget"""
+    def check(max_depth: Optional[int] = None, max_length: Optional[float] = None,
+              weights: Optional[dict] = None):
+        path = dependency_graph.critical_path(weights)
+        report = "\n".join(dependency_graph.summary_lines())
+        if max_depth is not None:
+            assert len(path) <= max_depth, \
+                f"critical path is {len(path)} resources deep (budget {max_depth}):\n{report}"
+        if max_length is not None:
+            length = dependency_graph.critical_path_length(weights)
+            assert length <= max_length, f"critical path takes {length:g} (budget {max_length:g}):\n{report}"
+        return path
+    return check
+
+
+@pytest.fixture(scope="session")
+def workspace_pool(pytestconfig, plan_broker, terraform_examples_dir):
+    """Fixture handing out pre-initialized copies of the examples directory to parallel consumers"""
+    pool = WorkspacePool(terraform_examples_dir, pytestconfig.getoption("workspace_pool_size"))
+    result = pool.prepare(plan_broker.init)
+    if result.returncode != 0:
+        pool.close()
+        pytest.fail(f"Terraform init failed: {result.stderr}")
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def terraform_console(pytestconfig, plan_broker, terraform_examples_dir):
+    """Fixture with long-lived terraform console sessions evaluating expressions against the examples"""
+    pool = ConsolePool(terraform_examples_dir, pytestconfig.getoption("console_pool_size"))
+    result = pool.prepare(plan_broker.init)
+    if result.returncode != 0:
+        pool.close()
+        pytest.fail(f"Terraform init failed: {result.stderr}")
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="session")
+def apply_benchmark(pytestconfig, plan_broker, terraform_examples_dir, tmp_path_factory) -> ApplyBenchmark:
+    """Fixture applying and destroying the examples against the AWS emulator at each -parallelism value"""
+    init_result = plan_broker.init()
+    if init_result.returncode != 0:
+        pytest.fail(f"Terraform init failed: {init_result.stderr}")
+    benchmark = ApplyBenchmark(terraform_examples_dir, tmp_path_factory.mktemp("apply"),
+                               pytestconfig.getoption("aws_endpoint"))
+    pytestconfig.stash[apply_benchmark_key] = benchmark
+    benchmark.sweep([int(value) for value in pytestconfig.getoption("apply_parallelism").split(",") if value.strip()])
+    report_path = pytestconfig.getoption("apply_report")
+    if report_path is None:
+        # Without the cache provider the report goes to the session's temporary directory
+        pytest_cache = getattr(pytestconfig, "cache", None)
+        if pytest_cache is None:
+            report_path = tmp_path_factory.mktemp("terraform-apply") / "report.json"
+        else:
+            report_path = pytest_cache.mkdir("terraform-apply") / "report.json"
+    benchmark.write_report(report_path)
+    return benchmark
+
+
+@pytest.fixture(scope="session")
+def variant_plans(pytestconfig, terraform_examples_dir, tmp_path_factory, provider_mirror, shared_state):
+    """Fixture planning every configuration variant of the example concurrently"""
+    pytest_cache = getattr(pytestconfig, "cache", None)
+    if provider_mirror is not None:
+        plugin_cache_dir = provider_mirror.plugin_cache_dir
+    elif pytest_cache is not None:
+        plugin_cache_dir = pytest_cache.mkdir("terraform-plugin-cache")
+    else:
+        # Without the cache provider the variants still share one plugin cache for the session
+        plugin_cache_dir = tmp_path_factory.mktemp("terraform-plugin-cache")
+    matrix = VariantMatrix(
+        terraform_examples_dir,
+        tmp_path_factory.mktemp("variants"),
+        plugin_cache_dir,
+        max_workers=pytestconfig.getoption("variant_workers"),
+    )
+    # Under pytest-xdist one worker plans the matrix and the others load its plans
+    stored = shared_state.root / "variant-plans.json"
+    with shared_state.lock("variant-plans"):
+        if stored.exists():
+            return load_variant_plans(stored)
+        plans = matrix.plan_all(configuration_variants())
+        save_variant_plans(plans, stored)
+    return plans
 
 
-def extract_plan_summary(plan_output: str) -> dict:
-    """Extract plan summary information"""
-    summary = {}
+@pytest.fixture(scope="session")
+def static_configuration(terraform_examples_dir) -> StaticConfiguration:
+    """Fixture evaluating the module as the example instantiates it, without running terraform"""
+    return StaticConfiguration.from_example(terraform_examples_dir)
+
+
+@pytest.fixture(scope="session")
+def workflow_registry() -> WorkflowRegistry:
+    """Fixture parsing the GitHub Actions workflows once, re-parsing a file only if it changes"""
+    return WorkflowRegistry(WORKFLOWS_DIR)
+
+
+@pytest.fixture(scope="session")
+def parsed_plan_output(terraform_plan_json) -> PlanModel:
+    """Fixture to index the JSON plan by resource address, type and module"""
+    return PlanModel.from_json(terraform_plan_json)
+
 
-    # Find the plan summary line
-    for line in plan_output.split('\n'):
-        if 'Plan:' in line and 'to add' in line:
-            # Extract numbers using regex
-            add_match = re.search(r'(\d+) to add', line)
-            change_match = re.search(r'(\d+) to change', line)
-            destroy_match = re.search(r'(\d+) to destroy', line)
+@pytest.fixture(scope="session")
+def plan_documents(parsed_plan_output) -> PlanDocuments:
+    """Fixture with the plan's embedded JSON documents decoded once and indexed (IAM actions, containers)"""
+    return PlanDocuments(parsed_plan_output)
+
+
+@pytest.fixture(scope="session")
+def plan_snapshot(terraform_plan_json) -> PlanSnapshot:
+    """Fixture with the normalized, per-resource hashed snapshot of the current plan"""
+    return PlanSnapshot.from_plan(terraform_plan_json)
+
+
+@pytest.fixture(scope="session")
+def golden_plan_snapshot(request, shared_state) -> PlanSnapshot:
+    """Fixture with the stored golden snapshot, rewritten from the current plan under --snapshot-update"""
+    path = SNAPSHOT_DIR / "example_plan.json"
+    if request.config.getoption("snapshot_update"):
+        snapshot = request.getfixturevalue("plan_snapshot")
+        # Under pytest-xdist only the first worker to get here rewrites the file
+        with shared_state.lock("snapshot-update"):
+            written = shared_state.root / "snapshot-updated"
+            if not written.exists():
+                snapshot.save(path)
+                written.touch()
+        return snapshot
+    if not path.exists():
+        pytest.fail(f"No golden plan snapshot at {path}; create it with pytest --snapshot-update", pytrace=False)
+    return PlanSnapshot.load(path)
 
-            summary['add'] = int(add_match.group(1)) if add_match else 0
-            summary['change'] = int(change_match.group(1)) if change_match else 0
-            summary['destroy'] = int(destroy_match.group(1)) if destroy_match else 0
-            break
 
-    return summary
+@pytest.fixture
+def assert_plan_snapshot(plan_snapshot, golden_plan_snapshot):
+    """Fixture asserting that the plan matches the golden snapshot, reporting only changed resources"""
+    def check():
+        diff = golden_plan_snapshot.compare(plan_snapshot)
+        assert not diff, "Plan differs from the golden snapshot (update with pytest --snapshot-update):\n" + \
+            "\n".join(diff.report())
+    return check
 
 
 @pytest.fixture(scope="function")
@@ -0,0 +1 @@
+# Terraform test harness helpers shared by the fixtures in conftest.py
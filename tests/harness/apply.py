@@ -0,0 +1,208 @@
+"""Apply and destroy latency of the example configuration against a local AWS emulator.
+
+``ApplyBenchmark`` clones the initialized examples workspace once per
+``-parallelism`` value, points the ``aws`` providers (the module's, from
+``mock-credentials.tf``, and the example's) at an emulator such as LocalStack
+through ``_override.tf.json`` files, then applies and destroys with
+``-json`` so every resource's create and destroy time can be read from the
+machine-readable UI events.
+"""
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .runner import TerraformResult, run_terraform
+from .static import ModuleConfig
+from .workspace import clone_workspace
+
+ENDPOINT_OVERRIDE_FILE = "endpoints_override.tf.json"
+
+# Provider endpoint names (AWS provider 4.x) for the resource type prefixes the module uses
+SERVICE_ENDPOINTS = {
+    "aws_batch_": "batch",
+    "aws_cloudwatch_event_": "cloudwatchevents",
+    "aws_cloudwatch_log_": "cloudwatchlogs",
+    "aws_ecs_": "ecs",
+    "aws_guardduty_": "guardduty",
+    "aws_iam_": "iam",
+    "aws_inspector2_": "inspector2",
+}
+
+
+def endpoint_services(module_dir: Path) -> List[str]:
+    """Endpoints the module's resources talk to, plus STS which the provider always uses"""
+    services = {"sts"}
+    for address in ModuleConfig.load(module_dir).resources:
+        for prefix, service in SERVICE_ENDPOINTS.items():
+            if address.startswith(prefix):
+                services.add(service)
+    return sorted(services)
+
+
+def endpoint_override(endpoint: str, services: Iterable[str]) -> dict:
+    """Override merged into the default ``aws`` provider block so every call goes to ``endpoint``"""
+    return {
+        "provider": {
+            "aws": {
+                "endpoints": {service: endpoint for service in services},
+                "s3_use_path_style": True,
+                "skip_metadata_api_check": True,
+                "skip_region_validation": True,
+            },
+        },
+    }
+
+
+def write_endpoint_overrides(examples_dir: Path, endpoint: str) -> List[Path]:
+    """Point the module's and the example's ``aws`` providers at ``endpoint``"""
+    examples_dir = Path(examples_dir)
+    override = json.dumps(endpoint_override(endpoint, endpoint_services(examples_dir.parent)), indent=2,
+                          sort_keys=True)
+    paths = [examples_dir.parent / ENDPOINT_OVERRIDE_FILE, examples_dir / ENDPOINT_OVERRIDE_FILE]
+    for path in paths:
+        path.write_text(override, encoding="utf-8")
+    return paths
+
+
+class ResourceTiming(NamedTuple):
+    """How long terraform took to create, update or destroy one resource instance"""
+    address: str
+    action: str
+    seconds: float
+    succeeded: bool
+
+
+def _timestamp(event: dict) -> Optional[float]:
+    value = event.get("@timestamp")
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def parse_apply_events(lines: Iterable[str]) -> List[ResourceTiming]:
+    """Per-resource timings from the ``-json`` output of ``terraform apply`` or ``destroy``.
+
+    Start and completion events are paired by address and action; their
+    ``@timestamp``s give sub-second durations, with the rounded
+    ``elapsed_seconds`` of the completion event as the fallback.
+    """
+    started: Dict[tuple, Optional[float]] = {}
+    timings = []
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        kind = event.get("type")
+        hook = event.get("hook") or {}
+        address = (hook.get("resource") or {}).get("addr")
+        if kind not in ("apply_start", "apply_complete", "apply_errored") or address is None:
+            continue
+        key = (address, hook.get("action"))
+        if kind == "apply_start":
+            started[key] = _timestamp(event)
+            continue
+        begin, end = started.pop(key, None), _timestamp(event)
+        seconds = end - begin if begin is not None and end is not None else float(hook.get("elapsed_seconds", 0))
+        timings.append(ResourceTiming(address, hook.get("action") or "", seconds, kind == "apply_complete"))
+    return timings
+
+
+class ApplyRun(NamedTuple):
+    """One ``apply`` or ``destroy`` at a given ``-parallelism``"""
+    operation: str
+    parallelism: int
+    wall_seconds: float
+    result: TerraformResult
+    resources: List[ResourceTiming]
+
+    @property
+    def succeeded(self) -> bool:
+        return self.result.returncode == 0 and all(timing.succeeded for timing in self.resources)
+
+    def to_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "parallelism": self.parallelism,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "returncode": self.result.returncode,
+            "resources": [
+                {"address": timing.address, "action": timing.action, "seconds": round(timing.seconds, 3),
+                 "succeeded": timing.succeeded}
+                for timing in sorted(self.resources, key=lambda timing: -timing.seconds)
+            ],
+        }
+
+
+class ApplyBenchmark:
+    """Applies and destroys the example configuration at several ``-parallelism`` values.
+
+    Each value gets its own workspace and state, and values run one after
+    another so they do not compete for the emulator. Destroy runs even when
+    apply fails, to leave the emulator empty for the next value.
+    """
+
+    def __init__(self, examples_dir: Path, root: Path, endpoint: str,
+                 runner: Callable[..., TerraformResult] = run_terraform):
+        self.examples_dir = Path(examples_dir)
+        self.root = Path(root)
+        self.endpoint = endpoint
+        self.runner = runner
+        self.runs: List[ApplyRun] = []
+
+    def prepare(self, parallelism: int) -> Path:
+        """Clone the initialized examples for one run and point them at the emulator"""
+        examples = clone_workspace(self.examples_dir, self.root / f"parallelism-{parallelism}")
+        write_endpoint_overrides(examples, self.endpoint)
+        return examples
+
+    def _run(self, operation: str, parallelism: int, workspace: Path) -> ApplyRun:
+        args = [operation, "-auto-approve", "-input=false", "-no-color", "-json", f"-parallelism={parallelism}"]
+        started = time.perf_counter()
+        result = self.runner(args, workspace)
+        run = ApplyRun(operation, parallelism, time.perf_counter() - started, result,
+                       parse_apply_events(result.stdout.splitlines()))
+        self.runs.append(run)
+        return run
+
+    def run(self, parallelism: int) -> List[ApplyRun]:
+        """Apply then destroy at ``parallelism``"""
+        workspace = self.prepare(parallelism)
+        return [self._run("apply", parallelism, workspace), self._run("destroy", parallelism, workspace)]
+
+    def sweep(self, values: Sequence[int]) -> List[ApplyRun]:
+        for parallelism in values:
+            self.run(parallelism)
+        return self.runs
+
+    def report(self) -> dict:
+        return {
+            "endpoint": self.endpoint,
+            "runs": [run.to_dict() for run in self.runs],
+            "wall_seconds": {
+                f"{run.operation} -parallelism={run.parallelism}": round(run.wall_seconds, 3) for run in self.runs
+            },
+        }
+
+    def write_report(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for run in self.runs:
+            slowest = max(run.resources, key=lambda timing: timing.seconds, default=None)
+            detail = f", slowest {slowest.address} {slowest.seconds:.1f}s" if slowest else ""
+            status = "ok" if run.succeeded else f"failed ({run.result.returncode})"
+            lines.append(f"{run.operation:>7} -parallelism={run.parallelism:<3} {run.wall_seconds:7.1f}s "
+                         f"{len(run.resources):3d} resources {status}{detail}")
+        return lines
@@ -0,0 +1,261 @@
+import json
+import shutil
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .cache import PlanCache, fingerprint_files, module_input_files
+from .handoff import PlanHandoff
+from .runner import TerraformResult, describe_version, run_terraform, terraform_binary
+from .shared import SharedState
+from .timing import cache_status, record_invocation
+from .workspace import ensure_init
+
+Runner = Callable[[Sequence[str], Path], TerraformResult]
+
+
+class PlanBroker:
+    """Runs init, plan and show once per session and shares the results.
+
+    Every consumer (the ``terraform_plan`` fixture, ``parsed_plan_output`` and
+    the class fixtures in ``test_terraform_plan.py``) asks the broker instead of
+    spawning terraform itself, so the session pays for exactly one init and one
+    plan no matter how many tests read the output.
+
+    With a ``PlanCache`` the broker also replays validate, plan and show from
+    previous sessions when the module inputs and terraform version are
+    unchanged, without spawning terraform or even initializing.
+
+    Each command is memoized under its own lock, so ``run_checks`` can drive
+    validate, fmt and plan from concurrent threads and init still runs once.
+    With ``SharedState`` the same holds across pytest-xdist workers: init and
+    every command run under a file lock and their results are shared.
+
+    With a ``PlanHandoff`` whose fingerprint matches the sources and whose
+    terraform version matches the binary, init, plan and show are served from
+    the files a CI step already produced.
+    ``handoff_status`` says whether the hand-off was used or why it was not.
+    """
+
+    PLAN_FILE_NAME = "tfplan"
+
+    def __init__(self, working_dir: Path, artifacts_dir: Path, runner: Runner = run_terraform,
+                 cache: Optional[PlanCache] = None, shared: Optional[SharedState] = None,
+                 handoff: Optional[PlanHandoff] = None):
+        self.working_dir = Path(working_dir)
+        self.artifacts_dir = Path(artifacts_dir)
+        self.runner = runner
+        self.cache = cache
+        self.shared = shared
+        self.handoff = handoff
+        self.handoff_status: Optional[str] = None
+        self.invocations: List[List[str]] = []
+        self.cache_hits: List[List[str]] = []
+        self._fingerprint: Optional[str] = None
+        self._terraform_version: Optional[str] = None
+        self._init_result: Optional[TerraformResult] = None
+        self._plan_result: Optional[TerraformResult] = None
+        self._show_result: Optional[TerraformResult] = None
+        self._plan_json: Optional[dict] = None
+        self._validate_result: Optional[TerraformResult] = None
+        self._fmt_result: Optional[TerraformResult] = None
+        self._graph_result: Optional[TerraformResult] = None
+        # One lock per memoized command, so concurrent callers share a single run
+        self._locks = {
+            name: threading.Lock()
+            for name in ("version", "handoff", "init", "plan", "show", "validate", "fmt", "graph")
+        }
+
+    def _run(self, args: Sequence[str]) -> TerraformResult:
+        self.invocations.append(list(args))
+        return self.runner(list(args), self.working_dir)
+
+    def terraform_version(self) -> str:
+        """Version and platform of the terraform binary, queried once.
+
+        With a ``PlanCache`` the version is remembered per binary (path, mtime
+        and size), so a session replaying from the cache spawns no terraform.
+        """
+        with self._locks["version"]:
+            if self._terraform_version is not None:
+                return self._terraform_version
+            binary = terraform_binary() if self.cache is not None else None
+            if binary is not None:
+                self._terraform_version = self.cache.terraform_version(binary)
+            if self._terraform_version is None:
+                result = self._run(["version", "-json"])
+                self._terraform_version = describe_version(result)
+                if binary is not None and result.returncode == 0 and self._terraform_version:
+                    self.cache.put_terraform_version(binary, self._terraform_version)
+        return self._terraform_version
+
+    def fingerprint(self) -> str:
+        """Hash of the module inputs and terraform version that determine every result"""
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint_files(
+                module_input_files(self.working_dir),
+                self.working_dir.parent,
+                [self.terraform_version()],
+            )
+        return self._fingerprint
+
+    def _usable_handoff(self) -> Optional[PlanHandoff]:
+        """The hand-off, checked against the sources once, if it can replace terraform"""
+        with self._locks["handoff"]:
+            if self.handoff is not None and self.handoff_status is None:
+                problem = self.handoff.mismatch(self.working_dir, self.terraform_version())
+                self.handoff_status = "used" if problem is None else f"ignored ({problem})"
+        return self.handoff if self.handoff_status == "used" else None
+
+    def _replay_handoff(self, key_args: Sequence[str], result: TerraformResult) -> TerraformResult:
+        record_invocation(key_args, self.working_dir, 0.0, result.returncode, cache="handoff")
+        return result
+
+    def _shared_lock(self, name: str):
+        """Cross-process lock held while ``name`` is looked up, run and stored, if workers share state"""
+        if self.shared is None:
+            return nullcontext()
+        return self.shared.lock(f"{self.shared.scope(self.working_dir)}-{name}")
+
+    def _lookup(self, key_args: Sequence[str], artifacts: Dict[str, Path]) -> Optional[TerraformResult]:
+        """Replay a stored result from the session-shared store or the persistent cache"""
+        started = time.perf_counter()
+        for store, label in ((self.shared and self.shared.store, "shared"), (self.cache, "hit")):
+            if store is None:
+                continue
+            entry = store.get(store.key(self.fingerprint(), key_args))
+            if entry is not None:
+                entry.restore(artifacts)
+                self.cache_hits.append(list(key_args))
+                record_invocation(key_args, self.working_dir, time.perf_counter() - started,
+                                  entry.result.returncode, cache=label)
+                return entry.result
+        return None
+
+    def _run_cached(self, args: Sequence[str], key_args: Sequence[str],
+                    artifacts: Optional[Dict[str, Path]] = None,
+                    requires_init: bool = True) -> TerraformResult:
+        """Replay ``args`` from a store, or run it (initializing first if needed) and store it.
+
+        ``key_args`` identifies the invocation without session-specific paths.
+        With shared state the whole lookup-run-store sequence holds a
+        cross-process lock, so one worker runs the command and the rest
+        replay its result.
+        """
+        artifacts = artifacts or {}
+        with self._shared_lock(key_args[0]):
+            if self.shared is not None:
+                # Another worker may have initialized, and written the lock file, while we waited
+                self._fingerprint = None
+            if self.cache is not None or self.shared is not None:
+                result = self._lookup(key_args, artifacts)
+                if result is not None:
+                    return result
+
+            if requires_init:
+                init_result = self.init()
+                if init_result.returncode != 0:
+                    return init_result
+
+            with cache_status(None if self.cache is None else "miss"):
+                result = self._run(args)
+            # init may have just written the lock file, which is part of the fingerprint
+            self._fingerprint = None
+            if self.shared is not None:
+                # Failures too, so the other workers report them instead of retrying
+                self.shared.store.put(self.shared.store.key(self.fingerprint(), key_args), result, artifacts)
+            if self.cache is not None and result.returncode == 0:
+                self.cache.put(self.cache.key(self.fingerprint(), key_args), result, artifacts)
+        return result
+
+    @property
+    def invocation_count(self) -> int:
+        """Number of terraform processes this broker has launched"""
+        return len(self.invocations)
+
+    @property
+    def plan_file(self) -> Path:
+        """Path of the binary plan written by ``terraform plan -out``"""
+        return self.artifacts_dir / self.PLAN_FILE_NAME
+
+    def init(self) -> TerraformResult:
+        """Run ``terraform init`` once, and not at all while the init fingerprint is unchanged"""
+        with self._locks["init"], self._shared_lock("init"):
+            if self._init_result is None:
+                handoff = self._usable_handoff()
+                if handoff is not None:
+                    self._init_result = handoff.adopt_data_dir(self.working_dir)
+            if self._init_result is None:
+                self._init_result = ensure_init(self.working_dir, self._run)
+        return self._init_result
+
+    def plan(self) -> TerraformResult:
+        """Run ``terraform plan`` once, saving the binary plan to ``plan_file``"""
+        with self._locks["plan"]:
+            if self._plan_result is None:
+                self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+                plan_args = ["plan", "-no-color", "-input=false"]
+                handoff = self._usable_handoff()
+                if handoff is not None:
+                    shutil.copyfile(handoff.plan_file, self.plan_file)
+                    self._plan_result = self._replay_handoff(plan_args, handoff.plan_result())
+                    return self._plan_result
+                self._plan_result = self._run_cached(
+                    [*plan_args, f"-out={self.plan_file}"],
+                    plan_args,
+                    artifacts={self.PLAN_FILE_NAME: self.plan_file},
+                )
+        return self._plan_result
+
+    def show(self) -> TerraformResult:
+        """Render the saved plan with ``terraform show -json`` once"""
+        with self._locks["show"]:
+            if self._show_result is None:
+                plan_result = self.plan()
+                if plan_result.returncode != 0:
+                    self._show_result = plan_result
+                    return self._show_result
+                handoff = self._usable_handoff()
+                if handoff is not None:
+                    self._show_result = self._replay_handoff(["show", "-json", "-no-color"], handoff.show_result())
+                    return self._show_result
+                self._show_result = self._run_cached(
+                    ["show", "-json", "-no-color", str(self.plan_file)],
+                    ["show", "-json", "-no-color"],
+                )
+        return self._show_result
+
+    def plan_json(self) -> dict:
+        """Decoded JSON rendering of the saved plan"""
+        if self._plan_json is None:
+            show_result = self.show()
+            if show_result.returncode != 0:
+                raise RuntimeError(f"Terraform show failed: {show_result.stderr}")
+            self._plan_json = json.loads(show_result.stdout)
+        return self._plan_json
+
+    def validate(self) -> TerraformResult:
+        """Run ``terraform validate`` once"""
+        with self._locks["validate"]:
+            if self._validate_result is None:
+                args = ["validate", "-no-color"]
+                self._validate_result = self._run_cached(args, args)
+        return self._validate_result
+
+    def fmt_check(self) -> TerraformResult:
+        """Run ``terraform fmt -check`` once; it does not need an initialized directory"""
+        with self._locks["fmt"]:
+            if self._fmt_result is None:
+                args = ["fmt", "-check", "-no-color"]
+                self._fmt_result = self._run_cached(args, args, requires_init=False)
+        return self._fmt_result
+
+    def graph(self) -> TerraformResult:
+        """Render the dependency graph with ``terraform graph`` once"""
+        with self._locks["graph"]:
+            if self._graph_result is None:
+                args = ["graph"]
+                self._graph_result = self._run_cached(args, args)
+        return self._graph_result
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .runner import TerraformResult
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def module_input_files(examples_dir: Path) -> List[Path]:
+    """Files whose content determines the outcome of validate and plan"""
+    examples_dir = Path(examples_dir)
+    module_dir = examples_dir.parent
+    files = sorted(module_dir.glob("*.tf")) + sorted(examples_dir.glob("*.tf"))
+    files.append(examples_dir / "terraform.tfvars")
+    files.append(examples_dir / ".terraform.lock.hcl")
+    return files
+
+
+def fingerprint_files(files: Iterable[Path], root: Path, extra: Sequence[str] = ()) -> str:
+    """Hash file names and contents (missing files hash as absent) plus extra strings"""
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(str(Path(path).relative_to(root)).encode())
+        digest.update(b"\0")
+        try:
+            digest.update(Path(path).read_bytes())
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+    for value in extra:
+        digest.update(value.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class CacheEntry:
+    """A stored terraform result plus the artifact files it produced"""
+
+    def __init__(self, path: Path, result: TerraformResult):
+        self.path = path
+        self.result = result
+
+    def restore(self, artifacts: Dict[str, Path]):
+        """Copy stored artifacts back to the paths the caller expects"""
+        for name, destination in artifacts.items():
+            source = self.path / "artifacts" / name
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, destination)
+
+
+class PlanCache:
+    """Content-addressed on-disk store of terraform results with LRU eviction.
+
+    Entries are directories named by the cache key holding ``result.json`` and
+    any artifact files. The mtime of ``result.json`` is bumped on every hit and
+    serves as the LRU clock, so eviction survives across sessions.
+    """
+
+    RESULT_FILE = "result.json"
+    VERSIONS_FILE = "terraform-versions.json"
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(fingerprint: str, args: Sequence[str]) -> str:
+        """Cache key for an invocation against a given input fingerprint"""
+        return hashlib.sha256("\0".join([fingerprint, *args]).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for ``key`` and mark it as recently used"""
+        entry_dir = self.root / key
+        result_file = entry_dir / self.RESULT_FILE
+        try:
+            data = json.loads(result_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        missing = [name for name in data.get("artifacts", []) if not (entry_dir / "artifacts" / name).exists()]
+        if missing:
+            return None
+        os.utime(result_file)
+        return CacheEntry(entry_dir, TerraformResult(data["stdout"], data["stderr"], data["returncode"]))
+
+    def put(self, key: str, result: TerraformResult, artifacts: Optional[Dict[str, Path]] = None) -> CacheEntry:
+        """Store a result and copies of its artifacts, then evict down to the size bound"""
+        artifacts = artifacts or {}
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=self.root))
+        (staging / "artifacts").mkdir()
+        for name, source in artifacts.items():
+            shutil.copyfile(source, staging / "artifacts" / name)
+        (staging / self.RESULT_FILE).write_text(json.dumps({
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "returncode": result.returncode,
+            "artifacts": sorted(artifacts),
+        }), encoding="utf-8")
+
+        entry_dir = self.root / key
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(staging, entry_dir)
+        self.evict()
+        return CacheEntry(entry_dir, result)
+
+    def terraform_version(self, binary: str) -> Optional[str]:
+        """Version recorded for ``binary`` (as identified by ``terraform_binary``), if any"""
+        try:
+            return json.loads((self.root / self.VERSIONS_FILE).read_text(encoding="utf-8")).get(binary)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put_terraform_version(self, binary: str, version: str):
+        """Record the version of ``binary`` so later sessions need not run ``terraform version``"""
+        path = self.root / self.VERSIONS_FILE
+        try:
+            versions = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            versions = {}
+        versions[binary] = version
+        staging = path.with_name(f".staging-{os.getpid()}-{path.name}")
+        staging.write_text(json.dumps(versions, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(staging, path)
+
+    def entries(self) -> List[Path]:
+        """Entry directories, least recently used first"""
+        entries = [
+            path for path in self.root.iterdir()
+            if path.is_dir() and not path.name.startswith(".staging-") and (path / self.RESULT_FILE).exists()
+        ]
+        return sorted(entries, key=lambda path: (path / self.RESULT_FILE).stat().st_mtime)
+
+    @staticmethod
+    def entry_size(path: Path) -> int:
+        size = 0
+        for file in path.rglob("*"):
+            try:
+                if file.is_file():
+                    size += file.stat().st_size
+            except FileNotFoundError:
+                # evicted by a concurrent put
+                pass
+        return size
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in ``max_bytes``"""
+        entries = self.entries()
+        sizes = {path: self.entry_size(path) for path in entries}
+        total = sum(sizes.values())
+        # Never evict the newest entry, even if it alone exceeds the bound
+        for path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= sizes[path]
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Sequence, TextIO
+
+from .broker import PlanBroker
+from .runner import TerraformResult, run_terraform
+
+# Broker calls behind each check; "show" renders the plan and implies "plan"
+CHECKS: Dict[str, Callable[[PlanBroker], TerraformResult]] = {
+    "fmt_check": PlanBroker.fmt_check,
+    "graph": PlanBroker.graph,
+    "plan": PlanBroker.plan,
+    "show": PlanBroker.show,
+    "validate": PlanBroker.validate,
+}
+
+# Start order: fmt needs no init, and the plan is the long pole, so begin it early
+START_ORDER = ("fmt_check", "show", "plan", "validate", "graph")
+
+
+def check_order(checks: Iterable[str]) -> list:
+    """Checks to launch, in start order, with ``plan`` folded into ``show``"""
+    checks = set(checks)
+    unknown = checks - set(CHECKS)
+    if unknown:
+        raise ValueError(f"unknown checks: {sorted(unknown)}")
+    if "show" in checks:
+        checks.discard("plan")
+    return [name for name in START_ORDER if name in checks]
+
+
+async def gather_checks(broker: PlanBroker, checks: Iterable[str],
+                        max_concurrency: Optional[int] = None) -> Dict[str, TerraformResult]:
+    """Run the broker's checks in threads, at most ``max_concurrency`` at a time.
+
+    Nothing here waits on init explicitly: validate and plan initialize
+    through the broker (once, and not at all on a cache hit) while fmt starts
+    immediately.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or os.cpu_count() or 1))
+
+    async def run(name: str):
+        async with semaphore:
+            return name, await asyncio.to_thread(CHECKS[name], broker)
+
+    results = dict(await asyncio.gather(*(run(name) for name in check_order(checks))))
+    if "show" in results:
+        results["plan"] = broker.plan()
+    return results
+
+
+def run_checks(broker: PlanBroker, checks: Iterable[str],
+               max_concurrency: Optional[int] = None) -> Dict[str, TerraformResult]:
+    """Blocking entry point for ``gather_checks``"""
+    return asyncio.run(gather_checks(broker, checks, max_concurrency))
+
+
+def streaming_runner(stream: TextIO) -> Callable[..., TerraformResult]:
+    """A ``run_terraform`` that also echoes output as ``[terraform <command>] line`` to ``stream``"""
+    lock = threading.Lock()
+
+    def run(args: Sequence[str], cwd: Path, env: Optional[dict] = None) -> TerraformResult:
+        prefix = f"[terraform {args[0] if args else ''}]"
+
+        def print_line(name: str, line: str):
+            with lock:
+                stream.write(f"{prefix}{' (stderr)' if name == 'stderr' else ''} {line.rstrip()}\n")
+                stream.flush()
+
+        return run_terraform(args, cwd, env, on_output=print_line)
+
+    return run
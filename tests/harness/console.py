@@ -0,0 +1,251 @@
+"""Long-lived ``terraform console`` processes for evaluating expressions in batches.
+
+Reading piped input, ``terraform console`` evaluates one expression per line
+and prints each result on stdout, so a single process (which loads the
+configuration and provider schemas once) can answer any number of
+expressions in milliseconds each. Every expression is wrapped in
+``jsonencode(...)`` so its result is one quoted line that decodes back to
+Python values. On the first failing expression the console prints the
+diagnostics to stderr and exits; the session raises ``ConsoleError`` and
+starts a fresh process for the next batch.
+"""
+import json
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+from .runner import TerraformResult
+from .timing import record_invocation
+from .workspace import WorkspacePool
+
+
+class _Placeholder:
+    """A value terraform cannot show, such as an attribute known only after apply"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self) -> str:
+        return self.text
+
+
+UNKNOWN = _Placeholder("(known after apply)")
+SENSITIVE = _Placeholder("(sensitive value)")
+PLACEHOLDERS = {placeholder.text: placeholder for placeholder in (UNKNOWN, SENSITIVE)}
+
+
+class ConsoleError(Exception):
+    """Raised when terraform console cannot evaluate an expression"""
+
+    def __init__(self, expression: str, diagnostics: str):
+        super().__init__(f"{expression}: {diagnostics.strip() or 'terraform console exited'}")
+        self.expression = expression
+        self.diagnostics = diagnostics
+
+
+def console_input(expression: str) -> str:
+    """The line sent for ``expression``: JSON-encoded, and on one line since the console reads line by line"""
+    return f"jsonencode({' '.join(expression.split())})\n"
+
+
+def parse_console_value(line: str) -> Any:
+    """Decode the console's rendering of a ``jsonencode`` result"""
+    line = line.strip()
+    if line in PLACEHOLDERS:
+        return PLACEHOLDERS[line]
+    return json.loads(json.loads(line))
+
+
+class ConsoleSession:
+    """One ``terraform console`` process kept open over a pipe.
+
+    The process starts on first use (or ``start()``) in ``working_dir``, which
+    must already be initialized, and lives until ``close()``. ``args`` are
+    passed through, e.g. ``["-plan"]`` to evaluate against planned values.
+    Sessions are thread safe, but one session evaluates one batch at a time;
+    use a ``ConsolePool`` for parallel callers.
+    """
+
+    def __init__(self, working_dir: Path, args: Sequence[str] = (), env: Optional[dict] = None):
+        self.working_dir = Path(working_dir)
+        self.args = list(args)
+        self.env = env
+        self.processes_started = 0
+        self.expressions_evaluated = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._stderr: List[str] = []
+        self._stderr_reader: Optional[threading.Thread] = None
+        self._started_at = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Launch the console process unless it is already running"""
+        if self._process is not None:
+            if self._process.poll() is None:
+                return
+            self._stop()
+        self._process = subprocess.Popen(
+            ["terraform", "console", "-no-color", *self.args],
+            cwd=self.working_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=self.env,
+        )
+        self._started_at = time.perf_counter()
+        self.processes_started += 1
+        # Drain stderr continuously so warnings cannot fill the pipe and stall the console
+        self._stderr = []
+        self._stderr_reader = threading.Thread(
+            target=lambda stream, chunks: chunks.extend(stream), args=(self._process.stderr, self._stderr),
+            daemon=True,
+        )
+        self._stderr_reader.start()
+
+    def _stop(self, timeout: float = 10.0, kill: bool = False) -> TerraformResult:
+        """End the process, record it for the timing report and return what it wrote to stderr"""
+        process, self._process = self._process, None
+        if kill:
+            process.kill()
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            returncode = process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            returncode = process.wait()
+        self._stderr_reader.join()
+        process.stdout.close()
+        process.stderr.close()
+        record_invocation(["console", *self.args], self.working_dir, time.perf_counter() - self._started_at,
+                          returncode)
+        return TerraformResult("", "".join(self._stderr), returncode)
+
+    @staticmethod
+    def _write(process: subprocess.Popen, lines: List[str]):
+        try:
+            process.stdin.write("".join(lines))
+            process.stdin.flush()
+        except (OSError, ValueError):
+            # The console exited on an error (or was stopped); the reader reports it
+            pass
+
+    def evaluate_batch(self, expressions: Sequence[str]) -> List[Any]:
+        """Evaluate ``expressions`` in order and return their values.
+
+        Raises ``ConsoleError`` for the first expression that fails; the
+        results of the expressions before it are discarded.
+        """
+        with self._lock:
+            self.start()
+            process = self._process
+            # Write from a thread so a long batch cannot deadlock against unread output
+            writer = threading.Thread(target=self._write, args=(process, [console_input(e) for e in expressions]),
+                                      daemon=True)
+            writer.start()
+            values = []
+            for expression in expressions:
+                line = process.stdout.readline()
+                if not line:
+                    writer.join()
+                    raise ConsoleError(expression, self._stop().stderr)
+                try:
+                    values.append(parse_console_value(line))
+                except ValueError:
+                    self._stop(kill=True)
+                    writer.join()
+                    raise ConsoleError(expression, f"unexpected console output: {line.strip()}")
+                self.expressions_evaluated += 1
+            writer.join()
+            return values
+
+    def evaluate(self, expression: str) -> Any:
+        """Evaluate a single expression"""
+        return self.evaluate_batch([expression])[0]
+
+    def close(self):
+        with self._lock:
+            if self._process is not None:
+                self._stop()
+
+    def __enter__(self) -> "ConsoleSession":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ConsolePool:
+    """A fixed set of console sessions, each over its own copy of the example configuration.
+
+    ``prepare()`` clones pre-initialized workspaces through a ``WorkspacePool``
+    (so consoles never contend for one state lock or ``.terraform``
+    directory) and starts a session in each. ``acquire()`` borrows a session;
+    ``evaluate_batch()`` spreads a batch over all of them.
+    """
+
+    def __init__(self, examples_dir: Path, size: int, args: Sequence[str] = (), root: Optional[Path] = None):
+        self.workspaces = WorkspacePool(examples_dir, size, root)
+        self.args = list(args)
+        self.sessions: List[ConsoleSession] = []
+        self._available: "queue.Queue[ConsoleSession]" = queue.Queue()
+
+    @property
+    def size(self) -> int:
+        return self.workspaces.size
+
+    def prepare(self, init: Callable[[], TerraformResult]) -> TerraformResult:
+        """Initialize the source once, clone it per session and start the consoles"""
+        result = self.workspaces.prepare(init)
+        if result.returncode != 0:
+            return result
+        for workspace in self.workspaces.workspaces:
+            session = ConsoleSession(workspace, self.args)
+            # Start every console now so they load the configuration concurrently
+            session.start()
+            self.sessions.append(session)
+            self._available.put(session)
+        return result
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[ConsoleSession]:
+        """Borrow a session for the duration of the ``with`` block"""
+        session = self._available.get(timeout=timeout)
+        try:
+            yield session
+        finally:
+            self._available.put(session)
+
+    def evaluate(self, expression: str) -> Any:
+        with self.acquire() as session:
+            return session.evaluate(expression)
+
+    def evaluate_batch(self, expressions: Sequence[str]) -> List[Any]:
+        """Evaluate ``expressions`` split into one chunk per session, in parallel, preserving order"""
+        expressions = list(expressions)
+        if not expressions:
+            return []
+        chunk_size = -(-len(expressions) // max(1, len(self.sessions)))
+        chunks = [expressions[start:start + chunk_size] for start in range(0, len(expressions), chunk_size)]
+
+        def run(chunk: List[str]) -> List[Any]:
+            with self.acquire() as session:
+                return session.evaluate_batch(chunk)
+
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            return [value for values in executor.map(run, chunks) for value in values]
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+        self.workspaces.close()
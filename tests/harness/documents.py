@@ -0,0 +1,239 @@
+"""Decoded JSON documents embedded in planned resources, with IAM and container indexes.
+
+ECS ``container_definitions``, Batch ``container_properties`` and IAM
+``policy``/``assume_role_policy`` arguments are JSON strings in the plan.
+``PlanDocuments`` decodes each of them once and indexes the result: IAM
+statements by action (``IamIndex``) and container definitions by container
+name (``ContainerDefinition``), so tests look up the statement or container
+they mean instead of searching the text of every document.
+"""
+import json
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .plan_model import PlanModel, ResourceChange
+
+# Arguments holding JSON documents, by resource type
+DOCUMENT_ATTRIBUTES = {
+    "aws_ecs_task_definition": ("container_definitions",),
+    "aws_batch_job_definition": ("container_properties",),
+    "aws_iam_policy": ("policy",),
+    "aws_iam_role": ("assume_role_policy",),
+    "aws_iam_role_policy": ("policy",),
+}
+POLICY_ATTRIBUTES = {"policy", "assume_role_policy"}
+
+
+def iam_match(value: str, pattern: str, ignore_case: bool = False) -> bool:
+    """IAM wildcard matching: ``*`` matches any run of characters and ``?`` any single one"""
+    expression = "".join(".*" if char == "*" else "." if char == "?" else re.escape(char) for char in pattern)
+    return re.fullmatch(expression, value, re.IGNORECASE if ignore_case else 0) is not None
+
+
+def _as_tuple(value: Any) -> Tuple[Any, ...]:
+    if value is None:
+        return ()
+    return tuple(value) if isinstance(value, list) else (value,)
+
+
+class PolicyStatement(NamedTuple):
+    """One statement of an IAM policy document, with ``Action``/``Resource`` always tuples"""
+    address: str
+    attribute: str
+    sid: Optional[str]
+    effect: str
+    actions: Tuple[str, ...]
+    not_actions: Tuple[str, ...]
+    resources: Tuple[str, ...]
+    principals: Dict[str, Tuple[str, ...]]
+    conditions: Dict[str, Any]
+
+    @classmethod
+    def from_json(cls, address: str, attribute: str, statement: dict) -> "PolicyStatement":
+        principal = statement.get("Principal") or {}
+        if not isinstance(principal, dict):
+            principal = {"AWS": principal}
+        return cls(
+            address=address,
+            attribute=attribute,
+            sid=statement.get("Sid"),
+            effect=statement.get("Effect", "Allow"),
+            actions=_as_tuple(statement.get("Action")),
+            not_actions=_as_tuple(statement.get("NotAction")),
+            resources=_as_tuple(statement.get("Resource")),
+            principals={kind: _as_tuple(value) for kind, value in principal.items()},
+            conditions=statement.get("Condition") or {},
+        )
+
+    def matches(self, action: str) -> bool:
+        """Whether the statement applies to ``action``, honouring IAM wildcards and ``NotAction``"""
+        if self.not_actions:
+            return not any(iam_match(action, pattern, ignore_case=True) for pattern in self.not_actions)
+        return any(iam_match(action, pattern, ignore_case=True) for pattern in self.actions)
+
+
+class IamIndex:
+    """Statements of every decoded IAM document, looked up by action"""
+
+    def __init__(self, statements: Iterable[PolicyStatement] = ()):
+        self.statements: List[PolicyStatement] = []
+        self._by_action: Dict[str, List[PolicyStatement]] = defaultdict(list)
+        self._wildcards: List[PolicyStatement] = []
+        for statement in statements:
+            self.add(statement)
+
+    def add(self, statement: PolicyStatement):
+        self.statements.append(statement)
+        if statement.not_actions or any(re.search(r"[*?]", action) for action in statement.actions):
+            self._wildcards.append(statement)
+        for action in statement.actions:
+            self._by_action[action.lower()].append(statement)
+
+    def granting(self, action: str, address: Optional[str] = None) -> List[PolicyStatement]:
+        """Statements that apply to ``action`` (literally or through a wildcard), optionally of one resource"""
+        found = list(self._by_action.get(action.lower(), ()))
+        found.extend(statement for statement in self._wildcards
+                     if statement not in found and statement.matches(action))
+        return [statement for statement in found if address is None or statement.address == address]
+
+    def allows(self, action: str, resource: str = "*", address: Optional[str] = None) -> bool:
+        """Whether some Allow statement covers ``action`` on ``resource`` and no Deny statement does"""
+        def covers(statement: PolicyStatement) -> bool:
+            return not statement.resources or any(iam_match(resource, pattern) for pattern in statement.resources)
+
+        statements = [statement for statement in self.granting(action, address) if covers(statement)]
+        return any(statement.effect == "Allow" for statement in statements) and \
+            not any(statement.effect == "Deny" for statement in statements)
+
+    def resources(self, action: str, effect: str = "Allow", address: Optional[str] = None) -> List[str]:
+        """Resources of the statements with ``effect`` that apply to ``action``"""
+        return sorted({
+            resource
+            for statement in self.granting(action, address) if statement.effect == effect
+            for resource in statement.resources
+        })
+
+    def actions(self, address: str, attribute: Optional[str] = None) -> List[str]:
+        """Actions named by the statements of one resource's documents"""
+        return sorted({
+            action
+            for statement in self.statements
+            if statement.address == address and attribute in (None, statement.attribute)
+            for action in statement.actions
+        })
+
+    def principals(self, address: str) -> Dict[str, List[str]]:
+        """Principals allowed to assume a role, by kind (``Service``, ``AWS``, ...)"""
+        found: Dict[str, set] = defaultdict(set)
+        for statement in self.statements:
+            if statement.address == address and statement.attribute == "assume_role_policy":
+                for kind, values in statement.principals.items():
+                    found[kind].update(values)
+        return {kind: sorted(values) for kind, values in found.items()}
+
+
+def _name_value_map(entries: Optional[List[dict]], value_key: str) -> Dict[str, Any]:
+    return {entry["name"]: entry.get(value_key) for entry in entries or () if "name" in entry}
+
+
+class ContainerDefinition(NamedTuple):
+    """One container from an ECS task definition or a Batch job definition"""
+    address: str
+    name: str
+    image: Optional[str]
+    environment: Dict[str, Any]
+    secrets: Dict[str, str]
+    ports: List[int]
+    document: dict
+
+    @classmethod
+    def from_json(cls, address: str, name: str, document: dict) -> "ContainerDefinition":
+        return cls(
+            address=address,
+            name=name,
+            image=document.get("image"),
+            environment=_name_value_map(document.get("environment"), "value"),
+            secrets=_name_value_map(document.get("secrets"), "valueFrom"),
+            ports=[mapping["containerPort"] for mapping in document.get("portMappings") or ()
+                   if "containerPort" in mapping],
+            document=document,
+        )
+
+    @property
+    def port_mappings(self) -> List[dict]:
+        return list(self.document.get("portMappings") or ())
+
+    @property
+    def log_configuration(self) -> dict:
+        return self.document.get("logConfiguration") or {}
+
+
+class PlanDocuments:
+    """Decoded embedded documents of one plan, with IAM and container indexes built once.
+
+    Documents only known after apply are listed in ``unknown`` rather than
+    decoded; documents that are not valid JSON are listed in ``invalid``.
+    """
+
+    def __init__(self, plan: PlanModel):
+        self.plan = plan
+        self.documents: Dict[Tuple[str, str], Any] = {}
+        self.unknown: List[Tuple[str, str]] = []
+        self.invalid: List[Tuple[str, str]] = []
+        self.iam = IamIndex()
+        self._containers: Dict[str, List[ContainerDefinition]] = defaultdict(list)
+        for change in plan:
+            for attribute in DOCUMENT_ATTRIBUTES.get(change.type, ()):
+                self._decode(change, attribute)
+
+    def _decode(self, change: ResourceChange, attribute: str):
+        key = (change.address, attribute)
+        if change.is_unknown(attribute):
+            self.unknown.append(key)
+            return
+        text = change.after.get(attribute)
+        if not isinstance(text, str):
+            return
+        try:
+            document = json.loads(text)
+        except ValueError:
+            self.invalid.append(key)
+            return
+        self.documents[key] = document
+        if attribute in POLICY_ATTRIBUTES and isinstance(document, dict):
+            for statement in _as_tuple(document.get("Statement")):
+                self.iam.add(PolicyStatement.from_json(change.address, attribute, statement))
+        elif attribute == "container_definitions":
+            for container in document:
+                self._add_container(ContainerDefinition.from_json(change.address, container.get("name", ""),
+                                                                  container))
+        elif attribute == "container_properties":
+            # Batch job definitions hold a single unnamed container; it goes by the job definition's name
+            name = change.after.get("name") or change.name
+            self._add_container(ContainerDefinition.from_json(change.address, name, document))
+
+    def _add_container(self, container: ContainerDefinition):
+        self._containers[container.name].append(container)
+
+    def document(self, address: str, attribute: str) -> Any:
+        """Decoded document of one resource argument (``KeyError`` if absent, unknown or invalid)"""
+        return self.documents[(address, attribute)]
+
+    def container(self, name: str, address: Optional[str] = None) -> ContainerDefinition:
+        """The container called ``name``; pass ``address`` when several resources define one"""
+        containers = [container for container in self._containers.get(name, ())
+                      if address is None or container.address == address]
+        if not containers:
+            raise KeyError(name)
+        if len(containers) > 1:
+            raise ValueError(f"container {name!r} is defined by {[c.address for c in containers]}")
+        return containers[0]
+
+    def containers(self, address: Optional[str] = None) -> List[ContainerDefinition]:
+        return [container for containers in self._containers.values() for container in containers
+                if address is None or container.address == address]
+
+    @property
+    def container_names(self) -> List[str]:
+        return sorted(self._containers)
@@ -0,0 +1,184 @@
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+
+from .plan_model import AttributePath, PlanModel, ResourceChange, lookup
+
+
+class _Sentinel:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+PRESENT = _Sentinel("<present>")
+UNKNOWN = _Sentinel("<known after apply>")
+
+Expected = Union[Any, Callable[[Any], bool]]
+
+
+class Expectation:
+    """One row of a declarative expectation table.
+
+    ``address`` is relative to the module under test and may be a full
+    address (``aws_ecs_service.ecs-batch[0]``), a resource without its index
+    (``aws_ecs_service.ecs-batch``, matching every instance) or a bare resource
+    type (``aws_iam_role``). With ``count`` the row asserts how many planned
+    resources match; otherwise every matching resource must have ``expected``
+    at ``path`` (a value, a predicate, ``UNKNOWN``, or ``PRESENT`` when only the
+    resource's existence matters).
+    """
+
+    __slots__ = ("address", "path", "expected", "count")
+
+    def __init__(self, address: str, path: Optional[AttributePath] = None,
+                 expected: Expected = PRESENT, count: Optional[int] = None):
+        self.address = address
+        self.path = path
+        self.expected = expected
+        self.count = count
+
+    @property
+    def id(self) -> str:
+        if self.count is not None:
+            return f"{self.address}#count={self.count}"
+        if self.path is None:
+            return self.address
+        expected = getattr(self.expected, "__name__", None) if callable(self.expected) else None
+        return f"{self.address}:{self.path}={expected or repr(self.expected)}"
+
+    def __repr__(self) -> str:
+        return f"Expectation({self.id})"
+
+
+class ExpectationResult(NamedTuple):
+    expectation: Expectation
+    passed: bool
+    message: str
+
+
+class ExpectationReport:
+    """Per-expectation results of one evaluation pass"""
+
+    def __init__(self, results: Iterable[ExpectationResult]):
+        self.results: Dict[Expectation, ExpectationResult] = {
+            result.expectation: result for result in results
+        }
+
+    def __getitem__(self, expectation: Expectation) -> ExpectationResult:
+        return self.results[expectation]
+
+    def __iter__(self):
+        return iter(self.results.values())
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    @property
+    def failures(self) -> List[ExpectationResult]:
+        return [result for result in self if not result.passed]
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+    def format(self) -> str:
+        """One line per expectation, suitable for a terminal or a CI log"""
+        return "\n".join(
+            f"{'PASS' if result.passed else 'FAIL'} {result.expectation.id}: {result.message}"
+            for result in self
+        )
+
+
+def _check_attribute(change: ResourceChange, expectation: Expectation) -> Optional[str]:
+    """Return a failure message, or ``None`` when ``change`` satisfies ``expectation``"""
+    if expectation.path is None:
+        return None
+    unknown = change.is_unknown(expectation.path)
+    if expectation.expected is UNKNOWN:
+        return None if unknown else f"{change.address}: expected value known only after apply"
+    if unknown:
+        return f"{change.address}: {expectation.path} is known only after apply"
+    actual = lookup(change.after, expectation.path, PRESENT)
+    if actual is PRESENT:
+        return f"{change.address}: {expectation.path} is not set"
+    if expectation.expected is PRESENT:
+        return None
+    if callable(expectation.expected):
+        if expectation.expected(actual):
+            return None
+        return f"{change.address}: {expectation.path}={actual!r} does not satisfy {expectation.id}"
+    if actual == expectation.expected:
+        return None
+    return f"{change.address}: {expectation.path}={actual!r}, expected {expectation.expected!r}"
+
+
+def evaluate(plan: PlanModel, expectations: Iterable[Expectation],
+             module_address: Optional[str] = None) -> ExpectationReport:
+    """Evaluate a whole expectation table in one pass over the plan.
+
+    Expectations are bucketed by the address forms they match, so each planned
+    resource only visits the rows that concern it and the cost is linear in
+    plan size plus table size. ``module_address`` restricts evaluation to one
+    module instance; by default every resource change is considered.
+    """
+    expectations = list(expectations)
+    by_key: Dict[str, List[Expectation]] = defaultdict(list)
+    for expectation in expectations:
+        by_key[expectation.address].append(expectation)
+
+    counts: Dict[Expectation, int] = defaultdict(int)
+    failures: Dict[Expectation, List[str]] = defaultdict(list)
+
+    changes = plan if module_address is None else plan.in_module(module_address)
+    for change in changes:
+        if change.action == "delete":
+            continue
+        keys = {change.local_address, f"{change.type}.{change.name}", change.type}
+        for key in keys:
+            for expectation in by_key.get(key, ()):
+                counts[expectation] += 1
+                if expectation.count is None:
+                    message = _check_attribute(change, expectation)
+                    if message:
+                        failures[expectation].append(message)
+
+    results = []
+    for expectation in expectations:
+        matched = counts[expectation]
+        if expectation.count is not None:
+            passed = matched == expectation.count
+            message = f"{matched} planned" + ("" if passed else f", expected {expectation.count}")
+        elif not matched:
+            passed, message = False, "no planned resource matches"
+        elif failures[expectation]:
+            passed, message = False, "; ".join(failures[expectation])
+        else:
+            passed, message = True, f"{matched} resource(s) match"
+        results.append(ExpectationResult(expectation, passed, message))
+    return ExpectationReport(results)
+
+
+def parse_literal(value: str) -> Any:
+    """Convert a plan-style literal such as ``'"ENABLED"'``, ``'14'`` or ``'true'`` to Python"""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    if value in ("true", "false"):
+        return value == "true"
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def expectations_from_resource_table(table: Dict[str, dict]) -> List[Expectation]:
+    """Expand the ``expected_resources`` table (type -> name and attributes) into expectations"""
+    expectations = []
+    for resource_type, spec in table.items():
+        address = f"{resource_type}.{spec['name']}"
+        expectations.append(Expectation(address))
+        for path, value in spec.get("attributes", {}).items():
+            expectations.append(Expectation(address, path, parse_literal(value)))
+    return expectations
@@ -0,0 +1,277 @@
+"""Apply ordering analysis from ``terraform graph``.
+
+``terraform graph`` prints the dependency graph as DOT, where ``"a" -> "b"``
+means ``a`` depends on ``b``. ``DependencyGraph.from_dot`` parses it, keeps
+only resources and data sources (dependencies through variables, locals,
+outputs and providers are followed, so ``a -> local.x -> b`` becomes
+``a -> b``), and answers how long the chain of resources terraform must
+create one after another is, how many resources can be created at each step,
+and which dependency edges make the chain as long as it is.
+"""
+import re
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from .trace import DATA_SOURCE, RESOURCE, resource_type, vertex_kind
+
+DOT_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|->|--|[{}\[\];,=]|[^\s{}\[\];,="]+')
+EXPAND_SUFFIX = " (expand)"
+
+
+class DotSyntaxError(ValueError):
+    """Raised for DOT input the parser cannot follow"""
+
+
+def _unquote(token: str) -> str:
+    if token.startswith('"'):
+        return re.sub(r'\\(.)', r"\1", token[1:-1])
+    return token
+
+
+def parse_dot(text: str) -> Tuple[Dict[str, dict], List[Tuple[str, str]]]:
+    """Nodes (with their attributes) and edges of a DOT digraph.
+
+    Covers what ``terraform graph`` emits: node and edge statements, edge
+    chains, attribute lists, graph attributes and nested subgraphs.
+    """
+    tokens = DOT_TOKEN.findall(re.sub(r"^\s*(?://|#).*$", "", text, flags=re.MULTILINE))
+    nodes: Dict[str, dict] = {}
+    edges: List[Tuple[str, str]] = []
+    position = 0
+
+    def attributes() -> dict:
+        nonlocal position
+        values = {}
+        while position < len(tokens) and tokens[position] == "[":
+            position += 1
+            while tokens[position] != "]":
+                if tokens[position] in (",", ";"):
+                    position += 1
+                    continue
+                key = _unquote(tokens[position])
+                if tokens[position + 1] != "=":
+                    raise DotSyntaxError(f"expected '=' after attribute {key!r}")
+                values[key] = _unquote(tokens[position + 2])
+                position += 3
+            position += 1
+        return values
+
+    depth = 0
+    while position < len(tokens):
+        token = tokens[position]
+        if token in ("digraph", "graph", "strict", "subgraph", "node", "edge") and position + 1 < len(tokens) \
+                and tokens[position + 1] not in ("->", "--", "="):
+            position += 1
+            if token in ("node", "edge"):
+                attributes()
+            elif tokens[position] not in ("{",):
+                position += 1  # graph or subgraph name
+            continue
+        if token == "{":
+            depth += 1
+            position += 1
+            continue
+        if token == "}":
+            depth -= 1
+            position += 1
+            continue
+        if token == ";":
+            position += 1
+            continue
+        if position + 1 < len(tokens) and tokens[position + 1] == "=":
+            position += 3  # graph attribute such as rankdir = "RL"
+            continue
+        chain = [_unquote(token)]
+        position += 1
+        while position + 1 < len(tokens) and tokens[position] in ("->", "--"):
+            chain.append(_unquote(tokens[position + 1]))
+            position += 2
+        attrs = attributes()
+        for name in chain:
+            nodes.setdefault(name, {})
+        if len(chain) == 1:
+            nodes[chain[0]].update(attrs)
+        edges.extend(zip(chain, chain[1:]))
+    if depth != 0:
+        raise DotSyntaxError("unbalanced braces")
+    return nodes, edges
+
+
+def vertex_address(name: str) -> str:
+    """``module.x.aws_iam_role.y`` for the vertex name ``[root] module.x.aws_iam_role.y (expand)``"""
+    if name.startswith("[root] "):
+        name = name[len("[root] "):]
+    # "(close)" vertices stay distinct: they depend on everything that uses the provider or module
+    return name[:-len(EXPAND_SUFFIX)] if name.endswith(EXPAND_SUFFIX) else name
+
+
+class SerializingEdge(NamedTuple):
+    """A dependency on the critical path and how much shorter the path gets without it"""
+    dependent: str
+    dependency: str
+    saving: float
+
+
+class DependencyGraph:
+    """Resources and data sources with the ones each depends on"""
+
+    def __init__(self, dependencies: Mapping[str, Iterable[str]]):
+        self.dependencies: Dict[str, Set[str]] = {node: set(deps) for node, deps in dependencies.items()}
+        for deps in list(self.dependencies.values()):
+            for dependency in deps:
+                self.dependencies.setdefault(dependency, set())
+        self._order = self._topological_order()
+
+    @classmethod
+    def from_dot(cls, text: str) -> "DependencyGraph":
+        nodes, edges = parse_dot(text)
+        full: Dict[str, Set[str]] = {}
+        for name in nodes:
+            full.setdefault(vertex_address(name), set())
+        for dependent, dependency in edges:
+            full.setdefault(vertex_address(dependent), set()).add(vertex_address(dependency))
+            full.setdefault(vertex_address(dependency), set())
+        kept = {name for name in full if vertex_kind(name) in (RESOURCE, DATA_SOURCE)}
+
+        # Resources reachable from a node through non-resource nodes only
+        frontier: Dict[str, Set[str]] = {}
+
+        def reachable(name: str, visiting: Set[str]) -> Set[str]:
+            found: Set[str] = set()
+            for dependency in full[name]:
+                if dependency in kept:
+                    found.add(dependency)
+                elif dependency in frontier:
+                    found |= frontier[dependency]
+                elif dependency not in visiting:
+                    visiting.add(dependency)
+                    frontier[dependency] = reachable(dependency, visiting)
+                    found |= frontier[dependency]
+            return found
+
+        return cls({name: reachable(name, {name}) - {name} for name in kept})
+
+    def _topological_order(self) -> List[str]:
+        """Nodes with every dependency before its dependents; raises ValueError on a cycle"""
+        remaining = {node: len(deps) for node, deps in self.dependencies.items()}
+        dependents: Dict[str, List[str]] = {node: [] for node in self.dependencies}
+        for node, deps in self.dependencies.items():
+            for dependency in deps:
+                dependents[dependency].append(node)
+        ready = sorted(node for node, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            node = ready.pop(0)
+            order.append(node)
+            for dependent in sorted(dependents[node]):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.dependencies):
+            cycle = sorted(node for node, count in remaining.items() if count)
+            raise ValueError(f"dependency cycle between {cycle}")
+        return order
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._order)
+
+    @property
+    def edges(self) -> List[Tuple[str, str]]:
+        """``(dependent, dependency)`` pairs"""
+        return sorted((node, dependency) for node, deps in self.dependencies.items() for dependency in deps)
+
+    def levels(self) -> Dict[str, int]:
+        """Step at which each node can be created when everything runs as early as possible"""
+        levels: Dict[str, int] = {}
+        for node in self._order:
+            levels[node] = 1 + max((levels[dependency] for dependency in self.dependencies[node]), default=-1)
+        return levels
+
+    def widths(self) -> List[int]:
+        """How many nodes can be created in parallel at each step"""
+        levels = self.levels()
+        widths = [0] * (max(levels.values(), default=-1) + 1)
+        for level in levels.values():
+            widths[level] += 1
+        return widths
+
+    def _weight(self, node: str, weights: Optional[Mapping[str, float]]) -> float:
+        if weights is None:
+            return 1.0
+        return weights.get(node, weights.get(resource_type(node), 1.0))
+
+    def _longest(self, weights: Optional[Mapping[str, float]],
+                 skip: Optional[Tuple[str, str]] = None) -> Tuple[float, List[str]]:
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+        for node in self._order:
+            best, best_dependency = 0.0, None
+            for dependency in sorted(self.dependencies[node]):
+                if (node, dependency) != skip and finish[dependency] > best:
+                    best, best_dependency = finish[dependency], dependency
+            finish[node] = best + self._weight(node, weights)
+            previous[node] = best_dependency
+        if not finish:
+            return 0.0, []
+        node = max(self._order, key=lambda name: finish[name])
+        length = finish[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = previous[node]
+        return length, path[::-1]
+
+    def critical_path(self, weights: Optional[Mapping[str, float]] = None) -> List[str]:
+        """The longest chain of dependencies, first-created node first.
+
+        ``weights`` maps addresses or resource types to creation times
+        (default 1 each, so the path is the one with the most nodes).
+        """
+        return self._longest(weights)[1]
+
+    def critical_path_length(self, weights: Optional[Mapping[str, float]] = None) -> float:
+        return self._longest(weights)[0]
+
+    @property
+    def depth(self) -> int:
+        """Number of resources created one after another on the critical path"""
+        return len(self.critical_path())
+
+    def serializing_edges(self, weights: Optional[Mapping[str, float]] = None) -> List[SerializingEdge]:
+        """Dependencies on any critical path, ordered by how much dropping each would shorten the apply.
+
+        An edge is critical when neither end has slack and the dependent
+        starts the moment its dependency finishes. Dropping one of several
+        equally long chains saves nothing, which the saving shows.
+        """
+        start: Dict[str, float] = {}
+        finish: Dict[str, float] = {}
+        for node in self._order:
+            start[node] = max((finish[dependency] for dependency in self.dependencies[node]), default=0.0)
+            finish[node] = start[node] + self._weight(node, weights)
+        length = max(finish.values(), default=0.0)
+        latest_finish = {node: length for node in self._order}
+        for node in reversed(self._order):
+            latest_start = latest_finish[node] - self._weight(node, weights)
+            for dependency in self.dependencies[node]:
+                latest_finish[dependency] = min(latest_finish[dependency], latest_start)
+
+        def critical(node: str) -> bool:
+            return abs(latest_finish[node] - finish[node]) < 1e-9
+
+        edges = [
+            SerializingEdge(dependent, dependency,
+                            length - self._longest(weights, skip=(dependent, dependency))[0])
+            for dependent, dependency in self.edges
+            if critical(dependent) and critical(dependency) and abs(finish[dependency] - start[dependent]) < 1e-9
+        ]
+        return sorted(edges, key=lambda edge: (-edge.saving, edge.dependent, edge.dependency))
+
+    def summary_lines(self) -> List[str]:
+        lines = [
+            f"critical path ({self.depth} resources): {' -> '.join(self.critical_path())}",
+            f"parallelism per step: {self.widths()}",
+        ]
+        for edge in self.serializing_edges():
+            lines.append(f"  {edge.dependent} waits for {edge.dependency} (saves {edge.saving:g})")
+        return lines
@@ -0,0 +1,175 @@
+"""Plans made by a CI workflow step, handed to the harness instead of planning again.
+
+Usage::
+
+    terraform plan -no-color -input=false -out="$DIR/tfplan" | tee "$DIR/plan.txt"
+    terraform show -json "$DIR/tfplan" > "$DIR/plan.json"
+    python -m tests.harness.handoff record examples --plan "$DIR/tfplan" \\
+        --plan-json "$DIR/plan.json" --plan-output "$DIR/plan.txt"
+    pytest tests/ --plan-handoff "$DIR/plan-handoff.json"     # or set TF_PLAN_HANDOFF
+
+``record`` writes a manifest next to the plan holding the fingerprint of the
+module inputs the plan was made from (the same files the plan cache keys on)
+and the ``terraform version -json`` of the binary that made it. The plan
+broker serves ``plan`` and ``show`` from the manifest's files, and adopts its
+``.terraform`` directory instead of running ``init``, while that fingerprint
+still matches the sources on disk and the version matches the broker's
+terraform; otherwise it ignores the hand-off and runs terraform as usual.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from .cache import fingerprint_files, module_input_files
+from .runner import TerraformResult, describe_version, run_terraform
+from .workspace import copy_data_dir, mark_initialized
+
+HANDOFF_ENV = "TF_PLAN_HANDOFF"
+MANIFEST_NAME = "plan-handoff.json"
+MANIFEST_FORMAT = 1
+ADOPTED_INIT = TerraformResult("Terraform initialized by the plan hand-off\n", "", 0)
+
+Runner = Callable[[Sequence[str], Path], TerraformResult]
+
+
+def source_fingerprint(examples_dir: Path) -> str:
+    """Hash of the module and example inputs that determine the plan"""
+    examples_dir = Path(examples_dir)
+    return fingerprint_files(module_input_files(examples_dir), examples_dir.parent)
+
+
+def terraform_version(examples_dir: Path, runner: Runner = run_terraform) -> str:
+    """Version and platform of the terraform binary, as ``PlanBroker.terraform_version`` reports them"""
+    return describe_version(runner(["version", "-json"], Path(examples_dir)))
+
+
+class PlanHandoff:
+    """A binary plan, its ``terraform show -json`` rendering and plan output, made outside pytest"""
+
+    def __init__(self, fingerprint: str, plan_file: Path, plan_json: Path, plan_output: Path,
+                 data_dir: Optional[Path] = None, terraform_version: str = "", manifest: Optional[Path] = None):
+        self.fingerprint = fingerprint
+        self.plan_file = Path(plan_file)
+        self.plan_json = Path(plan_json)
+        self.plan_output = Path(plan_output)
+        self.data_dir = None if data_dir is None else Path(data_dir)
+        self.terraform_version = terraform_version
+        self.manifest = manifest
+
+    @classmethod
+    def record(cls, examples_dir: Path, plan_file: Path, plan_json: Path, plan_output: Path,
+               data_dir: Optional[Path] = None, manifest: Optional[Path] = None,
+               runner: Runner = run_terraform) -> "PlanHandoff":
+        """Fingerprint the current sources and terraform binary and write a manifest for plan files made with them"""
+        examples_dir = Path(examples_dir)
+        if data_dir is None and (examples_dir / ".terraform").is_dir():
+            data_dir = examples_dir / ".terraform"
+        version = terraform_version(examples_dir, runner)
+        manifest = Path(manifest) if manifest else Path(plan_file).parent / MANIFEST_NAME
+        handoff = cls(source_fingerprint(examples_dir), plan_file, plan_json, plan_output, data_dir, version,
+                      manifest)
+        handoff.save(manifest)
+        return handoff
+
+    @classmethod
+    def load(cls, path: Path) -> "PlanHandoff":
+        """Read a manifest; relative paths in it are relative to the manifest's directory"""
+        path = Path(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("format") != MANIFEST_FORMAT:
+            raise ValueError(f"{path} is not a version {MANIFEST_FORMAT} plan hand-off manifest")
+        base = path.parent
+
+        def resolve(value: Optional[str]) -> Optional[Path]:
+            return None if value is None else base / value
+
+        return cls(data["fingerprint"], resolve(data["plan_file"]), resolve(data["plan_json"]),
+                   resolve(data["plan_output"]), resolve(data.get("data_dir")), data.get("terraform_version", ""),
+                   path)
+
+    def save(self, path: Path):
+        path = Path(path)
+        base = path.parent.resolve()
+
+        def relative(value: Optional[Path]) -> Optional[str]:
+            if value is None:
+                return None
+            value = value.resolve()
+            try:
+                return str(value.relative_to(base))
+            except ValueError:
+                return str(value)
+
+        path.write_text(json.dumps({
+            "format": MANIFEST_FORMAT,
+            "fingerprint": self.fingerprint,
+            "terraform_version": self.terraform_version,
+            "plan_file": relative(self.plan_file),
+            "plan_json": relative(self.plan_json),
+            "plan_output": relative(self.plan_output),
+            "data_dir": relative(self.data_dir),
+        }, indent=2) + "\n", encoding="utf-8")
+
+    def mismatch(self, examples_dir: Path, terraform_version: str) -> Optional[str]:
+        """Why the hand-off cannot stand in for planning ``examples_dir`` with ``terraform_version``, or ``None``"""
+        missing = [str(path) for path in (self.plan_file, self.plan_json, self.plan_output) if not path.exists()]
+        if missing:
+            return f"missing {', '.join(missing)}"
+        if source_fingerprint(examples_dir) != self.fingerprint:
+            return "sources changed since the plan was made"
+        if terraform_version != self.terraform_version:
+            return f"planned with terraform {self.terraform_version or 'of unknown version'}, not {terraform_version}"
+        return None
+
+    def plan_result(self) -> TerraformResult:
+        """The recorded ``terraform plan`` output"""
+        return TerraformResult(self.plan_output.read_text(encoding="utf-8"), "", 0)
+
+    def show_result(self) -> TerraformResult:
+        """The recorded ``terraform show -json`` output"""
+        return TerraformResult(self.plan_json.read_text(encoding="utf-8"), "", 0)
+
+    def adopt_data_dir(self, examples_dir: Path) -> Optional[TerraformResult]:
+        """Use the hand-off's ``.terraform`` directory for ``examples_dir``; ``None`` if it has none"""
+        if self.data_dir is None or not (self.data_dir / "providers").is_dir():
+            return None
+        destination = Path(examples_dir) / ".terraform"
+        if destination.resolve() != self.data_dir.resolve():
+            copy_data_dir(self.data_dir, destination)
+        mark_initialized(examples_dir)
+        return ADOPTED_INIT
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Hand a plan made outside pytest to the test harness")
+    parser.add_argument("command", choices=["record", "verify"])
+    parser.add_argument("examples_dir", type=Path, help="examples directory the plan was made in")
+    parser.add_argument("--plan", type=Path, help="binary plan written by terraform plan -out (record)")
+    parser.add_argument("--plan-json", type=Path, help="terraform show -json rendering of the plan (record)")
+    parser.add_argument("--plan-output", type=Path, help="output of terraform plan -no-color (record)")
+    parser.add_argument("--data-dir", type=Path, help="initialized .terraform directory (default: the examples')")
+    parser.add_argument("--manifest", type=Path, help=f"manifest path (default: {MANIFEST_NAME} next to the plan)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        if not (args.plan and args.plan_json and args.plan_output):
+            parser.error("record needs --plan, --plan-json and --plan-output")
+        handoff = PlanHandoff.record(args.examples_dir, args.plan, args.plan_json, args.plan_output,
+                                     args.data_dir, args.manifest)
+        print(f"Plan hand-off for {args.examples_dir} written to {handoff.manifest}")
+        return 0
+
+    if not args.manifest:
+        parser.error("verify needs --manifest")
+    problem = PlanHandoff.load(args.manifest).mismatch(args.examples_dir, terraform_version(args.examples_dir))
+    if problem:
+        print(f"error: {problem}", file=sys.stderr)
+        return 1
+    print(f"Plan hand-off {args.manifest} matches {args.examples_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
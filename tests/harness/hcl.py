@@ -0,0 +1,697 @@
+"""A pure-Python parser and evaluator for the HCL subset used by this module.
+
+``parse(text)`` returns a ``Body`` of attributes and blocks. Attribute values
+are expression trees: plain Python values (str, int, float, bool, None, list,
+dict) where the expression is constant, and the node types below where it is
+not. ``evaluate`` reduces a tree to a Python value, asking a resolver callable
+for ``var.*``, ``local.*`` and other references, and raises ``Unresolvable``
+for anything that is only known after apply.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class HCLSyntaxError(ValueError):
+    """Raised for configuration text outside the supported HCL subset"""
+
+
+class Unresolvable(Exception):
+    """Raised when an expression cannot be evaluated without terraform"""
+
+
+class _Unresolved:
+    def __repr__(self):
+        return "<unresolved>"
+
+
+# Stands in for a value that static evaluation could not determine
+UNRESOLVED = _Unresolved()
+
+
+class Reference(NamedTuple):
+    """A traversal such as ``var.subnets[0]``, as ``("var", "subnets", 0)``"""
+    parts: Tuple[Any, ...]
+
+
+class Template(NamedTuple):
+    """A string with interpolations; parts are literal strings or expressions"""
+    parts: Tuple[Any, ...]
+
+
+class FunctionCall(NamedTuple):
+    name: str
+    args: Tuple[Any, ...]
+    expand_final: bool
+
+
+class Conditional(NamedTuple):
+    condition: Any
+    true: Any
+    false: Any
+
+
+class Operation(NamedTuple):
+    """A unary (``!``, ``neg``) or binary operator applied to its operands"""
+    operator: str
+    operands: Tuple[Any, ...]
+
+
+class Index(NamedTuple):
+    """An index into a value that is not a plain reference, e.g. ``keys(x)[0]``"""
+    target: Any
+    key: Any
+
+
+class Splat(NamedTuple):
+    """``target[*].parts`` applied to every element of ``target``"""
+    target: Any
+    parts: Tuple[Any, ...]
+
+
+class ForExpression(NamedTuple):
+    key_name: Optional[str]
+    value_name: str
+    collection: Any
+    key: Any
+    value: Any
+    condition: Any
+    grouping: bool
+
+
+class Unsupported(NamedTuple):
+    """Syntax the parser recognizes but does not evaluate (template directives)"""
+    text: str
+
+
+class Block(NamedTuple):
+    type: str
+    labels: Tuple[str, ...]
+    body: "Body"
+
+
+class Body:
+    """Attributes and nested blocks of a file or block, in source order"""
+
+    def __init__(self):
+        self.attributes: Dict[str, Any] = {}
+        self.blocks: List[Block] = []
+
+    def blocks_of(self, block_type: str) -> List[Block]:
+        return [block for block in self.blocks if block.type == block_type]
+
+    def __repr__(self):
+        return f"Body(attributes={sorted(self.attributes)}, blocks={[block.type for block in self.blocks]})"
+
+
+class Token(NamedTuple):
+    kind: str
+    value: Any
+    line: int
+
+
+TOKEN = re.compile(r"""
+    (?P<space>[ \t\r]+|\\\n)
+  | (?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | (?P<newline>\n)
+  | (?P<heredoc><<(?P<indent>-?)(?P<marker>[A-Za-z_][A-Za-z0-9_]*)[ \t]*\r?\n)
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_-]*)
+  | (?P<quote>")
+  | (?P<op>\.\.\.|==|!=|<=|>=|&&|\|\||=>|[{}\[\]().,=:?!<>+\-*/%])
+""", re.VERBOSE | re.DOTALL)
+
+ESCAPES = {"n": "\n", "r": "\r", "t": "\t", '"': '"', "\\": "\\"}
+
+BINARY_OPERATORS = (("||",), ("&&",), ("==", "!="), ("<", ">", "<=", ">="), ("+", "-"), ("*", "/", "%"))
+
+
+def _scan_string(text: str, start: int, line: int) -> int:
+    """Index just past the closing quote of the string whose contents begin at ``start``"""
+    position = start
+    while position < len(text):
+        char = text[position]
+        if char == "\\":
+            position += 2
+        elif char == '"':
+            return position + 1
+        elif char == "\n":
+            break
+        elif text.startswith("$${", position) or text.startswith("%%{", position):
+            position += 3
+        elif text.startswith("${", position) or text.startswith("%{", position):
+            position = _interpolation_end(text, position + 2, line) + 1
+        else:
+            position += 1
+    raise HCLSyntaxError(f"line {line}: unterminated string")
+
+
+def _interpolation_end(text: str, start: int, line: int) -> int:
+    """Index of the ``}`` closing an interpolation whose expression begins at ``start``"""
+    depth = 1
+    position = start
+    while position < len(text):
+        char = text[position]
+        if char == '"':
+            position = _scan_string(text, position + 1, line)
+            continue
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return position
+        position += 1
+    raise HCLSyntaxError(f"line {line}: unterminated interpolation")
+
+
+def _parse_template(raw: str, line: int, escapes: bool = True) -> Any:
+    """Split string contents into literal text and interpolated expressions"""
+    parts: List[Any] = []
+    literal: List[str] = []
+    position = 0
+    while position < len(raw):
+        char = raw[position]
+        if escapes and char == "\\":
+            code = raw[position + 1:position + 2]
+            if code in ESCAPES:
+                literal.append(ESCAPES[code])
+                position += 2
+            elif code in ("u", "U"):
+                width = 4 if code == "u" else 8
+                literal.append(chr(int(raw[position + 2:position + 2 + width], 16)))
+                position += 2 + width
+            else:
+                raise HCLSyntaxError(f"line {line}: invalid escape \\{code}")
+        elif raw.startswith("$${", position) or raw.startswith("%%{", position):
+            literal.append(raw[position + 1:position + 3])
+            position += 3
+        elif raw.startswith("${", position) or raw.startswith("%{", position):
+            end = _interpolation_end(raw, position + 2, line)
+            if literal:
+                parts.append("".join(literal))
+                literal = []
+            inner = raw[position + 2:end].strip("~").strip()
+            parts.append(parse_expression(inner) if char == "$" else Unsupported(raw[position:end + 1]))
+            position = end + 1
+        else:
+            literal.append(char)
+            position += 1
+    if literal:
+        parts.append("".join(literal))
+    if not parts:
+        return ""
+    if all(isinstance(part, str) for part in parts):
+        return "".join(parts)
+    if len(parts) == 1:
+        # "${expr}" on its own yields the expression's value unconverted
+        return parts[0]
+    return Template(tuple(parts))
+
+
+def _heredoc(text: str, start: int, marker: str, indented: bool, line: int) -> Tuple[Any, int]:
+    """Parse heredoc contents starting at ``start``; returns the value and the index after the marker"""
+    lines = []
+    position = start
+    while position < len(text):
+        end = text.find("\n", position)
+        end = len(text) if end == -1 else end
+        current = text[position:end]
+        if current.strip() == marker:
+            if indented:
+                widths = [len(item) - len(item.lstrip()) for item in lines if item.strip()]
+                trim = min(widths, default=0)
+                lines = [item[trim:] for item in lines]
+            content = "".join(item + "\n" for item in lines)
+            return _parse_template(content, line, escapes=False), end
+        lines.append(current)
+        position = end + 1
+    raise HCLSyntaxError(f"line {line}: unterminated heredoc <<{marker}")
+
+
+def tokenize(text: str) -> List[Token]:
+    tokens = []
+    position = 0
+    line = 1
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise HCLSyntaxError(f"line {line}: unexpected character {text[position]!r}")
+        kind = match.lastgroup if match.lastgroup not in ("indent", "marker") else "heredoc"
+        value = match.group(0)
+        end = match.end()
+        if kind == "newline":
+            tokens.append(Token("newline", "\n", line))
+        elif kind == "number":
+            tokens.append(Token("number", float(value) if any(c in value for c in ".eE") else int(value), line))
+        elif kind == "ident":
+            tokens.append(Token("ident", value, line))
+        elif kind == "op":
+            tokens.append(Token("op", value, line))
+        elif kind == "quote":
+            end = _scan_string(text, end, line)
+            tokens.append(Token("string", _parse_template(text[match.end():end - 1], line), line))
+        elif kind == "heredoc":
+            template, end = _heredoc(text, end, match.group("marker"), bool(match.group("indent")), line)
+            tokens.append(Token("string", template, line))
+        line += text.count("\n", position, end)
+        position = end
+    tokens.append(Token("eof", None, line))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str, depth: int = 0):
+        self.tokens = tokenize(text)
+        self.position = 0
+        # Inside brackets newlines are insignificant
+        self.depth = depth
+
+    def peek(self) -> Token:
+        token = self.tokens[self.position]
+        while self.depth and token.kind == "newline":
+            self.position += 1
+            token = self.tokens[self.position]
+        return token
+
+    def next(self) -> Token:
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def at(self, value: str) -> bool:
+        token = self.peek()
+        return token.kind == "op" and token.value == value
+
+    def accept(self, value: str) -> bool:
+        if self.at(value):
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, value: str) -> Token:
+        token = self.next()
+        if token.kind != "op" or token.value != value:
+            raise HCLSyntaxError(f"line {token.line}: expected {value!r}, found {token.value!r}")
+        return token
+
+    def expect_ident(self) -> str:
+        token = self.next()
+        if token.kind != "ident":
+            raise HCLSyntaxError(f"line {token.line}: expected a name, found {token.value!r}")
+        return token.value
+
+    def parse_body(self, nested: bool = False) -> Body:
+        body = Body()
+        while True:
+            token = self.next()
+            if token.kind == "newline":
+                continue
+            if token.kind == "eof":
+                if nested:
+                    raise HCLSyntaxError(f"line {token.line}: unclosed block")
+                return body
+            if nested and token.kind == "op" and token.value == "}":
+                return body
+            if token.kind != "ident":
+                raise HCLSyntaxError(f"line {token.line}: expected an attribute or block, found {token.value!r}")
+            if self.accept("="):
+                body.attributes[token.value] = self.parse_expression()
+            else:
+                labels = []
+                while self.peek().kind in ("ident", "string"):
+                    label = self.next()
+                    if not isinstance(label.value, str):
+                        raise HCLSyntaxError(f"line {label.line}: block labels cannot be templates")
+                    labels.append(label.value)
+                self.expect("{")
+                body.blocks.append(Block(token.value, tuple(labels), self.parse_body(nested=True)))
+            following = self.peek()
+            if following.kind in ("newline", "eof"):
+                continue
+            if not (nested and following.kind == "op" and following.value == "}"):
+                raise HCLSyntaxError(f"line {following.line}: expected a newline, found {following.value!r}")
+
+    def parse_expression(self) -> Any:
+        condition = self._binary(0)
+        if self.accept("?"):
+            true = self.parse_expression()
+            self.expect(":")
+            return Conditional(condition, true, self.parse_expression())
+        return condition
+
+    def _binary(self, level: int) -> Any:
+        if level == len(BINARY_OPERATORS):
+            return self._unary()
+        left = self._binary(level + 1)
+        while self.peek().kind == "op" and self.peek().value in BINARY_OPERATORS[level]:
+            operator = self.next().value
+            left = Operation(operator, (left, self._binary(level + 1)))
+        return left
+
+    def _unary(self) -> Any:
+        if self.accept("!"):
+            return Operation("!", (self._unary(),))
+        if self.accept("-"):
+            operand = self._unary()
+            if isinstance(operand, (int, float)) and not isinstance(operand, bool):
+                return -operand
+            return Operation("neg", (operand,))
+        return self._postfix(self._primary())
+
+    def _postfix(self, node: Any) -> Any:
+        while True:
+            if self.at("."):
+                self.next()
+                token = self.next()
+                if token.kind == "op" and token.value == "*":
+                    node = Splat(node, ())
+                elif token.kind in ("ident", "number"):
+                    node = self._traverse(node, token.value)
+                else:
+                    raise HCLSyntaxError(f"line {token.line}: expected an attribute name, found {token.value!r}")
+            elif self.at("["):
+                self.next()
+                self.depth += 1
+                if self.accept("*"):
+                    node = Splat(node, ())
+                else:
+                    node = self._traverse(node, self.parse_expression())
+                self.expect("]")
+                self.depth -= 1
+            else:
+                return node
+
+    @staticmethod
+    def _traverse(node: Any, key: Any) -> Any:
+        static_key = isinstance(key, (str, int)) and not isinstance(key, bool)
+        if isinstance(node, Splat) and static_key:
+            return Splat(node.target, node.parts + (key,))
+        if isinstance(node, Reference) and static_key:
+            return Reference(node.parts + (key,))
+        return Index(node, key)
+
+    def _primary(self) -> Any:
+        token = self.next()
+        if token.kind in ("number", "string"):
+            return token.value
+        if token.kind == "ident":
+            if token.value in ("true", "false"):
+                return token.value == "true"
+            if token.value == "null":
+                return None
+            if self.at("("):
+                return self._function_call(token.value)
+            return Reference((token.value,))
+        if token.kind == "op" and token.value == "(":
+            self.depth += 1
+            node = self.parse_expression()
+            self.expect(")")
+            self.depth -= 1
+            return node
+        if token.kind == "op" and token.value == "[":
+            return self._collection("]")
+        if token.kind == "op" and token.value == "{":
+            return self._collection("}")
+        raise HCLSyntaxError(f"line {token.line}: unexpected {token.value!r} in expression")
+
+    def _function_call(self, name: str) -> FunctionCall:
+        self.expect("(")
+        self.depth += 1
+        args = []
+        expand_final = False
+        while not self.at(")"):
+            args.append(self.parse_expression())
+            if self.accept("..."):
+                expand_final = True
+            if not self.accept(","):
+                break
+        self.expect(")")
+        self.depth -= 1
+        return FunctionCall(name, tuple(args), expand_final)
+
+    def _collection(self, closing: str) -> Any:
+        self.depth += 1
+        token = self.peek()
+        if token.kind == "ident" and token.value == "for":
+            node = self._for_expression(closing)
+        elif closing == "]":
+            node = []
+            while not self.at("]"):
+                node.append(self.parse_expression())
+                if not self.accept(","):
+                    break
+        else:
+            node = {}
+            while not self.at("}"):
+                key = self.parse_expression()
+                if isinstance(key, Reference) and len(key.parts) == 1:
+                    key = key.parts[0]
+                if not self.accept("="):
+                    self.expect(":")
+                node[key] = self.parse_expression()
+                self.accept(",")
+        self.expect(closing)
+        self.depth -= 1
+        return node
+
+    def _for_expression(self, closing: str) -> ForExpression:
+        self.next()
+        names = [self.expect_ident()]
+        if self.accept(","):
+            names.append(self.expect_ident())
+        if self.expect_ident() != "in":
+            raise HCLSyntaxError(f"line {self.peek().line}: expected 'in' in for expression")
+        collection = self.parse_expression()
+        self.expect(":")
+        key = None
+        value = self.parse_expression()
+        grouping = False
+        if closing == "}":
+            self.expect("=>")
+            key, value = value, self.parse_expression()
+            grouping = self.accept("...")
+        condition = None
+        token = self.peek()
+        if token.kind == "ident" and token.value == "if":
+            self.next()
+            condition = self.parse_expression()
+        key_name = names[0] if len(names) == 2 else None
+        return ForExpression(key_name, names[-1], collection, key, value, condition, grouping)
+
+
+def parse(text: str) -> Body:
+    """Parse a ``.tf`` or ``.tfvars`` file"""
+    return _Parser(text).parse_body()
+
+
+def parse_expression(text: str) -> Any:
+    """Parse a single expression, e.g. the contents of an interpolation"""
+    parser = _Parser(text, depth=1)
+    node = parser.parse_expression()
+    token = parser.peek()
+    if token.kind != "eof":
+        raise HCLSyntaxError(f"line {token.line}: unexpected {token.value!r} after expression")
+    return node
+
+
+Resolver = Callable[[Tuple[Any, ...]], Any]
+
+
+def traverse(value: Any, parts: Sequence[Any]) -> Any:
+    """Follow attribute names and indexes into a value"""
+    for part in parts:
+        if value is UNRESOLVED:
+            raise Unresolvable("value is only known after apply")
+        try:
+            if isinstance(value, list) and isinstance(part, str):
+                part = int(part)
+            value = value[part]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise Unresolvable(f"no attribute or element {part!r}")
+    if value is UNRESOLVED:
+        raise Unresolvable("value is only known after apply")
+    return value
+
+
+def to_string(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (str, int, float)):
+        return str(value)
+    raise Unresolvable(f"cannot convert {type(value).__name__} to string")
+
+
+def to_number(value: Any) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value) if any(char in value for char in ".eE") else int(value)
+        except ValueError:
+            pass
+    raise Unresolvable(f"cannot convert {value!r} to number")
+
+
+def to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value in ("true", "false"):
+        return value == "true"
+    raise Unresolvable(f"cannot convert {value!r} to bool")
+
+
+def jsonencode(value: Any) -> str:
+    """``jsonencode`` as terraform renders it: compact, sorted keys, HTML characters escaped"""
+    text = json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+    return text.replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+
+
+def _lookup(mapping: dict, key: str, *default: Any) -> Any:
+    if key in mapping:
+        return mapping[key]
+    if default:
+        return default[0]
+    raise Unresolvable(f"lookup of missing key {key!r}")
+
+
+def _coalesce(*values: Any) -> Any:
+    for value in values:
+        if value not in (None, ""):
+            return value
+    raise Unresolvable("coalesce of only null or empty values")
+
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "coalesce": _coalesce,
+    "concat": lambda *lists: [item for items in lists for item in items],
+    "join": lambda separator, items: separator.join(to_string(item) for item in items),
+    "jsondecode": json.loads,
+    "jsonencode": jsonencode,
+    "keys": lambda mapping: sorted(mapping),
+    "length": len,
+    "lookup": _lookup,
+    "lower": lambda value: to_string(value).lower(),
+    "merge": lambda *mappings: {key: value for mapping in mappings for key, value in mapping.items()},
+    "tobool": to_bool,
+    "tolist": list,
+    "tomap": dict,
+    "tonumber": to_number,
+    "toset": lambda items: sorted(set(items), key=lambda item: (type(item).__name__, item)),
+    "tostring": to_string,
+    "upper": lambda value: to_string(value).upper(),
+    "values": lambda mapping: [mapping[key] for key in sorted(mapping)],
+}
+
+
+def _operate(operator: str, operands: List[Any]) -> Any:
+    if operator == "!":
+        return not to_bool(operands[0])
+    if operator == "neg":
+        return -to_number(operands[0])
+    left, right = operands
+    if operator == "==":
+        return left == right
+    if operator == "!=":
+        return left != right
+    if operator == "&&":
+        return to_bool(left) and to_bool(right)
+    if operator == "||":
+        return to_bool(left) or to_bool(right)
+    left, right = to_number(left), to_number(right)
+    if operator == "+":
+        return left + right
+    if operator == "-":
+        return left - right
+    if operator == "*":
+        return left * right
+    if operator == "/":
+        result = left / right
+        return int(result) if result.is_integer() else result
+    if operator == "%":
+        return left % right
+    return {"<": left < right, ">": left > right, "<=": left <= right, ">=": left >= right}[operator]
+
+
+def _iterate(collection: Any) -> List[Tuple[Any, Any]]:
+    if isinstance(collection, dict):
+        return [(key, collection[key]) for key in sorted(collection)]
+    if isinstance(collection, list):
+        return list(enumerate(collection))
+    raise Unresolvable(f"cannot iterate over {type(collection).__name__}")
+
+
+def evaluate(node: Any, resolve: Resolver) -> Any:
+    """Reduce an expression tree to a Python value.
+
+    ``resolve`` is called with the parts of every reference that is not a
+    ``for`` expression variable and either returns its value or raises
+    ``Unresolvable``.
+    """
+    if isinstance(node, Reference):
+        return resolve(node.parts)
+    if isinstance(node, list):
+        return [evaluate(item, resolve) for item in node]
+    if isinstance(node, dict):
+        return {
+            key if isinstance(key, str) else to_string(evaluate(key, resolve)): evaluate(value, resolve)
+            for key, value in node.items()
+        }
+    if isinstance(node, Template):
+        return "".join(part if isinstance(part, str) else to_string(evaluate(part, resolve)) for part in node.parts)
+    if isinstance(node, Conditional):
+        branch = node.true if to_bool(evaluate(node.condition, resolve)) else node.false
+        return evaluate(branch, resolve)
+    if isinstance(node, Operation):
+        if node.operator in ("&&", "||"):
+            left = to_bool(evaluate(node.operands[0], resolve))
+            if left == (node.operator == "||"):
+                return left
+        return _operate(node.operator, [evaluate(operand, resolve) for operand in node.operands])
+    if isinstance(node, FunctionCall):
+        if node.name not in FUNCTIONS:
+            raise Unresolvable(f"function {node.name}() is not supported statically")
+        args = [evaluate(arg, resolve) for arg in node.args]
+        if node.expand_final:
+            args = args[:-1] + list(args[-1])
+        try:
+            return FUNCTIONS[node.name](*args)
+        except (TypeError, ValueError, KeyError, AttributeError) as error:
+            raise Unresolvable(f"{node.name}(): {error}")
+    if isinstance(node, Index):
+        return traverse(evaluate(node.target, resolve), [evaluate(node.key, resolve)])
+    if isinstance(node, Splat):
+        target = evaluate(node.target, resolve)
+        items = target if isinstance(target, list) else ([] if target is None else [target])
+        return [traverse(item, node.parts) for item in items]
+    if isinstance(node, ForExpression):
+        return _evaluate_for(node, resolve)
+    if isinstance(node, Unsupported):
+        raise Unresolvable(f"{node.text} is not supported statically")
+    return node
+
+
+def _evaluate_for(node: ForExpression, resolve: Resolver) -> Any:
+    result: Any = {} if node.key is not None else []
+    for key, value in _iterate(evaluate(node.collection, resolve)):
+        bindings = {node.value_name: value}
+        if node.key_name:
+            bindings[node.key_name] = key
+
+        def scoped(parts, bindings=bindings):
+            if parts[0] in bindings:
+                return traverse(bindings[parts[0]], parts[1:])
+            return resolve(parts)
+
+        if node.condition is not None and not to_bool(evaluate(node.condition, scoped)):
+            continue
+        item = evaluate(node.value, scoped)
+        if node.key is None:
+            result.append(item)
+        elif node.grouping:
+            result.setdefault(to_string(evaluate(node.key, scoped)), []).append(item)
+        else:
+            result[to_string(evaluate(node.key, scoped))] = item
+    return result
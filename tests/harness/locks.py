@@ -0,0 +1,56 @@
+"""Cross-process file locks; a leaf module so that any harness module can import it."""
+import fcntl
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class LockTimeout(TimeoutError):
+    """Raised when another process holds a lock for longer than the timeout"""
+
+
+class FileLock:
+    """An exclusive ``flock`` on a lock file.
+
+    Every process (and thread) that opens the same path contends for the
+    lock, which the kernel releases if the holder dies, so a crashed worker
+    cannot leave the others waiting forever.
+    """
+
+    def __init__(self, path: Path, timeout: Optional[float] = None, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def acquire(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if self.timeout is None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        os.close(fd)
+                        raise LockTimeout(f"{self.path} is still locked after {self.timeout}s")
+                    time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,231 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .plan_model import PlanModel
+from .runner import TerraformResult, run_terraform
+from .workspace import clone_workspace, ensure_init
+
+MODULE_NAME = "batch_ecs"
+
+# Short variant names for the module's count toggles
+FEATURE_FLAGS = {
+    "ecs": "create_ecs_task_definition",
+    "inspector": "enable_inspector",
+    "eventbridge": "enable_eventbridge_rule",
+}
+
+# Extra module arguments a flag needs to produce a plannable configuration
+FLAG_REQUIREMENTS = {
+    "enable_eventbridge_rule": {
+        "eventbridge_target_arn": "arn:aws:sns:us-east-1:123456789012:batch-events",
+    },
+}
+
+# Additional Batch compute environments, queues and job definitions planned next to the defaults
+BATCH_MAPS = {
+    "batch_compute_environments": {
+        "spot": {"name": "example-spot-compute-env", "max_vcpus": 256},
+    },
+    "batch_job_queues": {
+        "urgent": {"name": "example-urgent-queue", "priority": 10},
+        "bulk": {"name": "example-bulk-queue", "priority": 1, "compute_environments": ["spot", "default"]},
+    },
+    "batch_job_definitions": {
+        "etl": {"name": "example-etl-job", "vcpu": "4", "memory": "8192", "timeout_seconds": 600,
+                "retry_attempts": 1},
+    },
+}
+
+# Target-tracking autoscaling of the ECS service on every supported metric
+AUTOSCALING = {
+    "enable_ecs_autoscaling": True,
+    "ecs_autoscaling_min_capacity": 1,
+    "ecs_autoscaling_max_capacity": 6,
+    "ecs_autoscaling_target_values": {"cpu": 60, "memory": 75, "requests": 500},
+    "ecs_autoscaling_alb_resource_label": "app/example-alb/0123456789abcdef/targetgroup/example-tg/0123456789abcdef",
+}
+
+# Fair-share scheduling of the default job queue between two share identifiers
+FAIR_SHARE = {
+    "enable_batch_fair_share": True,
+    "batch_fair_share_weights": {"tenant-a": 1, "tenant-b": 0.5},
+    "batch_fair_share_compute_reservation": 10,
+    "batch_fair_share_decay_seconds": 3600,
+}
+
+# FARGATE_SPOT capacity for Batch and a FARGATE/FARGATE_SPOT capacity provider strategy for the ECS service
+SPOT_CAPACITY = {
+    "enable_batch_fargate_spot": True,
+    "enable_ecs_capacity_provider_strategy": True,
+}
+
+OVERRIDE_FILE = "variant_override.tf.json"
+
+EnvRunner = Callable[[Sequence[str], Path, Optional[dict]], TerraformResult]
+
+
+class Variant(NamedTuple):
+    """A named set of ``module "batch_ecs"`` argument overrides"""
+    name: str
+    overrides: Dict[str, object]
+
+
+class VariantPlan(NamedTuple):
+    """Outcome of planning one variant workspace"""
+    variant: Variant
+    workspace: Path
+    result: TerraformResult
+    plan_json: Optional[dict]
+
+    @property
+    def model(self) -> PlanModel:
+        if self.plan_json is None:
+            raise RuntimeError(f"Variant {self.variant.name} did not plan: {self.result.stderr}")
+        return PlanModel.from_json(self.plan_json)
+
+
+def feature_matrix(flags: Optional[Dict[str, str]] = None) -> List[Variant]:
+    """Every on/off combination of the module feature flags"""
+    flags = FEATURE_FLAGS if flags is None else flags
+    variants = []
+    for values in itertools.product((False, True), repeat=len(flags)):
+        overrides: Dict[str, object] = {}
+        enabled = []
+        for (short, flag), value in zip(flags.items(), values):
+            overrides[flag] = value
+            if value:
+                enabled.append(short)
+                overrides.update(FLAG_REQUIREMENTS.get(flag, {}))
+        variants.append(Variant("+".join(enabled) or "baseline", overrides))
+    return variants
+
+
+def configuration_variants() -> List[Variant]:
+    """The feature matrix plus the Batch maps, autoscaling, fair-share and spot capacity variants"""
+    return [
+        *feature_matrix(),
+        Variant("batch-maps", BATCH_MAPS),
+        Variant("autoscaling", AUTOSCALING),
+        Variant("fair-share", FAIR_SHARE),
+        Variant("spot-capacity", SPOT_CAPACITY),
+    ]
+
+
+def save_variant_plans(plans: Dict[str, VariantPlan], path: Path):
+    """Write variant plans as JSON so other processes can reuse them"""
+    Path(path).write_text(json.dumps({
+        name: {
+            "overrides": plan.variant.overrides,
+            "workspace": str(plan.workspace),
+            "result": list(plan.result),
+            "plan_json": plan.plan_json,
+        }
+        for name, plan in plans.items()
+    }), encoding="utf-8")
+
+
+def load_variant_plans(path: Path) -> Dict[str, VariantPlan]:
+    """Read variant plans written by ``save_variant_plans``"""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {
+        name: VariantPlan(
+            Variant(name, plan["overrides"]),
+            Path(plan["workspace"]),
+            TerraformResult(*plan["result"]),
+            plan["plan_json"],
+        )
+        for name, plan in data.items()
+    }
+
+
+def plan_workspace(workspace: str, env: Dict[str, str], runner: EnvRunner = run_terraform) -> tuple:
+    """Init, plan and render one workspace; runs inside a pool worker"""
+    cwd = Path(workspace)
+    init = ensure_init(cwd, lambda args: runner(args, cwd, env))
+    if init.returncode != 0:
+        return init, None
+    plan = runner(["plan", "-no-color", "-input=false", "-out=tfplan"], cwd, env)
+    if plan.returncode != 0:
+        return plan, None
+    show = runner(["show", "-json", "-no-color", "tfplan"], cwd, env)
+    if show.returncode != 0:
+        return show, None
+    return plan, json.loads(show.stdout)
+
+
+class VariantMatrix:
+    """Plans feature-flag variants of the example configuration concurrently.
+
+    Each variant gets its own clone of the module and example configuration
+    (see ``clone_workspace``; an initialized source lends its providers, so
+    variant init is skipped), an override file setting its module arguments,
+    and an isolated ``TF_DATA_DIR``. All variants share one
+    ``TF_PLUGIN_CACHE_DIR``, which the first variant populates before the rest
+    are planned in a process pool.
+    """
+
+    def __init__(self, examples_dir: Path, workspaces_root: Path, plugin_cache_dir: Path,
+                 max_workers: Optional[int] = None, runner: EnvRunner = run_terraform):
+        self.examples_dir = Path(examples_dir)
+        self.module_dir = self.examples_dir.parent
+        self.workspaces_root = Path(workspaces_root)
+        self.plugin_cache_dir = Path(plugin_cache_dir)
+        self.max_workers = os.cpu_count() if max_workers is None else max_workers
+        self.runner = runner
+
+    def prepare(self, variant: Variant) -> Path:
+        """Create the variant's workspace and return the directory to plan in"""
+        examples = clone_workspace(self.examples_dir, self.workspaces_root / variant.name)
+        (examples / OVERRIDE_FILE).write_text(
+            json.dumps({"module": {MODULE_NAME: variant.overrides}}, indent=2, sort_keys=True),
+            encoding="utf-8",
+        )
+        return examples
+
+    def environment(self, workspace: Path) -> Dict[str, str]:
+        env = dict(os.environ)
+        env["TF_DATA_DIR"] = str(workspace / ".terraform")
+        env["TF_PLUGIN_CACHE_DIR"] = str(self.plugin_cache_dir)
+        env["TF_IN_AUTOMATION"] = "1"
+        return env
+
+    def plan_all(self, variants: Iterable[Variant]) -> Dict[str, VariantPlan]:
+        """Plan every variant and return the outcomes keyed by variant name"""
+        variants = list(variants)
+        if not variants:
+            return {}
+        self.plugin_cache_dir.mkdir(parents=True, exist_ok=True)
+        workspaces = {variant.name: self.prepare(variant) for variant in variants}
+        outcomes: Dict[str, tuple] = {}
+
+        # The plugin cache is not safe for concurrent first-time installs, so warm it with one variant
+        first, rest = variants[0], variants[1:]
+        outcomes[first.name] = plan_workspace(
+            str(workspaces[first.name]), self.environment(workspaces[first.name]), self.runner
+        )
+
+        if self.max_workers and len(rest) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(rest))) as pool:
+                futures = {
+                    variant.name: pool.submit(
+                        plan_workspace, str(workspaces[variant.name]),
+                        self.environment(workspaces[variant.name]), self.runner,
+                    )
+                    for variant in rest
+                }
+                for name, future in futures.items():
+                    outcomes[name] = future.result()
+        else:
+            for variant in rest:
+                outcomes[variant.name] = plan_workspace(
+                    str(workspaces[variant.name]), self.environment(workspaces[variant.name]), self.runner
+                )
+
+        return {
+            variant.name: VariantPlan(variant, workspaces[variant.name], *outcomes[variant.name])
+            for variant in variants
+        }
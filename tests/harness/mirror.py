@@ -0,0 +1,183 @@
+"""Offline provider mirror for hermetic terraform runs.
+
+Usage::
+
+    python -m tests.harness.mirror build  --root ~/.cache/terraform-mirror
+    python -m tests.harness.mirror verify --root ~/.cache/terraform-mirror
+    eval "$(python -m tests.harness.mirror env --root ~/.cache/terraform-mirror)"
+
+``build`` needs registry access once (``terraform providers mirror``); after
+that ``pytest --provider-mirror DIR`` initializes exclusively from the mirror.
+"""
+import argparse
+import hashlib
+import platform
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from .runner import TerraformResult, run_terraform
+
+PROVIDER_BLOCK = re.compile(r'provider\s+"(?P<source>[^"]+)"\s*\{(?P<body>.*?)\n\}', re.DOTALL)
+VERSION_LINE = re.compile(r'^\s*version\s*=\s*"(?P<value>[^"]+)"', re.MULTILINE)
+CONSTRAINTS_LINE = re.compile(r'^\s*constraints\s*=\s*"(?P<value>[^"]+)"', re.MULTILINE)
+HASHES_BLOCK = re.compile(r"hashes\s*=\s*\[(?P<values>.*?)\]", re.DOTALL)
+HASH_VALUE = re.compile(r'"(?P<value>[^"]+)"')
+
+MACHINE_ARCHITECTURES = {"x86_64": "amd64", "amd64": "amd64", "aarch64": "arm64", "arm64": "arm64"}
+
+
+class LockedProvider(NamedTuple):
+    """One ``provider`` block of ``.terraform.lock.hcl``"""
+    source: str
+    version: str
+    constraints: str
+    hashes: List[str]
+
+    @property
+    def type(self) -> str:
+        return self.source.rsplit("/", 1)[-1]
+
+    def archive_name(self, target_platform: str) -> str:
+        return f"terraform-provider-{self.type}_{self.version}_{target_platform}.zip"
+
+
+def current_platform() -> str:
+    """Terraform platform string for this machine, e.g. ``linux_amd64``"""
+    machine = platform.machine().lower()
+    return f"{platform.system().lower()}_{MACHINE_ARCHITECTURES.get(machine, machine)}"
+
+
+def parse_lock_file(path: Path) -> List[LockedProvider]:
+    """Providers pinned by a dependency lock file"""
+    providers = []
+    for block in PROVIDER_BLOCK.finditer(Path(path).read_text(encoding="utf-8")):
+        body = block.group("body")
+        version = VERSION_LINE.search(body)
+        constraints = CONSTRAINTS_LINE.search(body)
+        hashes = HASHES_BLOCK.search(body)
+        providers.append(LockedProvider(
+            source=block.group("source"),
+            version=version.group("value") if version else "",
+            constraints=constraints.group("value") if constraints else "",
+            hashes=HASH_VALUE.findall(hashes.group("values")) if hashes else [],
+        ))
+    return providers
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ProviderMirror:
+    """A packed-layout filesystem mirror plus plugin cache under one root directory"""
+
+    def __init__(self, root: Path, platforms: Optional[Sequence[str]] = None):
+        self.root = Path(root).expanduser()
+        self.platforms = list(platforms or [current_platform()])
+
+    @property
+    def mirror_dir(self) -> Path:
+        return self.root / "mirror"
+
+    @property
+    def plugin_cache_dir(self) -> Path:
+        return self.root / "plugin-cache"
+
+    @property
+    def cli_config_file(self) -> Path:
+        return self.root / "terraformrc"
+
+    def archive_path(self, provider: LockedProvider, target_platform: str) -> Path:
+        return self.mirror_dir / provider.source / provider.archive_name(target_platform)
+
+    def build(self, examples_dir: Path, runner=run_terraform) -> TerraformResult:
+        """Download the locked providers into the mirror with ``terraform providers mirror``"""
+        self.mirror_dir.mkdir(parents=True, exist_ok=True)
+        args = ["providers", "mirror", *(f"-platform={name}" for name in self.platforms), str(self.mirror_dir)]
+        return runner(args, Path(examples_dir))
+
+    def verify(self, lock_file: Path) -> List[str]:
+        """Problems preventing an offline init from the mirror (empty when it is usable).
+
+        Every provider in the lock file must have its locked version mirrored
+        for every platform, with an archive hash listed under ``zh:`` in the
+        lock file.
+        """
+        lock_file = Path(lock_file)
+        if not lock_file.exists():
+            return [f"{lock_file} not found; run terraform init once and commit the lock file"]
+        problems = []
+        for provider in parse_lock_file(lock_file):
+            for target_platform in self.platforms:
+                archive = self.archive_path(provider, target_platform)
+                if not archive.exists():
+                    problems.append(f"{provider.source} {provider.version} ({target_platform}) is not mirrored")
+                    continue
+                if f"zh:{file_sha256(archive)}" not in provider.hashes:
+                    problems.append(f"{archive.name} does not match any zh: hash in {lock_file.name}")
+        return problems
+
+    def write_cli_config(self) -> Path:
+        """Write a CLI config that installs providers only from the mirror"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.plugin_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cli_config_file.write_text(
+            f'plugin_cache_dir = "{self.plugin_cache_dir.as_posix()}"\n'
+            "\n"
+            "provider_installation {\n"
+            "  filesystem_mirror {\n"
+            f'    path = "{self.mirror_dir.as_posix()}"\n'
+            "  }\n"
+            "}\n",
+            encoding="utf-8",
+        )
+        return self.cli_config_file
+
+    def environment(self) -> Dict[str, str]:
+        """Variables that point terraform at the mirror and plugin cache"""
+        return {
+            "TF_CLI_CONFIG_FILE": str(self.write_cli_config()),
+            "TF_PLUGIN_CACHE_DIR": str(self.plugin_cache_dir),
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build and check the offline terraform provider mirror")
+    parser.add_argument("command", choices=["build", "verify", "env"])
+    parser.add_argument("--root", type=Path, required=True, help="directory holding the mirror and plugin cache")
+    parser.add_argument("--platform", action="append", dest="platforms", help="target platform (repeatable)")
+    parser.add_argument("--examples-dir", type=Path, default=Path(__file__).parent.parent.parent / "examples")
+    args = parser.parse_args(argv)
+
+    mirror = ProviderMirror(args.root, args.platforms)
+    lock_file = args.examples_dir / ".terraform.lock.hcl"
+
+    if args.command == "build":
+        result = mirror.build(args.examples_dir)
+        sys.stdout.write(result.stdout)
+        if result.returncode != 0:
+            sys.stderr.write(result.stderr)
+            return result.returncode
+
+    if args.command in ("build", "verify"):
+        problems = mirror.verify(lock_file)
+        for problem in problems:
+            print(f"error: {problem}", file=sys.stderr)
+        if problems:
+            return 1
+        print(f"Provider mirror at {mirror.mirror_dir} matches {lock_file}")
+        return 0
+
+    for name, value in mirror.environment().items():
+        print(f"export {name}={value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+AttributePath = Union[str, Sequence[Union[str, int]]]
+
+_MISSING = object()
+
+
+def split_path(path: AttributePath) -> Tuple[Union[str, int], ...]:
+    """Split ``"compute_resources.0.max_vcpus"`` into ``("compute_resources", 0, "max_vcpus")``"""
+    if not isinstance(path, str):
+        return tuple(path)
+    return tuple(int(part) if part.isdigit() else part for part in path.split("."))
+
+
+def lookup(value: Any, path: AttributePath, default: Any = _MISSING) -> Any:
+    """Follow an attribute path through nested dicts and lists"""
+    for part in split_path(path):
+        try:
+            value = value[part]
+        except (KeyError, IndexError, TypeError):
+            if default is _MISSING:
+                raise KeyError(path)
+            return default
+    return value
+
+
+def plan_actions_summary(actions: Sequence[str]) -> Tuple[int, int, int]:
+    """Map a change's action list to its (add, change, destroy) contribution"""
+    actions = set(actions)
+    if actions == {"create"}:
+        return 1, 0, 0
+    if actions == {"update"}:
+        return 0, 1, 0
+    if actions == {"delete"}:
+        return 0, 0, 1
+    if actions == {"create", "delete"}:
+        return 1, 0, 1
+    return 0, 0, 0
+
+
+class ResourceChange:
+    """One entry of ``resource_changes`` in a ``terraform show -json`` plan"""
+
+    __slots__ = (
+        "address", "module_address", "mode", "type", "name", "index",
+        "provider_name", "actions", "before", "after", "after_unknown", "after_sensitive",
+    )
+
+    def __init__(self, address: str, module_address: Optional[str], mode: str, type: str,
+                 name: str, index: Any, provider_name: str, actions: Tuple[str, ...],
+                 before: Any, after: Any, after_unknown: Any, after_sensitive: Any):
+        self.address = address
+        self.module_address = module_address
+        self.mode = mode
+        self.type = type
+        self.name = name
+        self.index = index
+        self.provider_name = provider_name
+        self.actions = actions
+        self.before = before
+        self.after = after
+        self.after_unknown = after_unknown
+        self.after_sensitive = after_sensitive
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ResourceChange":
+        change = data.get("change", {})
+        return cls(
+            address=data["address"],
+            module_address=data.get("module_address"),
+            mode=data.get("mode", "managed"),
+            type=data["type"],
+            name=data["name"],
+            index=data.get("index"),
+            provider_name=data.get("provider_name", ""),
+            actions=tuple(change.get("actions", ())),
+            before=change.get("before"),
+            after=change.get("after") or {},
+            after_unknown=change.get("after_unknown") or {},
+            after_sensitive=change.get("after_sensitive") or {},
+        )
+
+    @property
+    def action(self) -> str:
+        """Single word for the change: create, update, delete, replace, read or no-op"""
+        if set(self.actions) == {"create", "delete"}:
+            return "replace"
+        return self.actions[0] if self.actions else "no-op"
+
+    @property
+    def local_address(self) -> str:
+        """Address relative to the module, e.g. ``aws_ecs_service.ecs-batch[0]``"""
+        if self.module_address:
+            return self.address[len(self.module_address) + 1:]
+        return self.address
+
+    def get(self, path: AttributePath, default: Any = None) -> Any:
+        """Planned value at ``path``, or ``default`` when absent or not yet known"""
+        return lookup(self.after, path, default)
+
+    def is_unknown(self, path: AttributePath) -> bool:
+        """Whether the value at ``path`` is only known after apply"""
+        marker = self.after_unknown
+        for part in split_path(path):
+            if marker is True:
+                return True
+            try:
+                marker = marker[part]
+            except (KeyError, IndexError, TypeError):
+                return False
+        return marker is True
+
+    def __repr__(self) -> str:
+        return f"ResourceChange({self.address!r}, {self.action})"
+
+
+class OutputChange:
+    """One entry of ``output_changes`` in a ``terraform show -json`` plan"""
+
+    __slots__ = ("name", "actions", "after", "after_unknown", "sensitive")
+
+    def __init__(self, name: str, actions: Tuple[str, ...], after: Any, after_unknown: bool, sensitive: bool):
+        self.name = name
+        self.actions = actions
+        self.after = after
+        self.after_unknown = after_unknown
+        self.sensitive = sensitive
+
+    @classmethod
+    def from_json(cls, name: str, data: dict) -> "OutputChange":
+        return cls(
+            name=name,
+            actions=tuple(data.get("actions", ())),
+            after=data.get("after"),
+            after_unknown=data.get("after_unknown") is True,
+            sensitive=data.get("after_sensitive") is True,
+        )
+
+
+class PlanModel:
+    """Indexed view of a JSON plan with constant-time lookups by address, type and module"""
+
+    def __init__(self, resource_changes: Sequence[ResourceChange],
+                 output_changes: Optional[Dict[str, OutputChange]] = None,
+                 terraform_version: str = "", format_version: str = ""):
+        self.terraform_version = terraform_version
+        self.format_version = format_version
+        self.outputs: Dict[str, OutputChange] = dict(output_changes or {})
+        self._by_address: Dict[str, ResourceChange] = {}
+        self._by_type: Dict[str, List[ResourceChange]] = defaultdict(list)
+        self._by_module: Dict[str, List[ResourceChange]] = defaultdict(list)
+        for change in resource_changes:
+            self.add(change)
+
+    @classmethod
+    def from_json(cls, plan: dict) -> "PlanModel":
+        return cls(
+            [ResourceChange.from_json(data) for data in plan.get("resource_changes", [])],
+            {name: OutputChange.from_json(name, data) for name, data in plan.get("output_changes", {}).items()},
+            terraform_version=plan.get("terraform_version", ""),
+            format_version=plan.get("format_version", ""),
+        )
+
+    def add(self, change: ResourceChange):
+        """Index a resource change"""
+        self._by_address[change.address] = change
+        self._by_type[change.type].append(change)
+        self._by_module[change.module_address or ""].append(change)
+
+    def resource(self, address: str) -> ResourceChange:
+        """Resource change with the given full address (``KeyError`` if not planned)"""
+        return self._by_address[address]
+
+    def by_type(self, resource_type: str) -> List[ResourceChange]:
+        """Resource changes of one type, in plan order"""
+        return list(self._by_type.get(resource_type, ()))
+
+    def in_module(self, module_address: str = "") -> List[ResourceChange]:
+        """Resource changes declared directly in a module (``""`` for the root module)"""
+        return list(self._by_module.get(module_address, ()))
+
+    def output(self, name: str) -> OutputChange:
+        return self.outputs[name]
+
+    @property
+    def addresses(self) -> List[str]:
+        return list(self._by_address)
+
+    @property
+    def types(self) -> List[str]:
+        return list(self._by_type)
+
+    def with_action(self, action: str) -> List[ResourceChange]:
+        """Resource changes whose action is ``create``, ``update``, ``delete``, ``replace``..."""
+        return [change for change in self if change.action == action]
+
+    def summary(self) -> Dict[str, int]:
+        """Counts matching the ``Plan: N to add, N to change, N to destroy`` line"""
+        add = change = destroy = 0
+        for resource_change in self:
+            counts = plan_actions_summary(resource_change.actions)
+            add += counts[0]
+            change += counts[1]
+            destroy += counts[2]
+        return {"add": add, "change": change, "destroy": destroy}
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._by_address
+
+    def __iter__(self) -> Iterator[ResourceChange]:
+        return iter(self._by_address.values())
+
+    def __len__(self) -> int:
+        return len(self._by_address)
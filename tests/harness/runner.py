@@ -0,0 +1,92 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from .timing import peak_rss_mb, record_invocation
+
+
+class TerraformResult(NamedTuple):
+    """Captured result of a terraform invocation"""
+    stdout: str
+    stderr: str
+    returncode: int
+
+
+def describe_version(result: TerraformResult) -> str:
+    """``terraform version -json`` output as "<version> <platform>", or its first line if it is not JSON"""
+    try:
+        version = json.loads(result.stdout)
+        return f"{version['terraform_version']} {version.get('platform', '')}"
+    except (ValueError, KeyError):
+        return result.stdout.splitlines()[0] if result.stdout else ""
+
+
+# Called with the stream name ("stdout" or "stderr") and each line as it is produced
+OutputCallback = Callable[[str, str], None]
+
+
+def _read_into(stream, chunks: List[str], name: str, on_output: Optional[OutputCallback]):
+    if on_output is None:
+        chunks.append(stream.read())
+    else:
+        for line in stream:
+            chunks.append(line)
+            on_output(name, line)
+    stream.close()
+
+
+def run_terraform(args: Sequence[str], cwd: Path, env: Optional[dict] = None,
+                  on_output: Optional[OutputCallback] = None) -> TerraformResult:
+    """Run a terraform subcommand and capture its output.
+
+    ``on_output`` receives output line by line while the command runs. The
+    wall time, CPU time and peak RSS of the process are recorded for the
+    timing report (see ``timing.py``).
+    """
+    started = time.perf_counter()
+    if not hasattr(os, "wait4"):
+        result = subprocess.run(["terraform", *args], cwd=cwd, capture_output=True, text=True, env=env)
+        record_invocation(args, cwd, time.perf_counter() - started, result.returncode)
+        return TerraformResult(result.stdout, result.stderr, result.returncode)
+
+    process = subprocess.Popen(
+        ["terraform", *args],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env
+    )
+    stdout: List[str] = []
+    stderr: List[str] = []
+    readers = [
+        threading.Thread(target=_read_into, args=(process.stdout, stdout, "stdout", on_output), daemon=True),
+        threading.Thread(target=_read_into, args=(process.stderr, stderr, "stderr", on_output), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    # Reap the process ourselves: wait4 reports the resource usage of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    record_invocation(
+        args, cwd, time.perf_counter() - started, process.returncode,
+        user_seconds=usage.ru_utime, system_seconds=usage.ru_stime, peak_rss=peak_rss_mb(usage.ru_maxrss),
+    )
+    return TerraformResult("".join(stdout), "".join(stderr), process.returncode)
+
+
+def terraform_binary() -> Optional[str]:
+    """Real path, mtime and size of the terraform binary on ``PATH``, or ``None`` if there is none"""
+    path = shutil.which("terraform")
+    if path is None:
+        return None
+    real_path = os.path.realpath(path)
+    stat = os.stat(real_path)
+    return f"{real_path}:{stat.st_mtime_ns}:{stat.st_size}"
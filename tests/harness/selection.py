@@ -0,0 +1,374 @@
+"""Affected-test selection: skip tests whose inputs are unchanged since they last passed.
+
+Every test depends on its own file and on the harness (``conftest.py`` and
+``tests/harness``). Tests using the terraform fixtures also depend on the
+example configuration: whole-configuration checks (fmt, validate, graph,
+apply, decoded plan documents, console expressions) on every module input
+file, plan-based tests only on the resources, data sources, variables and
+outputs their source names, as found in the static index of the module (or
+as listed with ``@pytest.mark.terraform_inputs``).
+
+Inputs are fingerprinted by content. A resource's fingerprint covers its
+parsed block (so reformatting alone changes nothing), the values of the
+variables it reads and the fingerprints of the locals, data sources and
+resources it references; provider settings and the lock file are part of
+every terraform test's inputs. Changing ``outputs.tf`` therefore only
+affects tests naming an output, the test's own file, and the
+whole-configuration checks.
+
+Each passing test is recorded with the fingerprint of its inputs in the
+pytest cache. With ``--affected-only`` tests whose fingerprint matches
+their last pass are deselected and their earlier result is reused.
+"""
+import hashlib
+import inspect
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .cache import module_input_files
+from .hcl import HCLSyntaxError, Body, Reference, parse
+from .locks import FileLock
+from .static import StaticConfiguration
+
+STATE_FILE = "passed.json"
+
+# Fixtures whose results depend on the whole example configuration
+CONFIGURATION_FIXTURES = {
+    "terraform_examples_dir", "plan_broker", "terraform_init", "terraform_checks", "terraform_fmt_check",
+    "terraform_validate", "terraform_graph", "dependency_graph", "assert_critical_path", "workspace_pool",
+    "apply_benchmark", "plan_snapshot", "golden_plan_snapshot", "assert_plan_snapshot",
+    # Looked up by container name, IAM action or console expression rather than by resource
+    "plan_documents", "terraform_console",
+}
+# Fixtures whose results can be narrowed to the resources, variables and outputs a test names
+PLAN_FIXTURES = {
+    "terraform_plan", "terraform_plan_file", "terraform_plan_json", "parsed_plan_output",
+    "static_configuration", "variant_plans",
+}
+SETTINGS = "settings"
+ALL_FILES = "*"
+
+
+def canonical(value: Any) -> Any:
+    """JSON-serializable form of parsed HCL, independent of formatting and comments"""
+    if isinstance(value, Body):
+        return {
+            "attributes": {name: canonical(item) for name, item in value.attributes.items()},
+            "blocks": [canonical(block) for block in value.blocks],
+        }
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return [type(value).__name__, *(canonical(item) for item in value)]
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in value.items()}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(canonical(value), sort_keys=True).encode()).hexdigest()
+
+
+def references(value: Any) -> Iterator[Tuple[Any, ...]]:
+    """Parts of every reference in a parsed expression or block"""
+    if isinstance(value, Reference):
+        yield value.parts
+    elif isinstance(value, Body):
+        for item in value.attributes.values():
+            yield from references(item)
+        for block in value.blocks:
+            yield from references(block.body)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from references(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from references(item)
+
+
+class ConfigurationIndex:
+    """Content fingerprints of the example configuration's inputs.
+
+    Keys are ``file:<path>`` for every module input file, ``resource:<type.name>``,
+    ``data:<type.name>``, ``variable:<name>``, ``output:<name>`` and
+    ``local:<name>`` for the module's declarations, and ``settings`` for the
+    provider and ``terraform`` blocks plus the lock file.
+    """
+
+    def __init__(self, examples_dir: Path, module_name: str = "batch_ecs"):
+        self.examples_dir = Path(examples_dir)
+        self.root = self.examples_dir.parent
+        self.fingerprints: Dict[str, str] = {}
+        files = module_input_files(self.examples_dir)
+        for path in files:
+            try:
+                content = path.read_bytes()
+            except FileNotFoundError:
+                content = b"<missing>"
+            self.fingerprints[f"file:{path.relative_to(self.root)}"] = hashlib.sha256(content).hexdigest()
+
+        static = StaticConfiguration.from_example(self.examples_dir, module_name)
+        self.module = static.module
+        self._nodes: Dict[str, Any] = {}
+        for name, block in self.module.variables.items():
+            self._nodes[f"variable:{name}"] = [block, static.variables.get(name)]
+        for key, block in self.module.resources.items():
+            self._nodes[f"resource:{key}"] = block
+        for key, block in self.module.data_sources.items():
+            self._nodes[f"data:{key}"] = block
+        for name, block in self.module.outputs.items():
+            self._nodes[f"output:{name}"] = block
+        for name, expression in self.module.locals.items():
+            self._nodes[f"local:{name}"] = expression
+        for key in self._nodes:
+            self._fingerprint(key, set())
+
+        settings = [
+            block
+            for path in files if path.suffix == ".tf" and path.exists()
+            for block in parse(path.read_text(encoding="utf-8")).blocks if block.type in ("provider", "terraform")
+        ]
+        lock_file = self.examples_dir / ".terraform.lock.hcl"
+        settings.append(lock_file.read_text(encoding="utf-8") if lock_file.exists() else None)
+        self.fingerprints[SETTINGS] = digest(settings)
+
+    def dependencies(self, key: str) -> Set[str]:
+        """Keys of the declarations ``key`` references directly"""
+        found = set()
+        for parts in references(self._nodes[key]):
+            if len(parts) < 2 or not isinstance(parts[1], str):
+                continue
+            if parts[0] == "var":
+                found.add(f"variable:{parts[1]}")
+            elif parts[0] == "local":
+                found.add(f"local:{parts[1]}")
+            elif parts[0] == "data" and len(parts) > 2:
+                found.add(f"data:{parts[1]}.{parts[2]}")
+            else:
+                found.add(f"resource:{parts[0]}.{parts[1]}")
+        return {dependency for dependency in found if dependency in self._nodes and dependency != key}
+
+    def _fingerprint(self, key: str, visiting: Set[str]) -> str:
+        if key in self.fingerprints:
+            return self.fingerprints[key]
+        visiting.add(key)
+        dependencies = sorted(
+            (dependency, self._fingerprint(dependency, visiting))
+            for dependency in self.dependencies(key) if dependency not in visiting
+        )
+        visiting.discard(key)
+        self.fingerprints[key] = digest([self._nodes[key], dependencies])
+        return self.fingerprints[key]
+
+    @property
+    def files(self) -> List[str]:
+        return sorted(key for key in self.fingerprints if key.startswith("file:"))
+
+    def expand(self, names: Iterable[str]) -> Set[str]:
+        """Input keys for ``terraform_inputs`` names: resource types or addresses, ``var.x``,
+        ``output.x``, ``data.type.name``, file paths relative to the module, or ``*`` for every file"""
+        keys = set()
+        for name in names:
+            if name == ALL_FILES:
+                keys.update(self.files)
+            elif name.startswith("var."):
+                keys.add(f"variable:{name[4:]}")
+            elif name.startswith("output."):
+                keys.add(f"output:{name[7:]}")
+            elif name.startswith("data."):
+                keys.update(key for key in self._nodes if key.startswith(f"data:{name[5:]}"))
+            elif f"file:{name}" in self.fingerprints:
+                keys.add(f"file:{name}")
+            elif "." in name:
+                keys.add(f"resource:{name}")
+            else:
+                keys.update(key for key in self._nodes if key.startswith(f"resource:{name}."))
+        unknown = sorted(key for key in keys if key not in self.fingerprints)
+        if unknown:
+            raise KeyError(f"unknown terraform inputs: {', '.join(unknown)}")
+        return keys
+
+    def mentioned(self, source: str) -> Set[str]:
+        """Input keys for the declarations a test's source names"""
+        keys = set()
+        for key in self._nodes:
+            kind, name = key.split(":", 1)
+            if kind in ("resource", "data"):
+                resource_type = name.split(".", 1)[0]
+                if name in source or re.search(rf"\b{re.escape(resource_type)}\b", source):
+                    keys.add(key)
+            elif kind in ("variable", "output"):
+                prefix = "var" if kind == "variable" else "output"
+                if re.search(rf"""\b{prefix}\.{re.escape(name)}\b|["']{re.escape(name)}["']""", source):
+                    keys.add(key)
+        return keys
+
+
+def terraform_inputs(index: Optional[ConfigurationIndex], fixturenames: Iterable[str], source: str,
+                     declared: Optional[Sequence[str]] = None) -> Set[str]:
+    """Keys of the example configuration a test with these fixtures and source depends on"""
+    fixturenames = set(fixturenames)
+    whole = bool(fixturenames & CONFIGURATION_FIXTURES)
+    if not whole and not fixturenames & PLAN_FIXTURES and declared is None:
+        return set()
+    if index is None:
+        return {ALL_FILES}
+    if declared is not None:
+        keys = index.expand(declared)
+    elif whole:
+        keys = set(index.files)
+    else:
+        keys = index.mentioned(source) or set(index.files)
+    return keys | {SETTINGS}
+
+
+def requested_fixtures(item) -> Set[str]:
+    """Harness fixtures a test requests, directly or through fixtures of its own (such as class fixtures).
+
+    The walk stops at the harness fixtures rather than following the whole
+    closure: every plan fixture depends on ``plan_broker`` and
+    ``terraform_examples_dir``, which would make every test whole-configuration.
+    """
+    info = getattr(item, "_fixtureinfo", None)
+    if info is None:
+        return set(getattr(item, "fixturenames", ()))
+    harness = CONFIGURATION_FIXTURES | PLAN_FIXTURES
+    found: Set[str] = set()
+    pending, seen = list(info.initialnames), set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        if name in harness:
+            found.add(name)
+            continue
+        definitions = info.name2fixturedefs.get(name)
+        if definitions:
+            pending.extend(definitions[-1].argnames)
+    return found
+
+
+def _test_source(item) -> str:
+    """Source of a test function plus its parameters, or ``""`` when unavailable"""
+    parts = []
+    try:
+        parts.append(inspect.getsource(item.obj))
+    except (AttributeError, OSError, TypeError):
+        pass
+    callspec = getattr(item, "callspec", None)
+    if callspec is not None:
+        parts.append(repr(callspec.params))
+    return "\n".join(parts)
+
+
+class AffectedTestSelection:
+    """Pytest plugin recording passing tests' input fingerprints and deselecting unaffected tests"""
+
+    def __init__(self, examples_dir: Path, harness_files: Sequence[Path], enabled: bool = False):
+        self.examples_dir = Path(examples_dir)
+        self.harness_files = list(harness_files)
+        self.enabled = enabled
+        self.state_path: Optional[Path] = None
+        self.fingerprints: Dict[str, str] = {}
+        self.deselected: List[str] = []
+        self.reused_seconds = 0.0
+        self.outcomes: Dict[str, str] = {}
+        self.durations: Dict[str, float] = {}
+        self._file_hashes: Dict[Path, str] = {}
+
+    def _file_hash(self, path: Path) -> str:
+        if path not in self._file_hashes:
+            try:
+                self._file_hashes[path] = hashlib.sha256(Path(path).read_bytes()).hexdigest()
+            except OSError:
+                self._file_hashes[path] = "<missing>"
+        return self._file_hashes[path]
+
+    def load(self) -> Dict[str, dict]:
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            return json.loads(self.state_path.read_text(encoding="utf-8"))
+        except ValueError:
+            return {}
+
+    def pytest_sessionstart(self, session):
+        cache = getattr(session.config, "cache", None)
+        if cache is not None:
+            self.state_path = Path(cache.mkdir("terraform-selection")) / STATE_FILE
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        try:
+            index = ConfigurationIndex(self.examples_dir)
+        except (HCLSyntaxError, KeyError, OSError):
+            index = None  # unparsable configuration: every terraform test is affected
+        harness = [(str(path), self._file_hash(path)) for path in self.harness_files]
+        for item in items:
+            marker = item.get_closest_marker("terraform_inputs")
+            keys = terraform_inputs(index, requested_fixtures(item), _test_source(item),
+                                    marker.args if marker else None)
+            if ALL_FILES in keys:
+                self.fingerprints[item.nodeid] = "<unindexed>"
+                continue
+            inputs = sorted((key, index.fingerprints[key]) for key in keys)
+            self.fingerprints[item.nodeid] = digest([harness, self._file_hash(item.path), inputs])
+
+        if not self.enabled:
+            return
+        records = self.load()
+        selected, deselected = [], []
+        for item in items:
+            record = records.get(item.nodeid)
+            if record is not None and record["fingerprint"] == self.fingerprints[item.nodeid]:
+                deselected.append(item)
+                self.reused_seconds += record.get("duration", 0.0)
+            else:
+                selected.append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+            self.deselected = [item.nodeid for item in deselected]
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
+        if report.failed:
+            self.outcomes[report.nodeid] = "failed"
+        elif report.skipped:
+            self.outcomes.setdefault(report.nodeid, "skipped")
+        elif report.when == "call":
+            self.outcomes.setdefault(report.nodeid, "passed")
+
+    def pytest_sessionfinish(self, session):
+        if self.state_path is None or not self.outcomes:
+            return
+        # pytest-xdist workers finish concurrently, so merge into the stored records under a lock
+        with FileLock(self.state_path.with_suffix(".lock")):
+            records = self.load()
+            for nodeid, outcome in self.outcomes.items():
+                fingerprint = self.fingerprints.get(nodeid)
+                if fingerprint is None:
+                    continue
+                if outcome == "passed" and fingerprint != "<unindexed>":
+                    records[nodeid] = {
+                        "fingerprint": fingerprint,
+                        "duration": round(self.durations.get(nodeid, 0.0), 3),
+                        "passed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    }
+                else:
+                    records.pop(nodeid, None)
+            self.state_path.write_text(json.dumps(records, indent=2, sort_keys=True), encoding="utf-8")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.enabled:
+            return
+        terminalreporter.write_sep(
+            "-",
+            f"affected-test selection: {len(self.deselected)} unaffected tests deselected, "
+            f"reusing their last passing results (~{self.reused_seconds:.1f}s saved)"
+        )
@@ -0,0 +1,31 @@
+import hashlib
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+from .cache import PlanCache
+from .locks import FileLock
+
+
+class SharedState:
+    """Locks and a result store shared by every pytest-xdist worker of one run.
+
+    The plan broker holds ``lock(name)`` while it looks up, runs and stores a
+    command, so the first worker to get there runs terraform and the others
+    block, then find its result (failures included) in ``store``. Unlike the
+    persistent ``PlanCache`` the store lives only as long as the run.
+    """
+
+    def __init__(self, root: Path, timeout: Optional[float] = None):
+        self.root = Path(root)
+        self.timeout = timeout
+        self.store = PlanCache(self.root / "results", max_bytes=sys.maxsize)
+
+    def lock(self, name: str) -> FileLock:
+        return FileLock(self.root / "locks" / f"{name}.lock", timeout=self.timeout)
+
+    @staticmethod
+    def scope(path: Path) -> str:
+        """Short stable prefix that keeps lock names of different directories apart"""
+        return hashlib.sha256(str(Path(path).resolve()).encode()).hexdigest()[:12]
@@ -0,0 +1,210 @@
+"""Golden plan snapshots compared by per-resource hashes.
+
+A snapshot is the plan reduced to what the configuration decides: for every
+resource address its action and planned values, with ``jsonencode`` strings
+(policies, container definitions) decoded, values only known after apply or
+sensitive replaced by markers, and null arguments dropped so new optional
+provider arguments do not show up as changes. Each resource and output is
+stored with a hash of its canonical JSON (recomputed when a snapshot is
+loaded), so comparing two snapshots is a dictionary walk over hashes and only resources whose hashes differ are
+deep-diffed.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
+
+from .plan_model import PlanModel, ResourceChange, plan_actions_summary
+
+SNAPSHOT_FORMAT = 1
+UNKNOWN = "(known after apply)"
+SENSITIVE = "(sensitive value)"
+JSON_KEY = "(jsonencode)"
+
+
+def decode_json_string(value: str) -> Any:
+    """The decoded document for strings holding a JSON object or array, else ``value``"""
+    stripped = value.strip()
+    if not stripped.startswith(("{", "[")):
+        return value
+    try:
+        return {JSON_KEY: normalize(json.loads(stripped))}
+    except ValueError:
+        return value
+
+
+def normalize(value: Any, unknown: Any = None, sensitive: Any = None) -> Any:
+    """Planned value with unknown and sensitive parts marked, JSON strings decoded and nulls dropped"""
+    if unknown is True:
+        return UNKNOWN
+    if sensitive is True:
+        return SENSITIVE
+    if isinstance(value, dict):
+        unknown = unknown if isinstance(unknown, dict) else {}
+        sensitive = sensitive if isinstance(sensitive, dict) else {}
+        result = {}
+        for key in sorted(set(value) | {key for key, marker in unknown.items() if marker is True}):
+            item = normalize(value.get(key), unknown.get(key), sensitive.get(key))
+            if item is not None:
+                result[key] = item
+        return result
+    if isinstance(value, list):
+        unknown = unknown if isinstance(unknown, list) else []
+        sensitive = sensitive if isinstance(sensitive, list) else []
+        return [
+            normalize(item, unknown[index] if index < len(unknown) else None,
+                      sensitive[index] if index < len(sensitive) else None)
+            for index, item in enumerate(value)
+        ]
+    if isinstance(value, str):
+        return decode_json_string(value)
+    return value
+
+
+def content_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def resource_entry(change: ResourceChange) -> dict:
+    return {
+        "action": change.action,
+        "type": change.type,
+        "values": normalize(change.after, change.after_unknown, change.after_sensitive),
+    }
+
+
+def diff_values(expected: Any, actual: Any, path: str = "") -> Iterator[str]:
+    """Human-readable differences between two normalized values"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            child = f"{path}.{key}" if path else str(key)
+            if key not in actual:
+                yield f"{child}: removed (was {json.dumps(expected[key], sort_keys=True)})"
+            elif key not in expected:
+                yield f"{child}: added {json.dumps(actual[key], sort_keys=True)}"
+            else:
+                yield from diff_values(expected[key], actual[key], child)
+    elif isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        for index, (before, after) in enumerate(zip(expected, actual)):
+            yield from diff_values(before, after, f"{path}.{index}" if path else str(index))
+    elif expected != actual:
+        yield f"{path or '(value)'}: expected {json.dumps(expected, sort_keys=True)}, " \
+              f"got {json.dumps(actual, sort_keys=True)}"
+
+
+class SnapshotDiff(NamedTuple):
+    """Resources and outputs that differ between a golden snapshot and a plan"""
+    added: List[str]
+    removed: List[str]
+    changed: Dict[str, List[str]]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def report(self) -> List[str]:
+        lines = [f"+ {address}" for address in self.added]
+        lines.extend(f"- {address}" for address in self.removed)
+        for address, differences in self.changed.items():
+            lines.append(f"~ {address}")
+            lines.extend(f"    {difference}" for difference in differences)
+        return lines
+
+
+class PlanSnapshot:
+    """Normalized resources and outputs of a plan, each with its content hash"""
+
+    def __init__(self, resources: Dict[str, dict], outputs: Dict[str, Any], terraform_version: str = "",
+                 hashes: Optional[Dict[str, str]] = None):
+        self.resources = resources
+        self.outputs = outputs
+        self.terraform_version = terraform_version
+        if hashes is None:
+            hashes = {address: content_hash(entry) for address, entry in resources.items()}
+            hashes.update({f"output.{name}": content_hash(value) for name, value in outputs.items()})
+        self.hashes = hashes
+
+    @classmethod
+    def from_plan(cls, plan: Union[PlanModel, dict]) -> "PlanSnapshot":
+        """Snapshot of a ``PlanModel`` or a ``terraform show -json`` document"""
+        if isinstance(plan, dict):
+            plan = PlanModel.from_json(plan)
+        resources = {change.address: resource_entry(change) for change in sorted(plan, key=lambda c: c.address)}
+        outputs = {
+            name: SENSITIVE if output.sensitive else UNKNOWN if output.after_unknown else normalize(output.after)
+            for name, output in sorted(plan.outputs.items())
+        }
+        return cls(resources, outputs, plan.terraform_version)
+
+    @classmethod
+    def load(cls, path: Path) -> "PlanSnapshot":
+        """Read a snapshot written by ``save``.
+
+        Hashes are recomputed from the stored values rather than read back, so
+        a hand edit or merge resolution that changes values without touching
+        ``hash`` is still compared.
+        """
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a version {SNAPSHOT_FORMAT} plan snapshot")
+        return cls(
+            {address: {key: value for key, value in entry.items() if key != "hash"}
+             for address, entry in data["resources"].items()},
+            {name: entry["value"] for name, entry in data["outputs"].items()},
+            data.get("terraform_version", ""),
+        )
+
+    def save(self, path: Path):
+        """Write the snapshot through a temporary file, so readers never see a partial one"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": SNAPSHOT_FORMAT,
+            "terraform_version": self.terraform_version,
+            "resources": {
+                address: {"hash": self.hashes[address], **entry} for address, entry in self.resources.items()
+            },
+            "outputs": {
+                name: {"hash": self.hashes[f"output.{name}"], "value": value} for name, value in self.outputs.items()
+            },
+        }
+        staging = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        staging.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(staging, path)
+
+    def _value(self, key: str) -> Any:
+        if key.startswith("output."):
+            return self.outputs[key[len("output."):]]
+        return self.resources[key]
+
+    def compare(self, actual: "PlanSnapshot") -> SnapshotDiff:
+        """Differences from this (golden) snapshot to ``actual``; only changed hashes are deep-diffed"""
+        changed = {
+            key: list(diff_values(self._value(key), actual._value(key)))
+            for key, digest in self.hashes.items()
+            if key in actual.hashes and actual.hashes[key] != digest
+        }
+        return SnapshotDiff(
+            added=sorted(set(actual.hashes) - set(self.hashes)),
+            removed=sorted(set(self.hashes) - set(actual.hashes)),
+            changed=changed,
+        )
+
+    def addresses(self, action: Optional[str] = None) -> List[str]:
+        """Resource addresses, optionally only those planned for ``action``"""
+        return [address for address, entry in self.resources.items() if action in (None, entry["action"])]
+
+    def summary(self) -> Dict[str, int]:
+        """Counts matching the ``Plan:`` line of the snapshotted plan"""
+        actions = {"create": ("create",), "update": ("update",), "delete": ("delete",),
+                   "replace": ("create", "delete")}
+        add = change = destroy = 0
+        for entry in self.resources.values():
+            counts = plan_actions_summary(actions.get(entry["action"], ()))
+            add += counts[0]
+            change += counts[1]
+            destroy += counts[2]
+        return {"add": add, "change": change, "destroy": destroy}
+
+    def __len__(self) -> int:
+        return len(self.resources)
@@ -0,0 +1,352 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .hcl import (
+    UNRESOLVED,
+    Block,
+    Body,
+    Reference,
+    Unresolvable,
+    evaluate,
+    parse,
+    to_bool,
+    to_number,
+    to_string,
+    traverse,
+)
+from .plan_model import AttributePath, lookup
+
+# Arguments terraform interprets itself rather than passing to the provider
+META_ARGUMENTS = {"count", "for_each", "depends_on", "provider"}
+META_BLOCKS = {"lifecycle", "provisioner", "connection"}
+NON_RESOURCE_REFERENCES = {"data", "module", "path", "terraform", "self"}
+
+
+class ModuleConfig:
+    """Declarations from the ``*.tf`` files of one directory"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.resources: Dict[str, Block] = {}
+        self.data_sources: Dict[str, Block] = {}
+        self.variables: Dict[str, Block] = {}
+        self.outputs: Dict[str, Block] = {}
+        self.locals: Dict[str, Any] = {}
+        self.module_calls: Dict[str, Block] = {}
+
+    @classmethod
+    def load(cls, directory: Path) -> "ModuleConfig":
+        config = cls(directory)
+        for path in sorted(config.directory.glob("*.tf")):
+            config.add(parse(path.read_text(encoding="utf-8")))
+        return config
+
+    def add(self, body: Body):
+        for block in body.blocks:
+            if block.type == "resource":
+                self.resources[".".join(block.labels)] = block
+            elif block.type == "data":
+                self.data_sources[".".join(block.labels)] = block
+            elif block.type == "variable":
+                self.variables[block.labels[0]] = block
+            elif block.type == "output":
+                self.outputs[block.labels[0]] = block
+            elif block.type == "module":
+                self.module_calls[block.labels[0]] = block
+            elif block.type == "locals":
+                self.locals.update(block.body.attributes)
+
+
+def convert(value: Any, type_expression: Any) -> Any:
+    """Apply terraform's automatic conversion for a variable ``type`` constraint"""
+    if value is None or value is UNRESOLVED or type_expression is None:
+        return value
+    if isinstance(type_expression, Reference):
+        name = type_expression.parts[0]
+        converters = {"string": to_string, "number": to_number, "bool": to_bool}
+        return converters[name](value) if name in converters else value
+    name = getattr(type_expression, "name", None)
+    args = getattr(type_expression, "args", ())
+    element_type = args[0] if args else None
+    if name in ("list", "set") and isinstance(value, list):
+        return [convert(item, element_type) for item in value]
+    if name == "map" and isinstance(value, dict):
+        return {key: convert(item, element_type) for key, item in value.items()}
+    return value
+
+
+class StaticResource:
+    """One resource instance with its configured arguments evaluated without terraform.
+
+    ``values`` mirrors ``change.after`` in a JSON plan: nested blocks are lists
+    of dicts, and arguments that depend on apply-time values are ``UNRESOLVED``.
+    """
+
+    __slots__ = ("address", "module_address", "mode", "type", "name", "index", "values")
+
+    def __init__(self, address: str, module_address: Optional[str], mode: str, type: str,
+                 name: str, index: Any, values: Dict[str, Any]):
+        self.address = address
+        self.module_address = module_address
+        self.mode = mode
+        self.type = type
+        self.name = name
+        self.index = index
+        self.values = values
+
+    @property
+    def local_address(self) -> str:
+        """Address relative to the containing module, e.g. ``aws_ecs_service.ecs-batch[0]``"""
+        if self.module_address:
+            return self.address[len(self.module_address) + 1:]
+        return self.address
+
+    def get(self, path: AttributePath, default: Any = None) -> Any:
+        """Configured value at ``path``, ``UNRESOLVED`` if only known after apply"""
+        return lookup(self.values, path, default)
+
+    def is_resolved(self, path: AttributePath) -> bool:
+        return self.get(path) is not UNRESOLVED
+
+    def __repr__(self):
+        return f"StaticResource({self.address!r})"
+
+
+def _instance_suffix(index: Any) -> str:
+    if index is None:
+        return ""
+    return f"[{index}]" if isinstance(index, int) else f'["{index}"]'
+
+
+class StaticConfiguration:
+    """The module as instantiated by a ``module`` block, evaluated in pure Python.
+
+    Variables come from the calling module block (evaluated against the
+    caller's variable defaults and ``terraform.tfvars``) and the module's own
+    defaults. ``count`` and ``for_each`` are expanded when they resolve, and
+    references to other resources resolve to their configured arguments, so
+    only computed attributes such as ``arn`` or ``id`` stay ``UNRESOLVED``.
+    """
+
+    def __init__(self, module: ModuleConfig, variables: Dict[str, Any], module_address: Optional[str] = None):
+        self.module = module
+        self.variables = variables
+        self.module_address = module_address
+        self.unresolved_instances: Set[str] = set()
+        self._instances: Dict[str, List[StaticResource]] = {}
+        self._expanding: Set[str] = set()
+        self._unexpanded: Set[str] = set()
+        self._locals: Dict[str, Any] = {}
+        for key in module.resources:
+            self.instances(key)
+
+    @classmethod
+    def from_example(cls, examples_dir: Path, module_name: str = "batch_ecs",
+                     overrides: Optional[Dict[str, Any]] = None) -> "StaticConfiguration":
+        """Evaluate the module called ``module_name`` from the example configuration.
+
+        ``overrides`` replaces module arguments, as a variant override file would.
+        """
+        examples_dir = Path(examples_dir)
+        call = ModuleConfig.load(examples_dir).module_calls[module_name]
+        module = ModuleConfig.load(examples_dir / call.body.attributes["source"])
+        arguments = {**module_arguments(examples_dir, module_name), **(overrides or {})}
+        return cls(module, resolve_variables(module, arguments), f"module.{module_name}")
+
+    def evaluate(self, node: Any, bindings: Optional[Dict[str, Any]] = None) -> Any:
+        """Value of an expression in this module, ``UNRESOLVED`` if it needs terraform"""
+        try:
+            return evaluate(node, lambda parts: self._resolve(parts, bindings or {}))
+        except Unresolvable:
+            return UNRESOLVED
+
+    def _resolve(self, parts: Tuple[Any, ...], bindings: Dict[str, Any]) -> Any:
+        head = parts[0]
+        if head in bindings:
+            return traverse(bindings[head], parts[1:])
+        if head == "var":
+            return traverse(self.variables.get(parts[1], UNRESOLVED), parts[2:])
+        if head == "local":
+            return traverse(self._local(parts[1]), parts[2:])
+        if head in NON_RESOURCE_REFERENCES or head in ("count", "each") or len(parts) < 2:
+            raise Unresolvable(f"{head} references are not resolved statically")
+        key = f"{parts[0]}.{parts[1]}"
+        if key not in self.module.resources:
+            raise Unresolvable(f"unknown resource {key}")
+        instances = self.instances(key)
+        if not instances and key in self._unexpanded:
+            raise Unresolvable(f"instances of {key}")
+        rest = parts[2:]
+        attributes = self.module.resources[key].body.attributes
+        if "count" in attributes or "for_each" in attributes:
+            if not rest:
+                if "count" in attributes:
+                    return [instance.values for instance in instances]
+                return {instance.index: instance.values for instance in instances}
+            matches = [instance for instance in instances if instance.index == rest[0]]
+            if not matches:
+                raise Unresolvable(f"{key}[{rest[0]!r}] is not planned")
+            return traverse(matches[0].values, rest[1:])
+        return traverse(instances[0].values, rest)
+
+    def _local(self, name: str) -> Any:
+        if name not in self._locals:
+            if name not in self.module.locals:
+                raise Unresolvable(f"unknown local {name}")
+            self._locals[name] = UNRESOLVED
+            self._locals[name] = self.evaluate(self.module.locals[name])
+        return self._locals[name]
+
+    def _expansion(self, key: str, body: Body) -> List[Tuple[Any, Dict[str, Any]]]:
+        """``(index, bindings)`` for every instance of a resource, or raise ``Unresolvable``"""
+        if "count" in body.attributes:
+            count = self.evaluate(body.attributes["count"])
+            if count is UNRESOLVED:
+                raise Unresolvable(f"count of {key}")
+            return [(index, {"count": {"index": index}}) for index in range(to_number(count))]
+        if "for_each" in body.attributes:
+            collection = self.evaluate(body.attributes["for_each"])
+            if isinstance(collection, list):
+                collection = {to_string(item): item for item in collection}
+            if not isinstance(collection, dict):
+                raise Unresolvable(f"for_each of {key}")
+            return [(name, {"each": {"key": name, "value": collection[name]}}) for name in sorted(collection)]
+        return [(None, {})]
+
+    def instances(self, key: str) -> List[StaticResource]:
+        """Instances of the resource ``type.name`` (empty if count or for_each did not resolve)"""
+        if key in self._instances:
+            return self._instances[key]
+        if key in self._expanding:
+            raise Unresolvable(f"cycle through {key}")
+        self._expanding.add(key)
+        block = self.module.resources[key]
+        prefix = f"{self.module_address}." if self.module_address else ""
+        try:
+            expansion = self._expansion(key, block.body)
+        except Unresolvable:
+            self.unresolved_instances.add(prefix + key)
+            self._unexpanded.add(key)
+            expansion = []
+        instances = [
+            StaticResource(
+                address=f"{prefix}{key}{_instance_suffix(index)}",
+                module_address=self.module_address,
+                mode="managed",
+                type=block.labels[0],
+                name=block.labels[1],
+                index=index,
+                values=self._body_values(block.body, bindings, top_level=True),
+            )
+            for index, bindings in expansion
+        ]
+        self._expanding.discard(key)
+        self._instances[key] = instances
+        return instances
+
+    def _body_values(self, body: Body, bindings: Dict[str, Any], top_level: bool = False) -> Dict[str, Any]:
+        values = {
+            name: self.evaluate(node, bindings)
+            for name, node in body.attributes.items()
+            if not (top_level and name in META_ARGUMENTS)
+        }
+        for block in body.blocks:
+            if block.type in META_BLOCKS:
+                continue
+            if block.type == "dynamic":
+                self._dynamic_values(block, bindings, values)
+            else:
+                values.setdefault(block.type, []).append(self._body_values(block.body, bindings))
+        return values
+
+    def _dynamic_values(self, block: Block, bindings: Dict[str, Any], values: Dict[str, Any]):
+        block_type = block.labels[0]
+        iterator = block.body.attributes.get("iterator")
+        iterator = iterator.parts[0] if isinstance(iterator, Reference) else block_type
+        collection = self.evaluate(block.body.attributes["for_each"], bindings)
+        content = block.body.blocks_of("content")
+        if collection is UNRESOLVED or not content:
+            values[block_type] = UNRESOLVED
+            return
+        items = collection.items() if isinstance(collection, dict) else enumerate(collection)
+        generated = values.setdefault(block_type, [])
+        for key, value in items:
+            scoped = dict(bindings, **{iterator: {"key": key, "value": value}})
+            generated.append(self._body_values(content[0].body, scoped))
+
+    def local(self, name: str) -> Any:
+        """Value of a module local, ``UNRESOLVED`` if it needs terraform"""
+        return self._local(name)
+
+    def output(self, name: str) -> Any:
+        """Value of a module output, ``UNRESOLVED`` if it needs terraform"""
+        return self.evaluate(self.module.outputs[name].body.attributes.get("value"))
+
+    @property
+    def outputs(self) -> List[str]:
+        return list(self.module.outputs)
+
+    def resource(self, address: str) -> StaticResource:
+        """Instance at a full address; raises ``KeyError`` when it is not configured"""
+        for instance in self:
+            if instance.address == address:
+                return instance
+        raise KeyError(address)
+
+    def by_type(self, resource_type: str) -> List[StaticResource]:
+        return [instance for instance in self if instance.type == resource_type]
+
+    @property
+    def addresses(self) -> List[str]:
+        return [instance.address for instance in self]
+
+    @property
+    def types(self) -> Set[str]:
+        return {instance.type for instance in self}
+
+    def __contains__(self, address: str) -> bool:
+        return address in self.addresses
+
+    def __iter__(self) -> Iterator[StaticResource]:
+        for instances in self._instances.values():
+            yield from instances
+
+    def __len__(self) -> int:
+        return sum(len(instances) for instances in self._instances.values())
+
+
+def resolve_variables(module: ModuleConfig, assignments: Dict[str, Any]) -> Dict[str, Any]:
+    """Input variable values: assignments over defaults, converted to the declared types.
+
+    Assignments may be expression trees (from a ``.tfvars`` file) or values
+    already evaluated by the caller; required variables without a value are
+    ``UNRESOLVED``.
+    """
+    constants = StaticConfiguration(ModuleConfig(module.directory), {})
+    variables = {}
+    for name, block in module.variables.items():
+        if name in assignments:
+            value = constants.evaluate(assignments[name])
+        elif "default" in block.body.attributes:
+            value = constants.evaluate(block.body.attributes["default"])
+        else:
+            value = UNRESOLVED
+        try:
+            variables[name] = convert(value, block.body.attributes.get("type"))
+        except Unresolvable:
+            variables[name] = UNRESOLVED
+    return variables
+
+
+def module_arguments(examples_dir: Path, module_name: str = "batch_ecs") -> Dict[str, Any]:
+    """Arguments the example configuration passes to ``module "<module_name>"``, evaluated"""
+    examples_dir = Path(examples_dir)
+    root = ModuleConfig.load(examples_dir)
+    tfvars = examples_dir / "terraform.tfvars"
+    assignments = parse(tfvars.read_text(encoding="utf-8")).attributes if tfvars.exists() else {}
+    root_scope = StaticConfiguration(root, resolve_variables(root, assignments))
+    return {
+        name: root_scope.evaluate(value)
+        for name, value in root.module_calls[module_name].body.attributes.items()
+        if name not in ("source", "version", "providers", "count", "for_each", "depends_on")
+    }
@@ -0,0 +1,232 @@
+import codecs
+import json
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from .plan_model import ResourceChange
+
+CHUNK_SIZE = 1024 * 1024
+
+RESOURCE_HEADER = re.compile(r"^\s*# (?P<address>\S.*?) (?:will be|must be) (?P<verb>[a-z-]+(?: [a-z-]+)*)")
+ATTRIBUTE_LINE = re.compile(r'^\s*(?:[-+~]|-/\+|\+/-)?\s*(?P<key>"[^"]+"|[\w-]+)\s+=\s+(?P<value>.*?)\s*$')
+BLOCK_START = re.compile(r"^\s*(?:[-+~]|-/\+|\+/-)?\s*(?P<name>[\w-]+)\s*\{\s*$")
+RESOURCE_LINE = re.compile(r'^\s*(?:[-+~]|-/\+|\+/-|<=)?\s*(?:resource|data) "[^"]+" "[^"]+" \{$')
+PLAN_LINE = re.compile(r"^Plan: .*\bto add\b")
+NO_CHANGES_LINE = re.compile(r"^No changes\.")
+SUMMARY_LINE = re.compile(r"^(?:Plan: .*\bto add\b|No changes\.).*$", re.MULTILINE)
+SUMMARY_COUNTS = {
+    "add": re.compile(r"(\d+) to add"),
+    "change": re.compile(r"(\d+) to change"),
+    "destroy": re.compile(r"(\d+) to destroy"),
+}
+RESOURCE_CHANGES_KEY = re.compile(rb'"resource_changes"\s*:\s*\[')
+
+HEADER_ACTIONS = {
+    "created": "create",
+    "destroyed": "delete",
+    "updated in-place": "update",
+    "replaced": "replace",
+    "read during apply": "read",
+}
+
+OPENERS = "[({"
+CLOSERS = "])}"
+
+
+class TextResourceChange(NamedTuple):
+    """A resource change recovered from human-readable plan output"""
+    address: str
+    action: str
+    attributes: Dict[str, str]
+
+
+def _header_action(verb: str) -> str:
+    for phrase, action in HEADER_ACTIONS.items():
+        if verb.startswith(phrase):
+            return action
+    return verb
+
+
+def _nesting_delta(line: str) -> int:
+    """Change in nesting depth for one line of a multi-line plan value.
+
+    Terraform renders every opening bracket at the end of a line and every
+    closing bracket at the start of one, so the ends of the stripped line are
+    enough to follow ``jsonencode(...)``, lists and maps.
+    """
+    stripped = line.strip()
+    if not stripped:
+        return 0
+    return (stripped[-1] in OPENERS) - (stripped[0] in CLOSERS)
+
+
+def iter_text_resource_changes(lines: Iterable[str]) -> Iterator[TextResourceChange]:
+    """Yield resource changes from ``terraform plan`` output one at a time.
+
+    ``lines`` may be an open file, so only the resource currently being read
+    is held in memory. Nested blocks are flattened into dotted attribute
+    names (``compute_resources.max_vcpus``) and multi-line values such as
+    ``jsonencode(...)`` or lists are kept as their joined source text.
+    """
+    current: Optional[TextResourceChange] = None
+    blocks: List[str] = []
+    pending_key: Optional[str] = None
+    pending_value: List[str] = []
+    depth = 0
+
+    for line in lines:
+        stripped = line.strip()
+        if pending_key is not None:
+            pending_value.append(stripped)
+            depth += _nesting_delta(stripped)
+            if depth <= 0:
+                current.attributes[pending_key] = " ".join(pending_value)
+                pending_key = None
+            continue
+
+        if not stripped:
+            continue
+
+        if stripped[0] == "#":
+            header = RESOURCE_HEADER.match(line)
+            if header:
+                if current is not None:
+                    yield current
+                current = TextResourceChange(header.group("address"), _header_action(header.group("verb")), {})
+                blocks = []
+            continue
+
+        if current is None:
+            continue
+
+        if line[0] != " ":
+            # Unindented text ends the resource section ("Plan: ...", "Changes to Outputs:")
+            yield current
+            current = None
+            continue
+
+        if stripped[0] == "}":
+            if blocks:
+                blocks.pop()
+            continue
+
+        if stripped[-1] == "{":
+            block = BLOCK_START.match(line)
+            if block:
+                blocks.append(block.group("name"))
+                continue
+            if RESOURCE_LINE.match(line):
+                continue
+
+        attribute = ATTRIBUTE_LINE.match(line)
+        if attribute:
+            key = attribute.group("key").strip('"')
+            if blocks:
+                key = ".".join([*blocks, key])
+            value = attribute.group("value")
+            if value[-1:] in OPENERS and value not in ("[]", "{}"):
+                pending_key, pending_value, depth = key, [value], 1
+            else:
+                current.attributes[key] = value
+
+    if current is not None:
+        yield current
+
+
+def plan_summary(lines: Iterable[str]) -> Dict[str, int]:
+    """Single pass over plan output that stops at the ``Plan:`` (or ``No changes.``) line"""
+    for line in lines:
+        if PLAN_LINE.match(line):
+            summary = {}
+            for name, pattern in SUMMARY_COUNTS.items():
+                match = pattern.search(line)
+                summary[name] = int(match.group(1)) if match else 0
+            return summary
+        if NO_CHANGES_LINE.match(line):
+            return {"add": 0, "change": 0, "destroy": 0}
+    return {}
+
+
+def extract_plan_summary(plan_output: str) -> dict:
+    """Extract plan summary information from captured plan stdout"""
+    match = SUMMARY_LINE.search(plan_output)
+    return plan_summary([match.group(0)]) if match else {}
+
+
+def _find_array_start(source: BinaryIO, pattern: "re.Pattern", chunk_size: int) -> Optional[int]:
+    """Offset just past the first match of ``pattern``, scanning the file in overlapping chunks"""
+    overlap = 64
+    offset = 0
+    tail = b""
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return None
+        window = tail + chunk
+        match = pattern.search(window)
+        if match:
+            return offset - len(tail) + match.end()
+        tail = window[-overlap:]
+        offset += len(chunk)
+
+
+def _iter_json_array(source: BinaryIO, start: int, chunk_size: int) -> Iterator[dict]:
+    """Decode the elements of a JSON array one at a time, starting just after its ``[``"""
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    source.seek(start)
+    buffer = ""
+    position = 0
+
+    def fill() -> bool:
+        nonlocal buffer, position
+        chunk = source.read(chunk_size)
+        buffer = buffer[position:] + text_decoder.decode(chunk, final=not chunk)
+        position = 0
+        return bool(chunk)
+
+    fill()
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position >= len(buffer):
+            if not fill():
+                raise ValueError("unterminated resource_changes array")
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            element, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if not fill():
+                raise
+            continue
+        yield element
+
+
+def iter_json_resource_changes(path: Union[str, Path], chunk_size: int = CHUNK_SIZE) -> Iterator[ResourceChange]:
+    """Yield ``ResourceChange`` records from a ``terraform show -json`` file without loading it.
+
+    The ``resource_changes`` key is located by scanning the raw bytes in
+    chunks, then array elements are decoded incrementally from a bounded
+    buffer, so memory stays proportional to the largest single resource change
+    rather than the plan.
+    """
+    with open(path, "rb") as source:
+        start = _find_array_start(source, RESOURCE_CHANGES_KEY, chunk_size)
+        if start is None:
+            return
+        for element in _iter_json_array(source, start, chunk_size):
+            yield ResourceChange.from_json(element)
+
+
+def iter_resource_changes(path: Union[str, Path]) -> Iterator[Union[ResourceChange, TextResourceChange]]:
+    """Yield resource changes from either a JSON plan or captured human-readable plan output"""
+    with open(path, "rb") as source:
+        head = source.read(64).lstrip()
+    if head.startswith(b"{"):
+        yield from iter_json_resource_changes(path)
+    else:
+        with open(path, "r", encoding="utf-8") as lines:
+            yield from iter_text_resource_changes(lines)
@@ -0,0 +1,185 @@
+"""Per-invocation timing of terraform subprocesses and the pytest plugin that reports it.
+
+``run_terraform`` measures every process it launches and, while the plugin is
+active, appends one JSON line per invocation to the log named by
+``TIMING_LOG_ENV``. Going through a file (rather than memory) means
+invocations made in worker processes, such as the variant matrix's process
+pool, are reported as well. Under pytest-xdist the controller hands its log
+to every worker, so the report covers the whole run. The plan broker also
+records cache hits so the report shows what the cache saved.
+"""
+import contextvars
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pytest
+
+from .locks import FileLock
+
+TIMING_LOG_ENV = "TERRAFORM_HARNESS_TIMING_LOG"
+# pytest-xdist ``workerinput`` key carrying the controller's log path to its workers
+WORKER_LOG_KEY = "terraform_timing_log"
+
+# "miss" while the plan broker runs a cacheable command, else None. Replayed results are
+# recorded as "hit" (persistent plan cache), "shared" (another xdist worker's result) or
+# "handoff" (a plan made by a CI step before pytest).
+_cache_status: contextvars.ContextVar = contextvars.ContextVar("terraform_cache_status", default=None)
+
+
+@contextmanager
+def cache_status(status: Optional[str]) -> Iterator[None]:
+    """Label invocations recorded inside the ``with`` block with a cache status"""
+    token = _cache_status.set(status)
+    try:
+        yield
+    finally:
+        _cache_status.reset(token)
+
+
+def peak_rss_mb(ru_maxrss: int) -> float:
+    """Convert ``ru_maxrss`` (KiB on Linux, bytes on macOS) to MiB"""
+    return ru_maxrss / (1024 * 1024) if sys.platform == "darwin" else ru_maxrss / 1024
+
+
+def record_invocation(args: Sequence[str], cwd: Path, wall_seconds: float, returncode: int,
+                      user_seconds: float = 0.0, system_seconds: float = 0.0,
+                      peak_rss: Optional[float] = None, cache: Optional[str] = None):
+    """Append one invocation to the timing log, if the timing plugin is active"""
+    log_path = os.environ.get(TIMING_LOG_ENV)
+    if not log_path:
+        return
+    entry = {
+        "command": args[0] if args else "",
+        "args": list(args),
+        "cwd": str(cwd),
+        "wall_seconds": round(wall_seconds, 6),
+        "user_seconds": round(user_seconds, 6),
+        "system_seconds": round(system_seconds, 6),
+        "peak_rss_mb": None if peak_rss is None else round(peak_rss, 2),
+        "returncode": returncode,
+        "cache": cache if cache is not None else _cache_status.get(),
+        "test": os.environ.get("PYTEST_CURRENT_TEST", "").rsplit(" ", 1)[0] or None,
+        "pid": os.getpid(),
+        "finished_at": time.time(),
+    }
+    # pytest-xdist workers and the variant matrix's processes append to the same log
+    with FileLock(f"{log_path}.lock"), open(log_path, "a", encoding="utf-8") as log:
+        log.write(json.dumps(entry) + "\n")
+
+
+def read_log(path: Path) -> List[dict]:
+    if not Path(path).exists():
+        return []
+    with open(path, encoding="utf-8") as log:
+        return [json.loads(line) for line in log if line.strip()]
+
+
+def summarize(entries: List[dict]) -> Dict[str, dict]:
+    """Totals per terraform subcommand"""
+    totals: Dict[str, dict] = {}
+    for entry in entries:
+        command = totals.setdefault(entry["command"], {
+            "count": 0, "cache_hits": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_rss_mb": None,
+        })
+        command["count"] += 1
+        command["cache_hits"] += entry["cache"] in ("hit", "shared", "handoff")
+        command["wall_seconds"] += entry["wall_seconds"]
+        command["cpu_seconds"] += entry["user_seconds"] + entry["system_seconds"]
+        if entry["peak_rss_mb"] is not None:
+            command["peak_rss_mb"] = max(command["peak_rss_mb"] or 0.0, entry["peak_rss_mb"])
+    return totals
+
+
+class TerraformTimingPlugin:
+    """Reports where the session's terraform time went.
+
+    Registered from ``conftest.py``; prints the slowest invocations in the
+    terminal summary and writes every invocation plus per-command totals as
+    JSON to ``report_path`` (default: ``terraform-timing/report.json`` in the
+    pytest cache directory).
+    """
+
+    def __init__(self, report_path: Optional[Path] = None, slowest: int = 10):
+        self.report_path = Path(report_path) if report_path else None
+        self.slowest = slowest
+        self.log_path: Optional[Path] = None
+        self._previous_log: Optional[str] = None
+        self._owns_log = False
+
+    def _create_log(self) -> Path:
+        if self.log_path is None:
+            handle, path = tempfile.mkstemp(prefix="terraform-timing-", suffix=".jsonl")
+            os.close(handle)
+            self.log_path = Path(path)
+            self._owns_log = True
+        return self.log_path
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_sessionstart(self, session):
+        config = getattr(session, "config", None)
+        if self.report_path is None:
+            cache = getattr(config, "cache", None)
+            report_dir = cache.mkdir("terraform-timing") if cache is not None else config.rootpath
+            self.report_path = Path(report_dir) / "report.json"
+        self._previous_log = os.environ.get(TIMING_LOG_ENV)
+        workerinput = getattr(config, "workerinput", None)
+        # A pytest-xdist worker appends to the controller's log, which reports and removes it
+        worker_log = (workerinput.get(WORKER_LOG_KEY) or self._previous_log) if workerinput is not None else None
+        if worker_log:
+            self.log_path = Path(worker_log)
+        else:
+            self._create_log()
+        os.environ[TIMING_LOG_ENV] = str(self.log_path)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_configure_node(self, node):
+        """pytest-xdist controller: hand the log to each worker it starts"""
+        node.workerinput[WORKER_LOG_KEY] = str(self._create_log())
+
+    def entries(self) -> List[dict]:
+        return read_log(self.log_path) if self.log_path else []
+
+    def write_report(self, entries: List[dict]):
+        self.report_path.parent.mkdir(parents=True, exist_ok=True)
+        self.report_path.write_text(json.dumps({
+            "invocations": entries,
+            "commands": summarize(entries),
+            "total_wall_seconds": round(sum(entry["wall_seconds"] for entry in entries), 6),
+        }, indent=2), encoding="utf-8")
+
+    def pytest_terminal_summary(self, terminalreporter):
+        entries = self.entries()
+        if not entries:
+            return
+        self.write_report(entries)
+        terminalreporter.write_sep("-", f"slowest {min(self.slowest, len(entries))} terraform invocations")
+        for entry in sorted(entries, key=lambda item: item["wall_seconds"], reverse=True)[:self.slowest]:
+            rss = "-" if entry["peak_rss_mb"] is None else f"{entry['peak_rss_mb']:.0f}MiB"
+            terminalreporter.write_line(
+                f"{entry['wall_seconds']:8.2f}s wall {entry['user_seconds'] + entry['system_seconds']:7.2f}s cpu "
+                f"{rss:>8} rss  {entry['cache'] or '-':<4}  terraform {' '.join(entry['args'])}"
+            )
+        for command, totals in sorted(summarize(entries).items(), key=lambda item: -item[1]["wall_seconds"]):
+            terminalreporter.write_line(
+                f"{command}: {totals['count']} calls ({totals['cache_hits']} cached), "
+                f"{totals['wall_seconds']:.2f}s wall, {totals['cpu_seconds']:.2f}s cpu"
+            )
+        terminalreporter.write_line(f"terraform timing report: {self.report_path}")
+
+    def pytest_unconfigure(self, config):
+        if self.log_path is None:
+            return
+        if self._previous_log is None:
+            os.environ.pop(TIMING_LOG_ENV, None)
+        else:
+            os.environ[TIMING_LOG_ENV] = self._previous_log
+        if self._owns_log:
+            self.log_path.unlink(missing_ok=True)
+            Path(f"{self.log_path}.lock").unlink(missing_ok=True)
+        self.log_path = None
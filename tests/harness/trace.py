@@ -0,0 +1,441 @@
+"""Profile terraform runs from their ``TF_LOG=trace`` logs.
+
+Usage::
+
+    TF_LOG=trace TF_LOG_PATH=plan.log terraform plan
+    python -m tests.harness.trace plan.log --folded plan.folded
+
+A trace log says when the graph walk starts and finishes each vertex
+(``vertex "aws_iam_role.x": starting visit`` / ``visit complete``), when a
+provider plugin is launched, and, from the provider's own logging, when each
+gRPC request is received and served (keyed by ``tf_req_id``). ``TraceProfile``
+consumes the log one line at a time, so it can follow a log while terraform
+is still writing it, and turns those events into time per provider RPC, per
+resource, per data source and per provider start-up. ``folded()`` renders
+the same data as folded stacks for ``flamegraph.pl`` or speedscope.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, TextIO
+
+from .runner import TerraformResult, run_terraform
+
+LOG_LINE = re.compile(
+    r"^(?P<timestamp>\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?)(?P<zone>Z|[+-]\d\d:?\d\d)\s+"
+    r"\[(?P<level>TRACE|DEBUG|INFO|WARN|ERROR)\]\s+(?P<message>.*)$"
+)
+VERTEX_START = re.compile(r'^vertex "(?P<name>.+)": starting visit \((?P<node>[^)]*)\)')
+VERTEX_END = re.compile(r'^vertex "(?P<name>.+)": visit complete')
+PLUGIN_START = re.compile(r"^provider: starting plugin: path=(?P<path>\S+)")
+PLUGIN_READY = re.compile(r"^provider: using plugin: ")
+PROVIDER_REQUEST = re.compile(r"^provider\.[^:]+: (?P<event>Received|Served) request: (?P<fields>.*)$")
+FIELD = re.compile(r'(?P<key>[\w@.]+)=(?P<value>"(?:[^"\\]|\\.)*"|\S*)')
+PROVIDER_PATH = re.compile(r"(?P<source>[^/]+/[^/]+/[^/]+)/[^/]+/[^/]+/terraform-provider-[^/]+$")
+DATA_ADDRESS = re.compile(r"^(?:module\.[^.]+(?:\[[^\]]+\])?\.)*data\.")
+RESOURCE_ADDRESS = re.compile(r"^(?:module\.[^.]+(?:\[[^\]]+\])?\.)*[a-z0-9_]+\.[\w-]+(?:\[[^\]]+\])?$")
+MODULE_PREFIX = re.compile(r"^((?:module\.[^.]+(?:\[[^\]]+\])?\.)*)(.*)$")
+
+NON_RESOURCE_VERTICES = {"var", "local", "output", "module", "path", "terraform"}
+
+# Names of resource kinds in the breakdowns and the folded stacks
+RESOURCE, DATA_SOURCE, PROVIDER, OTHER = "resource", "data source", "provider", "other"
+
+
+def parse_timestamp(timestamp: str, zone: str) -> float:
+    """Seconds since the epoch for a trace log timestamp such as ``2024-05-01T10:00:00.123+0200``"""
+    seconds, _, fraction = timestamp.partition(".")
+    moment = datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S")
+    if zone == "Z":
+        offset = timedelta(0)
+    else:
+        digits = zone[1:].replace(":", "")
+        offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+        offset = -offset if zone[0] == "-" else offset
+    moment = moment.replace(tzinfo=timezone(offset))
+    return moment.timestamp() + (float(f"0.{fraction}") if fraction else 0.0)
+
+
+def unquote(text: str) -> str:
+    """Undo the Go ``%q`` escaping of a quoted log value"""
+    try:
+        return json.loads(f'"{text}"')
+    except ValueError:
+        return text
+
+
+def parse_fields(text: str) -> Dict[str, str]:
+    """``key=value`` pairs from a provider log message"""
+    return {
+        match["key"]: unquote(match["value"][1:-1]) if match["value"].startswith('"') else match["value"]
+        for match in FIELD.finditer(text)
+    }
+
+
+def provider_source(path: str) -> str:
+    """``registry.terraform.io/hashicorp/aws`` for a provider binary path, else the binary name"""
+    match = PROVIDER_PATH.search(path.replace("\\", "/"))
+    return match["source"] if match else os.path.basename(path)
+
+
+def vertex_kind(name: str) -> str:
+    """Whether a graph vertex is a resource or data source instance, a provider, or something else"""
+    if " " in name:
+        # "(expand)", "(close)" and other bookkeeping vertices
+        return OTHER
+    if "provider[" in name:
+        return PROVIDER
+    if DATA_ADDRESS.match(name):
+        return DATA_SOURCE
+    if RESOURCE_ADDRESS.match(name) and MODULE_PREFIX.match(name)[2].split(".")[0] not in NON_RESOURCE_VERTICES:
+        return RESOURCE
+    return OTHER
+
+
+def resource_type(address: str) -> str:
+    """``aws_iam_role`` for ``module.batch_ecs.aws_iam_role.x[0]`` (and ``data.aws_region.current``)"""
+    parts = MODULE_PREFIX.match(address)[2].split(".")
+    return parts[1] if parts[0] == "data" else parts[0]
+
+
+class Visit(NamedTuple):
+    """One visit of a graph vertex during the walk"""
+    name: str
+    node_type: str
+    start: float
+    end: float
+
+    @property
+    def kind(self) -> str:
+        return vertex_kind(self.name)
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class ProviderCall(NamedTuple):
+    """One gRPC request served by a provider, attributed to the vertex that made it, if any"""
+    rpc: str
+    provider: str
+    resource_type: Optional[str]
+    start: float
+    end: float
+    vertex: Optional[str]
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class ProviderStart(NamedTuple):
+    """Launch of a provider plugin, until terraform is connected to it"""
+    provider: str
+    start: float
+    end: float
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+def _add(totals: Dict[str, dict], key: str, seconds: float):
+    entry = totals.setdefault(key, {"count": 0, "seconds": 0.0})
+    entry["count"] += 1
+    entry["seconds"] += seconds
+
+
+def _rounded(totals: Dict[str, dict]) -> Dict[str, dict]:
+    ordered = sorted(totals.items(), key=lambda item: -item[1]["seconds"])
+    return {key: {"count": value["count"], "seconds": round(value["seconds"], 6)} for key, value in ordered}
+
+
+class TraceProfile:
+    """Time breakdown of one terraform run, built line by line from its trace log"""
+
+    def __init__(self, command: str = "terraform"):
+        self.command = command
+        self.visits: List[Visit] = []
+        self.calls: List[ProviderCall] = []
+        self.provider_starts: List[ProviderStart] = []
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.lines = 0
+        self._open_visits: Dict[str, tuple] = {}
+        self._open_requests: Dict[str, tuple] = {}
+        self._starting_plugins: List[tuple] = []
+
+    def feed(self, line: str):
+        """Consume one log line; continuation lines of multi-line messages are ignored"""
+        match = LOG_LINE.match(line.rstrip("\n"))
+        if match is None:
+            return
+        self.lines += 1
+        at = parse_timestamp(match["timestamp"], match["zone"])
+        if self.first is None:
+            self.first = at
+        self.last = at
+        message = match["message"]
+
+        if message.startswith("vertex "):
+            start = VERTEX_START.match(message)
+            if start:
+                self._open_visits[unquote(start["name"])] = (start["node"].lstrip("*"), at)
+                return
+            end = VERTEX_END.match(message)
+            if end and unquote(end["name"]) in self._open_visits:
+                name = unquote(end["name"])
+                node_type, started = self._open_visits.pop(name)
+                self.visits.append(Visit(name, node_type, started, at))
+            return
+
+        if message.startswith("provider."):
+            request = PROVIDER_REQUEST.match(message)
+            if request is None:
+                return
+            fields = parse_fields(request["fields"])
+            request_id = fields.get("tf_req_id")
+            if request_id is None:
+                return
+            if request["event"] == "Received":
+                type_name = fields.get("tf_resource_type") or fields.get("tf_data_source_type")
+                self._open_requests[request_id] = (fields, type_name, at, self._active_vertex(type_name, at))
+            elif request_id in self._open_requests:
+                fields, type_name, started, vertex = self._open_requests.pop(request_id)
+                self.calls.append(ProviderCall(
+                    fields.get("tf_rpc", "unknown"),
+                    fields.get("tf_provider_addr", "unknown"),
+                    type_name,
+                    started,
+                    at,
+                    vertex,
+                ))
+            return
+
+        plugin = PLUGIN_START.match(message)
+        if plugin:
+            self._starting_plugins.append((provider_source(plugin["path"]), at))
+        elif PLUGIN_READY.match(message) and self._starting_plugins:
+            provider, started = self._starting_plugins.pop(0)
+            self.provider_starts.append(ProviderStart(provider, started, at))
+
+    def _active_vertex(self, type_name: Optional[str], at: float) -> Optional[str]:
+        """The most recently started, still running resource or data source vertex of ``type_name``"""
+        if not type_name:
+            return None
+        candidates = [
+            (started, name) for name, (_, started) in self._open_visits.items()
+            if started <= at and vertex_kind(name) in (RESOURCE, DATA_SOURCE) and resource_type(name) == type_name
+        ]
+        return max(candidates)[1] if candidates else None
+
+    def feed_lines(self, lines) -> "TraceProfile":
+        for line in lines:
+            self.feed(line)
+        return self
+
+    @classmethod
+    def from_log(cls, path: Path, command: str = "terraform") -> "TraceProfile":
+        """Profile a complete log, streaming it rather than reading it into memory"""
+        with open(path, encoding="utf-8", errors="replace") as log:
+            return cls(command).feed_lines(log)
+
+    @property
+    def wall_seconds(self) -> float:
+        return 0.0 if self.first is None else self.last - self.first
+
+    def by_rpc(self) -> Dict[str, dict]:
+        """Count and time per provider RPC, e.g. ``PlanResourceChange``"""
+        totals: Dict[str, dict] = {}
+        for call in self.calls:
+            _add(totals, call.rpc, call.seconds)
+        return _rounded(totals)
+
+    def _by_kind(self, kind: str) -> Dict[str, dict]:
+        totals: Dict[str, dict] = {}
+        for visit in self.visits:
+            if visit.kind == kind:
+                _add(totals, visit.name, visit.seconds)
+        return _rounded(totals)
+
+    def by_resource(self) -> Dict[str, dict]:
+        """Time per managed resource instance address"""
+        return self._by_kind(RESOURCE)
+
+    def by_data_source(self) -> Dict[str, dict]:
+        """Time per data source instance address"""
+        return self._by_kind(DATA_SOURCE)
+
+    def by_provider(self) -> Dict[str, dict]:
+        """Launch count and start-up time per provider"""
+        totals: Dict[str, dict] = {}
+        for start in self.provider_starts:
+            _add(totals, start.provider, start.seconds)
+        return _rounded(totals)
+
+    def folded(self) -> List[str]:
+        """Folded stacks (``frame;frame;frame microseconds``) for flame graph tools.
+
+        Resource and data source visits nest under their module path, with the
+        provider RPCs they made as children; RPCs made outside any vertex
+        (schema loading, provider configuration) and provider start-up sit
+        under ``providers``.
+        """
+        stacks: Dict[str, float] = {}
+
+        def add(frames: Sequence[str], seconds: float):
+            key = ";".join(frame.replace(";", ",") for frame in (self.command, *frames))
+            stacks[key] = stacks.get(key, 0.0) + seconds
+
+        rpc_seconds: Dict[str, float] = {}
+        for call in self.calls:
+            if call.vertex is None:
+                add(("providers", call.provider, call.rpc), call.seconds)
+            else:
+                rpc_seconds[call.vertex] = rpc_seconds.get(call.vertex, 0.0) + call.seconds
+        for start in self.provider_starts:
+            add(("providers", start.provider, "start-up"), start.seconds)
+        for visit in self.visits:
+            kind = visit.kind
+            if kind not in (RESOURCE, DATA_SOURCE):
+                continue
+            module, local = MODULE_PREFIX.match(visit.name).groups()
+            frames = [module.rstrip(".") or "root", local]
+            # The visit's own time excludes the provider calls shown as its children
+            add(frames, max(0.0, visit.seconds - rpc_seconds.get(visit.name, 0.0)))
+        for call in self.calls:
+            if call.vertex is not None:
+                module, local = MODULE_PREFIX.match(call.vertex).groups()
+                add((module.rstrip(".") or "root", local, call.rpc), call.seconds)
+        return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(stacks.items()) if seconds > 0]
+
+    def to_dict(self) -> dict:
+        return {
+            "command": self.command,
+            "wall_seconds": round(self.wall_seconds, 6),
+            "log_lines": self.lines,
+            "rpcs": self.by_rpc(),
+            "resources": self.by_resource(),
+            "data_sources": self.by_data_source(),
+            "providers": self.by_provider(),
+        }
+
+    def summary_lines(self, limit: int = 5) -> List[str]:
+        """Short human-readable breakdown for the terminal"""
+        lines = [f"terraform {self.command}: {self.wall_seconds:.2f}s traced"]
+        for title, totals in (("provider start-up", self.by_provider()), ("provider RPCs", self.by_rpc()),
+                              ("resources", self.by_resource()), ("data sources", self.by_data_source())):
+            if not totals:
+                continue
+            lines.append(f"  {title}:")
+            for key, value in list(totals.items())[:limit]:
+                lines.append(f"    {value['seconds']:8.3f}s  {value['count']:4d}x  {key}")
+        return lines
+
+
+def follow(path: Path, done: threading.Event, poll_interval: float = 0.05) -> Iterator[str]:
+    """Yield complete lines appended to ``path`` until ``done`` is set and the file is drained"""
+    path = Path(path)
+    while not path.exists():
+        if done.is_set():
+            return
+        time.sleep(poll_interval)
+    with open(path, encoding="utf-8", errors="replace") as log:
+        partial = ""
+        finished = False
+        while True:
+            line = log.readline()
+            if line.endswith("\n"):
+                yield partial + line
+                partial = ""
+            elif line:
+                partial += line
+            elif finished:
+                break
+            else:
+                # Read once more after terraform exits so the tail of the log is not lost
+                finished = done.is_set()
+                if not finished:
+                    time.sleep(poll_interval)
+        if partial:
+            yield partial
+
+
+class TraceProfiler:
+    """Runner wrapper that traces selected terraform commands and profiles them as they run.
+
+    ``runner(args, cwd, env)`` runs terraform with ``TF_LOG=trace`` and
+    ``TF_LOG_PATH`` pointing into ``output_dir`` while a thread follows the
+    log into a ``TraceProfile``. For each profiled invocation the raw log,
+    the breakdown (``.json``) and the folded stacks (``.folded``) are kept in
+    ``output_dir``.
+    """
+
+    def __init__(self, output_dir: Path, commands: Sequence[str] = ("plan",),
+                 runner: Callable[..., TerraformResult] = run_terraform):
+        self.output_dir = Path(output_dir)
+        self.commands = set(commands)
+        self.base_runner = runner
+        self.profiles: List[TraceProfile] = []
+        self._lock = threading.Lock()
+
+    def _log_path(self, command: str) -> Path:
+        with self._lock:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            index = sum(1 for profile in self.profiles if profile.command == command)
+            path = self.output_dir / f"{command}-{index}.log"
+            while path.exists():
+                index += 1
+                path = self.output_dir / f"{command}-{index}.log"
+            path.touch()
+            return path
+
+    def runner(self, args: Sequence[str], cwd: Path, env: Optional[dict] = None) -> TerraformResult:
+        command = args[0] if args else ""
+        if command not in self.commands:
+            return self.base_runner(args, cwd, env)
+        log_path = self._log_path(command)
+        env = dict(os.environ if env is None else env, TF_LOG="trace", TF_LOG_PATH=str(log_path))
+        profile = TraceProfile(command)
+        done = threading.Event()
+        reader = threading.Thread(target=lambda: profile.feed_lines(follow(log_path, done)), daemon=True)
+        reader.start()
+        try:
+            result = self.base_runner(args, cwd, env)
+        finally:
+            done.set()
+            reader.join()
+        log_path.with_suffix(".json").write_text(json.dumps(profile.to_dict(), indent=2), encoding="utf-8")
+        log_path.with_suffix(".folded").write_text("\n".join(profile.folded()) + "\n", encoding="utf-8")
+        with self._lock:
+            self.profiles.append(profile)
+        return result
+
+    __call__ = runner
+
+
+def main(argv=None, stdout: TextIO = sys.stdout) -> int:
+    parser = argparse.ArgumentParser(description="Break down a terraform TF_LOG=trace log")
+    parser.add_argument("log", type=Path, help="log written with TF_LOG=trace and TF_LOG_PATH")
+    parser.add_argument("--folded", type=Path, help="write folded stacks for flame graph tools here")
+    parser.add_argument("--json", type=Path, help="write the breakdown as JSON here")
+    parser.add_argument("--limit", type=int, default=10, help="entries per category to print")
+    args = parser.parse_args(argv)
+
+    profile = TraceProfile.from_log(args.log, command=args.log.stem)
+    if args.folded:
+        args.folded.write_text("\n".join(profile.folded()) + "\n", encoding="utf-8")
+    if args.json:
+        args.json.write_text(json.dumps(profile.to_dict(), indent=2), encoding="utf-8")
+    stdout.write("\n".join(profile.summary_lines(args.limit)) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
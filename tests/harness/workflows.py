@@ -0,0 +1,235 @@
+"""GitHub Actions workflows parsed once per session and indexed for the workflow checks.
+
+``WorkflowRegistry`` parses each workflow file on first use (with LibYAML's
+``CSafeLoader`` when PyYAML was built with it) and keeps the result until the
+file's mtime or size changes. Parsing a workflow indexes its steps by action
+(``uses`` without the ``@ref``), by name and by the commands their ``run``
+scripts invoke (``terraform plan``, ``pytest``, ``python -m tests.harness.handoff``...),
+so questions such as "which jobs run terraform plan before pytest" are
+dictionary lookups rather than walks over every file.
+"""
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without LibYAML
+    from yaml import SafeLoader
+
+WORKFLOW_PATTERNS = ("*.yml", "*.yaml")
+COMMAND_SEPARATOR = re.compile(r"&&|\|\||[;|]")
+HEREDOC = re.compile(r"<<-?\s*['\"]?(\w+)")
+SUBCOMMAND = re.compile(r"^[a-z][a-z0-9-]*$")
+PYTHON = ("python", "python3")
+
+
+def load_yaml(text: str) -> Any:
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def _script_lines(script: str) -> Iterable[str]:
+    """Lines of a shell script with continuations joined and here-document bodies dropped"""
+    terminator = None
+    for line in script.replace("\\\n", " ").splitlines():
+        if terminator is not None:
+            if line.strip() == terminator:
+                terminator = None
+            continue
+        heredoc = HEREDOC.search(line)
+        if heredoc:
+            terminator = heredoc.group(1)
+        yield line
+
+
+def run_commands(script: Optional[str]) -> List[str]:
+    """Commands a ``run`` script invokes: each program, plus ``program subcommand`` and ``-m`` modules"""
+    commands: List[str] = []
+    for line in _script_lines(script or ""):
+        for segment in COMMAND_SEPARATOR.split(line):
+            words = segment.split()
+            while words and "=" in words[0]:
+                words.pop(0)  # environment assignments
+            if not words:
+                continue
+            program = Path(words[0]).name
+            commands.append(program)
+            if program in PYTHON and len(words) > 2 and words[1] == "-m":
+                commands.append(words[2])
+            elif len(words) > 1 and SUBCOMMAND.match(words[1]):
+                commands.append(f"{program} {words[1]}")
+    return commands
+
+
+class WorkflowStep(NamedTuple):
+    """One step of a job, with the job's default working directory applied"""
+    workflow: str
+    job: str
+    index: int
+    name: Optional[str]
+    uses: Optional[str]
+    run: Optional[str]
+    env: Dict[str, Any]
+    working_directory: Optional[str]
+    data: dict
+
+    @property
+    def action(self) -> Optional[str]:
+        """``uses`` without its ``@ref``"""
+        return self.uses.split("@", 1)[0] if self.uses else None
+
+    @property
+    def commands(self) -> List[str]:
+        return run_commands(self.run)
+
+
+class WorkflowJob:
+    """One job of a workflow, with its steps indexed by command"""
+
+    def __init__(self, workflow: str, job_id: str, data: dict, workflow_env: Dict[str, Any]):
+        self.workflow = workflow
+        self.id = job_id
+        self.data = data
+        self.name = data.get("name", job_id)
+        self.runs_on = data.get("runs-on")
+        self.env = {**workflow_env, **(data.get("env") or {})}
+        self.working_directory = ((data.get("defaults") or {}).get("run") or {}).get("working-directory")
+        self.steps = [
+            WorkflowStep(
+                workflow=workflow,
+                job=job_id,
+                index=index,
+                name=step.get("name"),
+                uses=step.get("uses"),
+                run=step.get("run"),
+                env={**self.env, **(step.get("env") or {})},
+                working_directory=step.get("working-directory", self.working_directory),
+                data=step,
+            )
+            for index, step in enumerate(data.get("steps") or ())
+        ]
+        self._by_command: Dict[str, List[WorkflowStep]] = defaultdict(list)
+        for step in self.steps:
+            for command in dict.fromkeys(step.commands):
+                self._by_command[command].append(step)
+
+    @property
+    def key(self) -> str:
+        return f"{self.workflow}:{self.id}"
+
+    def steps_running(self, command: str) -> List[WorkflowStep]:
+        """Steps whose ``run`` script invokes ``command`` (``pytest``, ``terraform plan``...)"""
+        return list(self._by_command.get(command, ()))
+
+    def first_step(self, command: str) -> Optional[int]:
+        steps = self._by_command.get(command)
+        return steps[0].index if steps else None
+
+    def runs_before(self, first: str, then: str) -> bool:
+        """Whether some step runs ``first`` before any step runs ``then``; both must run"""
+        first_index, then_index = self.first_step(first), self.first_step(then)
+        return first_index is not None and then_index is not None and first_index < then_index
+
+    def __repr__(self):
+        return f"WorkflowJob({self.key})"
+
+
+class Workflow:
+    """A parsed workflow file, with its jobs and step indexes"""
+
+    def __init__(self, path: Path, data: Any, stamp: Tuple[int, int]):
+        self.path = path
+        self.file = path.name
+        self.data = data if isinstance(data, dict) else {}
+        self.stamp = stamp
+        self.name = self.data.get("name")
+        # YAML 1.1 reads a bare ``on`` key as True
+        self.triggers = self.data.get("on", self.data.get(True)) or {}
+        self.env = self.data.get("env") or {}
+        self.jobs = {job_id: WorkflowJob(self.file, job_id, job or {}, self.env)
+                     for job_id, job in (self.data.get("jobs") or {}).items()}
+        self.steps_by_action: Dict[str, List[WorkflowStep]] = defaultdict(list)
+        self.steps_by_name: Dict[str, List[WorkflowStep]] = defaultdict(list)
+        for job in self.jobs.values():
+            for step in job.steps:
+                if step.action:
+                    self.steps_by_action[step.action].append(step)
+                if step.name:
+                    self.steps_by_name[step.name].append(step)
+
+    @property
+    def main_job(self) -> WorkflowJob:
+        return next(iter(self.jobs.values()))
+
+    def __repr__(self):
+        return f"Workflow({self.file})"
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WorkflowRegistry:
+    """Workflows of one directory, parsed once and re-parsed only when a file's mtime or size changes"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.parse_count = 0
+        self._workflows: Dict[str, Workflow] = {}
+
+    def _refresh(self, path: Path) -> Workflow:
+        stamp = _stamp(path)
+        cached = self._workflows.get(path.name)
+        if cached is None or cached.stamp != stamp:
+            cached = Workflow(path, load_yaml(path.read_text(encoding="utf-8")), stamp)
+            self.parse_count += 1
+            self._workflows[path.name] = cached
+        return cached
+
+    def workflow(self, file_name: str) -> Workflow:
+        """The parsed workflow file (``FileNotFoundError`` if absent, ``yaml.YAMLError`` if invalid)"""
+        return self._refresh(self.directory / file_name)
+
+    def workflows(self) -> List[Workflow]:
+        """Every workflow file in the directory, by file name"""
+        paths = sorted({path for pattern in WORKFLOW_PATTERNS for path in self.directory.glob(pattern)})
+        for name in set(self._workflows) - {path.name for path in paths}:
+            del self._workflows[name]
+        return [self._refresh(path) for path in paths]
+
+    @property
+    def files(self) -> List[str]:
+        return [workflow.file for workflow in self.workflows()]
+
+    def jobs(self) -> List[WorkflowJob]:
+        return [job for workflow in self.workflows() for job in workflow.jobs.values()]
+
+    def steps_using(self, action: str) -> List[WorkflowStep]:
+        """Steps using ``action`` (``owner/repo`` with or without ``@ref``) across all workflows"""
+        action = action.split("@", 1)[0]
+        return [step for workflow in self.workflows() for step in workflow.steps_by_action.get(action, ())]
+
+    def steps_named(self, name: str) -> List[WorkflowStep]:
+        return [step for workflow in self.workflows() for step in workflow.steps_by_name.get(name, ())]
+
+    def jobs_running(self, command: str) -> List[WorkflowJob]:
+        return [job for job in self.jobs() if job.first_step(command) is not None]
+
+    def jobs_running_before(self, first: str, then: str) -> List[WorkflowJob]:
+        """Jobs in which ``first`` runs before ``then``, e.g. ``("terraform plan", "pytest")``"""
+        return [job for job in self.jobs() if job.runs_before(first, then)]
+
+    def working_directories(self) -> Dict[str, Optional[str]]:
+        """Default ``run`` working directory by ``workflow:job``"""
+        return {job.key: job.working_directory for job in self.jobs()}
+
+    def env(self, name: str) -> Dict[str, Any]:
+        """Value of an environment variable by ``workflow:job``, for the jobs that set it"""
+        return {job.key: job.env[name] for job in self.jobs() if name in job.env}
+
+    def __iter__(self) -> Iterable[Workflow]:
+        return iter(self.workflows())
@@ -0,0 +1,163 @@
+import hashlib
+import os
+import queue
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from .runner import TerraformResult
+
+INIT_STAMP = "harness-init.fingerprint"
+INIT_INPUT_LINE = re.compile(r"^\s*(?:source|version|required_version)\s*=.*$", re.MULTILINE)
+SKIPPED_INIT = TerraformResult("Terraform already initialized (init fingerprint unchanged)\n", "", 0)
+
+
+def init_fingerprint(examples_dir: Path, extra: Sequence[str] = ()) -> str:
+    """Hash of everything ``terraform init`` depends on.
+
+    That is the dependency lock file plus the ``source``, ``version`` and
+    ``required_version`` lines of the module and example configurations, which
+    cover provider requirements and module sources. Editing resources or
+    variables leaves the fingerprint, and therefore the initialized
+    ``.terraform`` directory, untouched.
+    """
+    examples_dir = Path(examples_dir)
+    digest = hashlib.sha256()
+    for path in sorted(examples_dir.parent.glob("*.tf")) + sorted(examples_dir.glob("*.tf")):
+        digest.update(path.name.encode())
+        for line in INIT_INPUT_LINE.findall(path.read_text(encoding="utf-8")):
+            digest.update(line.strip().encode())
+            digest.update(b"\n")
+    lock_file = examples_dir / ".terraform.lock.hcl"
+    digest.update(lock_file.read_bytes() if lock_file.exists() else b"<no lock file>")
+    for value in extra:
+        digest.update(value.encode())
+    return digest.hexdigest()
+
+
+def is_initialized(examples_dir: Path, fingerprint: str) -> bool:
+    """Whether ``.terraform`` holds providers installed for ``fingerprint``"""
+    data_dir = Path(examples_dir) / ".terraform"
+    stamp = data_dir / INIT_STAMP
+    return (
+        stamp.exists()
+        and stamp.read_text(encoding="utf-8").strip() == fingerprint
+        and (data_dir / "providers").is_dir()
+    )
+
+
+def ensure_init(examples_dir: Path, run: Callable[[List[str]], TerraformResult],
+                extra: Sequence[str] = ()) -> TerraformResult:
+    """Run ``terraform init`` only when the init fingerprint changed since the last successful init"""
+    examples_dir = Path(examples_dir)
+    fingerprint = init_fingerprint(examples_dir, extra)
+    if is_initialized(examples_dir, fingerprint):
+        return SKIPPED_INIT
+    result = run(["init", "-no-color", "-input=false"])
+    if result.returncode == 0:
+        # init may have created or updated the lock file
+        mark_initialized(examples_dir, extra)
+    return result
+
+
+def mark_initialized(examples_dir: Path, extra: Sequence[str] = ()):
+    """Record that ``.terraform`` holds providers installed for the current init fingerprint"""
+    data_dir = Path(examples_dir) / ".terraform"
+    data_dir.mkdir(exist_ok=True)
+    (data_dir / INIT_STAMP).write_text(init_fingerprint(examples_dir, extra), encoding="utf-8")
+
+
+def _link_or_copy(source: str, destination: str):
+    """Hardlink provider binaries, falling back to a symlink across filesystems"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        os.symlink(os.path.abspath(source), destination)
+
+
+def clone_workspace(examples_dir: Path, destination_root: Path) -> Path:
+    """Copy the module and example configuration into ``destination_root``.
+
+    The copy mirrors the repository layout, so ``source = "../"`` resolves to
+    the copied module. When the source is initialized its ``.terraform``
+    directory comes along with provider binaries hardlinked (or symlinked on a
+    different filesystem) rather than copied, so the clone can plan at once.
+    Returns the cloned examples directory.
+    """
+    examples_dir = Path(examples_dir)
+    destination_root = Path(destination_root)
+    examples = destination_root / examples_dir.name
+    examples.mkdir(parents=True, exist_ok=True)
+    for source in examples_dir.parent.glob("*.tf"):
+        shutil.copyfile(source, destination_root / source.name)
+    for source in [*examples_dir.glob("*.tf"), *examples_dir.glob("*.tfvars"),
+                   examples_dir / ".terraform.lock.hcl"]:
+        if source.exists():
+            shutil.copyfile(source, examples / source.name)
+
+    data_dir = examples_dir / ".terraform"
+    if data_dir.is_dir():
+        copy_data_dir(data_dir, examples / ".terraform")
+    return examples
+
+
+def copy_data_dir(source: Path, destination: Path):
+    """Copy a ``.terraform`` directory, hardlinking (or symlinking) provider binaries instead of copying"""
+    source = Path(source)
+    shutil.copytree(source, destination, symlinks=True, dirs_exist_ok=True,
+                    ignore=shutil.ignore_patterns("providers"))
+    if (source / "providers").is_dir():
+        shutil.copytree(source / "providers", Path(destination) / "providers",
+                        symlinks=True, copy_function=_link_or_copy, dirs_exist_ok=True)
+
+
+def default_pool_root() -> Path:
+    """Directory for pooled workspaces: tmpfs (``/dev/shm``) when available, else the temp dir"""
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return shm
+    return Path(tempfile.gettempdir())
+
+
+class WorkspacePool:
+    """A fixed set of pre-initialized copies of the example configuration.
+
+    ``prepare()`` initializes the source directory through the given callable
+    (normally ``PlanBroker.init``, which skips init while the fingerprint is
+    current) and clones it ``size`` times; ``acquire()`` then hands out a
+    ready-to-plan examples directory, blocking until one is free, so parallel
+    consumers never share a ``.terraform`` directory.
+    """
+
+    def __init__(self, examples_dir: Path, size: int, root: Optional[Path] = None):
+        self.examples_dir = Path(examples_dir)
+        self.size = size
+        self.root = Path(tempfile.mkdtemp(prefix="terraform-pool-", dir=root or default_pool_root()))
+        self.workspaces: List[Path] = []
+        self._available: "queue.Queue[Path]" = queue.Queue()
+
+    def prepare(self, init: Callable[[], TerraformResult]) -> TerraformResult:
+        """Initialize the source once and clone it into every pool slot"""
+        result = init()
+        if result.returncode != 0:
+            return result
+        for index in range(self.size):
+            workspace = clone_workspace(self.examples_dir, self.root / f"slot-{index}")
+            self.workspaces.append(workspace)
+            self._available.put(workspace)
+        return result
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[Path]:
+        """Borrow a workspace for the duration of the ``with`` block"""
+        workspace = self._available.get(timeout=timeout)
+        try:
+            yield workspace
+        finally:
+            self._available.put(workspace)
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
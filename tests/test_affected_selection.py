@@ -0,0 +1,175 @@
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from tests.harness.selection import (
+    SETTINGS,
+    AffectedTestSelection,
+    ConfigurationIndex,
+    requested_fixtures,
+    terraform_inputs,
+)
+
+REPOSITORY = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def examples(tmp_path):
+    """Copy of the module and its example configuration"""
+    module = tmp_path / "module"
+    (module / "examples").mkdir(parents=True)
+    for path in REPOSITORY.glob("*.tf"):
+        shutil.copyfile(path, module / path.name)
+    for path in [*(REPOSITORY / "examples").glob("*.tf"), REPOSITORY / "examples" / "terraform.tfvars"]:
+        shutil.copyfile(path, module / "examples" / path.name)
+    return module / "examples"
+
+
+def edit(path, old, new):
+    text = path.read_text()
+    assert old in text
+    path.write_text(text.replace(old, new, 1))
+
+
+def changed(before, after):
+    return {key for key in before.fingerprints if before.fingerprints[key] != after.fingerprints.get(key)}
+
+
+def collect(request, path):
+    """Items pytest collects from ``path``, with their real fixture information"""
+    def walk(node):
+        if isinstance(node, pytest.Item):
+            yield node
+        else:
+            for child in node.collect():
+                yield from walk(child)
+
+    return list(walk(pytest.Module.from_parent(request.session, path=path)))
+
+
+def select(examples, state_path, items, enabled=True):
+    """Names of the items one session of the plugin runs, all of them passing"""
+    plugin = AffectedTestSelection(examples, [], enabled=enabled)
+    plugin.state_path = state_path
+    config = SimpleNamespace(hook=SimpleNamespace(pytest_deselected=lambda items: None))
+    selected = list(items)
+    plugin.pytest_collection_modifyitems(None, config, selected)
+    for item in selected:
+        plugin.pytest_runtest_logreport(SimpleNamespace(nodeid=item.nodeid, when="call", duration=1.0,
+                                                        failed=False, skipped=False))
+    plugin.pytest_sessionfinish(None)
+    return {item.name for item in selected}
+
+
+class TestConfigurationIndex:
+    """Test cases for fingerprinting the configuration a test depends on"""
+
+    def test_reformatting_changes_only_the_file(self, examples):
+        """Test that a comment changes the file but no block"""
+        before = ConfigurationIndex(examples)
+        edit(examples.parent / "main.tf", 'resource "aws_ecs_service"', '# the service\n\nresource "aws_ecs_service"')
+        assert changed(before, ConfigurationIndex(examples)) == {"file:main.tf"}
+
+    def test_output_change_affects_only_the_output(self, examples):
+        """Test that editing an output changes only that output"""
+        before = ConfigurationIndex(examples)
+        edit(examples.parent / "outputs.tf", "aws_ecs_cluster.ecs-batch.id", "aws_ecs_cluster.ecs-batch.arn")
+        assert changed(before, ConfigurationIndex(examples)) == {"file:outputs.tf", "output:ecs_cluster_id"}
+
+    def test_variable_value_reaches_dependent_resources(self, examples):
+        """Test that a variable value change reaches the resources using it"""
+        before = ConfigurationIndex(examples)
+        edit(examples / "main.tf", '"fargate-service"', '"other-service"')
+        affected = changed(before, ConfigurationIndex(examples))
+        assert {"file:examples/main.tf", "variable:service_name", "resource:aws_ecs_service.ecs-batch",
+                "output:ecs_service_name"} <= affected
+        assert "resource:aws_ecs_cluster.ecs-batch" not in affected
+        assert SETTINGS not in affected
+
+    def test_mentioned_inputs(self, examples):
+        """Test that resource types and variables named in test source are found"""
+        index = ConfigurationIndex(examples)
+        keys = index.mentioned('plan.by_type("aws_iam_role"); assert variables["desired_count"] == 1')
+        assert "variable:desired_count" in keys
+        assert keys & {key for key in index.fingerprints if key.startswith("resource:aws_iam_role.")}
+        assert not {key for key in keys if key.startswith("resource:aws_iam_role_policy")}
+
+    def test_terraform_inputs(self, examples):
+        """Test which configuration inputs each fixture and declaration depends on"""
+        index = ConfigurationIndex(examples)
+        assert terraform_inputs(index, ["tmp_path"], "aws_ecs_service") == set()
+        assert terraform_inputs(index, ["terraform_validate"], "") == set(index.files) | {SETTINGS}
+        assert terraform_inputs(index, ["parsed_plan_output"], "len(plan)") == set(index.files) | {SETTINGS}
+        assert terraform_inputs(index, ["parsed_plan_output"], "aws_ecs_service.ecs-batch") == \
+            {"resource:aws_ecs_service.ecs-batch", "resource:aws_ecs_service.ecs-batch-autoscaled", SETTINGS}
+        assert terraform_inputs(index, ["tmp_path"], "", declared=["output.ecs_cluster_id"]) == \
+            {"output:ecs_cluster_id", SETTINGS}
+        with pytest.raises(KeyError, match="unknown terraform inputs"):
+            index.expand(["var.no_such_variable"])
+
+
+class TestAffectedTestSelection:
+    """Test cases for deselecting tests whose terraform inputs are unchanged"""
+
+    def test_plugin_deselects_tests_unchanged_since_they_passed(self, examples, tmp_path):
+        """Test that only tests affected by an edit or failing are rerun"""
+        def plan_test(parsed_plan_output):
+            assert parsed_plan_output.by_type("aws_ecs_service")
+
+        def output_test(parsed_plan_output):
+            assert parsed_plan_output.outputs["ecs_cluster_id"]
+
+        test_file = tmp_path / "test_plan.py"
+        test_file.write_text("# plan tests\n")
+        items = [
+            SimpleNamespace(nodeid=f"test_plan.py::{function.__name__}", path=test_file, obj=function,
+                            fixturenames=["parsed_plan_output"], get_closest_marker=lambda name: None)
+            for function in (plan_test, output_test)
+        ]
+
+        def session(enabled, outcome="passed"):
+            plugin = AffectedTestSelection(examples, [], enabled=enabled)
+            plugin.state_path = tmp_path / "passed.json"
+            deselected = []
+            config = SimpleNamespace(hook=SimpleNamespace(pytest_deselected=lambda items: deselected.extend(items)))
+            selected = list(items)
+            plugin.pytest_collection_modifyitems(None, config, selected)
+            for item in selected:
+                plugin.pytest_runtest_logreport(SimpleNamespace(nodeid=item.nodeid, when="call", duration=1.0,
+                                                                failed=outcome == "failed", skipped=False))
+            plugin.pytest_sessionfinish(None)
+            return [item.nodeid for item in selected]
+
+        assert session(enabled=False) == [item.nodeid for item in items]
+        assert session(enabled=True) == []
+        edit(examples.parent / "outputs.tf", "aws_ecs_cluster.ecs-batch.id", "aws_ecs_cluster.ecs-batch.arn")
+        assert session(enabled=True, outcome="failed") == ["test_plan.py::output_test"]
+        # A failure is forgotten rather than reused
+        assert session(enabled=True) == ["test_plan.py::output_test"]
+        assert session(enabled=True) == []
+
+    def test_plugin_narrows_collected_plan_tests(self, examples, tmp_path, request):
+        """Test that collected plan tests are narrowed to their own resources"""
+        items = collect(request, REPOSITORY / "tests" / "test_terraform_plan.py")
+        by_name = {item.name: item for item in items}
+        assert requested_fixtures(by_name["test_ecs_cluster_creation"]) == {"parsed_plan_output"}
+
+        assert select(examples, tmp_path / "passed.json", items, enabled=False) == set(by_name)
+        edit(examples.parent / "outputs.tf", "aws_ecs_cluster.ecs-batch.id", "aws_ecs_cluster.ecs-batch.arn")
+        rerun = select(examples, tmp_path / "passed.json", items)
+        assert "test_outputs_validation" in rerun
+        assert "test_plan_matches_snapshot" in rerun
+        assert not rerun & {"test_ecs_cluster_creation", "test_batch_job_queue_creation", "test_iam_roles_creation"}
+
+    def test_container_edit_reruns_plan_document_tests(self, examples, tmp_path, request):
+        """Test that editing a container definition reruns the tests reading it through plan_documents"""
+        items = collect(request, REPOSITORY / "tests" / "test_terraform_plan.py")
+        by_name = {item.name: item for item in items}
+        assert requested_fixtures(by_name["test_kms_and_secrets_configuration"]) == {"plan_documents"}
+
+        assert select(examples, tmp_path / "passed.json", items, enabled=False) == set(by_name)
+        edit(examples.parent / "main.tf", '"SECRET_KEY"', '"RENAMED_SECRET_KEY"')
+        rerun = select(examples, tmp_path / "passed.json", items)
+        assert {"test_kms_and_secrets_configuration", "test_container_configuration"} <= rerun
@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+from tests.harness.apply import (
+    ENDPOINT_OVERRIDE_FILE,
+    ApplyBenchmark,
+    endpoint_services,
+    parse_apply_events,
+    write_endpoint_overrides,
+)
+from tests.harness.runner import TerraformResult
+from tests.harness.workspace import clone_workspace
+
+REPOSITORY = Path(__file__).parent.parent
+CLUSTER = "module.batch_ecs.aws_ecs_cluster.ecs-batch"
+ROLE = "module.batch_ecs.aws_iam_role.ecs_task_role"
+
+
+def event(kind, address, action, timestamp, **hook):
+    return json.dumps({
+        "@level": "info",
+        "@timestamp": timestamp,
+        "type": kind,
+        "hook": {"resource": {"addr": address}, "action": action, **hook},
+    })
+
+
+APPLY_OUTPUT = "\n".join([
+    json.dumps({"@level": "info", "@message": "Terraform 1.5.7", "type": "version"}),
+    event("apply_start", CLUSTER, "create", "2024-05-01T10:00:00.000000Z"),
+    event("apply_start", ROLE, "create", "2024-05-01T10:00:00.100000Z"),
+    event("apply_complete", ROLE, "create", "2024-05-01T10:00:00.600000Z", elapsed_seconds=0),
+    event("apply_complete", CLUSTER, "create", "2024-05-01T10:00:02.500000+00:00", elapsed_seconds=2),
+    "not json",
+])
+
+
+class TestEndpointOverrides:
+    """Test cases for pointing the AWS providers at an emulator"""
+
+    def test_endpoint_services_cover_the_module(self):
+        """Test that every AWS service the module uses gets an endpoint"""
+        assert endpoint_services(REPOSITORY) == [
+            "batch", "cloudwatchevents", "cloudwatchlogs", "ecs", "guardduty", "iam", "inspector2", "sts",
+        ]
+
+    def test_endpoint_overrides_reach_module_and_example_providers(self, tmp_path):
+        """Test that overrides are written for the module and the example"""
+        examples = clone_workspace(REPOSITORY / "examples", tmp_path / "workspace")
+        paths = write_endpoint_overrides(examples, "http://localhost:4566")
+        assert paths == [tmp_path / "workspace" / ENDPOINT_OVERRIDE_FILE, examples / ENDPOINT_OVERRIDE_FILE]
+        override = json.loads(paths[0].read_text())
+        assert override["provider"]["aws"]["endpoints"]["ecs"] == "http://localhost:4566"
+        assert override["provider"]["aws"]["skip_metadata_api_check"] is True
+
+
+class TestApplyBenchmark:
+    """Test cases for timing applies and destroys at several parallelism levels"""
+
+    def test_parse_apply_events(self):
+        """Test that per-resource apply times are read from the JSON event stream"""
+        timings = {timing.address: timing for timing in parse_apply_events(APPLY_OUTPUT.splitlines())}
+        assert timings[CLUSTER].seconds == 2.5
+        assert timings[ROLE].seconds == 0.5
+        assert timings[ROLE].action == "create" and timings[ROLE].succeeded
+
+    def test_errored_resource_fails_the_run(self):
+        """Test that an apply_errored event marks the resource as failed"""
+        output = "\n".join([
+            event("apply_start", CLUSTER, "create", "2024-05-01T10:00:00Z"),
+            event("apply_errored", CLUSTER, "create", "2024-05-01T10:00:01Z", elapsed_seconds=1),
+        ])
+        [timing] = parse_apply_events(output.splitlines())
+        assert not timing.succeeded
+
+    def test_sweep_applies_and_destroys_each_parallelism(self, tmp_path):
+        """Test that the sweep applies and destroys once per parallelism level"""
+        calls = []
+
+        def runner(args, cwd):
+            calls.append((args[0], args[-1], cwd))
+            assert (cwd / ENDPOINT_OVERRIDE_FILE).exists()
+            return TerraformResult(APPLY_OUTPUT, "", 0)
+
+        benchmark = ApplyBenchmark(REPOSITORY / "examples", tmp_path, "http://localhost:4566", runner=runner)
+        runs = benchmark.sweep([1, 4])
+        assert [(operation, parallelism) for operation, parallelism, _ in calls] == [
+            ("apply", "-parallelism=1"), ("destroy", "-parallelism=1"),
+            ("apply", "-parallelism=4"), ("destroy", "-parallelism=4"),
+        ]
+        assert calls[0][2] == calls[1][2] != calls[2][2]
+        assert all(run.succeeded for run in runs)
+
+        benchmark.write_report(tmp_path / "report.json")
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert report["runs"][0]["resources"][0] == {
+            "address": CLUSTER, "action": "create", "seconds": 2.5, "succeeded": True,
+        }
+        assert set(report["wall_seconds"]) == {
+            "apply -parallelism=1", "destroy -parallelism=1", "apply -parallelism=4", "destroy -parallelism=4",
+        }
+        assert len(benchmark.summary_lines()) == 4
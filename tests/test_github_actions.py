@@ -1,15 +1,15 @@
 import pytest
-import yaml
-from pathlib import Path
+
+WORKFLOW_FILES = ["terraform.yml", "terraform-mock.yml", "terraform-examples.yml"]
 
 
 class TestGitHubActionsWorkflows:
     """Test cases for GitHub Actions workflow validation"""
 
     @pytest.fixture(scope="class")
-    def workflows_dir(self):
+    def workflows_dir(self, workflow_registry):
         """Fixture to get the workflows directory"""
-        return Path(__file__).parent.parent / ".github" / "workflows"
+        return workflow_registry.directory
 
     def test_workflows_directory_exists(self, workflows_dir):
         """Test that .github/workflows directory exists"""
@@ -31,87 +31,60 @@ class TestGitHubActionsWorkflows:
         workflow_file = workflows_dir / "terraform-examples.yml"
         assert workflow_file.exists(), "terraform-examples.yml workflow should exist"
 
-    def test_terraform_workflow_valid_yaml(self, workflows_dir):
+    def test_terraform_workflow_valid_yaml(self, workflow_registry):
         """Test that terraform.yml is valid YAML"""
-        workflow_file = workflows_dir / "terraform.yml"
-        with open(workflow_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Should not raise an exception if valid YAML
-            yaml.safe_load(content)
+        # Should not raise an exception if valid YAML
+        assert workflow_registry.workflow("terraform.yml").data
 
-    def test_terraform_mock_workflow_valid_yaml(self, workflows_dir):
+    def test_terraform_mock_workflow_valid_yaml(self, workflow_registry):
         """Test that terraform-mock.yml is valid YAML"""
-        workflow_file = workflows_dir / "terraform-mock.yml"
-        with open(workflow_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            yaml.safe_load(content)
+        assert workflow_registry.workflow("terraform-mock.yml").data
 
-    def test_terraform_examples_workflow_valid_yaml(self, workflows_dir):
+    def test_terraform_examples_workflow_valid_yaml(self, workflow_registry):
         """Test that terraform-examples.yml is valid YAML"""
-        workflow_file = workflows_dir / "terraform-examples.yml"
-        with open(workflow_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            yaml.safe_load(content)
+        assert workflow_registry.workflow("terraform-examples.yml").data
 
-    def test_terraform_examples_workflow_structure(self, workflows_dir):
+    def test_terraform_examples_workflow_structure(self, workflow_registry):
         """Test terraform-examples.yml workflow has required structure"""
-        workflow_file = workflows_dir / "terraform-examples.yml"
-        with open(workflow_file, 'r', encoding='utf-8') as f:
-            workflow = yaml.safe_load(f)
+        workflow = workflow_registry.workflow("terraform-examples.yml")
 
-        assert "name" in workflow
-        assert workflow["name"] == "Terraform Examples Test"
-        assert "jobs" in workflow
-        assert "terraform-examples" in workflow["jobs"]
+        assert workflow.name == "Terraform Examples Test"
+        assert "terraform-examples" in workflow.jobs
 
-    def test_examples_workflow_uses_correct_directory(self, workflows_dir):
+    def test_examples_workflow_uses_correct_directory(self, workflow_registry):
         """Test that examples workflow uses correct working directory"""
-        workflow_file = workflows_dir / "terraform-examples.yml"
-        with open(workflow_file, 'r', encoding='utf-8') as f:
-            workflow = yaml.safe_load(f)
-
-        job_config = workflow["jobs"]["terraform-examples"]
+        working_directories = workflow_registry.working_directories()
+        assert working_directories["terraform-examples.yml:terraform-examples"] == "${{ env.TF_WORKING_DIR }}"
 
-        # Check working directory
-        assert "defaults" in job_config
-        assert "run" in job_config["defaults"]
-        assert "working-directory" in job_config["defaults"]["run"]
-        assert job_config["defaults"]["run"]["working-directory"] == "${{ env.TF_WORKING_DIR }}"
-
-    def test_workflows_use_ubuntu_runner(self, workflows_dir):
+    def test_workflows_use_ubuntu_runner(self, workflow_registry):
         """Test that all workflows use Ubuntu runners"""
-        workflows = ["terraform.yml", "terraform-mock.yml", "terraform-examples.yml"]
-
-        for workflow_file in workflows:
-            workflow_path = workflows_dir / workflow_file
-            with open(workflow_path, 'r', encoding='utf-8') as f:
-                workflow = yaml.safe_load(f)
-
+        for workflow_file in WORKFLOW_FILES:
             # Find the main job (different names for different workflows)
-            jobs = workflow["jobs"]
-            main_job = list(jobs.values())[0]
+            main_job = workflow_registry.workflow(workflow_file).main_job
 
-            assert "runs-on" in main_job
-            assert "ubuntu" in main_job["runs-on"]
+            assert main_job.runs_on is not None
+            assert "ubuntu" in main_job.runs_on
 
-    def test_workflows_use_terraform_setup_action(self, workflows_dir):
+    def test_workflows_use_terraform_setup_action(self, workflow_registry):
         """Test that workflows use hashicorp/setup-terraform action"""
-        workflows = ["terraform.yml", "terraform-mock.yml", "terraform-examples.yml"]
-
-        for workflow_file in workflows:
-            workflow_path = workflows_dir / workflow_file
-            with open(workflow_path, 'r', encoding='utf-8') as f:
-                workflow = yaml.safe_load(f)
-
-            jobs = workflow["jobs"]
-            main_job = list(jobs.values())[0]
-            steps = main_job["steps"]
-
-            # Find terraform setup step
-            terraform_step = None
-            for step in steps:
-                if "uses" in step and "hashicorp/setup-terraform" in step["uses"]:
-                    terraform_step = step
-                    break
-
-            assert terraform_step is not None, f"{workflow_file} should use hashicorp/setup-terraform action"
+        using_setup = {step.workflow for step in workflow_registry.steps_using("hashicorp/setup-terraform")}
+
+        for workflow_file in WORKFLOW_FILES:
+            assert workflow_file in using_setup, f"{workflow_file} should use hashicorp/setup-terraform action"
+
+    def test_examples_workflow_plans_before_pytest(self, workflow_registry):
+        """Test that the examples job records its plan for pytest before running it"""
+        keys = [job.key for job in workflow_registry.jobs_running_before("terraform plan", "pytest")]
+        assert "terraform-examples.yml:terraform-examples" in keys
+
+        job = workflow_registry.workflow("terraform-examples.yml").jobs["terraform-examples"]
+        assert job.runs_before("tests.harness.handoff", "pytest")
+        assert "TF_PLAN_HANDOFF" in job.steps_running("pytest")[0].env
+
+    def test_workflows_are_parsed_once(self, workflow_registry):
+        """Test that repeated lookups are served from the registry"""
+        workflow_registry.workflows()
+        parsed = workflow_registry.parse_count
+        workflow_registry.steps_using("actions/checkout")
+        workflow_registry.jobs_running("terraform init")
+        assert workflow_registry.parse_count == parsed
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from tests.harness.broker import PlanBroker
+from tests.harness.runner import TerraformResult
+
+pytestmark = pytest.mark.usefixtures("untimed")
+
+
+class TestPlanBroker:
+    """Test cases for the session plan broker"""
+
+    def test_plan_runs_init_and_plan_once(self, tmp_path, recording_runner):
+        """Test that repeated plan requests reuse the first result"""
+        runner = recording_runner
+        runner.results["plan"] = TerraformResult("Plan: 1 to add", "", 0)
+        broker = PlanBroker(tmp_path, tmp_path / "artifacts", runner=runner)
+
+        for _ in range(5):
+            assert broker.plan().stdout == "Plan: 1 to add"
+
+        assert [call[0] for call in runner.calls] == ["init", "plan"]
+        assert broker.invocation_count == 2
+
+    def test_plan_writes_plan_file_to_artifacts_dir(self, tmp_path, recording_runner):
+        """Test that plan is asked to save the binary plan in the artifacts directory"""
+        runner = recording_runner
+        broker = PlanBroker(tmp_path, tmp_path / "artifacts", runner=runner)
+        broker.plan()
+
+        assert f"-out={tmp_path / 'artifacts' / 'tfplan'}" in runner.calls[-1]
+        assert broker.plan_file == tmp_path / "artifacts" / "tfplan"
+
+    def test_plan_json_is_rendered_once(self, tmp_path, recording_runner):
+        """Test that the JSON plan is produced by a single terraform show"""
+        payload = {"format_version": "1.2", "resource_changes": []}
+        runner = recording_runner
+        runner.results["show"] = TerraformResult(json.dumps(payload), "", 0)
+        broker = PlanBroker(tmp_path, tmp_path / "artifacts", runner=runner)
+
+        assert broker.plan_json() == payload
+        assert broker.plan_json() is broker.plan_json()
+        assert [call[0] for call in runner.calls] == ["init", "plan", "show"]
+
+    def test_failed_init_skips_plan(self, tmp_path, recording_runner):
+        """Test that a failed init is reported as the plan result without planning"""
+        runner = recording_runner
+        runner.results["init"] = TerraformResult("", "no provider", 1)
+        broker = PlanBroker(tmp_path, tmp_path / "artifacts", runner=runner)
+
+        assert broker.plan().returncode == 1
+        with pytest.raises(RuntimeError):
+            broker.plan_json()
+        assert [call[0] for call in runner.calls] == ["init"]
+
+    def test_fmt_check_does_not_init(self, tmp_path, recording_runner):
+        """Test that fmt check runs without initializing the working directory"""
+        runner = recording_runner
+        broker = PlanBroker(tmp_path, tmp_path / "artifacts", runner=runner)
+        broker.fmt_check()
+        broker.fmt_check()
+
+        assert [call[0] for call in runner.calls] == ["fmt"]
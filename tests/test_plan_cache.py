@@ -0,0 +1,161 @@
+import json
+import os
+
+import pytest
+
+from tests.harness.broker import PlanBroker
+from tests.harness.cache import PlanCache, fingerprint_files, module_input_files
+from tests.harness.runner import TerraformResult
+
+pytestmark = pytest.mark.usefixtures("untimed")
+
+
+class PlanRunner:
+    """Stand-in runner that writes a plan file like terraform plan -out does"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, args, cwd):
+        self.calls.append(args)
+        if args[0] == "version":
+            return TerraformResult(json.dumps({"terraform_version": "1.5.7", "platform": "linux_amd64"}), "", 0)
+        if args[0] == "plan":
+            out = next(arg for arg in args if arg.startswith("-out="))[len("-out="):]
+            with open(out, "wb") as plan_file:
+                plan_file.write(b"binary-plan")
+            return TerraformResult("Plan: 15 to add, 0 to change, 0 to destroy.", "", 0)
+        return TerraformResult("", "", 0)
+
+
+class TestFingerprint:
+    """Test cases for module input fingerprinting"""
+
+    def test_fingerprint_ignores_non_input_files(self, tmp_path, fake_module):
+        """Test that README and test edits do not change the fingerprint"""
+        examples = fake_module
+        before = fingerprint_files(module_input_files(examples), tmp_path)
+        (examples.parent / "README.md").write_text("# changed\n")
+        (examples.parent / "tests").mkdir()
+        (examples.parent / "tests" / "test_new.py").write_text("")
+        assert fingerprint_files(module_input_files(examples), tmp_path) == before
+
+    def test_fingerprint_tracks_tf_tfvars_and_lock_file(self, tmp_path, fake_module):
+        """Test that module, example, tfvars and lock file edits change the fingerprint"""
+        examples = fake_module
+        seen = {fingerprint_files(module_input_files(examples), tmp_path)}
+        for path in (examples.parent / "main.tf", examples / "main.tf", examples / "terraform.tfvars",
+                     examples / ".terraform.lock.hcl"):
+            path.write_text(path.read_text() + "# edit\n" if path.exists() else "# lock\n")
+            seen.add(fingerprint_files(module_input_files(examples), tmp_path))
+        assert len(seen) == 5
+
+    def test_fingerprint_includes_terraform_version(self, tmp_path, fake_module):
+        """Test that the terraform version is part of the fingerprint"""
+        examples = fake_module
+        files = module_input_files(examples)
+        assert fingerprint_files(files, tmp_path, ["1.5.7"]) != fingerprint_files(files, tmp_path, ["1.6.0"])
+
+
+class TestPlanCache:
+    """Test cases for the on-disk plan cache"""
+
+    def test_put_and_get_round_trip(self, tmp_path):
+        """Test that a stored result and its artifacts are replayed"""
+        cache = PlanCache(tmp_path / "cache")
+        artifact = tmp_path / "tfplan"
+        artifact.write_bytes(b"plan")
+        cache.put("key", TerraformResult("out", "err", 0), {"tfplan": artifact})
+
+        entry = cache.get("key")
+        assert entry.result == TerraformResult("out", "err", 0)
+        restored = tmp_path / "restored" / "tfplan"
+        entry.restore({"tfplan": restored})
+        assert restored.read_bytes() == b"plan"
+
+    def test_get_missing_key(self, tmp_path):
+        """Test that unknown keys miss"""
+        assert PlanCache(tmp_path).get("missing") is None
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used entries are evicted past the size bound"""
+        cache = PlanCache(tmp_path, max_bytes=400)
+        for index, key in enumerate(["a", "b"]):
+            cache.put(key, TerraformResult("x" * 100, "", 0))
+            os.utime(tmp_path / key / PlanCache.RESULT_FILE, (index, index))
+        cache.get("a")
+        cache.put("c", TerraformResult("x" * 100, "", 0))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+
+class TestCachedBroker:
+    """Test cases for the broker replaying results from the plan cache"""
+
+    @pytest.fixture(autouse=True)
+    def terraform_binary(self, tmp_path, monkeypatch):
+        """Fixture putting a stand-in terraform binary on PATH, so the broker can identify it"""
+        (tmp_path / "bin").mkdir()
+        binary = tmp_path / "bin" / "terraform"
+        binary.write_text("#!/bin/sh\n")
+        binary.chmod(0o755)
+        monkeypatch.setenv("PATH", str(tmp_path / "bin"))
+        return binary
+
+    def test_second_session_replays_without_terraform(self, tmp_path, fake_module):
+        """Test that an unchanged module is planned and validated without spawning terraform"""
+        examples = fake_module
+        cache = PlanCache(tmp_path / "cache")
+
+        first = PlanBroker(examples, tmp_path / "session1", runner=PlanRunner(), cache=cache)
+        first.plan()
+        first.validate()
+
+        runner = PlanRunner()
+        second = PlanBroker(examples, tmp_path / "session2", runner=runner, cache=cache)
+        assert second.plan().stdout.startswith("Plan: 15 to add")
+        second.validate()
+
+        assert runner.calls == []
+        assert second.plan_file.read_bytes() == b"binary-plan"
+        assert len(second.cache_hits) == 2
+
+    def test_input_change_misses(self, tmp_path, fake_module):
+        """Test that editing a module file forces a fresh plan"""
+        examples = fake_module
+        cache = PlanCache(tmp_path / "cache")
+        PlanBroker(examples, tmp_path / "session1", runner=PlanRunner(), cache=cache).plan()
+
+        (examples.parent / "main.tf").write_text('resource "aws_ecs_cluster" "renamed" {}\n')
+        runner = PlanRunner()
+        PlanBroker(examples, tmp_path / "session2", runner=runner, cache=cache).plan()
+
+        assert [call[0] for call in runner.calls] == ["init", "plan"]
+
+    def test_changed_binary_is_queried_again(self, tmp_path, terraform_binary, fake_module):
+        """Test that the remembered version is dropped when the terraform binary changes"""
+        examples = fake_module
+        cache = PlanCache(tmp_path / "cache")
+        PlanBroker(examples, tmp_path / "session1", runner=PlanRunner(), cache=cache).plan()
+
+        terraform_binary.write_text("#!/bin/sh\n# upgraded\n")
+        runner = PlanRunner()
+        PlanBroker(examples, tmp_path / "session2", runner=runner, cache=cache).plan()
+
+        assert [call[0] for call in runner.calls] == ["version"]
+
+    def test_failed_results_are_not_cached(self, tmp_path, fake_module):
+        """Test that failing invocations are not replayed"""
+        examples = fake_module
+        cache = PlanCache(tmp_path / "cache")
+
+        def failing_runner(args, cwd):
+            return TerraformResult("", "boom", 1 if args[0] == "validate" else 0)
+
+        PlanBroker(examples, tmp_path / "session1", runner=failing_runner, cache=cache).validate()
+        runner = PlanRunner()
+        PlanBroker(examples, tmp_path / "session2", runner=runner, cache=cache).validate()
+
+        assert "validate" in [call[0] for call in runner.calls]
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from tests.harness.documents import IamIndex, PlanDocuments, PolicyStatement, iam_match
+from tests.harness.plan_model import PlanModel
+
+MODULE = "module.batch_ecs"
+TASK_POLICY = f"{MODULE}.aws_iam_policy.ecs_task_policy"
+
+
+@pytest.fixture
+def documents(recorded_plan):
+    return PlanDocuments(recorded_plan)
+
+
+class TestPlanDocuments:
+    """Test cases for the JSON documents embedded in planned values"""
+
+    def test_documents_are_decoded_once(self, documents, recorded_plan_json):
+        """Test that documents are decoded once and unknown ones are listed"""
+        policy = documents.document(TASK_POLICY, "policy")
+        assert policy["Version"] == "2012-10-17"
+        assert documents.document(TASK_POLICY, "policy") is policy
+        # container_properties references role ARNs, so it is only known after apply
+        job_definition = f"{MODULE}.aws_batch_job_definition.batch_job_definition"
+        assert documents.unknown == [(job_definition, "container_properties")]
+        with pytest.raises(KeyError):
+            documents.document(job_definition, "container_properties")
+
+    def test_container_index(self, documents):
+        """Test that container definitions are indexed by name"""
+        assert documents.container_names == ["app-container"]
+        container = documents.container("app-container")
+        assert container.address == f"{MODULE}.aws_ecs_task_definition.ecs-batch[0]"
+        assert container.image == "amazonlinux"
+        assert container.environment == {"TLS_ENABLED": "true"}
+        assert container.secrets == {
+            "SECRET_KEY": "arn:aws:secretsmanager:us-east-1:123456789012:secret:example-secret",
+        }
+        assert container.ports == [80]
+        assert container.log_configuration["logDriver"] == "awslogs"
+        with pytest.raises(KeyError):
+            documents.container("sidecar")
+
+    def test_invalid_documents_are_listed(self, recorded_plan_json):
+        """Test that undecodable documents are listed rather than raised"""
+        plan = json.loads(json.dumps(recorded_plan_json))
+        for resource in plan["resource_changes"]:
+            if resource["address"] == TASK_POLICY:
+                resource["change"]["after"]["policy"] = "{not json"
+        documents = PlanDocuments(PlanModel.from_json(plan))
+        assert documents.invalid == [(TASK_POLICY, "policy")]
+        assert not documents.iam.actions(TASK_POLICY)
+
+
+class TestIamIndex:
+    """Test cases for the IAM action index over planned policies"""
+
+    def test_iam_action_index(self, documents):
+        """Test action, resource and principal lookups across the planned policies"""
+        assert documents.iam.resources("logs:PutLogEvents") == ["*"]
+        assert documents.iam.resources("LOGS:putlogevents") == ["*"]
+        assert documents.iam.allows("kms:Decrypt", "abcd1234-5678-90ab-cdef-EXAMPLEKEY")
+        assert documents.iam.allows("s3:GetObject", "arn:aws:s3:::example-bucket/key")
+        assert not documents.iam.allows("s3:GetObject", "arn:aws:s3:::other-bucket/key")
+        assert not documents.iam.allows("s3:DeleteObject", "arn:aws:s3:::example-bucket/key")
+        assert [statement.address for statement in documents.iam.granting("sts:AssumeRole")] == [
+            f"{MODULE}.aws_iam_role.batch_service_role",
+            f"{MODULE}.aws_iam_role.ecs_task_execution_role",
+            f"{MODULE}.aws_iam_role.ecs_task_role",
+        ]
+        assert documents.iam.principals(f"{MODULE}.aws_iam_role.batch_service_role") == \
+            {"Service": ["batch.amazonaws.com"]}
+
+    def test_wildcards_and_deny(self):
+        """Test wildcard actions and resources, NotAction and explicit denies"""
+        def statement(effect, actions, resources="*", not_actions=None):
+            document = {"Effect": effect, "Action": actions, "Resource": resources}
+            if not_actions:
+                document = {"Effect": effect, "NotAction": not_actions, "Resource": resources}
+            return PolicyStatement.from_json("aws_iam_policy.p", "policy", document)
+
+        index = IamIndex([
+            statement("Allow", "s3:*", "arn:aws:s3:::bucket/*"),
+            statement("Deny", ["s3:DeleteObject"], "arn:aws:s3:::bucket/protected/*"),
+            statement("Allow", None, "*", not_actions=["iam:*"]),
+        ])
+        assert index.allows("s3:GetObject", "arn:aws:s3:::bucket/key")
+        assert index.allows("s3:DeleteObject", "arn:aws:s3:::bucket/key")
+        assert not index.allows("s3:DeleteObject", "arn:aws:s3:::bucket/protected/key")
+        assert index.allows("ec2:RunInstances")
+        assert not index.allows("iam:CreateUser")
+        assert iam_match("arn:aws:s3:::b[1]/x", "arn:aws:s3:::b[1]/?")
@@ -0,0 +1,134 @@
+import pytest
+
+from tests.harness.expectations import (
+    UNKNOWN,
+    Expectation,
+    evaluate,
+    expectations_from_resource_table,
+    parse_literal,
+)
+
+MODULE = "module.batch_ecs"
+
+
+def is_positive(value):
+    return value > 0
+
+
+EXPECTATIONS = [
+    Expectation("aws_batch_compute_environment.batch_compute_env", "compute_environment_name", "example-batch-compute-env"),
+    Expectation("aws_batch_compute_environment.batch_compute_env", "type", "MANAGED"),
+    Expectation("aws_batch_compute_environment.batch_compute_env", "state", "ENABLED"),
+    Expectation("aws_batch_compute_environment.batch_compute_env", "compute_resources.0.type", "FARGATE"),
+    Expectation("aws_batch_compute_environment.batch_compute_env", "compute_resources.0.max_vcpus", 16),
+    Expectation("aws_batch_compute_environment.batch_compute_env", "service_role", UNKNOWN),
+    Expectation("aws_batch_job_queue.batch_job_queue", "name", "example-batch-job-queue"),
+    Expectation("aws_batch_job_queue.batch_job_queue", "priority", is_positive),
+    Expectation("aws_batch_job_queue.batch_job_queue", "state", "ENABLED"),
+    Expectation("aws_batch_job_definition.batch_job_definition", "name", "example-batch-job-def"),
+    Expectation("aws_batch_job_definition.batch_job_definition", "type", "container"),
+    Expectation("aws_batch_job_definition.batch_job_definition", "platform_capabilities", ["FARGATE"]),
+    Expectation("aws_batch_job_definition.batch_job_definition", "retry_strategy.0.attempts", 3),
+    Expectation("aws_batch_job_definition.batch_job_definition", "timeout.0.attempt_duration_seconds", 3600),
+    Expectation("aws_ecs_cluster.ecs-batch", "name", "example-fargate-cluster"),
+    Expectation("aws_ecs_cluster.ecs-batch", "setting.0.name", "containerInsights"),
+    Expectation("aws_ecs_cluster.ecs-batch", "setting.0.value", "enabled"),
+    Expectation("aws_ecs_service.ecs-batch", count=1),
+    Expectation("aws_ecs_service.ecs-batch", "name", "fargate-service"),
+    Expectation("aws_ecs_service.ecs-batch", "launch_type", "FARGATE"),
+    Expectation("aws_ecs_service.ecs-batch", "desired_count", 1),
+    Expectation("aws_ecs_service.ecs-batch", "network_configuration.0.assign_public_ip", False),
+    Expectation("aws_ecs_service.ecs-batch", "network_configuration.0.security_groups", ["sg-0123456789abcdef0"]),
+    Expectation("aws_ecs_service.ecs-batch", "task_definition", UNKNOWN),
+    Expectation("aws_ecs_task_definition.ecs-batch", count=1),
+    Expectation("aws_ecs_task_definition.ecs-batch[0]", "family", "example-fargate-task-family"),
+    Expectation("aws_ecs_task_definition.ecs-batch[0]", "cpu", "256"),
+    Expectation("aws_ecs_task_definition.ecs-batch[0]", "memory", "512"),
+    Expectation("aws_ecs_task_definition.ecs-batch[0]", "network_mode", "awsvpc"),
+    Expectation("aws_ecs_task_definition.ecs-batch[0]", "requires_compatibilities", ["FARGATE"]),
+    Expectation("aws_cloudwatch_log_group.ecs-batch", "name", "/ecs/fargate"),
+    Expectation("aws_cloudwatch_log_group.ecs-batch", "retention_in_days", 14),
+    Expectation("aws_guardduty_detector.ecs-batch", "enable", True),
+    Expectation("aws_iam_role", count=3),
+    Expectation("aws_iam_role", "path", "/"),
+    Expectation("aws_iam_role_policy_attachment", count=2),
+    Expectation("aws_iam_policy.ecs_task_policy", "name", "example-ecsTaskRole-policy"),
+    Expectation("aws_iam_policy_attachment.ecs_task_policy_attach", "roles", ["example-ecsTaskRole"]),
+    Expectation("aws_inspector2_enabler", count=0),
+    Expectation("aws_cloudwatch_event_rule", count=0),
+]
+
+
+@pytest.fixture(scope="module")
+def expectation_report(parsed_plan_output):
+    """Fixture evaluating the whole expectation table against the plan once"""
+    return evaluate(parsed_plan_output, EXPECTATIONS, module_address=MODULE)
+
+
+class TestPlanExpectations:
+    """Test cases for the expectation table against the session plan"""
+
+    @pytest.mark.parametrize("expectation", EXPECTATIONS, ids=lambda expectation: expectation.id)
+    def test_plan_expectation(self, expectation_report, expectation):
+        """Test one row of the expectation table against the session plan"""
+        result = expectation_report[expectation]
+        assert result.passed, result.message
+
+    def test_expected_resources_table(self, parsed_plan_output, expected_resources):
+        """Test the shared expected_resources table against the session plan"""
+        expectations = expectations_from_resource_table(expected_resources)
+        report = evaluate(parsed_plan_output, expectations, module_address=MODULE)
+        assert report.passed, report.format()
+
+
+class TestExpectationEngine:
+    """Test cases for the expectation engine against the recorded plan"""
+
+    def test_table_passes_on_recorded_plan(self, recorded_plan):
+        """Test that the expectation table matches the recorded example plan"""
+        report = evaluate(recorded_plan, EXPECTATIONS, module_address=MODULE)
+        assert report.passed, report.format()
+        assert len(report) == len(EXPECTATIONS)
+
+    def test_expected_resources_table_passes_on_recorded_plan(self, recorded_plan, expected_resources):
+        """Test that the shared expected_resources table matches the recorded example plan"""
+        expectations = expectations_from_resource_table(expected_resources)
+        report = evaluate(recorded_plan, expectations, module_address=MODULE)
+        assert report.passed, report.format()
+
+    def test_mismatched_value_is_reported(self, recorded_plan):
+        """Test that a wrong value fails with the actual value in the message"""
+        expectation = Expectation("aws_ecs_task_definition.ecs-batch[0]", "cpu", "512")
+        result = evaluate(recorded_plan, [expectation])[expectation]
+        assert not result.passed
+        assert "'256'" in result.message
+
+    def test_missing_resource_is_reported(self, recorded_plan):
+        """Test that expectations for unplanned resources fail"""
+        expectation = Expectation("aws_lambda_function.handler", "runtime", "python3.11")
+        result = evaluate(recorded_plan, [expectation])[expectation]
+        assert not result.passed
+        assert result.message == "no planned resource matches"
+
+    def test_unknown_value_does_not_match_literal(self, recorded_plan):
+        """Test that values known only after apply never equal a literal"""
+        expectation = Expectation("aws_ecs_service.ecs-batch", "task_definition", "arn:aws:ecs:task")
+        assert not evaluate(recorded_plan, [expectation])[expectation].passed
+
+    def test_count_mismatch_is_reported(self, recorded_plan):
+        """Test that count expectations report the planned count"""
+        expectation = Expectation("aws_iam_role", count=4)
+        result = evaluate(recorded_plan, [expectation])[expectation]
+        assert not result.passed
+        assert result.message == "3 planned, expected 4"
+
+    def test_other_module_is_ignored(self, recorded_plan):
+        """Test that evaluation is scoped to the requested module"""
+        expectation = Expectation("aws_ecs_cluster.ecs-batch")
+        assert not evaluate(recorded_plan, [expectation], module_address="module.other")[expectation].passed
+
+    def test_parse_literal(self):
+        """Test conversion of plan-style literals"""
+        assert parse_literal('"ENABLED"') == "ENABLED"
+        assert parse_literal("14") == 14
+        assert parse_literal("true") is True
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from tests.harness.broker import PlanBroker
+from tests.harness.handoff import MANIFEST_NAME, PlanHandoff, main
+from tests.harness.runner import TerraformResult
+from tests.harness.workspace import INIT_STAMP, init_fingerprint, is_initialized
+
+pytestmark = pytest.mark.usefixtures("untimed")
+
+PLAN_JSON = {"format_version": "0.2", "terraform_version": "1.0.0", "resource_changes": []}
+VERSION = TerraformResult(json.dumps({"terraform_version": "1.0.0", "platform": "linux_amd64"}), "", 0)
+
+
+@pytest.fixture
+def runner(recording_runner):
+    """Fixture with a recording runner on the recorded terraform version whose plans are marked as made by pytest"""
+    recording_runner.results["version"] = VERSION
+    recording_runner.results["show"] = TerraformResult(
+        json.dumps({"resource_changes": [], "planned_by": "pytest"}), "", 0)
+    return recording_runner
+
+
+@pytest.fixture
+def examples(tmp_path):
+    """Module and example configuration, initialized as a workflow step would leave them"""
+    examples = tmp_path / "module" / "examples"
+    (examples / ".terraform" / "providers").mkdir(parents=True)
+    (examples.parent / "main.tf").write_text('resource "null_resource" "a" {}\n')
+    (examples / "main.tf").write_text('module "m" {\n  source = "../"\n}\n')
+    (examples / "terraform.tfvars").write_text("")
+    return examples
+
+
+@pytest.fixture
+def handoff(examples, tmp_path):
+    """Plan files and their manifest, as recorded by the workflow"""
+    output = tmp_path / "handoff"
+    output.mkdir()
+    (output / "tfplan").write_bytes(b"binary plan")
+    (output / "plan.json").write_text(json.dumps(PLAN_JSON))
+    (output / "plan.txt").write_text("Plan: 1 to add, 0 to change, 0 to destroy.\n")
+    return PlanHandoff.record(examples, output / "tfplan", output / "plan.json", output / "plan.txt",
+                              runner=lambda args, cwd: VERSION)
+
+
+class TestPlanHandoff:
+    """Test cases for reusing a plan recorded by the workflow"""
+
+    def test_record_and_load(self, examples, handoff, tmp_path):
+        """Test that a recorded manifest loads with the same fingerprint"""
+        manifest = tmp_path / "handoff" / MANIFEST_NAME
+        data = json.loads(manifest.read_text())
+        assert data["plan_file"] == "tfplan"
+        assert data["data_dir"] == str((examples / ".terraform").resolve())
+        assert data["terraform_version"] == "1.0.0 linux_amd64"
+
+        loaded = PlanHandoff.load(manifest)
+        assert loaded.fingerprint == handoff.fingerprint
+        assert loaded.plan_file == tmp_path / "handoff" / "tfplan"
+        assert loaded.mismatch(examples, "1.0.0 linux_amd64") is None
+
+    def test_matching_handoff_replaces_terraform(self, examples, handoff, tmp_path, runner):
+        """Test that a matching hand-off serves init and plan without terraform"""
+        broker = PlanBroker(examples, tmp_path / "artifacts", runner=runner, handoff=handoff)
+
+        assert broker.plan().stdout.startswith("Plan: 1 to add")
+        assert broker.plan_json() == PLAN_JSON
+        assert broker.plan_file.read_bytes() == b"binary plan"
+        assert broker.init().returncode == 0
+        assert runner.calls == [["version", "-json"]]
+        assert broker.handoff_status == "used"
+        assert is_initialized(examples, init_fingerprint(examples))
+
+    def test_changed_sources_fall_back_to_planning(self, examples, handoff, tmp_path, runner):
+        """Test that changed sources make the broker plan again"""
+        (examples.parent / "main.tf").write_text('resource "null_resource" "b" {}\n')
+        broker = PlanBroker(examples, tmp_path / "artifacts", runner=runner, handoff=handoff)
+
+        assert broker.plan_json()["planned_by"] == "pytest"
+        assert [call[0] for call in runner.calls] == ["version", "init", "plan", "show"]
+        assert broker.handoff_status == "ignored (sources changed since the plan was made)"
+
+    def test_other_terraform_version_falls_back_to_planning(self, examples, handoff, tmp_path, runner):
+        """Test that a plan made by another terraform version makes the broker plan again"""
+        runner.results["version"] = TerraformResult(
+            json.dumps({"terraform_version": "1.5.7", "platform": "linux_amd64"}), "", 0)
+        broker = PlanBroker(examples, tmp_path / "artifacts", runner=runner, handoff=handoff)
+
+        assert broker.plan_json()["planned_by"] == "pytest"
+        assert broker.handoff_status == \
+            "ignored (planned with terraform 1.0.0 linux_amd64, not 1.5.7 linux_amd64)"
+
+    def test_missing_files_fall_back_to_planning(self, examples, handoff, tmp_path, runner):
+        """Test that missing plan files make the broker plan again"""
+        handoff.plan_json.unlink()
+        broker = PlanBroker(examples, tmp_path / "artifacts", runner=runner, handoff=handoff)
+
+        broker.plan()
+        assert [call[0] for call in runner.calls] == ["version", "init", "plan"]
+        assert broker.handoff_status.startswith("ignored (missing ")
+
+    def test_data_dir_is_copied_into_the_working_directory(self, examples, handoff, tmp_path, runner):
+        """Test that the workflow's data directory is copied for init"""
+        workflow_data_dir = tmp_path / "workflow" / ".terraform"
+        (workflow_data_dir / "providers" / "registry").mkdir(parents=True)
+        (workflow_data_dir / "providers" / "registry" / "provider").write_bytes(b"binary")
+        handoff.data_dir = workflow_data_dir
+        (examples / ".terraform" / "providers").rmdir()
+
+        broker = PlanBroker(examples, tmp_path / "artifacts", runner=runner, handoff=handoff)
+        assert broker.init().stdout.startswith("Terraform initialized by the plan hand-off")
+        assert (examples / ".terraform" / "providers" / "registry" / "provider").read_bytes() == b"binary"
+        assert (examples / ".terraform" / INIT_STAMP).exists()
+
+    def test_verify_command(self, examples, handoff, tmp_path, capsys, monkeypatch):
+        """Test that the verify command fails once the sources change"""
+        monkeypatch.setattr("tests.harness.handoff.terraform_version", lambda examples_dir: "1.0.0 linux_amd64")
+        manifest = str(tmp_path / "handoff" / MANIFEST_NAME)
+        assert main(["verify", str(examples), "--manifest", manifest]) == 0
+        (examples / "terraform.tfvars").write_text('name = "changed"\n')
+        assert main(["verify", str(examples), "--manifest", manifest]) == 1
+        assert "sources changed" in capsys.readouterr().err
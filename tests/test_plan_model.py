@@ -0,0 +1,76 @@
+import pytest
+
+from tests.harness.plan_model import PlanModel, ResourceChange, lookup, split_path
+
+MODULE = "module.batch_ecs"
+
+
+class TestAttributePaths:
+    """Test cases for attribute path helpers"""
+
+    def test_split_path(self):
+        """Test that numeric path segments become list indices"""
+        assert split_path("compute_resources.0.max_vcpus") == ("compute_resources", 0, "max_vcpus")
+        assert split_path(["setting", 0]) == ("setting", 0)
+
+    def test_lookup_default(self):
+        """Test that missing paths raise unless a default is given"""
+        value = {"timeout": [{"attempt_duration_seconds": 3600}]}
+        assert lookup(value, "timeout.0.attempt_duration_seconds") == 3600
+        assert lookup(value, "timeout.1.attempt_duration_seconds", None) is None
+        with pytest.raises(KeyError):
+            lookup(value, "retry_strategy.0.attempts")
+
+
+class TestPlanModel:
+    """Test cases for the indexed plan model"""
+
+    def test_resource_lookup_by_address(self, recorded_plan):
+        """Test O(1) lookup of a counted resource by full address"""
+        task_definition = recorded_plan.resource(f"{MODULE}.aws_ecs_task_definition.ecs-batch[0]")
+        assert task_definition.after["cpu"] == "256"
+        assert task_definition.index == 0
+        assert task_definition.local_address == "aws_ecs_task_definition.ecs-batch[0]"
+
+    def test_missing_resource_raises(self, recorded_plan):
+        """Test that unknown addresses raise KeyError"""
+        assert f"{MODULE}.aws_inspector2_enabler.inspector[0]" not in recorded_plan
+        with pytest.raises(KeyError):
+            recorded_plan.resource(f"{MODULE}.aws_inspector2_enabler.inspector[0]")
+
+    def test_index_by_type_and_module(self, recorded_plan):
+        """Test the type and module indexes"""
+        assert len(recorded_plan.by_type("aws_iam_role")) == 3
+        assert recorded_plan.by_type("aws_lambda_function") == []
+        assert len(recorded_plan.in_module(MODULE)) == 15
+        assert recorded_plan.in_module() == []
+
+    def test_nested_blocks_are_preserved(self, recorded_plan):
+        """Test that nested blocks are reachable by attribute path"""
+        service = recorded_plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        assert service.get("network_configuration.0.assign_public_ip") is False
+
+    def test_unknown_values(self, recorded_plan):
+        """Test that values known only after apply are reported as unknown"""
+        service = recorded_plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        assert service.is_unknown("task_definition")
+        assert not service.is_unknown("desired_count")
+        assert service.get("task_definition") is None
+
+    def test_summary(self, recorded_plan):
+        """Test that the summary matches the plan line counts"""
+        assert recorded_plan.summary() == {"add": 15, "change": 0, "destroy": 0}
+
+    def test_replace_action(self):
+        """Test that delete-then-create is reported as a replace"""
+        change = ResourceChange.from_json({
+            "address": "aws_ecs_cluster.ecs-batch", "type": "aws_ecs_cluster", "name": "ecs-batch",
+            "change": {"actions": ["delete", "create"], "after": {}},
+        })
+        model = PlanModel([change])
+        assert change.action == "replace"
+        assert model.summary() == {"add": 1, "change": 0, "destroy": 1}
+
+    def test_records_use_slots(self, recorded_plan):
+        """Test that resource records do not carry a per-instance dict"""
+        assert not hasattr(next(iter(recorded_plan)), "__dict__")
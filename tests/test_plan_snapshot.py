@@ -0,0 +1,124 @@
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.harness.snapshot import (
+    JSON_KEY,
+    SENSITIVE,
+    UNKNOWN,
+    PlanSnapshot,
+    diff_values,
+    normalize,
+)
+
+MODULE = "module.batch_ecs"
+
+
+@pytest.fixture
+def golden(recorded_plan_json):
+    return PlanSnapshot.from_plan(recorded_plan_json)
+
+
+def change_resource(plan, address, **after):
+    plan = copy.deepcopy(plan)
+    for resource in plan["resource_changes"]:
+        if resource["address"] == address:
+            resource["change"]["after"].update(after)
+    return plan
+
+
+class TestNormalization:
+    """Test cases for normalizing and diffing planned values"""
+
+    def test_normalize(self):
+        """Test that unknown, sensitive, null and JSON-string values are normalized"""
+        value = normalize(
+            {"name": "x", "arn": None, "policy": '{"Version": "2012-10-17", "Statement": []}', "tags": None,
+             "secret": "s", "list": [{"a": 1}, {"a": None}]},
+            {"arn": True, "list": [{}, {"a": True}]},
+            {"secret": True},
+        )
+        assert value == {
+            "name": "x",
+            "arn": UNKNOWN,
+            "policy": {JSON_KEY: {"Statement": [], "Version": "2012-10-17"}},
+            "secret": SENSITIVE,
+            "list": [{"a": 1}, {"a": UNKNOWN}],
+        }
+        assert normalize("{not json") == "{not json"
+
+    def test_diff_values(self):
+        """Test that value differences are reported by dotted path"""
+        assert list(diff_values({"a": [1, 2], "b": 1}, {"a": [1, 3], "c": 2})) == [
+            "a.1: expected 2, got 3",
+            "b: removed (was 1)",
+            "c: added 2",
+        ]
+
+
+class TestPlanSnapshot:
+    """Test cases for comparing plans through hashed snapshots"""
+
+    def test_snapshot_of_recorded_plan(self, golden):
+        """Test the snapshot taken from the recorded plan"""
+        assert len(golden) == 15
+        assert golden.summary() == {"add": 15, "change": 0, "destroy": 0}
+        policy = golden.resources[f"{MODULE}.aws_iam_policy.ecs_task_policy"]["values"]["policy"]
+        assert policy[JSON_KEY]["Version"] == "2012-10-17"
+
+    def test_hashes_ignore_key_order_and_nulls(self, recorded_plan_json, golden):
+        """Test that key order and new null arguments do not change hashes"""
+        reordered = json.loads(json.dumps(recorded_plan_json, sort_keys=True))
+        for resource in reordered["resource_changes"]:
+            resource["change"]["after"]["new_optional_argument"] = None
+        assert not golden.compare(PlanSnapshot.from_plan(reordered))
+
+    def test_only_changed_resources_are_reported(self, recorded_plan_json, golden):
+        """Test that only resources with differing hashes are diffed"""
+        address = f"{MODULE}.aws_batch_compute_environment.batch_compute_env"
+        plan = change_resource(recorded_plan_json, address, state="DISABLED")
+        diff = golden.compare(PlanSnapshot.from_plan(plan))
+        assert diff.added == diff.removed == []
+        assert diff.changed == {address: ['values.state: expected "ENABLED", got "DISABLED"']}
+        assert diff.report() == [f"~ {address}", '    values.state: expected "ENABLED", got "DISABLED"']
+
+    def test_added_and_removed_resources(self, recorded_plan_json, golden):
+        """Test that added and removed resources are reported"""
+        plan = copy.deepcopy(recorded_plan_json)
+        removed = plan["resource_changes"].pop(0)
+        diff = golden.compare(PlanSnapshot.from_plan(plan))
+        assert diff.removed == [removed["address"]]
+        assert PlanSnapshot.from_plan(plan).compare(golden).added == [removed["address"]]
+
+
+class TestSnapshotFile:
+    """Test cases for the committed golden snapshot file"""
+
+    def test_save_and_load(self, tmp_path, recorded_plan_json, golden):
+        """Test that a saved snapshot loads with the same hashes"""
+        path = tmp_path / "snapshot.json"
+        golden.save(path)
+        stored = PlanSnapshot.load(path)
+        assert stored.hashes == golden.hashes
+        assert not stored.compare(golden)
+        plan = change_resource(recorded_plan_json, f"{MODULE}.aws_ecs_cluster.ecs-batch", name="renamed")
+        assert list(stored.compare(PlanSnapshot.from_plan(plan)).changed) == [f"{MODULE}.aws_ecs_cluster.ecs-batch"]
+
+    def test_hand_edited_values_are_compared(self, tmp_path, golden):
+        """Test that hand-edited values are compared despite stale stored hashes"""
+        path = tmp_path / "snapshot.json"
+        golden.save(path)
+        data = json.loads(path.read_text())
+        data["resources"][f"{MODULE}.aws_ecs_cluster.ecs-batch"]["values"]["name"] = "edited"  # hash left as is
+        path.write_text(json.dumps(data))
+
+        diff = PlanSnapshot.load(path).compare(golden)
+        assert list(diff.changed) == [f"{MODULE}.aws_ecs_cluster.ecs-batch"]
+        assert not list(tmp_path.glob(".*.tmp"))
+
+    def test_committed_snapshot_matches_recorded_plan(self, golden):
+        """Test that the committed snapshot matches the recorded plan"""
+        stored = PlanSnapshot.load(Path(__file__).parent / "snapshots" / "example_plan.json")
+        assert not stored.compare(golden)
@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from tests.harness.plan_model import PlanModel
+from tests.harness.streaming import (
+    extract_plan_summary,
+    iter_json_resource_changes,
+    iter_resource_changes,
+    iter_text_resource_changes,
+    plan_summary,
+)
+
+MODULE = "module.batch_ecs"
+
+
+@pytest.fixture(scope="module")
+def text_plan_path(fixtures_dir):
+    """Fixture to get the recorded human-readable plan output"""
+    return fixtures_dir / "example_plan.txt"
+
+
+@pytest.fixture(scope="module")
+def json_plan_path(fixtures_dir):
+    """Fixture to get the recorded JSON plan"""
+    return fixtures_dir / "example_plan.json"
+
+
+class TestTextStreaming:
+    """Test cases for streaming human-readable plan output"""
+
+    def test_yields_every_resource(self, text_plan_path):
+        """Test that each resource header produces one change"""
+        with open(text_plan_path, encoding="utf-8") as lines:
+            changes = list(iter_text_resource_changes(lines))
+        assert len(changes) == 15
+        assert {change.action for change in changes} == {"create"}
+        assert f"{MODULE}.aws_ecs_task_definition.ecs-batch[0]" in {change.address for change in changes}
+
+    def test_nested_blocks_are_flattened(self, text_plan_path):
+        """Test that attributes inside nested blocks keep their block path"""
+        with open(text_plan_path, encoding="utf-8") as lines:
+            changes = {change.address: change for change in iter_text_resource_changes(lines)}
+        compute_env = changes[f"{MODULE}.aws_batch_compute_environment.batch_compute_env"]
+        assert compute_env.attributes["compute_resources.max_vcpus"] == "16"
+        assert compute_env.attributes["compute_resources.type"] == '"FARGATE"'
+        assert compute_env.attributes["type"] == '"MANAGED"'
+        assert compute_env.attributes["arn"] == "(known after apply)"
+
+    def test_multiline_values_do_not_leak_attributes(self, text_plan_path):
+        """Test that keys inside jsonencode documents are not mistaken for attributes"""
+        with open(text_plan_path, encoding="utf-8") as lines:
+            changes = {change.address: change for change in iter_text_resource_changes(lines)}
+        task_definition = changes[f"{MODULE}.aws_ecs_task_definition.ecs-batch[0]"]
+        assert task_definition.attributes["container_definitions"].startswith("jsonencode(")
+        assert '"TLS_ENABLED"' in task_definition.attributes["container_definitions"]
+        assert task_definition.attributes["cpu"] == '"256"'
+        assert "essential" not in task_definition.attributes
+
+    def test_replace_and_destroy_headers(self):
+        """Test action detection for non-create headers"""
+        lines = [
+            "  # aws_ecs_cluster.ecs-batch must be replaced",
+            '-/+ resource "aws_ecs_cluster" "ecs-batch" {',
+            '      ~ name = "old" -> "new" # forces replacement',
+            "    }",
+            "  # aws_guardduty_detector.ecs-batch will be destroyed",
+            '  - resource "aws_guardduty_detector" "ecs-batch" {',
+            "      - enable = true -> null",
+            "    }",
+        ]
+        changes = list(iter_text_resource_changes(lines))
+        assert [(change.address, change.action) for change in changes] == [
+            ("aws_ecs_cluster.ecs-batch", "replace"),
+            ("aws_guardduty_detector.ecs-batch", "delete"),
+        ]
+
+
+class TestSummary:
+    """Test cases for plan summary extraction"""
+
+    def test_summary_from_stream(self, text_plan_path):
+        """Test that the summary is read from the Plan line"""
+        with open(text_plan_path, encoding="utf-8") as lines:
+            assert plan_summary(lines) == {"add": 15, "change": 0, "destroy": 0}
+
+    def test_summary_stops_at_plan_line(self):
+        """Test that lines after the Plan line are never read"""
+        def lines():
+            yield "Plan: 1 to add, 2 to change, 3 to destroy."
+            raise AssertionError("read past the Plan line")
+
+        assert plan_summary(lines()) == {"add": 1, "change": 2, "destroy": 3}
+
+    def test_extract_plan_summary(self, text_plan_path):
+        """Test summary extraction from captured stdout"""
+        assert extract_plan_summary(text_plan_path.read_text(encoding="utf-8")) == {"add": 15, "change": 0, "destroy": 0}
+        assert extract_plan_summary("No changes. Your infrastructure matches the configuration.") == {
+            "add": 0, "change": 0, "destroy": 0,
+        }
+        assert extract_plan_summary("Error: Invalid reference") == {}
+
+
+class TestJsonStreaming:
+    """Test cases for streaming resource changes out of a JSON plan"""
+
+    def test_matches_plan_model(self, json_plan_path, recorded_plan_json):
+        """Test that streamed records equal the fully loaded model"""
+        model = PlanModel.from_json(recorded_plan_json)
+        streamed = list(iter_json_resource_changes(json_plan_path))
+        assert [change.address for change in streamed] == model.addresses
+        assert streamed[0].after == next(iter(model)).after
+
+    def test_small_chunks(self, json_plan_path):
+        """Test that elements spanning many read chunks are reassembled"""
+        assert len(list(iter_json_resource_changes(json_plan_path, chunk_size=64))) == 15
+
+    def test_plan_without_changes(self, tmp_path):
+        """Test JSON plans with an empty or missing resource_changes array"""
+        empty = tmp_path / "empty.json"
+        empty.write_text(json.dumps({"format_version": "1.2", "resource_changes": []}))
+        missing = tmp_path / "missing.json"
+        missing.write_text(json.dumps({"format_version": "1.2"}))
+        assert list(iter_json_resource_changes(empty)) == []
+        assert list(iter_json_resource_changes(missing)) == []
+
+    def test_format_detection(self, json_plan_path, text_plan_path):
+        """Test that iter_resource_changes accepts either plan format"""
+        assert len(list(iter_resource_changes(json_plan_path))) == 15
+        assert len(list(iter_resource_changes(text_plan_path))) == 15
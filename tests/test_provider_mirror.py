@@ -0,0 +1,126 @@
+import hashlib
+
+from tests.harness.mirror import ProviderMirror, main, parse_lock_file
+from tests.harness.runner import TerraformResult
+
+ARCHIVE = b"PK\x03\x04 provider archive"
+
+LOCK_FILE = f'''# This file is maintained automatically by "terraform init".
+# Manual edits may be lost in future updates.
+
+provider "registry.terraform.io/hashicorp/aws" {{
+  version     = "4.67.0"
+  constraints = "~> 4.0"
+  hashes = [
+    "h1:5Zfo3GfRSWBaXs4TGQNOflr1XaYj6pRnVJLX5VAjFX4=",
+    "zh:{hashlib.sha256(ARCHIVE).hexdigest()}",
+    "zh:0843017ecc24385f2b45f2c5fce79dc25b258e50d516877b3affee3bef34f060",
+  ]
+}}
+
+provider "registry.terraform.io/hashicorp/random" {{
+  version = "3.5.1"
+  hashes = [
+    "h1:VSnd9ZIPyfKHOObuQCaKfnjIHRtR7qTw19Rz8tJxm+k=",
+  ]
+}}
+'''
+
+
+def write_lock_file(tmp_path):
+    lock_file = tmp_path / ".terraform.lock.hcl"
+    lock_file.write_text(LOCK_FILE)
+    return lock_file
+
+
+def mirror_archive(mirror, provider, contents=ARCHIVE):
+    archive = mirror.archive_path(provider, "linux_amd64")
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    archive.write_bytes(contents)
+    return archive
+
+
+class TestLockFile:
+    """Test cases for reading the provider lock file"""
+
+    def test_parse_lock_file(self, tmp_path):
+        """Test that providers, versions, constraints and hashes are read from the lock file"""
+        aws, random = parse_lock_file(write_lock_file(tmp_path))
+        assert aws.source == "registry.terraform.io/hashicorp/aws"
+        assert aws.version == "4.67.0"
+        assert aws.constraints == "~> 4.0"
+        assert len(aws.hashes) == 3
+        assert aws.archive_name("linux_amd64") == "terraform-provider-aws_4.67.0_linux_amd64.zip"
+        assert random.type == "random"
+        assert random.constraints == ""
+
+
+class TestProviderMirror:
+    """Test cases for verifying and using the offline provider mirror"""
+
+    def test_verify_accepts_mirrored_archives_with_locked_hashes(self, tmp_path):
+        """Test that archives matching a locked zh: hash pass and missing ones are reported"""
+        lock_file = write_lock_file(tmp_path)
+        mirror = ProviderMirror(tmp_path / "mirror-root", ["linux_amd64"])
+        aws, random = parse_lock_file(lock_file)
+        mirror_archive(mirror, aws)
+        assert mirror.verify(lock_file) == [
+            "registry.terraform.io/hashicorp/random 3.5.1 (linux_amd64) is not mirrored"
+        ]
+
+    def test_verify_rejects_tampered_archive(self, tmp_path):
+        """Test that an archive whose hash is not locked is rejected"""
+        lock_file = write_lock_file(tmp_path)
+        mirror = ProviderMirror(tmp_path / "mirror-root", ["linux_amd64"])
+        aws, _ = parse_lock_file(lock_file)
+        mirror_archive(mirror, aws, b"not the locked archive")
+        problems = mirror.verify(lock_file)
+        assert "terraform-provider-aws_4.67.0_linux_amd64.zip does not match any zh: hash" in problems[0]
+
+    def test_verify_requires_lock_file(self, tmp_path):
+        """Test that verification asks for a committed lock file"""
+        problems = ProviderMirror(tmp_path).verify(tmp_path / ".terraform.lock.hcl")
+        assert "run terraform init once and commit the lock file" in problems[0]
+
+    def test_environment_installs_only_from_mirror(self, tmp_path):
+        """Test that the CLI config installs providers from the mirror only"""
+        mirror = ProviderMirror(tmp_path / "mirror-root")
+        env = mirror.environment()
+        assert env["TF_PLUGIN_CACHE_DIR"] == str(mirror.plugin_cache_dir)
+        assert mirror.plugin_cache_dir.is_dir()
+        config = (tmp_path / "mirror-root" / "terraformrc").read_text()
+        assert env["TF_CLI_CONFIG_FILE"] == str(mirror.cli_config_file)
+        assert f'path = "{mirror.mirror_dir.as_posix()}"' in config
+        assert "filesystem_mirror" in config
+        assert "direct" not in config
+
+    def test_build_runs_providers_mirror_for_each_platform(self, tmp_path):
+        """Test that build runs terraform providers mirror once for every platform"""
+        calls = []
+
+        def runner(args, cwd):
+            calls.append((args, cwd))
+            return TerraformResult("", "", 0)
+
+        mirror = ProviderMirror(tmp_path / "mirror-root", ["linux_amd64", "darwin_arm64"])
+        mirror.build(tmp_path, runner=runner)
+        assert calls == [(
+            ["providers", "mirror", "-platform=linux_amd64", "-platform=darwin_arm64", str(mirror.mirror_dir)],
+            tmp_path,
+        )]
+
+    def test_cli_verify_and_env(self, tmp_path, capsys):
+        """Test the verify and env commands"""
+        write_lock_file(tmp_path)
+        root = tmp_path / "mirror-root"
+        args = ["--root", str(root), "--platform", "linux_amd64", "--examples-dir", str(tmp_path)]
+        assert main(["verify", *args]) == 1
+        assert "is not mirrored" in capsys.readouterr().err
+
+        mirror = ProviderMirror(root, ["linux_amd64"])
+        for provider in parse_lock_file(tmp_path / ".terraform.lock.hcl"):
+            mirror_archive(mirror, provider)
+        assert main(["verify", *args]) == 1  # the random archive has no zh: hash locked
+
+        assert main(["env", *args]) == 0
+        assert f"export TF_CLI_CONFIG_FILE={root / 'terraformrc'}" in capsys.readouterr().out
@@ -0,0 +1,117 @@
+import multiprocessing
+import time
+from pathlib import Path
+
+import pytest
+
+from tests.harness.broker import PlanBroker
+from tests.harness.locks import FileLock, LockTimeout
+from tests.harness.matrix import Variant, VariantPlan, load_variant_plans, save_variant_plans
+from tests.harness.runner import TerraformResult
+from tests.harness.shared import SharedState
+
+pytestmark = pytest.mark.usefixtures("untimed")
+
+fork = multiprocessing.get_context("fork")
+
+
+class LoggingRunner:
+    """Stand-in for terraform that logs each command to a file shared by all processes"""
+
+    def __init__(self, log_path):
+        self.log_path = log_path
+
+    def __call__(self, args, cwd):
+        with open(self.log_path, "a") as log:
+            log.write(args[0] + "\n")
+        if args[0] == "init":
+            (Path(cwd) / ".terraform" / "providers").mkdir(parents=True, exist_ok=True)
+        for arg in args:
+            if arg.startswith("-out="):
+                Path(arg[len("-out="):]).write_bytes(b"binary plan")
+        time.sleep(0.2 if args[0] != "version" else 0)
+        return TerraformResult(f"{args[0]} done\n", "", 0)
+
+
+def run_worker(examples, artifacts, shared_root, log_path):
+    """One simulated pytest-xdist worker asking its own broker for validate and plan"""
+    broker = PlanBroker(examples, artifacts, runner=LoggingRunner(log_path), shared=SharedState(shared_root))
+    assert broker.validate().returncode == 0
+    assert broker.plan().stdout == "plan done\n"
+
+
+def hold_lock(path, seconds):
+    with FileLock(path):
+        time.sleep(seconds)
+
+
+class TestFileLock:
+    """Test cases for the cross-process file lock"""
+
+    def test_file_lock_excludes_other_processes(self, tmp_path):
+        """Test that a lock held by another process times out until released"""
+        lock_path = tmp_path / "held.lock"
+        holder = fork.Process(target=hold_lock, args=(lock_path, 1.0))
+        holder.start()
+        time.sleep(0.3)
+        with pytest.raises(LockTimeout):
+            FileLock(lock_path, timeout=0.1).acquire()
+        holder.join()
+        with FileLock(lock_path, timeout=0.1):
+            pass
+
+
+class TestSharedState:
+    """Test cases for sharing terraform results between xdist workers"""
+
+    def test_workers_share_init_and_results(self, tmp_path):
+        """Test that concurrent workers run init, validate and plan once"""
+        examples = tmp_path / "module" / "examples"
+        examples.mkdir(parents=True)
+        (tmp_path / "module" / "main.tf").write_text('resource "aws_ecs_cluster" "main" {}\n')
+        log_path = tmp_path / "terraform.log"
+        workers = [
+            fork.Process(target=run_worker, args=(examples, tmp_path / f"gw{index}", tmp_path / "shared", log_path))
+            for index in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert [worker.exitcode for worker in workers] == [0, 0, 0]
+
+        commands = log_path.read_text().split()
+        assert commands.count("init") == 1
+        assert commands.count("plan") == 1
+        assert commands.count("validate") == 1
+        for index in range(3):
+            assert (tmp_path / f"gw{index}" / "tfplan").read_bytes() == b"binary plan"
+
+    def test_shared_failures_are_replayed(self, tmp_path):
+        """Test that a failed shared result is replayed instead of rerun"""
+        examples = tmp_path / "module" / "examples"
+        examples.mkdir(parents=True)
+        calls = []
+
+        def failing(args, cwd):
+            calls.append(args[0])
+            return TerraformResult("", "Error: formatting", 3)
+
+        shared = SharedState(tmp_path / "shared")
+        first = PlanBroker(examples, tmp_path / "gw0", runner=failing, shared=shared).fmt_check()
+        second = PlanBroker(examples, tmp_path / "gw1", runner=failing, shared=shared).fmt_check()
+        assert first == second == TerraformResult("", "Error: formatting", 3)
+        assert calls.count("fmt") == 1
+
+    def test_variant_plans_round_trip(self, tmp_path):
+        """Test that variant plans survive a save and load"""
+        plans = {
+            "baseline": VariantPlan(
+                Variant("baseline", {"enable_inspector": False}),
+                tmp_path / "baseline",
+                TerraformResult("Plan: 12 to add", "", 0),
+                {"resource_changes": []},
+            ),
+        }
+        save_variant_plans(plans, tmp_path / "plans.json")
+        assert load_variant_plans(tmp_path / "plans.json") == plans
@@ -0,0 +1,302 @@
+import pytest
+
+from tests.harness.hcl import (
+    UNRESOLVED,
+    FunctionCall,
+    HCLSyntaxError,
+    Reference,
+    Template,
+    Unresolvable,
+    evaluate,
+    parse,
+    parse_expression,
+)
+from tests.harness.matrix import AUTOSCALING, BATCH_MAPS, FAIR_SHARE
+from tests.harness.static import StaticConfiguration
+
+pytestmark = pytest.mark.unit
+
+MODULE_TF = '''
+variable "name" {
+  type = string
+}
+
+variable "replicas" {
+  type    = number
+  default = 2
+}
+
+variable "queues" {
+  type    = map(number)
+  default = {}
+}
+
+variable "enabled" {
+  type    = bool
+  default = false
+}
+
+locals {
+  prefix = "${var.name}-batch"
+}
+
+resource "aws_iam_role" "service" {
+  name = "${local.prefix}-role"
+}
+
+resource "aws_batch_job_queue" "queue" {
+  for_each = var.queues
+  name     = "${local.prefix}-${each.key}"
+  priority = each.value
+  role     = aws_iam_role.service.name
+  arn_ref  = aws_iam_role.service.arn
+}
+
+resource "aws_ecs_service" "optional" {
+  count         = var.enabled ? var.replicas : 0
+  name          = "svc-${count.index}"
+  desired_count = var.replicas
+
+  network_configuration {
+    assign_public_ip = false
+  }
+
+  dynamic "tag" {
+    for_each = { team = "batch" }
+    content {
+      key   = tag.key
+      value = upper(tag.value)
+    }
+  }
+}
+
+output "queue_names" {
+  value = [for name, queue in aws_batch_job_queue.queue : "${name}=${queue.priority}"]
+}
+'''
+
+EXAMPLE_TF = '''
+module "batch" {
+  source   = "../"
+  name     = var.name
+  replicas = "3"
+  enabled  = true
+  queues   = { high = 10, low = 1 }
+}
+
+variable "name" {
+  default = "default"
+}
+'''
+
+
+@pytest.fixture
+def configuration(tmp_path):
+    """Statically evaluate a small module through its example caller"""
+    (tmp_path / "main.tf").write_text(MODULE_TF)
+    examples = tmp_path / "examples"
+    examples.mkdir()
+    (examples / "main.tf").write_text(EXAMPLE_TF)
+    (examples / "terraform.tfvars").write_text('name = "demo"\n')
+    return StaticConfiguration.from_example(examples, module_name="batch")
+
+
+class TestHCLParser:
+    """Test cases for the terraform-free HCL parser"""
+
+    def test_parse_blocks_and_attributes(self):
+        """Test that blocks, labels, attributes and nested blocks are parsed"""
+        body = parse('resource "aws_ecs_cluster" "main" {\n  name = "x" # comment\n  setting { value = 1 }\n}\n')
+        (block,) = body.blocks
+        assert block.type == "resource"
+        assert block.labels == ("aws_ecs_cluster", "main")
+        assert block.body.attributes == {"name": "x"}
+        assert block.body.blocks[0].body.attributes == {"value": 1}
+
+    def test_parse_expressions(self):
+        """Test that references, templates, function calls and literals are parsed"""
+        assert parse_expression('var.subnets[0]') == Reference(("var", "subnets", 0))
+        assert parse_expression('"${var.name}-policy"') == Template((Reference(("var", "name")), "-policy"))
+        assert parse_expression('jsonencode({ "source" : ["aws.batch"] })') == FunctionCall(
+            "jsonencode", ({"source": ["aws.batch"]},), False
+        )
+        assert parse_expression('[\n  "a",\n  "b",\n]') == ["a", "b"]
+        assert parse_expression('-1') == -1
+
+    def test_parse_heredoc(self):
+        """Test that indented heredocs are parsed and interpolated"""
+        body = parse('policy = <<-EOT\n    {\n      "Version": "${var.version}"\n    }\n    EOT\n')
+        value = evaluate(body.attributes["policy"], lambda parts: "2012-10-17")
+        assert value == '{\n  "Version": "2012-10-17"\n}\n'
+
+    def test_parse_error_reports_line(self):
+        """Test that syntax errors name the offending line"""
+        with pytest.raises(HCLSyntaxError, match="line 2"):
+            parse('resource "a" "b" {\n  name = ]\n}\n')
+
+
+class TestExpressionEvaluation:
+    """Test cases for evaluating parsed expressions"""
+
+    def test_evaluate_operators_and_functions(self):
+        """Test conditionals, operators, jsonencode and for expressions"""
+        resolve = {("var", "n"): 4, ("var", "on"): True}.__getitem__
+        assert evaluate(parse_expression("var.on ? var.n * 2 : 0"), resolve) == 8
+        assert evaluate(parse_expression('!var.on || var.n >= 4'), resolve) is True
+        assert evaluate(parse_expression('jsonencode({ b = var.n, a = "<x>" })'), resolve) == (
+            '{"a":"\\u003cx\\u003e","b":4}'
+        )
+        assert evaluate(parse_expression('{ for k, v in { x = 1, y = 2 } : v => k if v > 1 }'), resolve) == {"2": "y"}
+
+    def test_evaluate_unknown_function_is_unresolvable(self):
+        """Test that unsupported functions are unresolvable"""
+        with pytest.raises(Unresolvable):
+            evaluate(parse_expression('timestamp()'), lambda parts: None)
+
+
+class TestStaticConfiguration:
+    """Test cases for evaluating a module as an example instantiates it"""
+
+    def test_variables_from_tfvars_and_module_call(self, configuration):
+        """Test that variables come from tfvars, the module call and defaults"""
+        assert configuration.variables == {
+            "name": "demo",
+            "replicas": 3,
+            "queues": {"high": 10, "low": 1},
+            "enabled": True,
+        }
+
+    def test_for_each_and_resource_references(self, configuration):
+        """Test for_each instances and references between resources"""
+        high = configuration.resource('module.batch.aws_batch_job_queue.queue["high"]')
+        assert high.values["name"] == "demo-batch-high"
+        assert high.values["priority"] == 10
+        assert high.values["role"] == "demo-batch-role"
+        assert high.values["arn_ref"] is UNRESOLVED
+        assert not high.is_resolved("arn_ref")
+
+    def test_count_nested_and_dynamic_blocks(self, configuration):
+        """Test count instances, nested blocks and dynamic blocks"""
+        services = configuration.by_type("aws_ecs_service")
+        assert [service.local_address for service in services] == [
+            "aws_ecs_service.optional[0]",
+            "aws_ecs_service.optional[1]",
+            "aws_ecs_service.optional[2]",
+        ]
+        assert services[1].get("name") == "svc-1"
+        assert services[1].get("network_configuration.0.assign_public_ip") is False
+        assert services[1].get("tag") == [{"key": "team", "value": "BATCH"}]
+        assert "count" not in services[1].values
+
+    def test_outputs(self, configuration):
+        """Test that outputs are evaluated"""
+        assert configuration.output("queue_names") == ["high=10", "low=1"]
+
+
+class TestExampleConfiguration:
+    """Test cases for the example configuration evaluated without terraform"""
+
+    def test_example_configuration(self, static_configuration):
+        """Test that every resource of the example resolves statically"""
+        assert len(static_configuration) == 15
+        assert not static_configuration.unresolved_instances
+        compute_env = static_configuration.resource("module.batch_ecs.aws_batch_compute_environment.batch_compute_env")
+        assert compute_env.get("compute_resources.0.max_vcpus") == 16
+        assert compute_env.get("service_role") is UNRESOLVED
+
+    def test_example_with_batch_maps(self, terraform_examples_dir):
+        """Test the additional compute environments, queues and job definitions"""
+        configuration = StaticConfiguration.from_example(terraform_examples_dir, overrides=BATCH_MAPS)
+        assert len(configuration) == 19
+        module = "module.batch_ecs"
+        spot = configuration.resource(f'{module}.aws_batch_compute_environment.additional["spot"]')
+        assert spot.get("compute_resources.0.max_vcpus") == 256
+        assert spot.get("state") == "ENABLED"
+        queues = {queue.local_address: queue.get("priority") for queue in configuration.by_type("aws_batch_job_queue")}
+        assert queues['aws_batch_job_queue.additional["urgent"]'] == 10
+        assert queues['aws_batch_job_queue.additional["bulk"]'] == 1
+        etl = configuration.resource(f'{module}.aws_batch_job_definition.additional["etl"]')
+        assert etl.get("timeout.0.attempt_duration_seconds") == 600
+        assert etl.get("retry_strategy.0.attempts") == 1
+        assert etl.get("container_properties") is UNRESOLVED
+
+    def test_example_with_fargate_spot(self, terraform_examples_dir):
+        """Test the FARGATE_SPOT compute environment and queue ordering"""
+        overrides = {
+            "enable_batch_fargate_spot": True,
+            "batch_spot_max_vcpus": 64,
+            "batch_compute_environments": {"spot": {"name": "example-spot-compute-env", "type": "FARGATE_SPOT"},
+                                           "extra": {"name": "example-extra-compute-env"}},
+            "batch_job_queues": {"mixed": {"name": "example-mixed-queue", "priority": 5,
+                                           "compute_environments": ["spot", "default_spot", "extra"]}},
+        }
+        configuration = StaticConfiguration.from_example(terraform_examples_dir, overrides=overrides)
+        spot = configuration.resource("module.batch_ecs.aws_batch_compute_environment.batch_spot_compute_env[0]")
+        assert spot.get("compute_environment_name") == "example-batch-compute-env-spot"
+        assert spot.get("compute_resources.0.type") == "FARGATE_SPOT"
+        assert spot.get("compute_resources.0.max_vcpus") == 64
+        assert configuration.local("batch_job_queue_compute_environment_keys") == {
+            "mixed": ["extra", "spot", "default_spot"],
+        }
+
+    def test_example_with_capacity_provider_strategy(self, terraform_examples_dir):
+        """Test that a capacity provider strategy replaces the launch type"""
+        strategy = [{"capacity_provider": "FARGATE", "base": 2, "weight": 1},
+                    {"capacity_provider": "FARGATE_SPOT", "base": 0, "weight": 3}]
+        configuration = StaticConfiguration.from_example(terraform_examples_dir, overrides={
+            "enable_ecs_capacity_provider_strategy": True,
+            "ecs_capacity_provider_strategy": strategy,
+        })
+        service = configuration.resource("module.batch_ecs.aws_ecs_service.ecs-batch[0]")
+        assert service.get("launch_type") is None
+        assert service.get("capacity_provider_strategy") == strategy
+        providers = configuration.resource("module.batch_ecs.aws_ecs_cluster_capacity_providers.ecs-batch[0]")
+        assert providers.get("default_capacity_provider_strategy") == strategy
+        assert configuration.output("ecs_capacity_providers") == ["FARGATE", "FARGATE_SPOT"]
+
+        default = StaticConfiguration.from_example(terraform_examples_dir)
+        assert default.resource("module.batch_ecs.aws_ecs_service.ecs-batch[0]").get("launch_type") == "FARGATE"
+        assert default.output("ecs_capacity_providers") == []
+
+    def test_example_with_autoscaling_and_fair_share(self, terraform_examples_dir):
+        """Test the autoscaling policies and the fair-share scheduling policy"""
+        configuration = StaticConfiguration.from_example(
+            terraform_examples_dir, overrides={**AUTOSCALING, **FAIR_SHARE})
+        module = "module.batch_ecs"
+        target = configuration.resource(f"{module}.aws_appautoscaling_target.ecs-batch[0]")
+        assert target.get("resource_id") == "service/example-fargate-cluster/fargate-service"
+        policies = {policy.index: policy for policy in configuration.by_type("aws_appautoscaling_policy")}
+        assert sorted(policies) == ["cpu", "memory", "requests"]
+        metric = "target_tracking_scaling_policy_configuration.0.predefined_metric_specification.0"
+        assert policies["cpu"].get(f"{metric}.predefined_metric_type") == "ECSServiceAverageCPUUtilization"
+        assert policies["cpu"].get(f"{metric}.resource_label") is None
+        assert policies["requests"].get(f"{metric}.resource_label") == AUTOSCALING["ecs_autoscaling_alb_resource_label"]
+
+        # Only the autoscaled service leaves its desired count to the autoscaler
+        assert [service.name for service in configuration.by_type("aws_ecs_service")] == ["ecs-batch-autoscaled"]
+        autoscaled = configuration.module.resources["aws_ecs_service.ecs-batch-autoscaled"]
+        lifecycle, = autoscaled.body.blocks_of("lifecycle")
+        assert [reference.parts for reference in lifecycle.body.attributes["ignore_changes"]] == [("desired_count",)]
+        assert not configuration.module.resources["aws_ecs_service.ecs-batch"].body.blocks_of("lifecycle")
+        assert configuration.output("ecs_service_name") == "fargate-service"
+        assert not configuration.by_type("null_resource")
+
+        # Without the label the check resource is planned and its trigger fails with the message
+        unlabelled = StaticConfiguration.from_example(
+            terraform_examples_dir, overrides={**AUTOSCALING, "ecs_autoscaling_alb_resource_label": None})
+        check, = unlabelled.by_type("null_resource")
+        assert check.name == "ecs_autoscaling_alb_resource_label_required"
+        assert check.get("triggers") is UNRESOLVED
+
+        policy = configuration.resource(f"{module}.aws_batch_scheduling_policy.batch_scheduling_policy[0]")
+        assert policy.get("fair_share_policy.0.share_distribution") == [
+            {"share_identifier": "tenant-a", "weight_factor": 1},
+            {"share_identifier": "tenant-b", "weight_factor": 0.5},
+        ]
+        queue = configuration.resource(f"{module}.aws_batch_job_queue.batch_job_queue")
+        assert queue.get("scheduling_policy_arn") is UNRESOLVED
+
+        default = StaticConfiguration.from_example(terraform_examples_dir)
+        assert not default.by_type("aws_appautoscaling_policy")
+        assert not default.by_type("aws_batch_scheduling_policy")
+        assert default.output("batch_scheduling_policy_arn") is None
@@ -0,0 +1,28 @@
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+class TestApplyLatency:
+    """Test cases for applying and destroying the example configuration against the AWS emulator"""
+
+    def test_every_apply_succeeds(self, apply_benchmark):
+        """Test that the apply succeeds at every parallelism level"""
+        failed = [run for run in apply_benchmark.runs if run.operation == "apply" and not run.succeeded]
+        assert not failed, "\n".join(f"-parallelism={run.parallelism}: {run.result.stderr}" for run in failed)
+
+    def test_planned_resources_are_created(self, apply_benchmark, parsed_plan_output):
+        """Test that each apply creates exactly the planned resources"""
+        planned = {change.address for change in parsed_plan_output.with_action("create")}
+        for run in apply_benchmark.runs:
+            if run.operation == "apply":
+                created = {timing.address for timing in run.resources if timing.action == "create"}
+                assert created == planned, f"-parallelism={run.parallelism}"
+
+    def test_destroy_removes_everything_applied(self, apply_benchmark):
+        """Test that each destroy removes every resource its apply created"""
+        runs = apply_benchmark.runs
+        for apply, destroy in zip(runs[::2], runs[1::2]):
+            assert destroy.succeeded, destroy.result.stderr
+            assert {timing.address for timing in destroy.resources} == \
+                {timing.address for timing in apply.resources if timing.succeeded}
@@ -0,0 +1,101 @@
+import io
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from tests.harness.broker import PlanBroker
+from tests.harness.checks import check_order, run_checks, streaming_runner
+from tests.harness.runner import TerraformResult
+
+pytestmark = pytest.mark.usefixtures("untimed")
+
+
+class SlowRunner:
+    """Stand-in for terraform that takes a while and tracks how many commands overlap"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.spans = {}
+
+    def __call__(self, args, cwd):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        started = time.perf_counter()
+        time.sleep(self.delay if args[0] != "version" else 0)
+        with self.lock:
+            self.running -= 1
+            self.spans.setdefault(args[0], []).append((started, time.perf_counter()))
+        return TerraformResult(f"{args[0]} ok\n", "", 0)
+
+
+@pytest.fixture
+def broker(tmp_path):
+    examples = tmp_path / "module" / "examples"
+    examples.mkdir(parents=True)
+    return PlanBroker(examples, tmp_path / "artifacts", runner=SlowRunner())
+
+
+class TestCheckScheduling:
+    """Test cases for running the terraform checks concurrently"""
+
+    def test_check_order_starts_fmt_first_and_folds_plan_into_show(self):
+        """Test that fmt is scheduled first and plan is folded into show"""
+        assert check_order({"validate", "plan", "fmt_check"}) == ["fmt_check", "plan", "validate"]
+        assert check_order({"plan", "show"}) == ["show"]
+        with pytest.raises(ValueError, match="unknown checks"):
+            check_order({"apply"})
+
+    def test_checks_run_concurrently(self, broker):
+        """Test that independent checks overlap and share one init"""
+        results = run_checks(broker, {"fmt_check", "validate", "show"}, max_concurrency=4)
+        assert set(results) == {"fmt_check", "validate", "show", "plan"}
+        assert all(result.returncode == 0 for result in results.values())
+        assert broker.runner.peak >= 2
+        assert len(broker.runner.spans["init"]) == 1
+
+    def test_fmt_does_not_wait_for_init(self, broker):
+        """Test that fmt starts before init has finished"""
+        run_checks(broker, {"fmt_check", "validate"}, max_concurrency=2)
+        (fmt_start, _), = broker.runner.spans["fmt"]
+        (_, init_end), = broker.runner.spans["init"]
+        assert fmt_start < init_end
+
+    def test_concurrency_limit(self, broker):
+        """Test that max_concurrency bounds the overlapping commands"""
+        run_checks(broker, {"fmt_check", "validate", "plan"}, max_concurrency=1)
+        assert broker.runner.peak == 1
+
+    def test_results_are_shared_with_later_callers(self, broker):
+        """Test that later broker calls reuse the concurrent results"""
+        results = run_checks(broker, {"validate"})
+        invocations = broker.invocation_count
+        assert broker.validate() is results["validate"]
+        assert broker.invocation_count == invocations
+
+
+class TestStreamingRunner:
+    """Test cases for streaming terraform output while a check runs"""
+
+    def test_streaming_runner_echoes_lines(self, tmp_path, monkeypatch):
+        """Test that stdout and stderr lines are echoed with the command prefix"""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        script = bin_dir / "terraform"
+        script.write_text('#!/bin/sh\necho "line one"\necho "line two"\necho "oops" >&2\n')
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+        stream = io.StringIO()
+        result = streaming_runner(stream)(["validate", "-no-color"], tmp_path)
+        assert result == TerraformResult("line one\nline two\n", "oops\n", 0)
+        lines = stream.getvalue().splitlines()
+        assert "[terraform validate] line one" in lines
+        assert "[terraform validate] line two" in lines
+        assert "[terraform validate] (stderr) oops" in lines
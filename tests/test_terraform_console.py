@@ -0,0 +1,162 @@
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from tests.harness.console import (
+    SENSITIVE,
+    UNKNOWN,
+    ConsoleError,
+    ConsolePool,
+    ConsoleSession,
+    console_input,
+    parse_console_value,
+)
+from tests.harness.runner import TerraformResult
+
+FAKE_CONSOLE = '''#!{python}
+import json, os, sys
+
+VALUES = {{
+    "var.cluster_name": "example-fargate-cluster",
+    "length(var.private_subnet_ids)": 2,
+    "{{ a = 1, b = [true, null] }}": {{"a": 1, "b": [True, None]}},
+    "\\"<${{x}}>\\"": "<${{x}}>",
+}}
+with open(os.environ["FAKE_CONSOLE_LOG"], "a") as log:
+    log.write("start\\n")
+for line in sys.stdin:
+    expression = line.strip()[len("jsonencode("):-1]
+    if expression == "aws_ecs_cluster.main.arn":
+        print("(known after apply)", flush=True)
+    elif expression == "var.secret":
+        print("(sensitive value)", flush=True)
+    elif expression == "garbage":
+        print("oops", flush=True)
+    elif expression in VALUES:
+        print(json.dumps(json.dumps(VALUES[expression])), flush=True)
+    else:
+        print("Error: Reference to undeclared input variable: " + expression, file=sys.stderr)
+        sys.exit(1)
+'''
+
+
+@pytest.fixture
+def fake_console(tmp_path, monkeypatch):
+    """Put a terraform stand-in that answers console expressions from a table first on PATH"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "terraform"
+    script.write_text(FAKE_CONSOLE.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "console.log"
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_CONSOLE_LOG", str(log))
+    return log
+
+
+class TestConsoleProtocol:
+    """Test cases for the terraform console input and output format"""
+
+    def test_console_input_is_one_json_encoded_line(self):
+        """Test that an expression is sent as one jsonencode() line"""
+        assert console_input("{\n  a = 1\n  b = 2\n}") == "jsonencode({ a = 1 b = 2 })\n"
+
+    def test_parse_console_value(self):
+        """Test that JSON, unknown and sensitive console output is decoded"""
+        assert parse_console_value('"{\\"a\\":[1,\\"\\\\u003cb\\\\u003e\\"]}"\n') == {"a": [1, "<b>"]}
+        assert parse_console_value("(known after apply)") is UNKNOWN
+        assert parse_console_value("(sensitive value)") is SENSITIVE
+
+
+@pytest.mark.usefixtures("untimed")
+class TestConsoleSession:
+    """Test cases for one console process answering many expressions"""
+
+    def test_batch_uses_one_process(self, tmp_path, fake_console):
+        """Test that a batch of expressions is answered by one console process"""
+        with ConsoleSession(tmp_path) as session:
+            assert session.evaluate_batch([
+                "var.cluster_name",
+                "length(var.private_subnet_ids)",
+                "{ a = 1, b = [true, null] }",
+            ]) == ["example-fargate-cluster", 2, {"a": 1, "b": [True, None]}]
+            assert session.evaluate('"<${x}>"') == "<${x}>"
+            assert session.evaluate("aws_ecs_cluster.main.arn") is UNKNOWN
+        assert fake_console.read_text().split() == ["start"]
+        assert session.expressions_evaluated == 5
+
+    def test_error_restarts_the_console(self, tmp_path, fake_console):
+        """Test that an expression error names the expression and restarts the console"""
+        with ConsoleSession(tmp_path) as session:
+            with pytest.raises(ConsoleError, match="undeclared input variable: var.missing") as error:
+                session.evaluate_batch(["var.cluster_name", "var.missing", "var.cluster_name"])
+            assert error.value.expression == "var.missing"
+            assert session.evaluate("var.cluster_name") == "example-fargate-cluster"
+        assert session.processes_started == 2
+
+    def test_unexpected_output(self, tmp_path, fake_console):
+        """Test that unrecognised console output raises a ConsoleError"""
+        with ConsoleSession(tmp_path) as session:
+            with pytest.raises(ConsoleError, match="unexpected console output: oops"):
+                session.evaluate("garbage")
+            assert session.evaluate("var.secret") is SENSITIVE
+
+
+@pytest.mark.usefixtures("untimed")
+class TestConsolePool:
+    """Test cases for console sessions over cloned workspaces"""
+
+    @pytest.fixture
+    def pool(self, tmp_path, fake_console):
+        """Fixture to get a three-session console pool over a prepared module"""
+        examples = tmp_path / "module" / "examples"
+        examples.mkdir(parents=True)
+        (tmp_path / "module" / "main.tf").write_text('resource "aws_ecs_cluster" "main" {}\n')
+        pool = ConsolePool(examples, 3, root=tmp_path)
+        assert pool.prepare(lambda: TerraformResult("", "", 0)).returncode == 0
+        yield pool
+        pool.close()
+
+    def test_sessions_run_in_separate_workspaces(self, pool, fake_console):
+        """Test that every session runs in its own cloned workspace"""
+        assert len({session.working_dir for session in pool.sessions}) == 3
+        assert all((session.working_dir.parent / "main.tf").exists() for session in pool.sessions)
+
+    def test_batch_is_spread_over_sessions_in_order(self, pool, fake_console):
+        """Test that a batch is spread over the sessions and answered in order"""
+        expressions = ["var.cluster_name", "length(var.private_subnet_ids)"] * 5
+        assert pool.evaluate_batch(expressions) == ["example-fargate-cluster", 2] * 5
+        assert all(session.expressions_evaluated > 0 for session in pool.sessions)
+        assert len(fake_console.read_text().split()) == 3
+
+    def test_failed_init_starts_no_consoles(self, tmp_path):
+        """Test that a failed init leaves the pool without sessions"""
+        examples = tmp_path / "examples"
+        examples.mkdir()
+        pool = ConsolePool(examples, 2, root=tmp_path)
+        assert pool.prepare(lambda: TerraformResult("", "Error: init", 1)).returncode == 1
+        assert pool.sessions == []
+        pool.close()
+
+
+class TestExampleConsole:
+    """Test cases for terraform console against the example configuration"""
+
+    def test_variables_come_from_tfvars(self, terraform_console):
+        """Test that console variables come from the example tfvars"""
+        assert terraform_console.evaluate_batch([
+            "var.cluster_name",
+            "var.private_subnet_ids",
+            "var.batch_job_queue_priority",
+            "var.enable_inspector",
+        ]) == ["example-fargate-cluster", ["subnet-0123456789abcdef0", "subnet-0fedcba9876543210"], 1, False]
+
+    def test_expressions_are_faster_than_a_plan(self, terraform_console):
+        """Test that a warm console answers expressions faster than a plan"""
+        terraform_console.evaluate("var.region")
+        started = time.perf_counter()
+        terraform_console.evaluate_batch(["upper(var.region)"] * 20)
+        assert time.perf_counter() - started < 5
@@ -0,0 +1,129 @@
+import pytest
+
+from tests.harness.broker import PlanBroker
+from tests.harness.graph import DependencyGraph, DotSyntaxError, parse_dot, vertex_address
+from tests.harness.runner import TerraformResult
+
+MODULE = "module.batch_ecs"
+
+# Simplified resource graph printed by terraform 1.7 and later
+RESOURCE_GRAPH = '''digraph G {
+  rankdir = "RL";
+  node [shape = rect, fontname = "sans-serif"];
+  "aws_iam_role.a" [label="aws_iam_role.a"];
+  "aws_iam_role_policy.b" [label="aws_iam_role_policy.b"];
+  "aws_ecs_service.c" [label="aws_ecs_service.c"];
+  "aws_ecs_service.c" -> "aws_iam_role_policy.b" -> "aws_iam_role.a";
+  subgraph "cluster_module.x" {
+    label = "module.x"
+    "module.x.aws_ecs_cluster.d" [label="aws_ecs_cluster.d"];
+  }
+}
+'''
+
+
+@pytest.fixture
+def example_graph(fixtures_dir):
+    return DependencyGraph.from_dot((fixtures_dir / "example_graph.dot").read_text())
+
+
+class TestGraphParsing:
+    """Test cases for reading terraform graph output"""
+
+    def test_parse_dot(self):
+        """Test that DOT nodes, labels and edges are parsed"""
+        nodes, edges = parse_dot(RESOURCE_GRAPH)
+        assert set(nodes) == {
+            "aws_iam_role.a", "aws_iam_role_policy.b", "aws_ecs_service.c", "module.x.aws_ecs_cluster.d",
+        }
+        assert nodes["module.x.aws_ecs_cluster.d"] == {"label": "aws_ecs_cluster.d"}
+        assert edges == [("aws_ecs_service.c", "aws_iam_role_policy.b"), ("aws_iam_role_policy.b", "aws_iam_role.a")]
+        with pytest.raises(DotSyntaxError):
+            parse_dot('digraph { "a" -> "b" ')
+
+    def test_vertex_address(self):
+        """Test that the [root] prefix is stripped and qualifiers are kept where needed"""
+        assert vertex_address(f"[root] {MODULE}.aws_iam_role.x (expand)") == f"{MODULE}.aws_iam_role.x"
+        assert vertex_address('[root] provider["registry.terraform.io/hashicorp/aws"] (close)') == \
+            'provider["registry.terraform.io/hashicorp/aws"] (close)'
+
+    def test_dependencies_through_other_vertices_are_followed(self):
+        """Test that resource dependencies skip locals, variables and providers"""
+        graph = DependencyGraph.from_dot('''digraph {
+        "[root] aws_ecs_service.s (expand)" -> "[root] local.cluster_id (expand)"
+        "[root] local.cluster_id (expand)" -> "[root] aws_ecs_cluster.c (expand)"
+        "[root] aws_ecs_cluster.c (expand)" -> "[root] var.name"
+        "[root] aws_ecs_cluster.c (expand)" -> "[root] provider[\\"registry.terraform.io/hashicorp/aws\\"]"
+        "[root] provider[\\"registry.terraform.io/hashicorp/aws\\"] (close)" -> "[root] aws_ecs_service.s (expand)"
+    }''')
+        assert graph.dependencies == {"aws_ecs_service.s": {"aws_ecs_cluster.c"}, "aws_ecs_cluster.c": set()}
+        assert graph.nodes == ["aws_ecs_cluster.c", "aws_ecs_service.s"]
+
+
+class TestDependencyGraph:
+    """Test cases for the apply ordering analysis"""
+
+    def test_levels_and_critical_path(self, example_graph):
+        """Test the levels, widths and depth of the example graph"""
+        assert len(example_graph.nodes) == 21
+        assert example_graph.widths() == [11, 8, 2]
+        assert example_graph.depth == 3
+        assert example_graph.levels()[f"{MODULE}.aws_ecs_service.ecs-batch"] == 2
+
+    def test_weights_pick_the_slowest_chain(self, example_graph):
+        """Test that resource type weights choose the critical path"""
+        weights = {"aws_ecs_service": 120, "aws_iam_role": 5}
+        assert example_graph.critical_path(weights) == [
+            f"{MODULE}.aws_iam_role.ecs_task_execution_role",
+            f"{MODULE}.aws_ecs_task_definition.ecs-batch",
+            f"{MODULE}.aws_ecs_service.ecs-batch",
+        ]
+        assert example_graph.critical_path_length(weights) == 126
+
+    def test_serializing_edges(self, example_graph):
+        """Test that edges lengthening the critical path are reported with their saving"""
+        weights = {"aws_batch_compute_environment": 60}
+        edges = example_graph.serializing_edges(weights)
+        assert [(edge.dependent, edge.dependency, edge.saving) for edge in edges] == [
+            (f"{MODULE}.aws_batch_compute_environment.batch_compute_env",
+             f"{MODULE}.aws_iam_role.batch_service_role", 1),
+            (f"{MODULE}.aws_batch_job_queue.batch_job_queue",
+             f"{MODULE}.aws_batch_compute_environment.batch_compute_env", 1),
+        ]
+        # With equal weights several chains are equally long, so no single edge shortens the apply
+        assert all(edge.saving == 0 for edge in example_graph.serializing_edges())
+
+    def test_cycle_is_reported(self):
+        """Test that a dependency cycle raises a ValueError"""
+        with pytest.raises(ValueError, match="dependency cycle"):
+            DependencyGraph({"aws_iam_role.a": {"aws_iam_role.b"}, "aws_iam_role.b": {"aws_iam_role.a"}})
+
+    def test_broker_runs_graph_once(self, tmp_path):
+        """Test that the broker runs terraform graph once per session"""
+        examples = tmp_path / "module" / "examples"
+        examples.mkdir(parents=True)
+        calls = []
+
+        def runner(args, cwd):
+            calls.append(args[0])
+            if args[0] == "init":
+                (cwd / ".terraform" / "providers").mkdir(parents=True)
+            return TerraformResult(RESOURCE_GRAPH if args[0] == "graph" else "", "", 0)
+
+        broker = PlanBroker(examples, tmp_path / "artifacts", runner=runner)
+        assert broker.graph() is broker.graph()
+        assert calls == ["init", "graph"]
+
+
+class TestApplyGraph:
+    """Test cases for the apply ordering of the example configuration"""
+
+    def test_critical_path_depth(self, assert_critical_path):
+        """Test that the apply critical path stays within three resources"""
+        # IAM role -> task definition -> ECS service; a deeper chain slows every rollout
+        assert_critical_path(max_depth=3)
+
+    def test_service_waits_for_task_definition(self, dependency_graph):
+        """Test that the ECS service depends on its task definition"""
+        assert (f"{MODULE}.aws_ecs_service.ecs-batch", f"{MODULE}.aws_ecs_task_definition.ecs-batch") \
+            in dependency_graph.edges
@@ -1,37 +1,20 @@
 import pytest
-import subprocess
-import json
-import re
-from pathlib import Path
+
+MODULE = "module.batch_ecs"
 
 
 class TestTerraformPlan:
     """Test cases for Terraform AWS Batch ECS module plan validation"""
 
     @pytest.fixture(scope="class")
-    def terraform_plan_output(self):
-        """Fixture to run terraform plan and capture output"""
-        # Change to examples directory for testing
-        examples_dir = Path(__file__).parent.parent / "examples"
-
-        # Run terraform init
-        init_result = subprocess.run(
-            ["terraform", "init", "-no-color"],
-            cwd=examples_dir,
-            capture_output=True,
-            text=True
-        )
-        assert init_result.returncode == 0, f"Terraform init failed: {init_result.stderr}"
-
-        # Run terraform plan
-        plan_result = subprocess.run(
-            ["terraform", "plan", "-no-color", "-input=false"],
-            cwd=examples_dir,
-            capture_output=True,
-            text=True
-        )
-
-        return plan_result.stdout, plan_result.stderr, plan_result.returncode
+    def terraform_plan_output(self, terraform_plan):
+        """Fixture to share the session plan output with this class"""
+        return terraform_plan
+
+    @pytest.fixture(scope="class")
+    def plan(self, parsed_plan_output):
+        """Fixture to share the indexed JSON plan with this class"""
+        return parsed_plan_output
 
     def test_terraform_plan_success(self, terraform_plan_output):
         """Test that terraform plan executes successfully"""
@@ -39,199 +22,172 @@ class TestTerraformPlan:
         assert returncode == 0, f"Terraform plan failed: {stderr}"
         assert "Plan:" in stdout, "Plan summary not found in output"
 
-    def test_plan_summary_validation(self, terraform_plan_output):
+    def test_plan_summary_validation(self, plan, golden_plan_snapshot):
         """Test the plan summary shows correct resource counts"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for expected plan summary
-        assert "15 to add, 0 to change, 0 to destroy" in stdout
+        assert plan.summary() == golden_plan_snapshot.summary()
 
-    def test_batch_compute_environment_creation(self, terraform_plan_output):
+    def test_batch_compute_environment_creation(self, plan):
         """Test AWS Batch Compute Environment resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for Batch Compute Environment
-        assert "aws_batch_compute_environment.batch_compute_env will be created" in stdout
-        assert 'compute_environment_name        = "example-batch-compute-env"' in stdout
-        assert 'state                           = "ENABLED"' in stdout
-        assert 'type                            = "MANAGED"' in stdout
-        assert 'max_vcpus          = 16' in stdout
-        assert 'type               = "FARGATE"' in stdout
-
-    def test_batch_job_definition_creation(self, terraform_plan_output):
+        compute_env = plan.resource(f"{MODULE}.aws_batch_compute_environment.batch_compute_env")
+        assert compute_env.action == "create"
+        assert compute_env.after["compute_environment_name"] == "example-batch-compute-env"
+        assert compute_env.after["state"] == "ENABLED"
+        assert compute_env.after["type"] == "MANAGED"
+        assert compute_env.get("compute_resources.0.max_vcpus") == 16
+        assert compute_env.get("compute_resources.0.type") == "FARGATE"
+
+    def test_batch_job_definition_creation(self, plan):
         """Test AWS Batch Job Definition resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for Batch Job Definition
-        assert "aws_batch_job_definition.batch_job_definition will be created" in stdout
-        assert 'name                  = "example-batch-job-def"' in stdout
-        assert 'type                  = "container"' in stdout
-        assert '"FARGATE"' in stdout
-        assert "attempts = 3" in stdout
-        assert "attempt_duration_seconds = 3600" in stdout
-
-    def test_batch_job_queue_creation(self, terraform_plan_output):
+        job_definition = plan.resource(f"{MODULE}.aws_batch_job_definition.batch_job_definition")
+        assert job_definition.action == "create"
+        assert job_definition.after["name"] == "example-batch-job-def"
+        assert job_definition.after["type"] == "container"
+        assert job_definition.after["platform_capabilities"] == ["FARGATE"]
+        assert job_definition.get("retry_strategy.0.attempts") == 3
+        assert job_definition.get("timeout.0.attempt_duration_seconds") == 3600
+
+    def test_batch_job_queue_creation(self, plan):
         """Test AWS Batch Job Queue resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
+        job_queue = plan.resource(f"{MODULE}.aws_batch_job_queue.batch_job_queue")
+        assert job_queue.action == "create"
+        assert job_queue.after["name"] == "example-batch-job-queue"
+        assert job_queue.after["priority"] == 1
+        assert job_queue.after["state"] == "ENABLED"
 
-        # Check for Batch Job Queue
-        assert "aws_batch_job_queue.batch_job_queue will be created" in stdout
-        assert 'name                 = "example-batch-job-queue"' in stdout
-        assert "priority             = 1" in stdout
-        assert 'state                = "ENABLED"' in stdout
-
-    def test_ecs_cluster_creation(self, terraform_plan_output):
+    def test_ecs_cluster_creation(self, plan):
         """Test ECS Cluster resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for ECS Cluster
-        assert "aws_ecs_cluster.ecs-batch will be created" in stdout
-        assert 'name               = "example-fargate-cluster"' in stdout
-        assert 'name  = "containerInsights"' in stdout
-        assert 'value = "enabled"' in stdout
+        cluster = plan.resource(f"{MODULE}.aws_ecs_cluster.ecs-batch")
+        assert cluster.action == "create"
+        assert cluster.after["name"] == "example-fargate-cluster"
+        assert {"name": "containerInsights", "value": "enabled"} in cluster.after["setting"]
 
-    def test_ecs_task_definition_creation(self, terraform_plan_output):
+    def test_ecs_task_definition_creation(self, plan, plan_documents):
         """Test ECS Task Definition resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for ECS Task Definition
-        assert "aws_ecs_task_definition.ecs-batch[0] will be created" in stdout
-        assert 'family                   = "example-fargate-task-family"' in stdout
-        assert 'cpu                      = "256"' in stdout
-        assert 'memory                   = "512"' in stdout
-        assert 'network_mode             = "awsvpc"' in stdout
-        assert '"FARGATE"' in stdout
-        assert '"TLS_ENABLED"' in stdout
-        assert '"app-container"' in stdout
-
-    def test_cloudwatch_log_group_creation(self, terraform_plan_output):
+        task_definition = plan.resource(f"{MODULE}.aws_ecs_task_definition.ecs-batch[0]")
+        assert task_definition.action == "create"
+        assert task_definition.after["family"] == "example-fargate-task-family"
+        assert task_definition.after["cpu"] == "256"
+        assert task_definition.after["memory"] == "512"
+        assert task_definition.after["network_mode"] == "awsvpc"
+        assert task_definition.after["requires_compatibilities"] == ["FARGATE"]
+
+        container = plan_documents.container("app-container")
+        assert container.address == task_definition.address
+        assert container.environment["TLS_ENABLED"] == "true"
+
+    def test_cloudwatch_log_group_creation(self, plan):
         """Test CloudWatch Log Group resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
+        log_group = plan.resource(f"{MODULE}.aws_cloudwatch_log_group.ecs-batch")
+        assert log_group.action == "create"
+        assert log_group.after["name"] == "/ecs/fargate"
+        assert log_group.after["retention_in_days"] == 14
 
-        # Check for CloudWatch Log Group
-        assert "aws_cloudwatch_log_group.ecs-batch will be created" in stdout
-        assert 'name              = "/ecs/fargate"' in stdout
-        assert "retention_in_days = 14" in stdout
-
-    def test_guardduty_detector_creation(self, terraform_plan_output):
+    def test_guardduty_detector_creation(self, plan):
         """Test GuardDuty Detector resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for GuardDuty Detector
-        assert "aws_guardduty_detector.ecs-batch will be created" in stdout
-        assert "enable                       = true" in stdout
+        detector = plan.resource(f"{MODULE}.aws_guardduty_detector.ecs-batch")
+        assert detector.action == "create"
+        assert detector.after["enable"] is True
 
-    def test_iam_roles_creation(self, terraform_plan_output):
+    def test_iam_roles_creation(self, plan):
         """Test IAM Roles resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for IAM Roles
-        assert "aws_iam_role.batch_service_role will be created" in stdout
-        assert "aws_iam_role.ecs_task_execution_role will be created" in stdout
-        assert "aws_iam_role.ecs_task_role will be created" in stdout
-
-        # Check role names
-        assert 'name                  = "example-batch-service-role"' in stdout
-        assert 'name                  = "example-ecsTaskExecutionRole"' in stdout
-        assert 'name                  = "example-ecsTaskRole"' in stdout
-
-    def test_iam_policies_creation(self, terraform_plan_output):
+        role_names = {
+            name: plan.resource(f"{MODULE}.aws_iam_role.{name}").after["name"]
+            for name in ("batch_service_role", "ecs_task_execution_role", "ecs_task_role")
+        }
+        assert role_names == {
+            "batch_service_role": "example-batch-service-role",
+            "ecs_task_execution_role": "example-ecsTaskExecutionRole",
+            "ecs_task_role": "example-ecsTaskRole",
+        }
+
+    def test_iam_policies_creation(self, plan, plan_documents):
         """Test IAM Policies resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
+        task_policy = plan.resource(f"{MODULE}.aws_iam_policy.ecs_task_policy")
+        assert task_policy.action == "create"
+        assert task_policy.after["name"] == "example-ecsTaskRole-policy"
 
-        # Check for IAM Policies
-        assert "aws_iam_policy.ecs_task_policy will be created" in stdout
-        assert 'name        = "example-ecsTaskRole-policy"' in stdout
-        assert '"logs:CreateLogStream"' in stdout
-        assert '"logs:PutLogEvents"' in stdout
-        assert '"kms:Decrypt"' in stdout
-        assert '"s3:GetObject"' in stdout
+        actions = plan_documents.iam.actions(task_policy.address)
+        assert {"logs:CreateLogStream", "logs:PutLogEvents", "kms:Decrypt", "s3:GetObject"} <= set(actions)
+        assert plan_documents.iam.principals(f"{MODULE}.aws_iam_role.ecs_task_role") == \
+            {"Service": ["ecs-tasks.amazonaws.com"]}
 
-    def test_iam_policy_attachments_creation(self, terraform_plan_output):
+    def test_iam_policy_attachments_creation(self, plan):
         """Test IAM Policy Attachments resource creation"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for IAM Policy Attachments
-        assert "aws_iam_role_policy_attachment.batch_service_role_policy will be created" in stdout
-        assert "aws_iam_role_policy_attachment.ecs_task_execution_role_policy will be created" in stdout
-        assert "aws_iam_policy_attachment.ecs_task_policy_attach will be created" in stdout
-
-    def test_outputs_validation(self, terraform_plan_output):
+        for address in (
+            "aws_iam_role_policy_attachment.batch_service_role_policy",
+            "aws_iam_role_policy_attachment.ecs_task_execution_role_policy",
+            "aws_iam_policy_attachment.ecs_task_policy_attach",
+        ):
+            assert plan.resource(f"{MODULE}.{address}").action == "create"
+
+    def test_outputs_validation(self, plan):
         """Test that expected outputs are defined"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check for expected outputs
-        assert "Changes to Outputs:" in stdout
-        assert "ecs_cluster_id" in stdout
-        assert "ecs_service_name" in stdout
-        assert 'ecs_service_name        = "fargate-service"' in stdout
-        assert "ecs_task_definition_arn" in stdout
+        assert {"ecs_cluster_id", "ecs_service_name", "ecs_task_definition_arn"} <= set(plan.outputs)
+        assert plan.output("ecs_service_name").after == "fargate-service"
+        assert plan.output("ecs_cluster_id").after_unknown
+        assert plan.output("ecs_task_definition_arn").after_unknown
 
-    def test_security_group_configuration(self, terraform_plan_output):
+    def test_security_group_configuration(self, plan):
         """Test security group configurations"""
-        stdout, stderr, returncode = terraform_plan_output
+        service = plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        compute_env = plan.resource(f"{MODULE}.aws_batch_compute_environment.batch_compute_env")
+        assert service.get("network_configuration.0.security_groups") == ["sg-0123456789abcdef0"]
+        assert compute_env.get("compute_resources.0.security_group_ids") == ["sg-0123456789abcdef0"]
 
-        # Check security groups are properly configured
-        assert '"sg-0123456789abcdef0"' in stdout
-
-    def test_subnet_configuration(self, terraform_plan_output):
+    def test_subnet_configuration(self, plan):
         """Test subnet configurations"""
-        stdout, stderr, returncode = terraform_plan_output
+        subnets = ["subnet-0123456789abcdef0", "subnet-0fedcba9876543210"]
+        service = plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        compute_env = plan.resource(f"{MODULE}.aws_batch_compute_environment.batch_compute_env")
+        assert service.get("network_configuration.0.subnets") == subnets
+        assert compute_env.get("compute_resources.0.subnets") == subnets
 
-        # Check subnets are properly configured
-        assert '"subnet-0123456789abcdef0"' in stdout
-        assert '"subnet-0fedcba9876543210"' in stdout
-
-    def test_container_configuration(self, terraform_plan_output):
+    def test_container_configuration(self, plan_documents):
         """Test container configurations"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check container configurations
-        assert '"amazonlinux"' in stdout
-        assert "containerPort = 80" in stdout
-        assert '"awslogs"' in stdout
-        assert '"/ecs/fargate"' in stdout
+        container = plan_documents.container("app-container")
+        assert container.image == "amazonlinux"
+        assert container.ports == [80]
+        assert container.log_configuration["logDriver"] == "awslogs"
+        assert container.log_configuration["options"]["awslogs-group"] == "/ecs/fargate"
 
-    def test_kms_and_secrets_configuration(self, terraform_plan_output):
+    def test_kms_and_secrets_configuration(self, plan_documents):
         """Test KMS and Secrets Manager configurations"""
-        stdout, stderr, returncode = terraform_plan_output
+        task_policy = f"{MODULE}.aws_iam_policy.ecs_task_policy"
+        assert plan_documents.iam.resources("kms:Decrypt", address=task_policy) == \
+            ["abcd1234-5678-90ab-cdef-EXAMPLEKEY"]
 
-        # Check KMS and secrets configurations
-        assert '"abcd1234-5678-90ab-cdef-EXAMPLEKEY"' in stdout
-        assert '"arn:aws:secretsmanager:us-east-1:123456789012:secret:example-secret"' in stdout
-        assert '"SECRET_KEY"' in stdout
+        container = plan_documents.container("app-container")
+        assert container.secrets == {
+            "SECRET_KEY": "arn:aws:secretsmanager:us-east-1:123456789012:secret:example-secret",
+        }
 
-    def test_s3_bucket_configuration(self, terraform_plan_output):
+    def test_s3_bucket_configuration(self, plan_documents):
         """Test S3 bucket configurations"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check S3 bucket configurations
-        assert '"arn:aws:s3:::example-bucket/*"' in stdout
+        task_policy = f"{MODULE}.aws_iam_policy.ecs_task_policy"
+        assert plan_documents.iam.resources("s3:GetObject", address=task_policy) == ["arn:aws:s3:::example-bucket/*"]
+        assert plan_documents.iam.allows("s3:PutObject", "arn:aws:s3:::example-bucket/data.csv", address=task_policy)
 
-    def test_resource_count_validation(self, terraform_plan_output):
+    def test_resource_count_validation(self, plan, golden_plan_snapshot):
         """Test that all expected resources are present"""
-        stdout, stderr, returncode = terraform_plan_output
+        created = sorted(change.address for change in plan.with_action("create"))
+        assert created == golden_plan_snapshot.addresses("create")
 
-        # Count the number of resources being created
-        create_count = stdout.count("will be created")
-        assert create_count == 15, f"Expected 15 resources to be created, found {create_count}"
+    def test_plan_matches_snapshot(self, assert_plan_snapshot):
+        """Test that every planned resource and output matches the golden snapshot"""
+        assert_plan_snapshot()
 
-    def test_no_unexpected_changes(self, terraform_plan_output):
+    def test_no_unexpected_changes(self, plan):
         """Test that no unexpected changes or destroys are planned"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Ensure no resources are being changed or destroyed
-        assert "to change" in stdout and "0 to change" in stdout
-        assert "to destroy" in stdout and "0 to destroy" in stdout
+        unexpected = [change.address for change in plan if change.action not in ("create", "no-op", "read")]
+        assert not unexpected, f"Unexpected changes planned: {unexpected}"
 
-    def test_fargate_configuration(self, terraform_plan_output):
+    def test_fargate_configuration(self, plan):
         """Test Fargate-specific configurations"""
-        stdout, stderr, returncode = terraform_plan_output
-
-        # Check Fargate configurations
-        assert '"FARGATE"' in stdout
-        assert 'requires_compatibilities = [' in stdout
-        assert 'network_mode             = "awsvpc"' in stdout
+        task_definition = plan.resource(f"{MODULE}.aws_ecs_task_definition.ecs-batch[0]")
+        service = plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        assert task_definition.after["requires_compatibilities"] == ["FARGATE"]
+        assert task_definition.after["network_mode"] == "awsvpc"
+        assert service.after["launch_type"] == "FARGATE"
 
     def test_terraform_version_compatibility(self, terraform_plan_output):
         """Test Terraform version compatibility"""
@@ -0,0 +1,161 @@
+import json
+import os
+import stat
+from types import SimpleNamespace
+
+import pytest
+
+from tests.harness.broker import PlanBroker
+from tests.harness.cache import PlanCache
+from tests.harness.runner import TerraformResult, run_terraform
+from tests.harness.timing import (
+    TIMING_LOG_ENV,
+    WORKER_LOG_KEY,
+    TerraformTimingPlugin,
+    cache_status,
+    read_log,
+    record_invocation,
+    summarize,
+)
+
+
+@pytest.fixture
+def timing_log(tmp_path, monkeypatch):
+    """Activate invocation recording into a temporary log"""
+    log = tmp_path / "timing.jsonl"
+    monkeypatch.setenv(TIMING_LOG_ENV, str(log))
+    return log
+
+
+@pytest.fixture
+def fake_terraform(tmp_path, monkeypatch):
+    """Put a terraform stand-in that echoes its arguments first on PATH"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "terraform"
+    script.write_text('#!/bin/sh\necho "ran $*"\necho "warning" >&2\nexit 3\n')
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+class TerminalReporter:
+    """Collects what the plugin writes to the terminal"""
+
+    def __init__(self):
+        self.lines = []
+
+    def write_sep(self, sep, title):
+        self.lines.append(title)
+
+    def write_line(self, line):
+        self.lines.append(line)
+
+
+class TestInvocationLog:
+    """Test cases for recording terraform invocations in the timing log"""
+
+    def test_nothing_recorded_without_plugin(self, tmp_path, monkeypatch):
+        """Test that nothing is written when the timing plugin is inactive"""
+        monkeypatch.delenv(TIMING_LOG_ENV, raising=False)
+        record_invocation(["plan"], tmp_path, 1.0, 0)
+        assert not list(tmp_path.iterdir())
+
+    def test_run_terraform_records_resource_usage(self, tmp_path, timing_log, fake_terraform):
+        """Test that run_terraform logs wall time, CPU time and peak memory"""
+        result = run_terraform(["plan", "-no-color"], tmp_path)
+        assert result == TerraformResult("ran plan -no-color\n", "warning\n", 3)
+
+        (entry,) = read_log(timing_log)
+        assert entry["command"] == "plan"
+        assert entry["args"] == ["plan", "-no-color"]
+        assert entry["returncode"] == 3
+        assert entry["wall_seconds"] > 0
+        assert entry["peak_rss_mb"] > 0
+        assert entry["cache"] is None
+        assert entry["test"].endswith("test_run_terraform_records_resource_usage")
+
+    def test_cache_status_labels_invocations(self, tmp_path, timing_log):
+        """Test that invocations are labelled with the plan cache status"""
+        with cache_status("miss"):
+            record_invocation(["validate"], tmp_path, 2.0, 0)
+        record_invocation(["validate"], tmp_path, 0.1, 0, cache="hit")
+        assert [entry["cache"] for entry in read_log(timing_log)] == ["miss", "hit"]
+
+    def test_broker_records_cache_hits(self, tmp_path, timing_log):
+        """Test that the plan broker records misses and replayed cache hits"""
+        module = tmp_path / "module"
+        examples = module / "examples"
+        examples.mkdir(parents=True)
+        (module / "main.tf").write_text('resource "aws_ecs_cluster" "main" {}\n')
+
+        def runner(args, cwd):
+            record_invocation(args, cwd, 0.5, 0)
+            return TerraformResult("ok", "", 0)
+
+        cache = PlanCache(tmp_path / "cache")
+        PlanBroker(examples, tmp_path / "first", runner=runner, cache=cache).fmt_check()
+        PlanBroker(examples, tmp_path / "second", runner=runner, cache=cache).fmt_check()
+
+        fmt_entries = [entry for entry in read_log(timing_log) if entry["command"] == "fmt"]
+        assert [entry["cache"] for entry in fmt_entries] == ["miss", "hit"]
+
+    def test_summarize_totals_per_command(self):
+        """Test that the summary totals invocations per terraform command"""
+        entries = [
+            {"command": "plan", "cache": "miss", "wall_seconds": 3.0, "user_seconds": 1.0,
+             "system_seconds": 0.5, "peak_rss_mb": 200.0},
+            {"command": "plan", "cache": "hit", "wall_seconds": 0.5, "user_seconds": 0.0,
+             "system_seconds": 0.0, "peak_rss_mb": None},
+        ]
+        assert summarize(entries) == {
+            "plan": {"count": 2, "cache_hits": 1, "wall_seconds": 3.5, "cpu_seconds": 1.5, "peak_rss_mb": 200.0},
+        }
+
+
+class TestTerraformTimingPlugin:
+    """Test cases for the terraform timing pytest plugin"""
+
+    def test_plugin_reports_slowest_invocations(self, tmp_path, monkeypatch):
+        """Test that the plugin reports the slowest invocations and cleans up"""
+        monkeypatch.delenv(TIMING_LOG_ENV, raising=False)
+        plugin = TerraformTimingPlugin(tmp_path / "report.json", slowest=1)
+        plugin.pytest_sessionstart(session=None)
+        record_invocation(["init", "-no-color"], tmp_path, 9.0, 0, user_seconds=4.0, peak_rss=120.0)
+        record_invocation(["validate", "-no-color"], tmp_path, 1.0, 0)
+
+        reporter = TerminalReporter()
+        plugin.pytest_terminal_summary(reporter)
+        assert reporter.lines[0] == "slowest 1 terraform invocations"
+        assert "terraform init -no-color" in reporter.lines[1]
+        assert "120MiB" in reporter.lines[1]
+        assert not any("terraform validate" in line for line in reporter.lines)
+
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert len(report["invocations"]) == 2
+        assert report["total_wall_seconds"] == 10.0
+
+        log_path = plugin.log_path
+        plugin.pytest_unconfigure(config=None)
+        assert TIMING_LOG_ENV not in os.environ
+        assert not log_path.exists()
+
+    def test_xdist_workers_append_to_the_controller_log(self, tmp_path, monkeypatch):
+        """Test that xdist workers append to the controller's log"""
+        monkeypatch.delenv(TIMING_LOG_ENV, raising=False)
+        controller = TerraformTimingPlugin(tmp_path / "report.json")
+        controller.pytest_sessionstart(session=None)
+        node = SimpleNamespace(workerinput={})
+        controller.pytest_configure_node(node)
+        assert node.workerinput[WORKER_LOG_KEY] == str(controller.log_path)
+
+        worker = TerraformTimingPlugin(tmp_path / "worker-report.json")
+        worker.pytest_sessionstart(SimpleNamespace(config=SimpleNamespace(workerinput=node.workerinput)))
+        record_invocation(["plan"], tmp_path, 2.0, 0)
+        worker.pytest_unconfigure(config=None)
+        assert os.environ[TIMING_LOG_ENV] == str(controller.log_path)
+
+        record_invocation(["show"], tmp_path, 1.0, 0)
+        assert [entry["command"] for entry in controller.entries()] == ["plan", "show"]
+        log_path = controller.log_path
+        controller.pytest_unconfigure(config=None)
+        assert not log_path.exists()
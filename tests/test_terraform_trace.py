@@ -0,0 +1,159 @@
+import io
+import json
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from tests.harness.runner import TerraformResult
+from tests.harness.trace import (
+    DATA_SOURCE,
+    OTHER,
+    PROVIDER,
+    RESOURCE,
+    TraceProfile,
+    TraceProfiler,
+    follow,
+    main,
+    parse_timestamp,
+    vertex_kind,
+)
+
+
+@pytest.fixture
+def trace_log(fixtures_dir):
+    return fixtures_dir / "plan_trace.log"
+
+
+@pytest.fixture
+def profile(trace_log):
+    return TraceProfile.from_log(trace_log, command="plan")
+
+
+class TestTraceLog:
+    """Test cases for reading TF_LOG=trace output"""
+
+    def test_parse_timestamp(self):
+        """Test that trace timestamps are converted to UTC epoch seconds"""
+        assert parse_timestamp("2024-05-01T10:00:00.250", "Z") == 1714557600.25
+        assert parse_timestamp("2024-05-01T12:00:00.250", "+0200") == 1714557600.25
+        assert parse_timestamp("2024-05-01T05:30:00", "-04:30") == 1714557600.0
+
+    def test_vertex_kind(self):
+        """Test that graph vertices are classified by address"""
+        assert vertex_kind("module.batch_ecs.aws_iam_role.ecs_task_role") == RESOURCE
+        assert vertex_kind('module.batch_ecs.aws_iam_role.x["a.b"]') == RESOURCE
+        assert vertex_kind("data.aws_caller_identity.current") == DATA_SOURCE
+        assert vertex_kind('provider["registry.terraform.io/hashicorp/aws"]') == PROVIDER
+        assert vertex_kind("module.batch_ecs.aws_iam_role.ecs_task_role (expand)") == OTHER
+        assert vertex_kind("module.batch_ecs.var.cluster_name") == OTHER
+        assert vertex_kind("module.batch_ecs") == OTHER
+
+    def test_follow_reads_a_growing_log(self, tmp_path):
+        """Test that follow yields complete lines while the log is written"""
+        path = tmp_path / "growing.log"
+        done = threading.Event()
+
+        def write():
+            with open(path, "w") as log:
+                for index in range(3):
+                    log.write(f"line {index}")
+                    log.flush()
+                    time.sleep(0.05)
+                    log.write("\n")
+                    log.flush()
+            done.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        assert list(follow(path, done, poll_interval=0.01)) == ["line 0\n", "line 1\n", "line 2\n"]
+        writer.join()
+
+
+class TestTraceProfile:
+    """Test cases for the time breakdowns of a traced plan"""
+
+    def test_breakdowns(self, profile):
+        """Test the time per RPC, resource, data source and provider"""
+        assert profile.wall_seconds == pytest.approx(2.0)
+        assert profile.by_rpc() == {
+            "GetProviderSchema": {"count": 1, "seconds": 0.4},
+            "PlanResourceChange": {"count": 2, "seconds": 0.35},
+            "ConfigureProvider": {"count": 1, "seconds": 0.2},
+            "ReadDataSource": {"count": 1, "seconds": 0.1},
+        }
+        assert list(profile.by_resource()) == [
+            "module.batch_ecs.aws_iam_role.ecs_task_role",
+            "module.batch_ecs.aws_ecs_cluster.ecs-batch",
+        ]
+        assert profile.by_data_source() == {
+            "module.batch_ecs.data.aws_iam_policy_document.assume": {"count": 1, "seconds": 0.119},
+        }
+        assert profile.by_provider() == {"registry.terraform.io/hashicorp/aws": {"count": 1, "seconds": 0.8}}
+
+    def test_rpcs_are_attributed_to_the_vertex_that_made_them(self, profile):
+        """Test that provider RPCs are attributed to their graph vertex"""
+        vertices = {(call.rpc, call.vertex) for call in profile.calls}
+        assert ("PlanResourceChange", "module.batch_ecs.aws_iam_role.ecs_task_role") in vertices
+        assert ("ReadDataSource", "module.batch_ecs.data.aws_iam_policy_document.assume") in vertices
+        assert ("GetProviderSchema", None) in vertices
+
+    def test_folded_stacks(self, profile):
+        """Test that folded stacks hold each visit's own time in microseconds"""
+        stacks = dict(line.rsplit(" ", 1) for line in profile.folded())
+        assert stacks["plan;module.batch_ecs;aws_iam_role.ecs_task_role;PlanResourceChange"] == "300000"
+        # The visit's own time excludes its provider call
+        assert stacks["plan;module.batch_ecs;aws_iam_role.ecs_task_role"] == "20000"
+        assert stacks["plan;providers;registry.terraform.io/hashicorp/aws;start-up"] == "800000"
+        assert not any("var.cluster_name" in stack for stack in stacks)
+
+
+class TestTraceProfiler:
+    """Test cases for tracing terraform invocations while the tests run"""
+
+    @pytest.mark.usefixtures("untimed")
+    def test_profiler_traces_selected_commands(self, tmp_path, trace_log):
+        """Test that only the selected commands are traced and reported"""
+        seen = []
+
+        def runner(args, cwd, env=None):
+            seen.append((args[0], None if env is None else env.get("TF_LOG")))
+            if env is not None:
+                with open(env["TF_LOG_PATH"], "a") as log:
+                    log.write(trace_log.read_text())
+            return TerraformResult("ok", "", 0)
+
+        profiler = TraceProfiler(tmp_path / "profile", commands=["plan"], runner=runner)
+        profiler(["validate"], tmp_path)
+        profiler(["plan", "-no-color"], tmp_path)
+        assert seen == [("validate", None), ("plan", "trace")]
+        [profile] = profiler.profiles
+        assert profile.by_rpc()["PlanResourceChange"]["count"] == 2
+        report = json.loads((tmp_path / "profile" / "plan-0.json").read_text())
+        assert report["resources"] == profile.by_resource()
+        assert (tmp_path / "profile" / "plan-0.folded").read_text().splitlines() == profile.folded()
+        assert (tmp_path / "profile" / "plan-0.log").read_text() == trace_log.read_text()
+
+    @pytest.mark.usefixtures("untimed")
+    def test_profiler_with_terraform_process(self, tmp_path, trace_log, monkeypatch):
+        """Test that a real process's trace log is collected"""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        script = bin_dir / "terraform"
+        script.write_text(f'#!/bin/sh\ncat "{trace_log}" >> "$TF_LOG_PATH"\necho planned\n')
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+        profiler = TraceProfiler(tmp_path / "profile")
+        assert profiler(["plan"], tmp_path) == TerraformResult("planned\n", "", 0)
+        assert profiler.profiles[0].lines == 29
+
+    def test_cli(self, tmp_path, trace_log):
+        """Test that the command line prints the summary and writes folded stacks"""
+        stdout = io.StringIO()
+        assert main([str(trace_log), "--folded", str(tmp_path / "out.folded"), "--limit", "1"], stdout=stdout) == 0
+        assert "GetProviderSchema" in stdout.getvalue()
+        assert "PlanResourceChange" not in stdout.getvalue()
+        assert (tmp_path / "out.folded").read_text().count("\n") == 9
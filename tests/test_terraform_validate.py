@@ -1,5 +1,9 @@
+import json
+
 import pytest
 
+MODULE = "module.batch_ecs"
+
 
 class TestTerraformValidate:
     """Test cases for Terraform validation"""
@@ -19,11 +23,6 @@ class TestTerraformValidate:
         assert not stderr.strip() or "Success!" in stderr, f"Unexpected error in stderr: {stderr}"
         print("test_terraform_validate_no_errors passed")
 
-def pytest_terminal_summary(terminalreporter, exitstatus, config):
-    passed = len(terminalreporter.stats.get('passed', []))
-    failed = len(terminalreporter.stats.get('failed', []))
-    terminalreporter.write_sep("=", f"Test Summary: {passed} passed, {failed} failed")
-
 
 class TestTerraformFormat:
     """Test cases for Terraform formatting"""
@@ -79,81 +78,77 @@ class TestConfigurationFiles:
         assert mock_creds.exists(), "mock-credentials.tf should exist in root directory"
 
 
+@pytest.mark.unit
 class TestResourceValidation:
-    """Test cases for resource validation in plan output"""
+    """Test cases for resource validation, resolved statically from the configuration"""
 
-    def test_batch_resources_in_plan(self, terraform_plan):
+    @pytest.fixture(scope="class")
+    def config(self, static_configuration):
+        """Fixture to share the statically evaluated module with this class"""
+        return static_configuration
+
+    @pytest.fixture(scope="class")
+    def task_container(self, config):
+        """Fixture with the first container of the ECS task definition"""
+        task_definition = config.resource(f"{MODULE}.aws_ecs_task_definition.ecs-batch[0]")
+        return json.loads(task_definition.get("container_definitions"))[0]
+
+    def test_batch_resources_in_plan(self, config):
         """Test that Batch resources are present in plan"""
-        stdout, stderr, returncode = terraform_plan
-        assert "aws_batch_compute_environment" in stdout
-        assert "aws_batch_job_definition" in stdout
-        assert "aws_batch_job_queue" in stdout
+        assert {"aws_batch_compute_environment", "aws_batch_job_definition", "aws_batch_job_queue"} <= config.types
 
-    def test_ecs_resources_in_plan(self, terraform_plan):
+    def test_ecs_resources_in_plan(self, config):
         """Test that ECS resources are present in plan"""
-        stdout, stderr, returncode = terraform_plan
-        assert "aws_ecs_cluster" in stdout
-        assert "aws_ecs_service" in stdout
-        assert "aws_ecs_task_definition" in stdout
+        assert {"aws_ecs_cluster", "aws_ecs_service", "aws_ecs_task_definition"} <= config.types
 
-    def test_iam_resources_in_plan(self, terraform_plan):
+    def test_iam_resources_in_plan(self, config):
         """Test that IAM resources are present in plan"""
-        stdout, stderr, returncode = terraform_plan
-        assert "aws_iam_role" in stdout
-        assert "aws_iam_policy" in stdout
+        assert {"aws_iam_role", "aws_iam_policy"} <= config.types
 
-    def test_monitoring_resources_in_plan(self, terraform_plan):
+    def test_monitoring_resources_in_plan(self, config):
         """Test that monitoring resources are present in plan"""
-        stdout, stderr, returncode = terraform_plan
-        assert "aws_cloudwatch_log_group" in stdout
-        assert "aws_guardduty_detector" in stdout
+        assert {"aws_cloudwatch_log_group", "aws_guardduty_detector"} <= config.types
 
-    def test_fargate_platform_capabilities(self, terraform_plan):
+    def test_fargate_platform_capabilities(self, config):
         """Test that Fargate platform capabilities are configured"""
-        stdout, stderr, returncode = terraform_plan
-        assert '"FARGATE"' in stdout
-        assert "platform_capabilities" in stdout
+        job_definition = config.resource(f"{MODULE}.aws_batch_job_definition.batch_job_definition")
+        assert job_definition.get("platform_capabilities") == ["FARGATE"]
 
-    def test_security_configurations(self, terraform_plan):
+    def test_security_configurations(self, config):
         """Test that security configurations are present"""
-        stdout, stderr, returncode = terraform_plan
-        assert "security_group_ids" in stdout
-        assert "assign_public_ip = false" in stdout
+        compute_env = config.resource(f"{MODULE}.aws_batch_compute_environment.batch_compute_env")
+        service = config.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        assert compute_env.get("compute_resources.0.security_group_ids") == ["sg-0123456789abcdef0"]
+        assert service.get("network_configuration.0.assign_public_ip") is False
 
-    def test_network_configurations(self, terraform_plan):
+    def test_network_configurations(self, config):
         """Test that network configurations are present"""
-        stdout, stderr, returncode = terraform_plan
-        assert "network_configuration" in stdout
-        assert "subnets" in stdout
+        service = config.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        assert service.get("network_configuration.0.subnets") == [
+            "subnet-0123456789abcdef0",
+            "subnet-0fedcba9876543210",
+        ]
 
-    def test_container_definitions(self, terraform_plan):
+    def test_container_definitions(self, task_container):
         """Test that container definitions are properly configured"""
-        stdout, stderr, returncode = terraform_plan
-        assert "container_definitions" in stdout
-        assert "image" in stdout
-        assert "portMappings" in stdout
+        assert task_container["image"] == "amazonlinux"
+        assert task_container["portMappings"] == [{"containerPort": 80, "protocol": "tcp"}]
 
-    def test_logging_configurations(self, terraform_plan):
+    def test_logging_configurations(self, task_container):
         """Test that logging configurations are present"""
-        stdout, stderr, returncode = terraform_plan
-        assert "logConfiguration" in stdout
-        assert "awslogs" in stdout
+        assert task_container["logConfiguration"]["logDriver"] == "awslogs"
+        assert task_container["logConfiguration"]["options"]["awslogs-group"] == "/ecs/fargate"
 
-    def test_environment_variables(self, terraform_plan):
+    def test_environment_variables(self, task_container):
         """Test that environment variables are configured"""
-        stdout, stderr, returncode = terraform_plan
-        assert "environment" in stdout
-        assert "TLS_ENABLED" in stdout
+        assert {"name": "TLS_ENABLED", "value": "true"} in task_container["environment"]
 
-    def test_retry_strategies(self, terraform_plan):
+    def test_retry_strategies(self, config):
         """Test that retry strategies are configured"""
-        stdout, stderr, returncode = terraform_plan
-        assert "retry_strategy" in stdout
-        assert "attempts" in stdout
+        job_definition = config.resource(f"{MODULE}.aws_batch_job_definition.batch_job_definition")
+        assert job_definition.get("retry_strategy.0.attempts") == 3
 
-    def test_timeout_configurations(self, terraform_plan):
+    def test_timeout_configurations(self, config):
         """Test that timeout configurations are present"""
-        stdout, stderr, returncode = terraform_plan
-        assert "timeout" in stdout
-        assert "attempt_duration_seconds" in stdout
-
+        job_definition = config.resource(f"{MODULE}.aws_batch_job_definition.batch_job_definition")
+        assert job_definition.get("timeout.0.attempt_duration_seconds") == 3600
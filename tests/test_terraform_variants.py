@@ -0,0 +1,185 @@
+import json
+
+import pytest
+
+from tests.harness.matrix import (
+    AUTOSCALING,
+    FEATURE_FLAGS,
+    OVERRIDE_FILE,
+    Variant,
+    VariantMatrix,
+    feature_matrix,
+)
+from tests.harness.runner import TerraformResult
+
+MODULE = "module.batch_ecs"
+VARIANTS = feature_matrix()
+
+# Resources each flag adds on top of the 13 that are always planned
+FLAG_RESOURCES = {
+    "create_ecs_task_definition": ["aws_ecs_service.ecs-batch[0]", "aws_ecs_task_definition.ecs-batch[0]"],
+    "enable_inspector": [
+        "aws_inspector2_enabler.inspector[0]",
+        "aws_inspector2_organization_configuration.org_config[0]",
+    ],
+    "enable_eventbridge_rule": [
+        "aws_cloudwatch_event_rule.batch_events_rule[0]",
+        "aws_cloudwatch_event_target.batch_events_target[0]",
+        "aws_iam_role.eventbridge_invoke_role[0]",
+        "aws_iam_role_policy.eventbridge_invoke_policy[0]",
+    ],
+}
+ALWAYS_PLANNED = 13
+
+
+class TestVariantPlans:
+    """Test cases for planning every feature-flag combination"""
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("variant", VARIANTS, ids=lambda variant: variant.name)
+    def test_variant_plans(self, variant_plans, variant):
+        """Test that every feature-flag combination plans successfully"""
+        outcome = variant_plans[variant.name]
+        assert outcome.result.returncode == 0, f"Terraform plan failed for {variant.name}: {outcome.result.stderr}"
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("variant", VARIANTS, ids=lambda variant: variant.name)
+    def test_variant_count_branches(self, variant_plans, variant):
+        """Test that each count toggle adds exactly its resources"""
+        plan = variant_plans[variant.name].model
+        expected = ALWAYS_PLANNED
+        for flag, addresses in FLAG_RESOURCES.items():
+            for address in addresses:
+                assert (f"{MODULE}.{address}" in plan) == variant.overrides[flag], address
+            expected += len(addresses) if variant.overrides[flag] else 0
+        assert plan.summary() == {"add": expected, "change": 0, "destroy": 0}
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize("variant", VARIANTS, ids=lambda variant: variant.name)
+    def test_variant_launch_type(self, variant_plans, variant):
+        """Test that the ECS service of each variant keeps the FARGATE launch type"""
+        plan = variant_plans[variant.name].model
+        assert f"{MODULE}.aws_batch_compute_environment.batch_spot_compute_env[0]" not in plan
+        assert f"{MODULE}.aws_ecs_cluster_capacity_providers.ecs-batch[0]" not in plan
+        if variant.overrides["create_ecs_task_definition"]:
+            service = plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+            assert service.get("launch_type") == "FARGATE"
+            assert not service.get("capacity_provider_strategy")
+
+
+class TestOptionalFeatureVariants:
+    """Test cases for the variants enabling the optional map and policy inputs"""
+
+    @pytest.mark.slow
+    def test_batch_maps_variant(self, variant_plans):
+        """Test that the Batch maps plan one resource per entry on top of the defaults"""
+        outcome = variant_plans["batch-maps"]
+        assert outcome.result.returncode == 0, f"Terraform plan failed: {outcome.result.stderr}"
+        plan = outcome.model
+        assert sorted(change.address for change in plan if change.name == "additional") == [
+            f'{MODULE}.aws_batch_compute_environment.additional["spot"]',
+            f'{MODULE}.aws_batch_job_definition.additional["etl"]',
+            f'{MODULE}.aws_batch_job_queue.additional["bulk"]',
+            f'{MODULE}.aws_batch_job_queue.additional["urgent"]',
+        ]
+        assert plan.resource(f'{MODULE}.aws_batch_compute_environment.additional["spot"]') \
+            .get("compute_resources.0.max_vcpus") == 256
+        assert plan.resource(f'{MODULE}.aws_batch_job_queue.additional["urgent"]').get("priority") == 10
+        assert plan.resource(f'{MODULE}.aws_batch_job_queue.additional["bulk"]').get("priority") == 1
+        job_definition = plan.resource(f'{MODULE}.aws_batch_job_definition.additional["etl"]')
+        assert job_definition.get("timeout.0.attempt_duration_seconds") == 600
+        assert job_definition.get("retry_strategy.0.attempts") == 1
+
+    @pytest.mark.slow
+    def test_autoscaling_variant(self, variant_plans):
+        """Test that the service gets a scalable target and one target-tracking policy per metric"""
+        outcome = variant_plans["autoscaling"]
+        assert outcome.result.returncode == 0, f"Terraform plan failed: {outcome.result.stderr}"
+        plan = outcome.model
+        assert f"{MODULE}.aws_ecs_service.ecs-batch[0]" not in plan
+        assert plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch-autoscaled[0]").get("desired_count") == 1
+        target = plan.resource(f"{MODULE}.aws_appautoscaling_target.ecs-batch[0]")
+        assert target.get("resource_id") == "service/example-fargate-cluster/fargate-service"
+        assert target.get("scalable_dimension") == "ecs:service:DesiredCount"
+        assert (target.get("min_capacity"), target.get("max_capacity")) == (1, 6)
+
+        policies = {change.index: change for change in plan.by_type("aws_appautoscaling_policy")}
+        assert sorted(policies) == ["cpu", "memory", "requests"]
+        configuration = "target_tracking_scaling_policy_configuration.0"
+        assert policies["cpu"].get(f"{configuration}.target_value") == 60
+        assert policies["memory"].get(f"{configuration}.predefined_metric_specification.0.predefined_metric_type") == \
+            "ECSServiceAverageMemoryUtilization"
+        assert policies["requests"].get(f"{configuration}.predefined_metric_specification.0.resource_label") == \
+            AUTOSCALING["ecs_autoscaling_alb_resource_label"]
+
+    @pytest.mark.slow
+    def test_spot_capacity_variant(self, variant_plans):
+        """Test the FARGATE_SPOT compute environment and the ECS capacity provider strategy"""
+        outcome = variant_plans["spot-capacity"]
+        assert outcome.result.returncode == 0, f"Terraform plan failed: {outcome.result.stderr}"
+        plan = outcome.model
+        spot = plan.resource(f"{MODULE}.aws_batch_compute_environment.batch_spot_compute_env[0]")
+        assert spot.get("compute_resources.0.type") == "FARGATE_SPOT"
+        assert spot.get("compute_environment_name") == "example-batch-compute-env-spot"
+        providers = plan.resource(f"{MODULE}.aws_ecs_cluster_capacity_providers.ecs-batch[0]")
+        assert sorted(providers.get("capacity_providers")) == ["FARGATE", "FARGATE_SPOT"]
+        assert {strategy["capacity_provider"]: (strategy["base"], strategy["weight"])
+                for strategy in providers.get("default_capacity_provider_strategy")} == \
+            {"FARGATE": (1, 1), "FARGATE_SPOT": (0, 4)}
+        service = plan.resource(f"{MODULE}.aws_ecs_service.ecs-batch[0]")
+        assert service.get("launch_type") in (None, "")
+        assert len(service.get("capacity_provider_strategy")) == 2
+
+    @pytest.mark.slow
+    def test_fair_share_variant(self, variant_plans):
+        """Test that the default job queue gets a fair-share scheduling policy with the configured weights"""
+        outcome = variant_plans["fair-share"]
+        assert outcome.result.returncode == 0, f"Terraform plan failed: {outcome.result.stderr}"
+        plan = outcome.model
+        policy = plan.resource(f"{MODULE}.aws_batch_scheduling_policy.batch_scheduling_policy[0]")
+        assert policy.get("name") == "example-batch-job-queue-fair-share"
+        assert policy.get("fair_share_policy.0.compute_reservation") == 10
+        assert policy.get("fair_share_policy.0.share_decay_seconds") == 3600
+        assert {share["share_identifier"]: share["weight_factor"]
+                for share in policy.get("fair_share_policy.0.share_distribution")} == {"tenant-a": 1, "tenant-b": 0.5}
+        assert plan.resource(f"{MODULE}.aws_batch_job_queue.batch_job_queue").is_unknown("scheduling_policy_arn")
+
+
+class TestVariantMatrix:
+    """Test cases for variant generation and workspace isolation"""
+
+    def test_feature_matrix_covers_every_combination(self):
+        """Test that all flag combinations are generated with unique names"""
+        assert len(VARIANTS) == 2 ** len(FEATURE_FLAGS)
+        assert len({variant.name for variant in VARIANTS}) == len(VARIANTS)
+        assert VARIANTS[0] == Variant("baseline", {flag: False for flag in FEATURE_FLAGS.values()})
+
+    def test_enabled_flags_bring_required_arguments(self):
+        """Test that enabling EventBridge also sets a target ARN"""
+        variant = next(variant for variant in VARIANTS if variant.name == "eventbridge")
+        assert variant.overrides["enable_eventbridge_rule"] is True
+        assert variant.overrides["eventbridge_target_arn"].startswith("arn:aws:sns:")
+
+    def test_workspace_mirrors_repository_layout(self, terraform_examples_dir, tmp_path):
+        """Test that a workspace keeps the module at ../ and writes the override file"""
+        matrix = VariantMatrix(terraform_examples_dir, tmp_path, tmp_path / "plugins")
+        workspace = matrix.prepare(VARIANTS[-1])
+
+        assert (workspace / "main.tf").exists()
+        assert (workspace.parent / "main.tf").exists()
+        override = json.loads((workspace / OVERRIDE_FILE).read_text())
+        assert override["module"]["batch_ecs"] == VARIANTS[-1].overrides
+
+    def test_variants_share_plugin_cache_but_not_data_dir(self, terraform_examples_dir, tmp_path, recording_runner):
+        """Test environment isolation between variant workspaces"""
+        runner = recording_runner
+        runner.results["show"] = TerraformResult(json.dumps({"resource_changes": []}), "", 0)
+        matrix = VariantMatrix(terraform_examples_dir, tmp_path, tmp_path / "plugins", max_workers=0, runner=runner)
+        outcomes = matrix.plan_all(VARIANTS[:3])
+
+        assert set(outcomes) == {variant.name for variant in VARIANTS[:3]}
+        data_dirs = {env["TF_DATA_DIR"] for env in runner.envs}
+        plugin_dirs = {env["TF_PLUGIN_CACHE_DIR"] for env in runner.envs}
+        assert len(data_dirs) == 3
+        assert plugin_dirs == {str(tmp_path / "plugins")}
+        assert len(outcomes["baseline"].model) == 0
@@ -0,0 +1,102 @@
+import os
+
+import yaml
+
+from tests.harness.workflows import SafeLoader, WorkflowRegistry, run_commands
+
+WORKFLOW = """\
+name: CI
+on:
+  push:
+env:
+  TF_WORKING_DIR: examples
+jobs:
+  plan:
+    runs-on: ubuntu-latest
+    defaults:
+      run:
+        working-directory: ${{ env.TF_WORKING_DIR }}
+    steps:
+    - uses: actions/checkout@v4
+    - name: Setup Terraform
+      uses: hashicorp/setup-terraform@v3
+    - name: Plan
+      run: |
+        terraform init -input=false
+        terraform plan -out=tfplan | tee plan.txt
+    - name: Test
+      run: cd .. && python -m pytest tests/
+      working-directory: .
+      env:
+        TF_PLAN_HANDOFF: plan-handoff.json
+  lint:
+    runs-on: ubuntu-latest
+    steps:
+    - run: pytest tests/ && terraform fmt -check
+"""
+
+
+def write(directory, name, text, mtime_ns=None):
+    path = directory / name
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+class TestRunCommands:
+    """Test cases for reading the commands a run script invokes"""
+
+    def test_run_commands(self):
+        """Test that programs, subcommands and python modules are found outside here-documents"""
+        script = ("FOO=1 terraform plan -out=x | tee out\n"
+                  "cat > f <<EOF\nrm -rf /\nEOF\n"
+                  "cd .. && python3 -m tests.harness.handoff record")
+        assert run_commands(script) == ["terraform", "terraform plan", "tee", "tee out", "cat", "cd", "python3",
+                                        "tests.harness.handoff"]
+        assert run_commands(None) == []
+
+
+class TestWorkflowRegistry:
+    """Test cases for parsing and indexing the workflow files"""
+
+    def test_indexes(self, tmp_path):
+        """Test the step, job, working directory and environment indexes"""
+        write(tmp_path, "ci.yml", WORKFLOW)
+        registry = WorkflowRegistry(tmp_path)
+        workflow = registry.workflow("ci.yml")
+
+        assert workflow.triggers == {"push": None}
+        assert [step.job for step in registry.steps_using("hashicorp/setup-terraform@v3")] == ["plan"]
+        assert registry.steps_named("Plan")[0].index == 2
+        assert [job.id for job in registry.jobs_running("pytest")] == ["plan", "lint"]
+        assert [job.id for job in registry.jobs_running_before("terraform plan", "pytest")] == ["plan"]
+        assert registry.working_directories() == {"ci.yml:plan": "${{ env.TF_WORKING_DIR }}", "ci.yml:lint": None}
+        assert registry.env("TF_WORKING_DIR") == {"ci.yml:plan": "examples", "ci.yml:lint": "examples"}
+
+        test_step = workflow.jobs["plan"].steps_running("pytest")[0]
+        assert test_step.working_directory == "."
+        assert test_step.env == {"TF_WORKING_DIR": "examples", "TF_PLAN_HANDOFF": "plan-handoff.json"}
+
+    def test_parsed_once_until_changed(self, tmp_path):
+        """Test that a workflow is parsed again only after its file changes"""
+        path = write(tmp_path, "ci.yml", WORKFLOW, mtime_ns=1_000_000_000)
+        registry = WorkflowRegistry(tmp_path)
+        for _ in range(3):
+            registry.workflows()
+            registry.jobs_running("pytest")
+        assert registry.parse_count == 1
+
+        write(tmp_path, "ci.yml", WORKFLOW.replace("name: CI", "name: Renamed"), mtime_ns=2_000_000_000)
+        assert registry.workflow("ci.yml").name == "Renamed"
+        assert registry.parse_count == 2
+
+        write(tmp_path, "other.yaml", "jobs: {}\n")
+        path.unlink()
+        assert registry.files == ["other.yaml"]
+        assert registry.parse_count == 3
+
+    def test_uses_libyaml_when_available(self):
+        """Test that the LibYAML loader is used when PyYAML was built with it"""
+        expected = getattr(yaml, "CSafeLoader", yaml.SafeLoader) if yaml.__with_libyaml__ else yaml.SafeLoader
+        assert SafeLoader is expected
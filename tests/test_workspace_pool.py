@@ -0,0 +1,126 @@
+import os
+import threading
+
+from tests.harness.runner import TerraformResult
+from tests.harness.workspace import (
+    SKIPPED_INIT,
+    WorkspacePool,
+    clone_workspace,
+    ensure_init,
+    init_fingerprint,
+)
+
+
+class FakeInit:
+    """Stand-in for terraform init that lays out a .terraform directory"""
+
+    def __init__(self, examples):
+        self.examples = examples
+        self.calls = 0
+
+    def __call__(self, args):
+        self.calls += 1
+        provider = self.examples / ".terraform" / "providers" / "registry.terraform.io" / "hashicorp" / "aws"
+        provider.mkdir(parents=True, exist_ok=True)
+        (provider / "terraform-provider-aws").write_bytes(b"\x7fELF")
+        (self.examples / ".terraform" / "modules").mkdir(exist_ok=True)
+        (self.examples / ".terraform" / "modules" / "modules.json").write_text("{}")
+        (self.examples / ".terraform.lock.hcl").write_text('provider "registry.terraform.io/hashicorp/aws" {}\n')
+        return TerraformResult("Terraform has been successfully initialized!", "", 0)
+
+
+class TestInitFingerprint:
+    """Test cases for init fingerprinting"""
+
+    def test_resource_edits_keep_fingerprint(self, fake_module):
+        """Test that edits unrelated to providers or module sources do not force init"""
+        examples = fake_module
+        before = init_fingerprint(examples)
+        main_tf = examples.parent / "main.tf"
+        main_tf.write_text(main_tf.read_text().replace("var.name", '"renamed"'))
+        assert init_fingerprint(examples) == before
+
+    def test_provider_and_source_edits_change_fingerprint(self, fake_module):
+        """Test that provider versions, module sources and the lock file force init"""
+        examples = fake_module
+        seen = {init_fingerprint(examples)}
+        main_tf = examples.parent / "main.tf"
+        main_tf.write_text(main_tf.read_text().replace("~> 4.0", "~> 5.0"))
+        seen.add(init_fingerprint(examples))
+        (examples / "main.tf").write_text((examples / "main.tf").read_text().replace('"../"', '"../../"'))
+        seen.add(init_fingerprint(examples))
+        (examples / ".terraform.lock.hcl").write_text("# lock\n")
+        seen.add(init_fingerprint(examples))
+        assert len(seen) == 4
+
+    def test_ensure_init_runs_once_per_fingerprint(self, fake_module):
+        """Test that init is skipped until the fingerprint changes"""
+        examples = fake_module
+        init = FakeInit(examples)
+
+        assert ensure_init(examples, init).returncode == 0
+        assert ensure_init(examples, init) is SKIPPED_INIT
+        assert init.calls == 1
+
+        (examples / ".terraform.lock.hcl").write_text("# upgraded\n")
+        ensure_init(examples, init)
+        assert init.calls == 2
+
+    def test_failed_init_is_not_stamped(self, fake_module):
+        """Test that a failed init is retried next time"""
+        examples = fake_module
+        failing = lambda args: TerraformResult("", "registry unreachable", 1)  # noqa: E731
+        ensure_init(examples, failing)
+        assert not (examples / ".terraform").exists()
+
+
+class TestWorkspaceClones:
+    """Test cases for cloning and pooling initialized workspaces"""
+
+    def test_clone_links_provider_binaries(self, tmp_path, fake_module):
+        """Test that clones share provider binaries instead of copying them"""
+        examples = fake_module
+        ensure_init(examples, FakeInit(examples))
+        clone = clone_workspace(examples, tmp_path / "clone")
+
+        provider = "providers/registry.terraform.io/hashicorp/aws/terraform-provider-aws"
+        source_binary = examples / ".terraform" / provider
+        cloned_binary = clone / ".terraform" / provider
+        assert cloned_binary.exists()
+        assert os.path.samefile(source_binary, cloned_binary)
+        assert (clone.parent / "main.tf").exists()
+        assert ensure_init(clone, FakeInit(clone)) is SKIPPED_INIT
+
+    def test_pool_hands_out_distinct_workspaces(self, tmp_path, fake_module):
+        """Test that concurrent consumers never share a workspace"""
+        examples = fake_module
+        init = FakeInit(examples)
+        pool = WorkspacePool(examples, size=3, root=tmp_path)
+        assert pool.prepare(lambda: ensure_init(examples, init)).returncode == 0
+
+        held, lock, barrier = [], threading.Lock(), threading.Barrier(3)
+
+        def consume():
+            with pool.acquire(timeout=5) as workspace:
+                with lock:
+                    held.append(workspace)
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=consume) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(held)) == 3
+        assert init.calls == 1
+        pool.close()
+        assert not pool.root.exists()
+
+    def test_pool_propagates_init_failure(self, tmp_path, fake_module):
+        """Test that a failed init leaves the pool empty"""
+        pool = WorkspacePool(fake_module, size=2, root=tmp_path)
+        result = pool.prepare(lambda: TerraformResult("", "no provider", 1))
+        assert result.returncode == 1
+        assert pool.workspaces == []
+        pool.close()
@@ -74,7 +74,7 @@ variable "service_name" {
 }
 
 variable "desired_count" {
-  description = "Desired number of ECS service tasks"
+  description = "Desired number of ECS service tasks (only the initial count when enable_ecs_autoscaling is true)"
   type        = number
 }
 
@@ -124,6 +124,24 @@ variable "batch_max_vcpus" {
   type        = number
 }
 
+variable "enable_batch_fargate_spot" {
+  description = "Create a FARGATE_SPOT compute environment queued behind the on-demand one in the default job queue"
+  type        = bool
+  default     = false
+}
+
+variable "batch_spot_compute_environment_name" {
+  description = "Name of the FARGATE_SPOT compute environment (defaults to the compute environment name with a -spot suffix)"
+  type        = string
+  default     = ""
+}
+
+variable "batch_spot_max_vcpus" {
+  description = "Maximum vCPUs for the FARGATE_SPOT compute environment (defaults to batch_max_vcpus)"
+  type        = number
+  default     = null
+}
+
 variable "batch_job_queue_name" {
   description = "Name of the AWS Batch job queue"
   type        = string
@@ -208,6 +226,79 @@ variable "batch_job_tags" {
   default     = {}
 }
 
+variable "enable_batch_fair_share" {
+  description = "Attach a fair-share scheduling policy to the AWS Batch job queue"
+  type        = bool
+  default     = false
+}
+
+variable "batch_scheduling_policy_name" {
+  description = "Name of the fair-share scheduling policy (defaults to the job queue name with a -fair-share suffix)"
+  type        = string
+  default     = ""
+}
+
+variable "batch_fair_share_weights" {
+  description = "Fair-share weight factor by share identifier; a lower weight gets more of the compute environment"
+  type        = map(number)
+  default     = {}
+
+  validation {
+    condition     = alltrue([for weight in values(var.batch_fair_share_weights) : weight >= 0.0001 && weight <= 999.9999])
+    error_message = "Fair-share weight factors must be between 0.0001 and 999.9999."
+  }
+}
+
+variable "batch_fair_share_compute_reservation" {
+  description = "Percentage of the maximum vCPUs reserved for share identifiers that have no running jobs (0-99)"
+  type        = number
+  default     = 0
+
+  validation {
+    condition     = var.batch_fair_share_compute_reservation >= 0 && var.batch_fair_share_compute_reservation <= 99
+    error_message = "The compute reservation must be between 0 and 99."
+  }
+}
+
+variable "batch_fair_share_decay_seconds" {
+  description = "Time window in seconds of past usage that fair-share scheduling takes into account (0 uses only current usage)"
+  type        = number
+  default     = 0
+}
+
+variable "batch_compute_environments" {
+  description = "Additional Fargate compute environments keyed for batch_job_queues: name, optional type (FARGATE or FARGATE_SPOT), max_vcpus, state, subnet_ids, security_group_ids"
+  type        = any
+  default     = {}
+
+  validation {
+    condition     = !contains(keys(var.batch_compute_environments), "default") && !contains(keys(var.batch_compute_environments), "default_spot")
+    error_message = "The keys \"default\" and \"default_spot\" refer to the module's own compute environments and cannot be redefined."
+  }
+
+  validation {
+    condition     = alltrue([for environment in values(var.batch_compute_environments) : contains(["FARGATE", "FARGATE_SPOT"], lookup(environment, "type", "FARGATE"))])
+    error_message = "Compute environment type must be FARGATE or FARGATE_SPOT."
+  }
+}
+
+variable "batch_job_queues" {
+  description = "Additional job queues: name, priority, optional state and compute_environments (batch_compute_environments keys, \"default\" or \"default_spot\"; FARGATE_SPOT ones are queued last)"
+  type        = any
+  default     = {}
+
+  validation {
+    condition     = alltrue([for queue in values(var.batch_job_queues) : contains([1, 2, 3], length(lookup(queue, "compute_environments", ["default"])))])
+    error_message = "Each job queue needs between one and three compute environments."
+  }
+}
+
+variable "batch_job_definitions" {
+  description = "Additional job definitions: name, optional image, vcpu, memory, timeout_seconds, retry_attempts, environment, secrets, log_prefix, tags"
+  type        = any
+  default     = {}
+}
+
 variable "batch_service_role_name" {
   description = "Name of the IAM role for AWS Batch service"
   type        = string
@@ -223,3 +314,87 @@ variable "create_ecs_task_definition" {
   type        = bool
   default     = false
 }
+
+variable "enable_ecs_capacity_provider_strategy" {
+  description = "Run the ECS service on the ecs_capacity_provider_strategy instead of the FARGATE launch type"
+  type        = bool
+  default     = false
+}
+
+variable "ecs_capacity_provider_strategy" {
+  description = "Capacity provider strategy of the ECS cluster and service (FARGATE or FARGATE_SPOT, with base and weight)"
+  type = list(object({
+    capacity_provider = string
+    base              = number
+    weight            = number
+  }))
+  default = [
+    { capacity_provider = "FARGATE", base = 1, weight = 1 },
+    { capacity_provider = "FARGATE_SPOT", base = 0, weight = 4 },
+  ]
+
+  validation {
+    condition     = alltrue([for strategy in var.ecs_capacity_provider_strategy : contains(["FARGATE", "FARGATE_SPOT"], strategy.capacity_provider) && strategy.base >= 0 && strategy.weight >= 0])
+    error_message = "Capacity providers must be FARGATE or FARGATE_SPOT, with non-negative base and weight."
+  }
+
+  validation {
+    condition     = length([for strategy in var.ecs_capacity_provider_strategy : strategy if strategy.base > 0]) <= 1
+    error_message = "Only one capacity provider in the strategy can have a base."
+  }
+}
+
+variable "enable_ecs_autoscaling" {
+  description = "Scale the ECS service's desired count with Application Auto Scaling target-tracking policies"
+  type        = bool
+  default     = false
+}
+
+variable "ecs_autoscaling_min_capacity" {
+  description = "Minimum number of ECS service tasks when autoscaling"
+  type        = number
+  default     = 1
+}
+
+variable "ecs_autoscaling_max_capacity" {
+  description = "Maximum number of ECS service tasks when autoscaling"
+  type        = number
+  default     = 4
+}
+
+variable "ecs_autoscaling_target_values" {
+  description = "Target value by tracked metric: cpu and memory (average utilization, percent) or requests (ALB requests per target)"
+  type        = map(number)
+  default = {
+    cpu    = 70
+    memory = 80
+  }
+
+  validation {
+    condition     = alltrue([for metric in keys(var.ecs_autoscaling_target_values) : contains(["cpu", "memory", "requests"], metric)])
+    error_message = "Autoscaling metrics must be cpu, memory or requests."
+  }
+}
+
+variable "ecs_autoscaling_alb_resource_label" {
+  description = "ALB resource label (app/<load-balancer>/<id>/targetgroup/<target-group>/<id>) for the requests metric; required when ecs_autoscaling_target_values has a requests entry"
+  type        = string
+  default     = null
+
+  validation {
+    condition     = var.ecs_autoscaling_alb_resource_label == null || can(regex("^app/[^/]+/[^/]+/targetgroup/[^/]+/[^/]+$", var.ecs_autoscaling_alb_resource_label))
+    error_message = "The ALB resource label must look like app/<load-balancer>/<id>/targetgroup/<target-group>/<id>."
+  }
+}
+
+variable "ecs_autoscaling_scale_in_cooldown" {
+  description = "Seconds after a scale-in activity before another scale-in can start"
+  type        = number
+  default     = 300
+}
+
+variable "ecs_autoscaling_scale_out_cooldown" {
+  description = "Seconds after a scale-out activity before another scale-out can start"
+  type        = number
+  default     = 60
+}